@@ -20,6 +20,9 @@ def create_app():
         "TELEGRAF_METRICS_FILE",
         "/tmp/telegraf-metrics/metrics.json",  # nosec B108
     )
+    app.config["TELEGRAF_INGEST_URL"] = os.environ.get(
+        "TELEGRAF_INGEST_URL", "http://gateway:5000"
+    )
     app.config["SECRET_KEY"] = os.environ.get("SECRET_KEY", "dev-secret-key")
 
     # Ensure data directories exist
@@ -31,10 +34,13 @@ def create_app():
     from app.routes.configuration import configuration_bp
     from app.routes.dashboard import dashboard_bp
     from app.routes.help import help_bp
+    from app.routes.metrics import metrics_bp
     from app.routes.modbus import modbus_bp
     from app.routes.mqtt import mqtt_bp
     from app.routes.opcua import opcua_bp
+    from app.routes.stream import stream_bp
     from app.routes.telegraf import telegraf_bp
+    from app.routes.values import values_bp
 
     app.register_blueprint(opcua_bp)
     app.register_blueprint(modbus_bp)
@@ -43,6 +49,19 @@ def create_app():
     app.register_blueprint(configuration_bp)
     app.register_blueprint(dashboard_bp)
     app.register_blueprint(help_bp)
+    app.register_blueprint(stream_bp)
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(values_bp)
+
+    # Track container state and Telegraf restarts from the Docker event stream
+    from app.services.docker_events import container_watcher
+
+    container_watcher.start(app)
+
+    # Follow the Telegraf log so deploy config checks and the logs view read memory
+    from app.services.telegraf_logs import telegraf_log_follower
+
+    telegraf_log_follower.start()
 
     @app.context_processor
     def inject_input_status():
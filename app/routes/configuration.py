@@ -5,8 +5,16 @@ import time
 
 from flask import Blueprint, current_app, jsonify, render_template, request, send_file
 
-from app.services import config_store, event_log
-from app.services.system_monitor import get_telegraf_version
+from app.services import config_store, event_log, metrics_exporter
+from app.services.docker_events import record_intentional_start
+from app.services.system_monitor import (
+    clear_intentional_restart,
+    get_telegraf_version,
+    mark_intentional_restart,
+    reset_crash_detection,
+)
+from app.services.telegraf_logs import telegraf_log_follower
+from app.services.value_cache import value_cache
 
 configuration_bp = Blueprint("configuration", __name__)
 
@@ -89,14 +97,25 @@ def save_telegraf_config():
     with open(path, "w") as fh:
         fh.write(content)
 
+    deploy_time = time.time()
+    reset_crash_detection()
+    mark_intentional_restart("deploy")
     restart_result = _restart_telegraf()
 
     if restart_result.get("ok"):
         event_log.log(
             "info", "telegraf", "Telegraf config edited manually and agent restarted"
         )
-        time.sleep(3)
-        error_line = _get_telegraf_config_error()
+        restarted = restart_result.get("restarted")
+        if restarted:
+            record_intentional_start("deploy", since=deploy_time)
+        reset_crash_detection()
+        clear_intentional_restart()
+        value_cache.clear()  # tags may have been renamed or removed
+        error_line = (
+            _get_telegraf_config_error(since=deploy_time) if restarted else None
+        )
+        metrics_exporter.DEPLOYS.inc(result="config_error" if error_line else "ok")
         if error_line:
             event_log.log(
                 "error", "telegraf", "Telegraf failed to load config", detail=error_line
@@ -105,6 +124,9 @@ def save_telegraf_config():
                 {"ok": True, "restart": restart_result, "warning": error_line}
             )
     else:
+        reset_crash_detection()
+        clear_intentional_restart()
+        metrics_exporter.DEPLOYS.inc(result="restart_failed")
         event_log.log(
             "error",
             "telegraf",
@@ -126,27 +148,20 @@ def _restart_telegraf():
         containers = client.containers.list(filters={"name": "telegraf"})
         for c in containers:
             c.restart(timeout=10)
-        return {"ok": True, "message": f"Restarted {len(containers)} container(s)"}
+        return {
+            "ok": True,
+            "message": f"Restarted {len(containers)} container(s)",
+            "restarted": len(containers),
+        }
     except Exception as e:
         return {"ok": False, "error": str(e)}
 
 
-def _get_telegraf_config_error():
-    try:
-        import docker
+def _get_telegraf_config_error(since, timeout=5):
+    """Return the first config error logged after `since`, once Telegraf finished loading.
 
-        client = docker.from_env()
-        containers = client.containers.list(all=True, filters={"name": "telegraf"})
-        if not containers:
-            return None
-        logs = (
-            containers[0]
-            .logs(tail=30, stderr=True, stdout=True)
-            .decode("utf-8", errors="replace")
-        )
-        for line in reversed(logs.splitlines()):
-            if " E! " in line:
-                return line.strip()
-        return None
-    except Exception:
-        return None
+    Waits on the log follower until Telegraf reports "Loaded outputs" or a
+    config error, for at most `timeout` seconds.
+    """
+    telegraf_log_follower.start()
+    return telegraf_log_follower.wait_for_config_result(since, timeout)
@@ -1,14 +1,15 @@
 import os
 
-from flask import Blueprint, current_app, jsonify, render_template
+from flask import Blueprint, current_app, jsonify, render_template, request
 
 from app.services import config_store, event_log
+from app.services.dashboard_snapshot import get_dashboard_metrics, get_snapshot
 from app.services.system_monitor import (
     get_gateway_info,
     get_system_health,
-    get_telegraf_metrics,
     get_telegraf_status,
 )
+from app.services.telegraf_health import telegraf_health
 
 dashboard_bp = Blueprint("dashboard", __name__)
 
@@ -42,43 +43,15 @@ def health():
 
 @dashboard_bp.route("/api/dashboard/telegraf-status", methods=["GET"])
 def telegraf_status():
-    return jsonify(get_telegraf_status())
+    status = get_telegraf_status()
+    if request.args.get("history") in ("1", "true"):
+        status["history"] = telegraf_health.get_history()
+    return jsonify(status)
 
 
 @dashboard_bp.route("/api/dashboard/telegraf-metrics", methods=["GET"])
 def telegraf_metrics():
-    metrics = get_telegraf_metrics()
-
-    process_crashed = metrics.pop("process_crash_detected", False)
-    if process_crashed:
-        event_log.log(
-            "error",
-            "telegraf",
-            "Process crash detected — data gap in collection",
-            detail="Telegraf restarted inside the container (entrypoint loop). Counters reset.",
-        )
-        # Do NOT call record_restart — a process crash inside the container is not a
-        # container restart. Docker StartedAt is unchanged. Last Restart shows only
-        # container-level events (deploy / manual / unplanned).
-
-    cfg = config_store.load()
-    metrics["nodes_configured"] = len(cfg.get("nodes", []))
-    # Zero out stale metrics for disabled inputs
-    opcua_enabled = cfg.get("opcua", {}).get("enabled", True)
-    modbus_enabled = cfg.get("modbus", {}).get("enabled", False)
-    if not opcua_enabled:
-        metrics["opcua_gathered"] = 0
-        metrics["opcua_scan_time_ms"] = 0
-        metrics["opcua_errors"] = 0
-        metrics["opcua_read_success"] = 0
-        metrics["opcua_read_error"] = 0
-    if not modbus_enabled:
-        metrics["modbus_gathered"] = 0
-        metrics["modbus_scan_time_ms"] = 0
-        metrics["modbus_errors"] = 0
-    metrics["any_input_active"] = opcua_enabled or modbus_enabled
-    metrics["process_crashed"] = process_crashed
-    return jsonify(metrics)
+    return jsonify(get_dashboard_metrics(config_store.load()))
 
 
 @dashboard_bp.route("/api/dashboard/gateway-info", methods=["GET"])
@@ -86,6 +59,12 @@ def gateway_info():
     return jsonify(get_gateway_info())
 
 
+@dashboard_bp.route("/api/dashboard/snapshot", methods=["GET"])
+def snapshot():
+    """All dashboard sections in one response, gathered concurrently."""
+    return jsonify(get_snapshot())
+
+
 _DEMO_SERVICES = {"opcua-demo-server", "mosquitto"}
 
 
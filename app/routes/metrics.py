@@ -0,0 +1,43 @@
+import time
+
+from flask import Blueprint, Response, current_app, g, request
+
+from app.services import metrics_exporter
+from app.services.dashboard_feed import dashboard_feed
+
+metrics_bp = Blueprint("metrics", __name__)
+
+_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# Long-lived or file responses would only skew the latency histogram
+_UNTIMED_ENDPOINTS = {"static", "stream.stream"}
+
+
+@metrics_bp.before_app_request
+def _start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@metrics_bp.after_app_request
+def _observe_request(response):
+    started = g.pop("request_started", None)
+    if started is None or request.endpoint in _UNTIMED_ENDPOINTS:
+        return response
+    # The URL rule, not the path, keeps label cardinality bounded
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    metrics_exporter.observe_request(
+        request.method, route, response.status_code, time.perf_counter() - started
+    )
+    return response
+
+
+@metrics_bp.route("/metrics", methods=["GET"])
+def metrics():
+    """OpenMetrics exposition. Host and Telegraf values come from the dashboard
+    feed's cache; the first scrape after startup starts the sampler."""
+    dashboard_feed.touch()
+    dashboard_feed.ensure_running(current_app._get_current_object())
+    body = metrics_exporter.render(
+        dashboard_feed.get_state(), dashboard_feed.get_state_age()
+    )
+    return Response(body, content_type=_CONTENT_TYPE)
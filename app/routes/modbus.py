@@ -1,11 +1,21 @@
+import asyncio
 import socket
+import time
 
 from flask import Blueprint, jsonify, render_template, request
 
 from app.services import config_store, event_log
+from app.services.async_runtime import async_runtime
+from app.services.device_governor import device_governor
 
 modbus_bp = Blueprint("modbus", __name__)
 
+# Deadline for the probe's connect and reply together
+_PROBE_SOCKET_TIMEOUT = 5
+# The probe's deadline plus as long again queued behind other requests to the
+# device, so the probe's own error wins
+_TEST_CONNECTION_TIMEOUT = 2 * _PROBE_SOCKET_TIMEOUT
+
 
 # --- Page routes ---
 
@@ -32,6 +42,21 @@ def save_modbus_config():
     return jsonify({"ok": True})
 
 
+def _probe(host, port, slave_id):
+    deadline = time.monotonic() + _PROBE_SOCKET_TIMEOUT
+    with socket.create_connection((host, port), timeout=_PROBE_SOCKET_TIMEOUT) as sock:
+        # Modbus TCP read holding registers (function 0x03), address 0, count 1
+        request_pdu = bytes(
+            [0x00, 0x01, 0x00, 0x00, 0x00, 0x06, slave_id, 0x03, 0x00, 0x00, 0x00, 0x01]
+        )
+        sock.send(request_pdu)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise socket.timeout("timed out")
+        sock.settimeout(remaining)
+        return sock.recv(256)
+
+
 @modbus_bp.route("/api/modbus/test-connection", methods=["POST"])
 def test_modbus_connection():
     data = request.get_json() or {}
@@ -56,16 +81,16 @@ def test_modbus_connection():
         port = 502
 
     try:
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(5)
-        sock.connect((host, port))
-        # Modbus TCP read holding registers (function 0x03), address 0, count 1
-        request_pdu = bytes(
-            [0x00, 0x01, 0x00, 0x00, 0x00, 0x06, slave_id, 0x03, 0x00, 0x00, 0x00, 0x01]
+        # Through the device governor, so tabs testing at once send one probe
+        response = async_runtime.run(
+            device_governor.call(
+                f"modbus://{host}:{port}",
+                lambda: asyncio.to_thread(_probe, host, port, slave_id),
+                key=("modbus_test_connection", host, port, slave_id),
+            ),
+            timeout=_TEST_CONNECTION_TIMEOUT,
+            operation="modbus_test_connection",
         )
-        sock.send(request_pdu)
-        response = sock.recv(256)
-        sock.close()
         detail = f"Connected to {host}:{port} — slave {slave_id} responded ({len(response)} bytes)"
         event_log.log(
             "info", "modbus", f"Connection OK → {host}:{port} slave {slave_id}"
@@ -1,8 +1,21 @@
-import asyncio
-
-from flask import Blueprint, jsonify, render_template, request
-
-from app.services import config_store
+import json
+import os
+import re
+
+from flask import Blueprint, current_app, jsonify, render_template, request
+
+from app.services import config_store, metrics_exporter, opcua_limits
+from app.services.async_runtime import (
+    OperationCancelled,
+    async_runtime,
+    client_disconnected,
+)
+from app.services.browse_cache import browse_cache, watch_model_changes
+from app.services.device_governor import device_governor
+from app.services.nodeset_import import nodeset_importer
+from app.services.opcua_pool import opcua_pool, session_key
+from app.services.tag_index import INDEX_FILE, TagIndex, tag_crawler
+from app.services.value_cache import tag_key, value_cache
 
 opcua_bp = Blueprint("opcua", __name__)
 
@@ -45,6 +58,10 @@ def save_opcua_config():
     return jsonify({"ok": True})
 
 
+# Upper bound on a connection test, whatever connect_timeout says
+_TEST_CONNECTION_TIMEOUT = 60
+
+
 @opcua_bp.route("/api/opcua/test-connection", methods=["POST"])
 def test_opcua_connection():
     from app.services import event_log
@@ -54,9 +71,24 @@ def test_opcua_connection():
     data = request.get_json() or {}
     merged = {**config, **data}
     endpoint = merged.get("endpoint", "")
-    result = asyncio.run(test_connection(merged))
+    try:
+        result = async_runtime.run(
+            device_governor.call(
+                endpoint,
+                lambda: test_connection(merged),
+                key=("test_connection", session_key(merged)),
+            ),
+            timeout=_TEST_CONNECTION_TIMEOUT,
+            cancelled=client_disconnected(request.environ),
+            operation="test_connection",
+        )
+    except TimeoutError as e:
+        result = {"ok": False, "error": "Connection test timed out", "detail": str(e)}
+    except OperationCancelled:
+        return "", 499  # the browser went away; nobody reads the result
     if result.get("ok"):
         event_log.log("info", "opcua", f"Connection OK → {endpoint}")
+        opcua_limits.save(endpoint, result["limits"])
     else:
         event_log.log(
             "error",
@@ -67,32 +99,376 @@ def test_opcua_connection():
     return jsonify(result)
 
 
+async def _watched(client, server, op, *args):
+    await watch_model_changes(client, server, browse_cache)
+    return await op(client, *args)
+
+
+def _cached_response(kind, op, node_id, *args):
+    """Serve `op(node_id, *args)` from the browse cache, filling it on a miss.
+
+    ?refresh=1 clears the cache for the configured server first. Responses
+    carry an ETag, so the browser can revalidate without a body.
+    """
+    config = config_store.get_section("opcua")
+    server = session_key(config)
+    if request.args.get("refresh"):
+        browse_cache.invalidate(server)
+    key = (node_id, *args) if args else node_id
+    cached = browse_cache.get(server, kind, key)
+    metrics_exporter.OPCUA_BROWSE_CACHE.inc(
+        kind=kind, result="hit" if cached else "miss"
+    )
+    if cached:
+        value, etag = cached
+    else:
+        value = opcua_pool.run(
+            config,
+            _watched,
+            server,
+            op,
+            node_id,
+            *args,
+            cancelled=client_disconnected(request.environ),
+            operation=op.__name__,
+            coalesce=True,
+        )
+        etag = browse_cache.put(server, kind, key, value)
+    resp = jsonify(value)
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.headers["X-Cache"] = "HIT" if cached else "MISS"
+    return resp.make_conditional(request)
+
+
+_MAX_PAGE = 1000
+
+
 @opcua_bp.route("/api/opcua/browse", methods=["GET"])
 def browse_opcua_nodes():
-    from app.services.opcua_client import browse_children
+    """Children of `node_id`: all of them, or with ?limit= one page of
+    {"children", "next_cursor"}, continued with ?cursor=<next_cursor>. The
+    whole list and first pages (what expanding a folder asks for) are cached."""
+    from app.services.opcua_client import (
+        fetch_children,
+        fetch_children_page,
+        parse_page_cursor,
+    )
 
-    config = config_store.get_section("opcua")
     node_id = request.args.get("node_id", "ns=0;i=85")
+    if "limit" not in request.args:
+        try:
+            return _cached_response("browse", fetch_children, node_id)
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    limit = request.args.get("limit", type=int)
+    if not limit or not 0 < limit <= _MAX_PAGE:
+        return jsonify({"error": f"limit must be between 1 and {_MAX_PAGE}"}), 400
+    cursor = request.args.get("cursor") or None
     try:
-        result = asyncio.run(browse_children(config, node_id))
-        return jsonify(result)
+        parse_page_cursor(cursor)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if cursor is None:
+        try:
+            return _cached_response("page", fetch_children_page, node_id, limit)
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+    config = config_store.get_section("opcua")
+    try:
+        page = opcua_pool.run(
+            config,
+            fetch_children_page,
+            node_id,
+            limit,
+            cursor,
+            cancelled=client_disconnected(request.environ),
+            coalesce=True,
+        )
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+    return jsonify(page)
 
 
 @opcua_bp.route("/api/opcua/node-details", methods=["GET"])
 def get_node_details():
-    from app.services.opcua_client import read_node_details
+    from app.services.opcua_client import fetch_node_details
 
-    config = config_store.get_section("opcua")
     node_id = request.args.get("node_id")
     if not node_id:
         return jsonify({"error": "node_id is required"}), 400
     try:
-        result = asyncio.run(read_node_details(config, node_id))
-        return jsonify(result)
+        return _cached_response("details", fetch_node_details, node_id)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@opcua_bp.route("/api/opcua/browse-cache", methods=["GET"])
+def get_browse_cache_stats():
+    return jsonify(browse_cache.get_stats())
+
+
+@opcua_bp.route("/api/opcua/runtime", methods=["GET"])
+def get_runtime_stats():
+    """Latency per OPC UA operation, the session pool's counters and the
+    device governor's queues."""
+    return jsonify(
+        {
+            "operations": async_runtime.get_stats(),
+            "sessions": opcua_pool.get_stats(),
+            "governor": device_governor.get_stats(),
+        }
+    )
+
+
+# --- Tag index (background crawl + search) ---
+
+
+def _tag_index():
+    return TagIndex(os.path.join(current_app.config["DATA_DIR"], INDEX_FILE))
+
+
+def _positive_int(data, name, default):
+    value = int(data.get(name, default))
+    if value < 1:
+        raise ValueError(f"{name} must be at least 1")
+    return value
+
+
+@opcua_bp.route("/api/opcua/crawl", methods=["GET"])
+def get_crawl_progress():
+    config = config_store.get_section("opcua")
+    progress = tag_crawler.get_progress()
+    progress["index_size"] = _tag_index().count(config.get("endpoint", ""))
+    return jsonify(progress)
+
+
+@opcua_bp.route("/api/opcua/crawl", methods=["POST"])
+def start_crawl():
+    data = request.get_json(silent=True) or {}
+    try:
+        options = {
+            "root": str(data.get("root") or "i=85"),
+            "concurrency": _positive_int(data, "concurrency", 4),
+            "rate": float(data.get("rate", 20)),
+            "max_nodes": _positive_int(data, "max_nodes", 200_000),
+        }
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    config = config_store.get_section("opcua")
+    if not tag_crawler.start(config, _tag_index(), **options):
+        return jsonify({"error": "A crawl is already running"}), 409
+    return jsonify({"ok": True})
+
+
+@opcua_bp.route("/api/opcua/crawl", methods=["DELETE"])
+def cancel_crawl():
+    tag_crawler.cancel()
+    return jsonify({"ok": True})
+
+
+@opcua_bp.route("/api/opcua/nodeset", methods=["GET"])
+def get_nodeset_import_progress():
+    config = config_store.get_section("opcua")
+    progress = nodeset_importer.get_progress()
+    progress["index_size"] = _tag_index().count(config.get("endpoint", ""))
+    return jsonify(progress)
+
+
+def _server_namespace_uris(config):
+    """The server's namespace array as a list of URIs, or None if the server
+    cannot be reached."""
+    from app.services.opcua_client import fetch_namespace_array
+
+    try:
+        namespaces = opcua_pool.run(
+            config,
+            fetch_namespace_array,
+            cancelled=client_disconnected(request.environ),
+            coalesce=True,
+        )
+    except Exception:
+        return None
+    return [ns["uri"] for ns in namespaces]
+
+
+@opcua_bp.route("/api/opcua/nodeset", methods=["POST"])
+def start_nodeset_import():
+    """Index a NodeSet2 XML upload (form field "file", plain or gzipped) for the
+    configured endpoint. Node ids are moved to the server's namespace indexes:
+    from the optional form field "namespace_uris" (the namespace array as
+    JSON), else read from the server if it is reachable."""
+    upload = request.files.get("file")
+    if upload is None or not upload.filename:
+        return jsonify({"error": "file is required"}), 400
+    try:
+        server_uris = json.loads(request.form.get("namespace_uris") or "null")
+    except ValueError:
+        return jsonify({"error": "namespace_uris must be a JSON list"}), 400
+    if server_uris is not None and not isinstance(server_uris, list):
+        return jsonify({"error": "namespace_uris must be a JSON list"}), 400
+    if nodeset_importer.is_running():
+        return jsonify({"error": "An import is already running"}), 409
+    path = os.path.join(current_app.config["DATA_DIR"], "nodeset-upload.xml")
+    upload.save(path)
+    config = config_store.get_section("opcua")
+    server = config.get("endpoint", "")
+    if server_uris is None:
+        server_uris = _server_namespace_uris(config)
+    if not nodeset_importer.start(path, _tag_index(), server, server_uris, True):
+        return jsonify({"error": "An import is already running"}), 409
+    return jsonify({"ok": True})
+
+
+@opcua_bp.route("/api/opcua/nodeset", methods=["DELETE"])
+def cancel_nodeset_import():
+    nodeset_importer.cancel()
+    return jsonify({"ok": True})
+
+
+def _search_args(data):
+    return {
+        "q": str(data.get("q", "")),
+        "mode": str(data.get("mode", "substring")),
+        "node_class": data.get("node_class") or None,
+    }
+
+
+@opcua_bp.route("/api/opcua/tags", methods=["GET"])
+def search_tags():
+    config = config_store.get_section("opcua")
+    try:
+        limit = min(_positive_int(request.args, "limit", 200), 1000)
+        offset = int(request.args.get("offset", 0))
+        result = _tag_index().search(
+            config.get("endpoint", ""),
+            **_search_args(request.args),
+            limit=limit,
+            offset=offset,
+        )
+    except (ValueError, re.error) as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(result)
+
+
+@opcua_bp.route("/api/opcua/tags/children", methods=["GET"])
+def tag_children():
+    """Direct children of a browse path in the tag index, for browsing a
+    crawled or imported address space without the live server."""
+    config = config_store.get_section("opcua")
+    children = _tag_index().children(
+        config.get("endpoint", ""), request.args.get("path", "")
+    )
+    return jsonify(children)
+
+
+@opcua_bp.route("/api/opcua/tags/select", methods=["POST"])
+def select_matching_tags():
+    """Add every indexed Variable matching the search to the node selection.
+
+    Node ids the NodeSet2 import kept by namespace URI are moved to the URI's
+    index on the server. Those whose URI the server does not list, and ids
+    that do not parse, are skipped and counted."""
+    from asyncua import ua
+
+    from app.services.opcua_client import node_identifier
+
+    config = config_store.get_section("opcua")
+    args = {
+        **_search_args(request.get_json(silent=True) or {}),
+        "node_class": "Variable",
+    }
+    try:
+        matches = _tag_index().search(config.get("endpoint", ""), **args, limit=None)
+    except (ValueError, re.error) as e:
+        return jsonify({"error": str(e)}), 400
+
+    nodes = config_store.get_section("nodes")
+    existing = {
+        (str(n.get("namespace")), n.get("identifier_type"), str(n.get("identifier")))
+        for n in nodes
+    }
+    server_uris = None
+    added = skipped = 0
+    for tag in matches["nodes"]:
+        try:
+            nodeid = ua.NodeId.from_string(tag["node_id"])
+        except ua.UaStringParsingError:
+            skipped += 1
+            continue
+        namespace = nodeid.NamespaceIndex
+        if getattr(nodeid, "NamespaceUri", None):
+            if server_uris is None:
+                server_uris = _server_namespace_uris(config) or []
+            if nodeid.NamespaceUri not in server_uris:
+                skipped += 1
+                continue
+            namespace = server_uris.index(nodeid.NamespaceUri)
+        identifier_type, identifier = node_identifier(nodeid)
+        key = (str(namespace), identifier_type, identifier)
+        if key in existing:
+            continue
+        existing.add(key)
+        nodes.append(
+            {
+                "name": tag["display_name"],
+                "namespace": key[0],
+                "identifier_type": identifier_type,
+                "identifier": identifier,
+                "sampling_mode": "polling",
+                "interval": "1s",
+                "deadband_type": "None",
+                "deadband_value": 0,
+                "data_type": tag["data_type"],
+            }
+        )
+        added += 1
+    if added:
+        config_store.update_section("nodes", nodes)
+    return jsonify(
+        {"ok": True, "added": added, "skipped": skipped, "matched": matches["total"]}
+    )
+
+
+@opcua_bp.route("/api/opcua/sampling-audit", methods=["POST"])
+def run_sampling_audit():
+    """Check the acquisition interval against every selected node's
+    MinimumSamplingInterval and recent change rate; suggest rate classes."""
+    from app.services.opcua_client import fetch_sampling_info
+    from app.services.sampling_audit import audit
+    from app.services.telegraf_config import acquisition_settings
+
+    config = config_store.load()
+    nodes = config.get("nodes", [])
+    if not nodes:
+        return jsonify({"error": "No nodes selected"}), 400
+    node_ids = [
+        f"ns={n.get('namespace')};{n.get('identifier_type')}={n.get('identifier')}"
+        for n in nodes
+    ]
+    try:
+        info = opcua_pool.run(
+            config.get("opcua", {}),
+            fetch_sampling_info,
+            node_ids,
+            cancelled=client_disconnected(request.environ),
+        )
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+    # Individual mode tags each value with its node id; grouped mode cannot
+    names = {}
+    for node, node_id in zip(nodes, node_ids, strict=True):
+        names[tag_key("opcua", node["name"], {"id": node_id})] = node["name"]
+        names.setdefault(tag_key("opcua", node["name"]), node["name"])
+    cached = value_cache.get(list(names), history=True)
+    histories = {
+        names[key]: entry["history"] for key, entry in cached["values"].items()
+    }
+    try:
+        return jsonify(audit(nodes, acquisition_settings(config), info, histories))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
 
 @opcua_bp.route("/api/opcua/nodes", methods=["GET"])
@@ -138,11 +514,16 @@ def save_publishing():
 
 @opcua_bp.route("/api/opcua/namespaces", methods=["GET"])
 def get_opcua_namespaces():
-    from app.services.opcua_client import read_namespace_array
+    from app.services.opcua_client import fetch_namespace_array
 
     config = config_store.get_section("opcua")
     try:
-        result = asyncio.run(read_namespace_array(config))
+        result = opcua_pool.run(
+            config,
+            fetch_namespace_array,
+            cancelled=client_disconnected(request.environ),
+            coalesce=True,
+        )
         return jsonify(result)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -150,14 +531,51 @@ def get_opcua_namespaces():
 
 @opcua_bp.route("/api/opcua/node-value", methods=["GET"])
 def get_node_value():
-    from app.services.opcua_client import read_node_value
+    from app.services.opcua_client import fetch_node_value
 
     config = config_store.get_section("opcua")
     node_id = request.args.get("node_id")
     if not node_id:
         return jsonify({"error": "node_id is required"}), 400
     try:
-        result = asyncio.run(read_node_value(config, node_id))
+        result = opcua_pool.run(
+            config,
+            fetch_node_value,
+            node_id,
+            cancelled=client_disconnected(request.environ),
+            coalesce=True,
+        )
         return jsonify(result)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+
+
+_MAX_VALUE_NODES = 5000
+
+
+@opcua_bp.route("/api/opcua/node-values", methods=["POST"])
+def get_node_values():
+    """Values for a list of node ids, read with as few Read requests as the
+    server's MaxNodesPerRead allows."""
+    from app.services.opcua_client import fetch_node_values
+
+    data = request.get_json(silent=True) or {}
+    node_ids = data.get("node_ids")
+    if not isinstance(node_ids, list) or not all(isinstance(n, str) for n in node_ids):
+        return jsonify({"error": "node_ids must be a list of node id strings"}), 400
+    if len(node_ids) > _MAX_VALUE_NODES:
+        return jsonify({"error": f"At most {_MAX_VALUE_NODES} node ids per call"}), 400
+    if not node_ids:
+        return jsonify([])
+    config = config_store.get_section("opcua")
+    try:
+        return jsonify(
+            opcua_pool.run(
+                config,
+                fetch_node_values,
+                node_ids,
+                cancelled=client_disconnected(request.environ),
+            )
+        )
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
@@ -0,0 +1,142 @@
+import json
+import threading
+
+from flask import Blueprint, Response, current_app, jsonify, request
+
+from app.services import config_store, event_bus
+from app.services.dashboard_feed import dashboard_feed
+from app.services.opcua_watch import CHANNEL as OPCUA_CHANNEL
+from app.services.opcua_watch import opcua_watcher
+
+stream_bp = Blueprint("stream", __name__)
+
+_CHANNELS = ("dashboard", "log", "tail")
+# A comment line every N seconds keeps proxies from closing an idle stream and
+# lets the server notice a client that went away.
+_KEEPALIVE_SECS = 15
+_RETRY_MS = 3000
+# Nodes one stream may watch
+_MAX_WATCHED = 50
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@stream_bp.route("/api/stream", methods=["GET"])
+def stream():
+    """Server-Sent Events: dashboard deltas, new log events and MQTT tail messages.
+
+    ?channels=dashboard,log,tail selects what to receive (default: all).
+    """
+    requested = request.args.get("channels", "").split(",")
+    channels = [c for c in requested if c in _CHANNELS] or list(_CHANNELS)
+
+    sub = event_bus.subscribe(channels)
+    initial = None
+    if "dashboard" in channels:
+        dashboard_feed.ensure_running(current_app._get_current_object())
+        initial = dashboard_feed.get_state()
+
+    def generate():
+        try:
+            yield f"retry: {_RETRY_MS}\n\n"
+            if initial:
+                yield _sse("dashboard", {"full": True, **initial})
+            while True:
+                item = sub.get(timeout=_KEEPALIVE_SECS)
+                if item is None:
+                    if sub.closed:
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+                channel, data = item
+                if channel == "resync":
+                    # Queue overflowed — the client re-fetches full state
+                    yield _sse("resync", {"channels": channels})
+                else:
+                    yield _sse(channel, data)
+        finally:
+            sub.close()
+
+    return Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@stream_bp.route("/api/stream/opcua-values", methods=["GET"])
+def stream_opcua_values():
+    """Server-Sent Events: live values of ?node_id=...&node_id=... (repeatable).
+
+    Each stream joins the gateway's shared OPC UA subscription for its nodes
+    and leaves it when the browser disconnects. Every event is a "value" with
+    the node-value fields plus "node_id".
+    """
+    try:
+        node_ids = list(
+            dict.fromkeys(
+                opcua_watcher.normalize(n) for n in request.args.getlist("node_id")
+            )
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not node_ids or len(node_ids) > _MAX_WATCHED:
+        return jsonify({"error": f"Give 1 to {_MAX_WATCHED} node_id parameters"}), 400
+
+    config = config_store.get_section("opcua")
+    sub = event_bus.subscribe([OPCUA_CHANNEL])
+    initial, watching = [], []
+    try:
+        for node_id in node_ids:
+            value = opcua_watcher.watch(config, node_id)
+            watching.append(node_id)
+            if value:
+                initial.append(value)
+    except Exception as e:
+        sub.close()
+        for node_id in watching:
+            opcua_watcher.unwatch(config, node_id)
+        return jsonify({"error": str(e)}), 500
+    wanted = set(node_ids)
+    released = threading.Lock()
+
+    def release():
+        if released.acquire(blocking=False):
+            sub.close()
+            for node_id in watching:
+                opcua_watcher.unwatch(config, node_id)
+
+    def generate():
+        try:
+            yield f"retry: {_RETRY_MS}\n\n"
+            sent = {}
+            for value in initial:
+                sent[value["node_id"]] = value
+                yield _sse("value", value)
+            while True:
+                item = sub.get(timeout=_KEEPALIVE_SECS)
+                if item is None:
+                    if sub.closed:
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+                channel, data = item
+                if channel != OPCUA_CHANNEL or data["node_id"] not in wanted:
+                    continue
+                # The first notification may already have gone out as initial state
+                if sent.get(data["node_id"]) != data:
+                    sent[data["node_id"]] = data
+                    yield _sse("value", data)
+        finally:
+            release()
+
+    resp = Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    # Also runs when the client leaves before the first chunk is sent
+    resp.call_on_close(release)
+    return resp
@@ -1,16 +1,21 @@
 import os
+import re
 import time
-from datetime import datetime, timezone
 
-from flask import Blueprint, current_app, jsonify
+from flask import Blueprint, current_app, jsonify, request
 
-from app.services import config_store
+from app.services import config_store, metrics_exporter, opcua_limits
+from app.services.docker_events import record_intentional_start
 from app.services.system_monitor import (
     clear_intentional_restart,
+    get_telegraf_container_running,
     mark_intentional_restart,
     reset_crash_detection,
 )
-from app.services.telegraf_config import render_config
+from app.services.telegraf_config import plan_opcua_inputs, render_config
+from app.services.telegraf_ingest import MAX_PAYLOAD_BYTES, telegraf_ingest
+from app.services.telegraf_logs import parse_level, telegraf_log_follower
+from app.services.value_cache import value_cache
 
 telegraf_bp = Blueprint("telegraf", __name__)
 
@@ -34,7 +39,13 @@ def generate_config():
     from app.services import event_log
 
     config = config_store.load()
-    rendered = render_config(config)
+    limits = opcua_limits.load(config.get("opcua", {}).get("endpoint", ""))
+    _, warnings = plan_opcua_inputs(config, limits)
+    for warning in warnings:
+        event_log.log("warning", "telegraf", warning)
+    rendered = render_config(
+        config, current_app.config.get("TELEGRAF_INGEST_URL"), limits
+    )
     output_path = os.path.join(
         current_app.config["TELEGRAF_OUTPUT_DIR"], "telegraf.conf"
     )
@@ -44,28 +55,30 @@ def generate_config():
 
     deploy_time = time.time()
     reset_crash_detection()  # before restart — prevents false crash on counter reset
-    mark_intentional_restart()  # suppress unplanned detection during restart window
+    mark_intentional_restart("deploy")  # suppress unplanned detection during restart
     restart_result = _restart_telegraf()
 
     if restart_result.get("ok"):
         event_log.log("info", "telegraf", "Config applied and agent restarted")
-        config_store.record_restart(datetime.now(timezone.utc).isoformat(), "deploy")
-        # Wait briefly then check Telegraf logs for config parse errors
-        time.sleep(3)
-        # Update with precise Docker timestamp, then re-enable unplanned detection
-        telegraf_start = _get_telegraf_started_at()
-        if telegraf_start:
-            config_store.record_restart(telegraf_start, "deploy")
+        if restart_result.get("restarted"):
+            record_intentional_start("deploy", since=deploy_time)
         reset_crash_detection()  # clear stale baseline from old metrics.json before re-enabling
         clear_intentional_restart()
-        error_line = _get_telegraf_config_error(since=deploy_time)
+        value_cache.clear()  # tags may have been renamed or removed
+        error_line = (
+            _get_telegraf_config_error(since=deploy_time)
+            if restart_result.get("restarted")
+            else None
+        )
         if error_line:
             event_log.log(
                 "error", "telegraf", "Telegraf config error detected", detail=error_line
             )
+        metrics_exporter.DEPLOYS.inc(result="config_error" if error_line else "ok")
     else:
         reset_crash_detection()
         clear_intentional_restart()
+        metrics_exporter.DEPLOYS.inc(result="restart_failed")
         event_log.log(
             "error",
             "telegraf",
@@ -73,87 +86,55 @@ def generate_config():
             detail=restart_result.get("error"),
         )
 
-    return jsonify({"ok": True, "path": output_path, "restart": restart_result})
-
-
-# Keywords that indicate a genuine config parse/load error in Telegraf logs.
-# Runtime errors (OPC UA session drops, MQTT timeouts, etc.) are excluded — they
-# are transient and Telegraf recovers from them automatically without intervention.
-_CONFIG_ERROR_KEYWORDS = (
-    "config",
-    "toml",
-    "parse",
-    "invalid",
-    "unknown field",
-    "failed to load",
-    "cannot parse",
-    "error loading",
-)
+    return jsonify(
+        {
+            "ok": True,
+            "path": output_path,
+            "restart": restart_result,
+            "warnings": warnings,
+        }
+    )
+
 
+_CONFIG_CHECK_TIMEOUT_SECS = 5
 
-def _get_telegraf_config_error(since):
+
+def _get_telegraf_config_error(since, timeout=_CONFIG_CHECK_TIMEOUT_SECS):
     """Return the first config-related E! log line emitted after `since` (Unix timestamp).
 
-    Filters out:
-    - Lines logged before the deploy (via Docker SDK `since` param)
-    - Runtime E! errors that are not config problems (OPC UA session drops, etc.)
+    Waits on the log follower until Telegraf reports its plugins as loaded (no
+    error) or logs a config error, giving up after `timeout` seconds. Runtime
+    E! errors (OPC UA session drops, etc.) are not config problems and are ignored.
     """
-    try:
-        import docker
-
-        client = docker.from_env()
-        containers = client.containers.list(all=True, filters={"name": "telegraf"})
-        if not containers:
-            return None
-        logs = (
-            containers[0]
-            .logs(tail=50, stderr=True, stdout=True, since=int(since))
-            .decode("utf-8", errors="replace")
-        )
-        for line in reversed(logs.splitlines()):
-            if " E! " not in line:
-                continue
-            if any(kw in line.lower() for kw in _CONFIG_ERROR_KEYWORDS):
-                return line.strip()
-        return None
-    except Exception:
-        return None
+    telegraf_log_follower.start()
+    return telegraf_log_follower.wait_for_config_result(since, timeout)
 
 
 @telegraf_bp.route("/api/telegraf/logs", methods=["GET"])
 def telegraf_logs():
-    """Return recent Telegraf container log lines."""
-    try:
-        import docker
+    """Telegraf container log lines from the follower's ring buffer.
 
-        client = docker.from_env()
-        containers = client.containers.list(all=True, filters={"name": "telegraf"})
-        if not containers:
-            return jsonify({"ok": True, "lines": []})
-        raw = (
-            containers[0]
-            .logs(tail=200, stderr=True, stdout=True)
-            .decode("utf-8", errors="replace")
-        )
-        lines = [line for line in raw.splitlines() if line.strip()]
-        return jsonify({"ok": True, "lines": lines})
-    except Exception as e:
-        return jsonify({"ok": False, "error": str(e)})
-
-
-def _get_telegraf_started_at():
-    """Return the Telegraf container's current started_at ISO string, or None."""
+    Query params: after (cursor from the previous response), level (E/W/I/D or
+    error/warn/info/debug, comma-separated), plugin (e.g. inputs.opcua),
+    q (regular expression), limit (default 500).
+    """
+    telegraf_log_follower.start()
     try:
-        import docker
-
-        client = docker.from_env()
-        containers = client.containers.list(all=True, filters={"name": "telegraf"})
-        if not containers:
-            return None
-        containers[0].reload()
-        return containers[0].attrs["State"]["StartedAt"]
-    except Exception:
-        return None
+        after = int(request.args.get("after", 0))
+        limit = min(max(int(request.args.get("limit", 500)), 1), 2000)
+        levels = parse_level(request.args.get("level"))
+        result = telegraf_log_follower.query(
+            after=after,
+            levels=levels,
+            plugin=request.args.get("plugin") or None,
+            pattern=request.args.get("q") or None,
+            limit=limit,
+        )
+    except (ValueError, re.error) as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    if not result["lines"] and result["error"]:
+        return jsonify({"ok": False, "error": result["error"]})
+    return jsonify({"ok": True, **result})
 
 
 def _restart_telegraf():
@@ -164,24 +145,30 @@ def _restart_telegraf():
         containers = client.containers.list(filters={"name": "telegraf"})
         for container in containers:
             container.restart(timeout=10)
-        return {"ok": True, "message": f"Restarted {len(containers)} container(s)"}
+        return {
+            "ok": True,
+            "message": f"Restarted {len(containers)} container(s)",
+            "restarted": len(containers),
+        }
     except Exception as e:
         return {"ok": False, "error": str(e)}
 
 
-@telegraf_bp.route("/api/telegraf/status", methods=["GET"])
-def telegraf_status():
+@telegraf_bp.route("/api/telegraf/ingest", methods=["POST"])
+def ingest_metrics():
+    """Receive internal metrics from Telegraf's [[outputs.http]] (JSON format)."""
+    if (request.content_length or 0) > MAX_PAYLOAD_BYTES:
+        return jsonify({"ok": False, "error": "Payload too large"}), 413
     try:
-        import docker
+        accepted = telegraf_ingest.ingest(request.get_data(cache=False))
+    except ValueError:
+        return jsonify({"ok": False, "error": "Invalid metrics payload"}), 400
+    return jsonify({"ok": True, "accepted": accepted})
 
-        client = docker.from_env()
-        containers = client.containers.list(all=True, filters={"name": "telegraf"})
-        if not containers:
-            return jsonify({"ok": True, "running": False})
-        running = containers[0].status == "running"
-        return jsonify({"ok": True, "running": running})
-    except Exception as e:
-        return jsonify({"ok": False, "error": str(e)})
+
+@telegraf_bp.route("/api/telegraf/status", methods=["GET"])
+def telegraf_status():
+    return jsonify(get_telegraf_container_running())
 
 
 @telegraf_bp.route("/api/telegraf/stop", methods=["POST"])
@@ -213,15 +200,12 @@ def start_telegraf():
         client = docker.from_env()
         containers = client.containers.list(all=True, filters={"name": "telegraf"})
         reset_crash_detection()  # before start — prevents false crash on counter reset
-        mark_intentional_restart()  # suppress unplanned detection during restart window
+        mark_intentional_restart("manual")  # suppress unplanned detection during start
+        start_time = time.time()
         for container in containers:
             container.start()
-        config_store.record_restart(datetime.now(timezone.utc).isoformat(), "manual")
-        # Brief wait for Docker to update StartedAt, then update with precise timestamp
-        time.sleep(2)
-        telegraf_start = _get_telegraf_started_at()
-        if telegraf_start:
-            config_store.record_restart(telegraf_start, "manual")
+        if containers:
+            record_intentional_start("manual", since=start_time)
         reset_crash_detection()  # clear stale baseline from old metrics.json before re-enabling
         clear_intentional_restart()  # re-enable unplanned detection
         event_log.log("info", "telegraf", "Agent started manually")
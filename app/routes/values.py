@@ -0,0 +1,40 @@
+from flask import Blueprint, jsonify, render_template, request
+
+from app.services.telegraf_ingest import MAX_PAYLOAD_BYTES, parse_batch
+from app.services.value_cache import value_cache
+
+values_bp = Blueprint("values", __name__)
+
+
+@values_bp.route("/values")
+def values_page():
+    return render_template("values.html")
+
+
+@values_bp.route("/api/values/ingest", methods=["POST"])
+def ingest_values():
+    """Receive opcua/modbus metrics from Telegraf's [[outputs.http]] (JSON format)."""
+    if (request.content_length or 0) > MAX_PAYLOAD_BYTES:
+        return jsonify({"ok": False, "error": "Payload too large"}), 413
+    try:
+        metrics = parse_batch(request.get_data(cache=False))
+    except ValueError:
+        return jsonify({"ok": False, "error": "Invalid metrics payload"}), 400
+    return jsonify({"ok": True, "accepted": value_cache.update(metrics)})
+
+
+@values_bp.route("/api/values", methods=["GET"])
+def get_values():
+    """Bulk read of cached values.
+
+    ?tags=opcua:Temp[id=ns=3;i=1001]&tags=modbus:Pressure[slave_id=1]
+                                      only these tags (default: all); repeated
+                                      rather than comma-separated, since string
+                                      node ids may contain commas
+    ?since=<seq>                      only tags updated after this sequence number
+    ?history=1                        include each tag's recent values
+    """
+    keys = [t.strip() for t in request.args.getlist("tags") if t.strip()] or None
+    since = request.args.get("since", 0, type=int)
+    history = request.args.get("history") in ("1", "true")
+    return jsonify(value_cache.get(keys, since=since, history=history))
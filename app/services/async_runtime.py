@@ -0,0 +1,205 @@
+"""
+The gateway's asyncio event loop, on one long-lived thread.
+
+Flask handlers are synchronous and run on the server's request threads. Any
+coroutine they need (OPC UA sessions, subscriptions, connection tests) runs
+on this one loop instead of a fresh asyncio.run() per request, so sessions
+and other loop-bound state can be shared between requests and simultaneous
+requests do not each spin up their own loop.
+
+    async_runtime.run(coro, timeout=10, operation="test_connection")
+
+run() blocks the calling thread until the coroutine finishes and re-raises
+its exception. It cancels the coroutine on the loop when the call times out
+or when `cancelled()` turns true while waiting (see client_disconnected()).
+Every call with an `operation` name is timed into the
+gateway_async_operation_duration_seconds histogram and get_stats().
+"""
+
+import asyncio
+import concurrent.futures
+import socket
+import threading
+import time
+
+from app.services import metrics_exporter
+
+_CALL_TIMEOUT_SECS = 30.0
+# How often a waiting call checks `cancelled()`
+_CANCEL_POLL_SECS = 0.25
+
+
+class OperationTimedOut(TimeoutError):
+    """run() stopped waiting after its timeout (as opposed to a TimeoutError
+    raised by the coroutine itself, which run() re-raises unchanged)."""
+
+
+class OperationCancelled(Exception):
+    """The caller gave up (e.g. the HTTP client disconnected) before the end."""
+
+
+class AsyncRuntime:
+    """Thread-safe bridge from synchronous code to one asyncio loop thread."""
+
+    def __init__(self, name="gateway-async"):
+        self._name = name
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._stats = {}
+
+    # --- Lifecycle ---
+
+    @property
+    def loop(self):
+        """The running loop (starting it if needed)."""
+        self.start()
+        return self._loop
+
+    def is_running(self):
+        return bool(self._thread and self._thread.is_alive())
+
+    def start(self):
+        """Start the loop thread (idempotent)."""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            ready = threading.Event()
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(
+                target=self._run_loop, args=(ready,), name=self._name, daemon=True
+            )
+            self._thread.start()
+            ready.wait()
+
+    def _run_loop(self, ready):
+        asyncio.set_event_loop(self._loop)
+        self._loop.call_soon(ready.set)
+        self._loop.run_forever()
+        # Give tasks still running a chance to clean up
+        pending = asyncio.all_tasks(self._loop)
+        for task in pending:
+            task.cancel()
+        self._loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        self._loop.close()
+
+    def stop(self, timeout=10):
+        """Stop the loop thread; tasks still running are cancelled."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._thread = None
+        if loop is None or thread is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+
+    # --- Bridge ---
+
+    def submit(self, coro):
+        """Schedule `coro` on the loop; returns a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout=_CALL_TIMEOUT_SECS, cancelled=None, operation=None):
+        """Run `coro` on the loop and return its result.
+
+        Raises OperationTimedOut (a TimeoutError) after `timeout` seconds
+        (None = wait forever) and OperationCancelled once `cancelled()`
+        returns true; the coroutine is cancelled on the loop either way.
+        """
+        future = self.submit(coro)
+        started = time.monotonic()
+        result = "ok"
+        try:
+            return self._wait(future, timeout, cancelled, started)
+        except OperationTimedOut:
+            result = "timeout"
+            raise
+        except OperationCancelled:
+            result = "cancelled"
+            raise
+        except BaseException:
+            result = "error"
+            raise
+        finally:
+            if operation:
+                self._record(operation, result, time.monotonic() - started)
+
+    @staticmethod
+    def _wait(future, timeout, cancelled, started):
+        deadline = None if timeout is None else started + timeout
+        while True:
+            wait = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if cancelled is not None:
+                wait = (
+                    _CANCEL_POLL_SECS if wait is None else min(wait, _CANCEL_POLL_SECS)
+                )
+            # Wait first, then take the result: on Python 3.11+ a TimeoutError
+            # raised by the coroutine itself is the same class as a wait timeout
+            concurrent.futures.wait([future], wait)
+            if future.done():
+                return future.result()
+            if deadline is not None and time.monotonic() >= deadline:
+                future.cancel()
+                raise OperationTimedOut(f"Async operation timed out after {timeout}s")
+            if cancelled is not None and cancelled():
+                future.cancel()
+                raise OperationCancelled()
+
+    # --- Instrumentation ---
+
+    def _record(self, operation, result, seconds):
+        metrics_exporter.ASYNC_OPERATION_LATENCY.observe(
+            seconds, operation=operation, result=result
+        )
+        with self._lock:
+            entry = self._stats.setdefault(
+                operation,
+                {
+                    "calls": 0,
+                    "ok": 0,
+                    "error": 0,
+                    "timeout": 0,
+                    "cancelled": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                },
+            )
+            entry["calls"] += 1
+            entry[result] += 1
+            entry["total_ms"] += seconds * 1000
+            entry["max_ms"] = max(entry["max_ms"], seconds * 1000)
+
+    def get_stats(self):
+        """Per-operation call counts by outcome, with mean and max latency (ms)."""
+        with self._lock:
+            return {
+                op: {
+                    **{k: v for k, v in entry.items() if k != "total_ms"},
+                    "mean_ms": round(entry["total_ms"] / entry["calls"], 2),
+                    "max_ms": round(entry["max_ms"], 2),
+                }
+                for op, entry in self._stats.items()
+            }
+
+
+def client_disconnected(environ):
+    """A cancelled() callable for run(): true once the HTTP client behind this
+    WSGI request has closed its connection. Always false when the server does
+    not expose the socket (Werkzeug's does, as environ["werkzeug.socket"])."""
+    sock = environ.get("werkzeug.socket")
+    if sock is None:
+        return lambda: False
+
+    def check():
+        try:
+            return sock.recv(1, socket.MSG_PEEK | socket.MSG_DONTWAIT) == b""
+        except (BlockingIOError, InterruptedError):
+            return False  # still connected, nothing to read
+        except OSError:
+            return True
+
+    return check
+
+
+# Module-level singleton
+async_runtime = AsyncRuntime()
@@ -0,0 +1,165 @@
+"""
+Server-side cache of OPC UA browse results and node details.
+
+Expanding a folder in the browser and clicking a node used to go to the PLC
+every time. Results are now cached per server (endpoint + security/auth
+settings, the same key as the session pool), node id and kind ("browse",
+"page" for the first page of a paged browse, keyed by node id and page size,
+or "details"), with LRU eviction under a memory cap and a TTL.
+
+Entries for a server are dropped when it reports an address-space change: a
+model change event (BaseModelChangeEventType and subtypes) or a new
+NamespaceArray. The watch lives on the pooled session, so when the session
+is replaced the cache for that server is dropped too, since changes may
+have been missed. The browser's refresh button clears it explicitly.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+from asyncua import ua
+
+logger = logging.getLogger(__name__)
+
+_MAX_BYTES = 16 * 1024 * 1024
+_TTL_SECS = 300.0
+_WATCH_PUBLISH_MS = 1000
+
+
+class _Entry:
+    __slots__ = ("value", "etag", "size", "expires")
+
+    def __init__(self, value, etag, size, expires):
+        self.value = value
+        self.etag = etag
+        self.size = size
+        self.expires = expires
+
+
+class BrowseCache:
+    """LRU of JSON-serialisable results with a byte budget and a TTL."""
+
+    def __init__(self, max_bytes=_MAX_BYTES, ttl=_TTL_SECS):
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def get(self, server, kind, node_id):
+        """Cached (value, etag) or None. Counts a hit or a miss."""
+        key = (server, kind, node_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires < time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry.value, entry.etag
+
+    def put(self, server, kind, node_id, value):
+        """Store `value` and return its ETag. Values over the budget are not kept."""
+        body = json.dumps(value, sort_keys=True, separators=(",", ":"))
+        etag = hashlib.sha1(body.encode()).hexdigest()[:16]
+        size = len(body)
+        if size > self._max_bytes:
+            return etag
+        key = (server, kind, node_id)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(value, etag, size, time.monotonic() + self._ttl)
+            self._bytes += size
+            while self._bytes > self._max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats["evictions"] += 1
+        return etag
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def invalidate(self, server=None):
+        """Drop everything cached for `server`, or the whole cache."""
+        with self._lock:
+            keys = [k for k in self._entries if server is None or k[0] == server]
+            for key in keys:
+                self._remove(key)
+            self._stats["invalidations"] += 1
+        return len(keys)
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self._max_bytes,
+                "hit_rate": round(self._stats["hits"] / lookups, 3)
+                if lookups
+                else None,
+            }
+
+
+# Module-level singleton
+browse_cache = BrowseCache()
+
+
+# ---------------------------------------------------------------------------
+# Address-space change watch (runs on the session pool's loop)
+# ---------------------------------------------------------------------------
+
+# Pooled clients that already carry a watch subscription
+_watched = weakref.WeakSet()
+
+
+class _ModelChangeHandler:
+    def __init__(self, cache, server):
+        self._cache = cache
+        self._server = server
+        self._namespaces = None
+
+    def event_notification(self, event):
+        logger.info("OPC UA model change reported; clearing browse cache")
+        self._cache.invalidate(self._server)
+
+    def datachange_notification(self, node, val, data):
+        # The first notification is the current NamespaceArray
+        if self._namespaces is not None and val != self._namespaces:
+            logger.info("OPC UA namespace array changed; clearing browse cache")
+            self._cache.invalidate(self._server)
+        self._namespaces = val
+
+
+async def watch_model_changes(client, server, cache=browse_cache):
+    """Subscribe `client` to model change events and NamespaceArray updates,
+    once per session. Clears the cache for `server` when a new watch starts,
+    since anything cached under a previous session may be stale."""
+    if client in _watched:
+        return
+    _watched.add(client)
+    cache.invalidate(server)
+    handler = _ModelChangeHandler(cache, server)
+    try:
+        subscription = await client.create_subscription(_WATCH_PUBLISH_MS, handler)
+        await subscription.subscribe_events(
+            client.nodes.server, ua.ObjectIds.BaseModelChangeEventType
+        )
+        await subscription.subscribe_data_change(
+            client.get_node(ua.ObjectIds.Server_NamespaceArray)
+        )
+    except Exception as e:
+        # Servers without event support still get the TTL and manual refresh
+        logger.info("OPC UA model change watch unavailable: %s", e)
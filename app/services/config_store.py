@@ -6,6 +6,7 @@ import threading
 from datetime import datetime, timezone
 
 from app.config import DEFAULT_CONFIG
+from app.services import metrics_exporter
 
 logger = logging.getLogger(__name__)
 
@@ -110,6 +111,8 @@ def record_restart(started_at_iso, reason):
             os.replace(tmp_path, path)
         except Exception:
             logger.error("Failed to record telegraf restart")
+            return
+    metrics_exporter.RESTARTS.inc(reason=reason)
 
 
 def is_dirty():
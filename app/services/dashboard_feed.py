@@ -0,0 +1,168 @@
+"""
+Dashboard change feed for the Server-Sent Events stream.
+
+A single sampler thread collects the dashboard snapshot while at least one
+client is subscribed to the "dashboard" channel, and publishes only the fields
+that changed since the previous sample. The cost is one snapshot per interval
+no matter how many browsers are watching; with no subscribers the thread exits.
+The cached state also backs /metrics, whose scrapes keep the sampler alive.
+"""
+
+import threading
+import time
+
+from app.services import event_bus
+
+CHANNEL = "dashboard"
+
+# Keep sampling this long after the last touch() (e.g. a /metrics scrape)
+_TOUCH_KEEPALIVE_SECS = 120
+
+# Snapshot sections pushed to clients. Events travel on the "log" channel.
+_SECTIONS = (
+    "health",
+    "telegraf_status",
+    "telegraf_metrics",
+    "gateway_info",
+    "telegraf_running",
+)
+
+
+def diff_sections(old, new):
+    """Return {section: {changed fields}} between two snapshots.
+
+    Dict sections are compared field by field; anything else is replaced whole.
+    Sections missing from `new` (failed or timed out) are left out.
+    """
+    delta = {}
+    for section in _SECTIONS:
+        value = new.get(section)
+        if value is None:
+            continue
+        previous = old.get(section)
+        if isinstance(value, dict) and isinstance(previous, dict):
+            changed = {
+                k: v for k, v in value.items() if k not in previous or previous[k] != v
+            }
+            if changed:
+                delta[section] = changed
+        elif value != previous:
+            delta[section] = value
+    return delta
+
+
+class DashboardFeed:
+    """Samples the dashboard while it has subscribers and publishes deltas."""
+
+    def __init__(self, interval=2.0, source=None):
+        self._interval = interval
+        self._source = source
+        self._app = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._state = {}
+        self._samples = 0
+        self._sampled_at = None
+        self._touched_at = None
+
+    def ensure_running(self, app=None):
+        """Start the sampler if it is not already running."""
+        with self._lock:
+            if app is not None:
+                self._app = app
+            if self._thread is not None:
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="dashboard-feed", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def touch(self):
+        """Keep sampling without an SSE subscriber, for readers of get_state()."""
+        with self._lock:
+            self._touched_at = time.monotonic()
+
+    def _has_readers(self):
+        if event_bus.subscriber_count(CHANNEL) > 0:
+            return True
+        touched = self._touched_at
+        return (
+            touched is not None and time.monotonic() - touched < _TOUCH_KEEPALIVE_SECS
+        )
+
+    def _run(self):
+        while True:
+            try:
+                self.sample()
+            except Exception:
+                pass  # a failed sample is retried on the next tick
+            if self._stop_event.wait(self._interval):
+                break
+            with self._lock:
+                if not self._has_readers():
+                    self._thread = None
+                    return
+        with self._lock:
+            self._thread = None
+
+    def sample(self):
+        """Take one snapshot and publish what changed. Returns the delta."""
+        source = self._source
+        if source is None:
+            from app.services.dashboard_snapshot import get_snapshot
+
+            source = get_snapshot
+        if self._app is not None:
+            with self._app.app_context():
+                snapshot = source()
+        else:
+            snapshot = source()
+
+        # Holding the lock while publishing keeps get_state() and the delta
+        # stream consistent for clients that subscribe mid-sample.
+        with self._lock:
+            self._samples += 1
+            self._sampled_at = time.monotonic()
+            delta = diff_sections(self._state, snapshot)
+            for section, value in delta.items():
+                if isinstance(value, dict) and isinstance(
+                    self._state.get(section), dict
+                ):
+                    self._state[section] = {**self._state[section], **value}
+                else:
+                    self._state[section] = value
+            if delta:
+                event_bus.publish(CHANNEL, delta)
+        return delta
+
+    def get_state(self):
+        """Full current state, sent to a client when it connects."""
+        with self._lock:
+            return {
+                k: (dict(v) if isinstance(v, dict) else v)
+                for k, v in self._state.items()
+            }
+
+    def get_state_age(self):
+        """Seconds since the last sample, or None before the first one."""
+        with self._lock:
+            if self._sampled_at is None:
+                return None
+            return time.monotonic() - self._sampled_at
+
+    def get_sample_count(self):
+        with self._lock:
+            return self._samples
+
+    def is_running(self):
+        with self._lock:
+            return self._thread is not None
+
+
+# Module-level singleton
+dashboard_feed = DashboardFeed()
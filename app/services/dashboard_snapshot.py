@@ -0,0 +1,135 @@
+"""
+Aggregated dashboard snapshot.
+
+Gathers every dashboard section (system health, Telegraf status and metrics,
+gateway info, recent events) concurrently in a bounded thread pool, sharing a
+single config load. Each section has its own timeout so one slow Docker call
+cannot stall the rest: a section that misses its deadline is returned as None
+and reported in "errors".
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from app.services import config_store, event_log
+from app.services.system_monitor import (
+    get_gateway_info,
+    get_system_health,
+    get_telegraf_container_running,
+    get_telegraf_metrics,
+    get_telegraf_status,
+)
+
+# Seconds each section may take, measured from the moment the snapshot starts.
+SECTION_TIMEOUTS = {
+    "health": 2.0,
+    "telegraf_status": 1.5,
+    "telegraf_metrics": 2.0,
+    "gateway_info": 4.0,
+    "telegraf_running": 4.0,
+    "events": 1.0,
+}
+_DEFAULT_TIMEOUT = 3.0
+
+# Shared by all dashboard clients. Sized so a hung Docker call in every
+# Docker-backed section still leaves workers for the other sections.
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="dashboard")
+
+
+def gather(sources, timeouts=None, default_timeout=_DEFAULT_TIMEOUT):
+    """Run each callable in `sources` ({name: fn}) concurrently.
+
+    Returns (results, latency_ms, errors). A source that raises or exceeds its
+    timeout gets a None result and an entry in `errors`; the others are unaffected.
+    """
+    timeouts = timeouts or {}
+    started = time.monotonic()
+    measured = {}
+
+    def _timed(name, fn):
+        t0 = time.monotonic()
+        try:
+            return fn()
+        finally:
+            measured[name] = round((time.monotonic() - t0) * 1000, 1)
+
+    futures = {name: _executor.submit(_timed, name, fn) for name, fn in sources.items()}
+
+    results, latency_ms, errors = {}, {}, {}
+    for name, future in futures.items():
+        deadline = started + timeouts.get(name, default_timeout)
+        try:
+            results[name] = future.result(timeout=max(0, deadline - time.monotonic()))
+            latency_ms[name] = measured.get(name)
+        except FutureTimeoutError:
+            future.cancel()  # drops it if still queued; a running call finishes unseen
+            results[name] = None
+            errors[name] = "timeout"
+            latency_ms[name] = round((time.monotonic() - started) * 1000, 1)
+        except Exception as e:
+            results[name] = None
+            errors[name] = str(e)
+            latency_ms[name] = measured.get(name)
+    return results, latency_ms, errors
+
+
+def get_dashboard_metrics(config):
+    """Telegraf metrics as shown on the dashboard.
+
+    Logs a detected process crash and zeroes stale values of disabled inputs.
+    """
+    metrics = get_telegraf_metrics()
+
+    process_crashed = metrics.pop("process_crash_detected", False)
+    if process_crashed:
+        event_log.log(
+            "error",
+            "telegraf",
+            "Process crash detected — data gap in collection",
+            detail="Telegraf restarted inside the container (entrypoint loop). Counters reset.",
+        )
+        # Do NOT call record_restart — a process crash inside the container is not a
+        # container restart. Docker StartedAt is unchanged. Last Restart shows only
+        # container-level events (deploy / manual / unplanned).
+
+    metrics["nodes_configured"] = len(config.get("nodes", []))
+    # Zero out stale metrics (counters, scan times, derived rates) for disabled inputs
+    opcua_enabled = config.get("opcua", {}).get("enabled", True)
+    modbus_enabled = config.get("modbus", {}).get("enabled", False)
+    for prefix, enabled in (("opcua_", opcua_enabled), ("modbus_", modbus_enabled)):
+        if not enabled:
+            for key in metrics:
+                if key.startswith(prefix):
+                    metrics[key] = 0
+    metrics["any_input_active"] = opcua_enabled or modbus_enabled
+    metrics["process_crashed"] = process_crashed
+    return metrics
+
+
+def get_snapshot():
+    """Collect all dashboard sections in one pass. Requires a Flask app context."""
+    from flask import current_app
+
+    app = current_app._get_current_object()
+    config = config_store.load()
+
+    def _in_app(fn):
+        def run():
+            with app.app_context():
+                return fn()
+
+        return run
+
+    sources = {
+        "health": get_system_health,
+        "telegraf_status": _in_app(get_telegraf_status),
+        "telegraf_metrics": _in_app(lambda: get_dashboard_metrics(config)),
+        "gateway_info": _in_app(lambda: get_gateway_info(config)),
+        "telegraf_running": get_telegraf_container_running,
+        "events": event_log.get_events,
+    }
+    results, latency_ms, errors = gather(sources, SECTION_TIMEOUTS)
+    results["latency_ms"] = latency_ms
+    results["errors"] = errors
+    return results
@@ -0,0 +1,230 @@
+"""
+Per-device limits on the requests the gateway itself sends to PLCs.
+
+Telegraf already polls the devices; on top of that every open browser tab can
+browse, auto-refresh values and test the connection, and the tag crawler
+walks the address space in the background. The governor keeps that extra
+load bounded per endpoint:
+
+- at most `concurrency` requests in flight,
+- at most `rate` requests per second on average (token bucket holding up to
+  `burst` tokens),
+- waiting requests are served by priority (INTERACTIVE before BACKGROUND),
+  then in arrival order,
+- identical requests already in flight are coalesced (singleflight): ten
+  tabs expanding the same folder cause one Browse.
+
+It lives on the async runtime's loop: callers await call() (or hold slot()
+around one request) from coroutines running there. Queue depth, wait times
+and coalesced calls are exported as gateway_device_* metrics.
+"""
+
+import asyncio
+import contextlib
+import heapq
+import itertools
+import threading
+import time
+
+from app.services import metrics_exporter
+
+INTERACTIVE = 0
+BACKGROUND = 1
+_PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+_CONCURRENCY = 4
+_RATE = 20.0
+_BURST = 20
+
+
+class _Endpoint:
+    """Loop-thread state of one device."""
+
+    def __init__(self, burst):
+        self.in_flight = 0
+        self.waiting = []  # heap of (priority, seq, future)
+        self.tokens = float(burst)
+        self.refilled = time.monotonic()
+        self.timer = None
+
+
+class _Flight:
+    def __init__(self, task):
+        self.task = task
+        self.callers = 0
+
+
+class DeviceGovernor:
+    """Concurrency, rate and priority limits per device endpoint."""
+
+    def __init__(self, concurrency=_CONCURRENCY, rate=_RATE, burst=_BURST):
+        self._concurrency = max(1, concurrency)
+        self._rate = rate
+        self._burst = max(1, burst)
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        # Loop-thread state
+        self._endpoints = {}
+        self._flights = {}
+        self._stats = {}
+
+    # --- Slots ---
+
+    @contextlib.asynccontextmanager
+    async def slot(self, endpoint, priority=INTERACTIVE):
+        """Hold one of `endpoint`'s request slots for the body of the block."""
+        state = await self._acquire(endpoint, priority)
+        try:
+            yield
+        finally:
+            state.in_flight -= 1
+            self._dispatch(endpoint, state)
+
+    async def _acquire(self, endpoint, priority):
+        state = self._endpoints.get(endpoint)
+        if state is None:
+            state = self._endpoints[endpoint] = _Endpoint(self._burst)
+        started = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(state.waiting, (priority, next(self._seq), future))
+        self._dispatch(endpoint, state)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just as the caller gave up: hand the slot on
+                state.in_flight -= 1
+                self._dispatch(endpoint, state)
+            else:
+                self._set_depth(endpoint, state)
+            raise
+        waited = time.monotonic() - started
+        metrics_exporter.DEVICE_REQUEST_WAIT.observe(
+            waited, endpoint=endpoint, priority=_PRIORITY_NAMES.get(priority, priority)
+        )
+        self._count(endpoint, "requests", waited)
+        return state
+
+    def _take_token(self, state):
+        """Take a token, or return the seconds until the next one."""
+        if not self._rate:
+            return 0.0
+        now = time.monotonic()
+        state.tokens = min(
+            self._burst, state.tokens + (now - state.refilled) * self._rate
+        )
+        state.refilled = now
+        if state.tokens >= 1:
+            state.tokens -= 1
+            return 0.0
+        return (1 - state.tokens) / self._rate
+
+    def _dispatch(self, endpoint, state):
+        """Grant slots to the best waiters while concurrency and tokens allow."""
+        while state.waiting and state.in_flight < self._concurrency:
+            future = state.waiting[0][2]
+            if future.done():  # cancelled while queued
+                heapq.heappop(state.waiting)
+                continue
+            wait = self._take_token(state)
+            if wait:
+                if state.timer is None:
+                    loop = asyncio.get_running_loop()
+                    state.timer = loop.call_later(wait, self._on_timer, endpoint, state)
+                break
+            heapq.heappop(state.waiting)
+            state.in_flight += 1
+            future.set_result(None)
+        self._set_depth(endpoint, state)
+
+    def _on_timer(self, endpoint, state):
+        state.timer = None
+        self._dispatch(endpoint, state)
+
+    def _set_depth(self, endpoint, state):
+        depth = sum(1 for _, _, f in state.waiting if not f.done())
+        metrics_exporter.DEVICE_QUEUE_DEPTH.set(depth, endpoint=endpoint)
+
+    # --- Calls ---
+
+    async def call(self, endpoint, fn, priority=INTERACTIVE, key=None):
+        """Return `await fn()` run in one of `endpoint`'s slots.
+
+        Callers passing the same `key` while a call with that key is queued
+        or running share its result instead of sending their own request. The
+        shared call is cancelled only when every caller waiting for it is.
+        """
+        if key is None:
+            async with self.slot(endpoint, priority):
+                return await fn()
+
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(self._lead(endpoint, fn, priority)))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda task: self._land(key, flight, task))
+        else:
+            self._count(endpoint, "coalesced")
+            metrics_exporter.DEVICE_COALESCED.inc(endpoint=endpoint)
+        flight.callers += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.callers -= 1
+            if not flight.callers and not flight.task.done():
+                self._land(key, flight)
+                flight.task.cancel()
+
+    async def _lead(self, endpoint, fn, priority):
+        async with self.slot(endpoint, priority):
+            return await fn()
+
+    def _land(self, key, flight, task=None):
+        """Stop offering `flight` to new callers (and retrieve its outcome once
+        done, so the loop does not log an exception the callers received)."""
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if task is not None and not task.cancelled():
+            task.exception()
+
+    # --- Introspection ---
+
+    def _count(self, endpoint, field, waited=None):
+        with self._lock:
+            entry = self._stats.setdefault(
+                endpoint,
+                {
+                    "requests": 0,
+                    "coalesced": 0,
+                    "total_wait_ms": 0.0,
+                    "max_wait_ms": 0.0,
+                },
+            )
+            entry[field] += 1
+            if waited is not None:
+                entry["total_wait_ms"] += waited * 1000
+                entry["max_wait_ms"] = max(entry["max_wait_ms"], waited * 1000)
+
+    def get_stats(self):
+        """Per endpoint: requests sent, calls coalesced, current queue and
+        in-flight counts, and mean/max time spent waiting for a slot (ms)."""
+        with self._lock:
+            stats = {ep: dict(entry) for ep, entry in self._stats.items()}
+        for endpoint, entry in stats.items():
+            state = self._endpoints.get(endpoint)
+            total = entry.pop("total_wait_ms")
+            entry["mean_wait_ms"] = (
+                round(total / entry["requests"], 2) if entry["requests"] else 0.0
+            )
+            entry["max_wait_ms"] = round(entry["max_wait_ms"], 2)
+            entry["in_flight"] = state.in_flight if state else 0
+            entry["queued"] = (
+                sum(1 for _, _, f in list(state.waiting) if not f.done())
+                if state
+                else 0
+            )
+        return stats
+
+
+# Module-level singleton
+device_governor = DeviceGovernor()
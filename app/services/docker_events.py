@@ -0,0 +1,363 @@
+"""
+Docker events subscriber for the gateway's compose project.
+
+Keeps an in-memory view of every project container (status, health, start time)
+and records Telegraf container restarts the moment Docker reports them, instead
+of re-listing containers and comparing StartedAt strings on every dashboard poll.
+"""
+
+import contextlib
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+_COMPOSE_PROJECT_LABEL = "com.docker.compose.project"
+_COMPOSE_SERVICE_LABEL = "com.docker.compose.service"
+
+# Docker event action -> container status. Health events ("health_status: healthy")
+# and exec events are handled separately.
+_ACTION_STATUS = {
+    "create": "created",
+    "start": "running",
+    "restart": "running",
+    "unpause": "running",
+    "pause": "paused",
+    "die": "exited",
+}
+
+
+def detect_compose_project(containers):
+    """Return the compose project the gateway belongs to.
+
+    Prefers the container we are running inside (matched via HOSTNAME), then falls
+    back to the most common project label among the given containers.
+    """
+    hostname = os.environ.get("HOSTNAME", "")
+    for c in containers:
+        if c.short_id in hostname or c.name in hostname:
+            return c.labels.get(_COMPOSE_PROJECT_LABEL)
+
+    projects = {}
+    for c in containers:
+        p = c.labels.get(_COMPOSE_PROJECT_LABEL, "")
+        projects[p] = projects.get(p, 0) + 1
+    if not projects:
+        return None
+    return max(projects, key=projects.get)
+
+
+def _format_event_time(event):
+    """Docker-style ISO timestamp ("2026-03-07T10:30:00.123456789Z") for an event."""
+    nanos = event.get("timeNano")
+    if nanos is None:
+        nanos = int(event.get("time", time.time()) * 1_000_000_000)
+    secs, frac = divmod(int(nanos), 1_000_000_000)
+    dt = datetime.fromtimestamp(secs, tz=timezone.utc)
+    return dt.strftime("%Y-%m-%dT%H:%M:%S") + f".{frac:09d}Z"
+
+
+def _event_epoch(event):
+    nanos = event.get("timeNano")
+    if nanos is not None:
+        return int(nanos) / 1_000_000_000
+    return float(event.get("time", time.time()))
+
+
+class ContainerEventWatcher:
+    """Background subscriber to container events of the compose project.
+
+    Maintains the current status of each container and, for the Telegraf service,
+    records every (re)start in config_store with Docker's exact timestamp. The
+    restart reason comes from system_monitor's intentional-restart flag: deploys
+    and manual starts set it beforehand, anything else is "unplanned".
+    """
+
+    def __init__(self, telegraf_service="telegraf"):
+        self._telegraf_service = telegraf_service
+        self._app = None
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._connected = False
+        self._stream = None
+        self._project = None
+        # container id -> {"service", "name", "status", "health", "started_at"}
+        self._containers = {}
+        # service -> (started_at_iso, event_epoch) of the last observed start
+        self._last_start = {}
+
+    # --- Lifecycle ---
+
+    def start(self, app=None):
+        """Start the watcher thread (idempotent). Reconnects with backoff on errors."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._app = app
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="docker-events", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        stream = self._stream
+        if stream is not None:
+            with contextlib.suppress(Exception):
+                stream.close()
+
+    def is_running(self):
+        """True while the container snapshot is valid and the event stream is live."""
+        with self._lock:
+            return self._connected
+
+    def _run(self):
+        backoff = 1
+        while not self._stop_event.is_set():
+            try:
+                import docker
+
+                client = docker.from_env()
+                self._watch(client)
+                backoff = 1
+            except Exception as e:
+                logger.debug("Docker event stream unavailable: %s", e)
+            with self._lock:
+                self._connected = False
+            self._stop_event.wait(backoff)
+            backoff = min(backoff * 2, 60)
+
+    def _watch(self, client):
+        """Snapshot the project containers, then apply events until the stream ends."""
+        since = int(time.time())
+        containers = client.containers.list(
+            all=True, filters={"label": _COMPOSE_PROJECT_LABEL}
+        )
+        project = detect_compose_project(containers)
+        self._snapshot(client, [c for c in containers if self._in_project(c, project)])
+
+        filters = {"type": "container"}
+        if project:
+            filters["label"] = f"{_COMPOSE_PROJECT_LABEL}={project}"
+        # `since` replays anything that happened between the list and the subscribe.
+        stream = client.events(since=since, filters=filters, decode=True)
+        self._stream = stream
+        with self._lock:
+            self._project = project
+            self._connected = True
+        try:
+            for event in stream:
+                if self._stop_event.is_set():
+                    break
+                self._handle_event(client, event)
+        finally:
+            self._stream = None
+            with contextlib.suppress(Exception):
+                stream.close()
+
+    @staticmethod
+    def _in_project(container, project):
+        return (
+            project is None or container.labels.get(_COMPOSE_PROJECT_LABEL) == project
+        )
+
+    def _snapshot(self, client, containers):
+        snapshot = {}
+        telegraf_started_at = None
+        for c in containers:
+            service = c.labels.get(_COMPOSE_SERVICE_LABEL, c.name)
+            entry = {
+                "service": service,
+                "name": c.name,
+                "status": c.status,
+                "health": None,
+                "started_at": None,
+            }
+            if service == self._telegraf_service:
+                with contextlib.suppress(Exception):
+                    c.reload()
+                    state = c.attrs.get("State", {})
+                    entry["started_at"] = state.get("StartedAt")
+                    entry["health"] = (state.get("Health") or {}).get("Status")
+                    telegraf_started_at = entry["started_at"]
+            snapshot[c.id] = entry
+
+        with self._cond:
+            self._containers = snapshot
+            known = self._last_start.get(self._telegraf_service)
+            if telegraf_started_at and (not known or known[0] != telegraf_started_at):
+                # Epoch 0: a start seen only in a snapshot never satisfies wait_for_start()
+                self._last_start[self._telegraf_service] = (telegraf_started_at, 0.0)
+            self._cond.notify_all()
+
+        # A restart that happened while the gateway was down is only visible here.
+        if telegraf_started_at:
+            self._reconcile_startup_restart(telegraf_started_at)
+
+    def _reconcile_startup_restart(self, started_at):
+        from app.services import config_store
+        from app.services.system_monitor import (
+            _compute_unexpected_restart,
+            get_intentional_restart_reason,
+        )
+
+        if get_intentional_restart_reason():
+            return
+        with self._app_context():
+            last = config_store.load().get("_meta", {}).get("last_restart", {})
+            if _compute_unexpected_restart(started_at, last.get("started_at")):
+                config_store.record_restart(started_at, "unplanned")
+
+    # --- Event handling ---
+
+    def _handle_event(self, client, event):
+        if event.get("Type", event.get("type")) != "container":
+            return
+        action = event.get("Action", event.get("status", "")) or ""
+        actor = event.get("Actor", {})
+        container_id = actor.get("ID", event.get("id"))
+        attrs = actor.get("Attributes", {})
+        if not container_id:
+            return
+
+        if action == "destroy":
+            with self._cond:
+                self._containers.pop(container_id, None)
+                self._cond.notify_all()
+            return
+
+        with self._cond:
+            entry = self._containers.get(container_id)
+            if entry is None:
+                entry = {
+                    "service": attrs.get(_COMPOSE_SERVICE_LABEL, attrs.get("name", "")),
+                    "name": attrs.get("name", ""),
+                    "status": "created",
+                    "health": None,
+                    "started_at": None,
+                }
+                self._containers[container_id] = entry
+            if action.startswith("health_status"):
+                entry["health"] = action.split(":", 1)[-1].strip()
+            elif action in _ACTION_STATUS:
+                entry["status"] = _ACTION_STATUS[action]
+                if action == "die":
+                    entry["health"] = None
+            service = entry["service"]
+            self._cond.notify_all()
+
+        if action == "start" and service == self._telegraf_service:
+            self._on_telegraf_start(client, container_id, event)
+
+    def _on_telegraf_start(self, client, container_id, event):
+        from app.services import config_store, event_log
+        from app.services.system_monitor import get_intentional_restart_reason
+
+        started_at = None
+        with contextlib.suppress(Exception):
+            started_at = client.containers.get(container_id).attrs["State"]["StartedAt"]
+        if not started_at:
+            started_at = _format_event_time(event)
+
+        with self._cond:
+            previous = self._last_start.get(self._telegraf_service)
+            self._containers[container_id]["started_at"] = started_at
+        # A replayed event for a start we already recorded is not recorded again
+        replayed = previous is not None and previous[0] == started_at
+        reason = None
+        if not replayed:
+            reason = get_intentional_restart_reason() or "unplanned"
+            with self._app_context():
+                config_store.record_restart(started_at, reason)
+
+        # Wake wait_for_start() only now: its callers clear the intentional-restart
+        # flag as soon as it returns, so the reason must be read and stored first.
+        with self._cond:
+            self._last_start[self._telegraf_service] = (started_at, _event_epoch(event))
+            self._cond.notify_all()
+        if reason == "unplanned":
+            event_log.log(
+                "warning",
+                "telegraf",
+                "Telegraf container restarted unexpectedly",
+                detail=f"Started at {started_at}",
+            )
+
+    def _app_context(self):
+        if self._app is not None:
+            return self._app.app_context()
+        return contextlib.nullcontext()
+
+    # --- Queries ---
+
+    def get_containers(self):
+        """Return a list of {"service", "name", "status", "health", "started_at"}."""
+        with self._lock:
+            return [dict(entry) for entry in self._containers.values()]
+
+    def get_service(self, service):
+        """Return the state of the first container of `service`, or None."""
+        with self._lock:
+            for entry in self._containers.values():
+                if entry["service"] == service:
+                    return dict(entry)
+        return None
+
+    def wait_for_start(self, service, after, timeout=15):
+        """Block until `service` reports a start event newer than `after` (epoch).
+
+        Returns the exact started_at ISO string, or None on timeout or when the
+        event stream is not connected (callers then fall back to polling Docker).
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if not self._connected:
+                    return None
+                start = self._last_start.get(service)
+                if start and start[1] >= after:
+                    return start[0]
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+
+def _query_started_at(service):
+    """StartedAt of the first container named like `service`, straight from Docker."""
+    try:
+        import docker
+
+        client = docker.from_env()
+        containers = client.containers.list(all=True, filters={"name": service})
+        if not containers:
+            return None
+        containers[0].reload()
+        return containers[0].attrs["State"]["StartedAt"]
+    except Exception:
+        return None
+
+
+def record_intentional_start(reason, since, service="telegraf"):
+    """Wait for the `service` start triggered after `since` and make sure it is recorded.
+
+    The watcher records the restart (with the pending intentional-restart
+    reason) as soon as the start event arrives. Without a live event stream,
+    Docker is queried directly and the start is recorded with `reason` — the
+    restart/start calls are synchronous, so StartedAt is already up to date.
+    """
+    from app.services import config_store
+
+    if container_watcher.wait_for_start(service, after=since):
+        return
+    started_at = _query_started_at(service) or datetime.now(timezone.utc).isoformat()
+    config_store.record_restart(started_at, reason)
+
+
+# Module-level singleton
+container_watcher = ContainerEventWatcher()
@@ -0,0 +1,89 @@
+"""
+In-process publish/subscribe for the Server-Sent Events stream.
+
+Producers (event log, MQTT tail, dashboard feed) publish to named channels.
+Each subscriber gets its own bounded queue, so a slow browser only ever costs
+its own memory: when a queue overflows the oldest items are dropped and the
+subscriber is told to resync instead of blocking the producer.
+"""
+
+import threading
+from collections import deque
+
+# Items kept per subscriber before the oldest are dropped
+_DEFAULT_MAXLEN = 256
+
+_lock = threading.Lock()
+_subscribers = set()
+
+
+class Subscription:
+    """Bounded queue of (channel, data) items for one consumer."""
+
+    def __init__(self, channels, maxlen=_DEFAULT_MAXLEN):
+        self.channels = frozenset(channels)
+        self._queue = deque(maxlen=maxlen)
+        self._cond = threading.Condition()
+        self._overflowed = False
+        self._closed = False
+
+    def _put(self, channel, data):
+        with self._cond:
+            if len(self._queue) == self._queue.maxlen:
+                self._overflowed = True
+            self._queue.append((channel, data))
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Return the next (channel, data), or None on timeout or close.
+
+        After an overflow, returns ("resync", None) once so the consumer can
+        re-fetch full state; items still queued are delivered afterwards.
+        """
+        with self._cond:
+            if not self._queue and not self._closed:
+                self._cond.wait(timeout)
+            if self._overflowed:
+                self._overflowed = False
+                return ("resync", None)
+            if self._queue:
+                return self._queue.popleft()
+            return None
+
+    def close(self):
+        unsubscribe(self)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self):
+        return self._closed
+
+
+def subscribe(channels, maxlen=_DEFAULT_MAXLEN):
+    sub = Subscription(channels, maxlen=maxlen)
+    with _lock:
+        _subscribers.add(sub)
+    return sub
+
+
+def unsubscribe(sub):
+    with _lock:
+        _subscribers.discard(sub)
+
+
+def publish(channel, data):
+    """Deliver `data` to every subscriber of `channel`. Never blocks on consumers."""
+    with _lock:
+        targets = [s for s in _subscribers if channel in s.channels]
+    for sub in targets:
+        sub._put(channel, data)
+    return len(targets)
+
+
+def subscriber_count(channel=None):
+    with _lock:
+        if channel is None:
+            return len(_subscribers)
+        return sum(1 for s in _subscribers if channel in s.channels)
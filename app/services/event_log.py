@@ -8,6 +8,8 @@ import threading
 from collections import deque
 from datetime import datetime, timezone
 
+from app.services import event_bus
+
 _lock = threading.Lock()
 _events = deque(maxlen=150)
 
@@ -29,6 +31,7 @@ def log(level, component, message, detail=None):
         entry["detail"] = str(detail)[:500]
     with _lock:
         _events.appendleft(entry)
+    event_bus.publish("log", {"event": entry})
 
 
 def get_events(limit=100):
@@ -39,3 +42,4 @@ def get_events(limit=100):
 def clear():
     with _lock:
         _events.clear()
+    event_bus.publish("log", {"cleared": True})
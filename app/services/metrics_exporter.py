@@ -0,0 +1,530 @@
+"""
+OpenMetrics exposition for Prometheus-compatible scrapers.
+
+Gateway-side counters (HTTP requests, deploys, restarts) are updated in-process
+as things happen. Host and Telegraf values come from the dashboard feed's cached
+state, so rendering a scrape only formats numbers that are already in memory.
+No client library is needed for this small, fixed set of metric families.
+"""
+
+import math
+import threading
+
+# Seconds. Covers quick JSON APIs up to slow OPC UA browses and deploys.
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield "_total", dict(zip(self.labelnames, key, strict=True)), value
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def get(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield "", dict(zip(self.labelnames, key, strict=True)), value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = {
+                    "counts": [0] * len(self.buckets),
+                    "sum": 0.0,
+                }
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry["counts"][i] += 1
+                    break
+            entry["sum"] += value
+
+    def samples(self):
+        with self._lock:
+            items = sorted(
+                (k, {"counts": list(v["counts"]), "sum": v["sum"]})
+                for k, v in self._values.items()
+            )
+        for key, entry in items:
+            labels = dict(zip(self.labelnames, key, strict=True))
+            cumulative = 0
+            for bound, count in zip(self.buckets, entry["counts"], strict=True):
+                cumulative += count
+                yield "_bucket", {**labels, "le": bound}, cumulative
+            yield "_count", labels, cumulative
+            yield "_sum", labels, entry["sum"]
+
+
+HTTP_REQUESTS = Counter(
+    "gateway_http_requests",
+    "HTTP requests handled by the gateway UI and API.",
+    ("method", "route", "code"),
+)
+HTTP_LATENCY = Histogram(
+    "gateway_http_request_duration_seconds",
+    "Time spent handling gateway HTTP requests.",
+    ("method", "route"),
+)
+DEPLOYS = Counter(
+    "gateway_deploys",
+    "Telegraf configuration deploys, by outcome.",
+    ("result",),
+)
+RESTARTS = Counter(
+    "gateway_telegraf_restarts",
+    "Telegraf container restarts recorded by the gateway, by reason.",
+    ("reason",),
+)
+
+OPCUA_BROWSE_CACHE = Counter(
+    "gateway_opcua_browse_cache_lookups",
+    "OPC UA browse/node-details lookups in the browse cache, by kind and result.",
+    ("kind", "result"),
+)
+
+ASYNC_OPERATION_LATENCY = Histogram(
+    "gateway_async_operation_duration_seconds",
+    "Time spent in operations run on the gateway's async runtime (OPC UA calls),"
+    " by operation and outcome.",
+    ("operation", "result"),
+)
+DEVICE_QUEUE_DEPTH = Gauge(
+    "gateway_device_queue_depth",
+    "Gateway requests waiting for a slot on a device, by endpoint.",
+    ("endpoint",),
+)
+DEVICE_REQUEST_WAIT = Histogram(
+    "gateway_device_request_wait_seconds",
+    "Time gateway requests waited for a slot on a device, by endpoint and priority.",
+    ("endpoint", "priority"),
+)
+DEVICE_COALESCED = Counter(
+    "gateway_device_coalesced_requests",
+    "Gateway requests answered by an identical request already in flight.",
+    ("endpoint",),
+)
+
+_REGISTRY = (
+    HTTP_REQUESTS,
+    HTTP_LATENCY,
+    DEPLOYS,
+    RESTARTS,
+    OPCUA_BROWSE_CACHE,
+    ASYNC_OPERATION_LATENCY,
+    DEVICE_QUEUE_DEPTH,
+    DEVICE_REQUEST_WAIT,
+    DEVICE_COALESCED,
+)
+
+
+def observe_request(method, route, status_code, seconds):
+    HTTP_REQUESTS.inc(method=method, route=route, code=status_code)
+    HTTP_LATENCY.observe(seconds, method=method, route=route)
+
+
+# ---------------------------------------------------------------------------
+# Families derived from cached dashboard state
+# ---------------------------------------------------------------------------
+
+
+def _state_families(state):
+    """Yield (name, type, help, [(labels, value)]) for each available section."""
+    health = state.get("health")
+    if health:
+        yield (
+            "gateway_cpu_usage_percent",
+            "gauge",
+            "Host CPU usage.",
+            [({}, health.get("cpu_percent"))],
+        )
+        yield (
+            "gateway_memory_usage_percent",
+            "gauge",
+            "Host memory usage.",
+            [({}, health.get("memory_percent"))],
+        )
+        yield (
+            "gateway_memory_used_bytes",
+            "gauge",
+            "Host memory in use.",
+            [({}, (health.get("memory_used_mb") or 0) * 1024 * 1024)],
+        )
+        yield (
+            "gateway_memory_total_bytes",
+            "gauge",
+            "Total host memory.",
+            [({}, (health.get("memory_total_mb") or 0) * 1024 * 1024)],
+        )
+        yield (
+            "gateway_disk_usage_percent",
+            "gauge",
+            "Root filesystem usage.",
+            [({}, health.get("disk_percent"))],
+        )
+        yield (
+            "gateway_network_sent_bytes",
+            "counter",
+            "Bytes sent on all interfaces.",
+            [({}, health.get("bytes_sent"))],
+        )
+        yield (
+            "gateway_network_received_bytes",
+            "counter",
+            "Bytes received on all interfaces.",
+            [({}, health.get("bytes_recv"))],
+        )
+
+    status = state.get("telegraf_status")
+    if status:
+        yield (
+            "telegraf_health_up",
+            "gauge",
+            "1 if the Telegraf health endpoint answers.",
+            [({}, 1 if status.get("running") else 0)],
+        )
+        if status.get("latency_ms") is not None:
+            yield (
+                "telegraf_health_check_latency_seconds",
+                "gauge",
+                "Response time of the latest Telegraf health check.",
+                [({}, status["latency_ms"] / 1000)],
+            )
+
+    running = state.get("telegraf_running")
+    if running and running.get("ok"):
+        yield (
+            "telegraf_container_running",
+            "gauge",
+            "1 if the Telegraf container is running.",
+            [({}, 1 if running.get("running") else 0)],
+        )
+
+    m = state.get("telegraf_metrics")
+    if m:
+        yield (
+            "telegraf_input_metrics_gathered",
+            "counter",
+            "Metrics gathered per input since Telegraf started.",
+            [
+                ({"input": "opcua"}, m.get("opcua_gathered")),
+                ({"input": "modbus"}, m.get("modbus_gathered")),
+            ],
+        )
+        yield (
+            "telegraf_input_gather_errors",
+            "counter",
+            "Gather errors per input since Telegraf started.",
+            [
+                ({"input": "opcua"}, m.get("opcua_errors")),
+                ({"input": "modbus"}, m.get("modbus_errors")),
+            ],
+        )
+        yield (
+            "telegraf_input_gather_time_seconds",
+            "gauge",
+            "Duration of the last gather per input.",
+            [
+                ({"input": "opcua"}, (m.get("opcua_scan_time_ms") or 0) / 1000),
+                ({"input": "modbus"}, (m.get("modbus_scan_time_ms") or 0) / 1000),
+            ],
+        )
+        yield (
+            "telegraf_opcua_reads",
+            "counter",
+            "OPC UA node reads since Telegraf started, by result.",
+            [
+                ({"result": "success"}, m.get("opcua_read_success")),
+                ({"result": "error"}, m.get("opcua_read_error")),
+            ],
+        )
+        out = {"output": "mqtt"}
+        yield (
+            "telegraf_output_metrics_written",
+            "counter",
+            "Metrics written per output.",
+            [(out, m.get("mqtt_written"))],
+        )
+        yield (
+            "telegraf_output_metrics_dropped",
+            "counter",
+            "Metrics dropped per output.",
+            [(out, m.get("mqtt_dropped"))],
+        )
+        yield (
+            "telegraf_output_write_errors",
+            "counter",
+            "Write errors per output.",
+            [(out, m.get("mqtt_errors"))],
+        )
+        yield (
+            "telegraf_output_buffer_size",
+            "gauge",
+            "Metrics waiting in the output buffer.",
+            [(out, m.get("mqtt_buffer_size"))],
+        )
+        yield (
+            "telegraf_output_buffer_limit",
+            "gauge",
+            "Capacity of the output buffer.",
+            [(out, m.get("mqtt_buffer_limit"))],
+        )
+        yield (
+            "telegraf_input_metrics_gathered_rate",
+            "gauge",
+            "Moving average of metrics gathered per second, per input.",
+            [
+                ({"input": "opcua"}, m.get("opcua_gathered_per_sec_avg")),
+                ({"input": "modbus"}, m.get("modbus_gathered_per_sec_avg")),
+            ],
+        )
+        yield (
+            "telegraf_output_metrics_written_rate",
+            "gauge",
+            "Moving average of metrics written per second, per output.",
+            [(out, m.get("mqtt_written_per_sec_avg"))],
+        )
+        yield (
+            "telegraf_output_drop_ratio",
+            "gauge",
+            "Share of metrics dropped instead of written (moving average).",
+            [(out, m.get("mqtt_drop_ratio"))],
+        )
+        yield (
+            "telegraf_opcua_read_error_ratio",
+            "gauge",
+            "Share of OPC UA reads that failed (moving average).",
+            [({}, m.get("opcua_read_error_ratio"))],
+        )
+        write_times = m.get("output_write_times") or {}
+        yield (
+            "telegraf_output_write_time_seconds",
+            "gauge",
+            "Mean write duration of the latest Telegraf interval, per output.",
+            [({"output": o}, t["last_ms"] / 1000) for o, t in write_times.items()],
+        )
+        yield (
+            "telegraf_output_write_time_quantile_seconds",
+            "gauge",
+            "Write duration percentiles over the recent Telegraf intervals.",
+            [
+                ({"output": o, "q": q}, t[f"p{pct}_ms"] / 1000)
+                for o, t in write_times.items()
+                for q, pct in (("0.5", 50), ("0.95", 95), ("0.99", 99))
+            ],
+        )
+        yield (
+            "telegraf_agent_metrics_gathered",
+            "counter",
+            "Metrics gathered by all Telegraf inputs.",
+            [({}, m.get("agent_metrics_gathered"))],
+        )
+        yield (
+            "telegraf_agent_metrics_written",
+            "counter",
+            "Metrics written by all Telegraf outputs.",
+            [({}, m.get("agent_metrics_written"))],
+        )
+        yield (
+            "telegraf_agent_metrics_dropped",
+            "counter",
+            "Metrics dropped by all Telegraf outputs.",
+            [({}, m.get("agent_metrics_dropped"))],
+        )
+        yield (
+            "telegraf_agent_gather_errors",
+            "counter",
+            "Gather errors across all Telegraf inputs.",
+            [({}, m.get("agent_gather_errors"))],
+        )
+        if m.get("telegraf_heap_alloc_bytes") is not None:
+            yield (
+                "telegraf_heap_alloc_bytes",
+                "gauge",
+                "Heap memory allocated by the Telegraf process.",
+                [({}, m.get("telegraf_heap_alloc_bytes"))],
+            )
+            yield (
+                "telegraf_heap_in_use_bytes",
+                "gauge",
+                "Heap spans in use by the Telegraf process.",
+                [({}, m.get("telegraf_heap_in_use_bytes"))],
+            )
+            yield (
+                "telegraf_heap_objects",
+                "gauge",
+                "Allocated heap objects in the Telegraf process.",
+                [({}, m.get("telegraf_heap_objects_bytes"))],
+            )
+            yield (
+                "telegraf_sys_bytes",
+                "gauge",
+                "Memory the Telegraf process obtained from the OS.",
+                [({}, m.get("telegraf_sys_bytes"))],
+            )
+            yield (
+                "telegraf_gc_cycles",
+                "counter",
+                "Completed garbage collection cycles in the Telegraf process.",
+                [({}, m.get("telegraf_num_gc"))],
+            )
+        if m.get("last_updated") is not None:
+            yield (
+                "telegraf_metrics_last_update_timestamp_seconds",
+                "gauge",
+                "Timestamp of the latest Telegraf internal metrics.",
+                [({}, m.get("last_updated"))],
+            )
+        yield (
+            "gateway_nodes_configured",
+            "gauge",
+            "OPC UA nodes in the gateway config.",
+            [({}, m.get("nodes_configured"))],
+        )
+
+    info = state.get("gateway_info")
+    if info:
+        if info.get("telegraf_uptime_seconds") is not None:
+            yield (
+                "telegraf_uptime_seconds",
+                "gauge",
+                "Seconds since the Telegraf container started.",
+                [({}, info["telegraf_uptime_seconds"])],
+            )
+        containers = info.get("containers") or []
+        if containers:
+            yield (
+                "gateway_container_running",
+                "gauge",
+                "1 if the compose service container is running.",
+                [
+                    (
+                        {"service": c.get("service", "")},
+                        1 if c.get("status") == "running" else 0,
+                    )
+                    for c in containers
+                ],
+            )
+
+
+# ---------------------------------------------------------------------------
+# Rendering
+# ---------------------------------------------------------------------------
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value):
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    value = float(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(value)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels.items():
+        if key == "le":
+            value = _format_value(float(value))
+        parts.append(f'{key}="{_escape(value)}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _family_lines(name, metric_type, documentation, samples):
+    lines = [f"# TYPE {name} {metric_type}", f"# HELP {name} {_escape(documentation)}"]
+    for suffix, labels, value in samples:
+        if value is None:
+            continue
+        lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+    return lines
+
+
+def render(state=None, state_age_seconds=None):
+    """Render all metric families as OpenMetrics text (ending in "# EOF")."""
+    lines = []
+    for metric in _REGISTRY:
+        lines += _family_lines(
+            metric.name, metric.type, metric.documentation, metric.samples()
+        )
+
+    for name, metric_type, documentation, values in _state_families(state or {}):
+        suffix = "_total" if metric_type == "counter" else ""
+        lines += _family_lines(
+            name,
+            metric_type,
+            documentation,
+            ((suffix, labels, value) for labels, value in values),
+        )
+
+    if state_age_seconds is not None:
+        lines += _family_lines(
+            "gateway_metrics_state_age_seconds",
+            "gauge",
+            "Age of the cached host and Telegraf values in this scrape.",
+            [("", {}, round(state_age_seconds, 3))],
+        )
+
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
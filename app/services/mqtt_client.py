@@ -7,6 +7,8 @@ from datetime import datetime, timezone
 
 import paho.mqtt.client as mqtt
 
+from app.services import event_bus
+
 
 def _parse_endpoint(endpoint):
     use_tls = endpoint.startswith("mqtts://")
@@ -125,14 +127,14 @@ class MqttTailSubscriber:
 
             def on_message(c, userdata, msg):
                 payload = msg.payload.decode("utf-8", errors="replace")[:2048]
+                entry = {
+                    "timestamp": datetime.now(timezone.utc).isoformat(),
+                    "topic": msg.topic,
+                    "payload": payload,
+                }
                 with self._lock:
-                    self._messages.appendleft(
-                        {
-                            "timestamp": datetime.now(timezone.utc).isoformat(),
-                            "topic": msg.topic,
-                            "payload": payload,
-                        }
-                    )
+                    self._messages.appendleft(entry)
+                event_bus.publish("tail", {"message": entry})
 
             client.on_connect = on_connect
             client.on_message = on_message
@@ -145,6 +147,9 @@ class MqttTailSubscriber:
                 client.loop_start()
                 self._client = client
                 self._thread_running = True
+                event_bus.publish(
+                    "tail", {"running": True, "topic": self._subscribe_topic}
+                )
                 return {"ok": True, "message": f"Subscribed to {host}:{port}"}
             except Exception as e:
                 return {"ok": False, "error": str(e)}
@@ -157,9 +162,12 @@ class MqttTailSubscriber:
             except Exception:
                 pass
             self._client = None
+        was_running = self._thread_running
         self._thread_running = False
         self._endpoint = None
         self._subscribe_topic = None
+        if was_running:
+            event_bus.publish("tail", {"running": False})
 
     def is_running(self):
         return self._thread_running
@@ -174,6 +182,7 @@ class MqttTailSubscriber:
     def clear_messages(self):
         with self._lock:
             self._messages.clear()
+        event_bus.publish("tail", {"cleared": True})
 
 
 # Module-level singleton
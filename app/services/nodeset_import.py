@@ -0,0 +1,382 @@
+"""
+Offline tag index from an OPC UA NodeSet2 XML export.
+
+Integrators hand over NodeSet2 files (often hundreds of MB, optionally
+gzipped) long before the live server is reachable. The importer streams the
+file with iterparse, clearing every node element once it is read, so memory
+stays flat whatever the file size. Nodes go to a temporary SQLite staging
+file next to the index; parents, browse paths and custom data type names are
+resolved there with one SQL pass per tree level, and the result replaces the
+server's rows in the tag index. Search, "add all matching" and the tag tree
+then work as after a crawl.
+
+What gets indexed matches TagCrawler: Objects and Variables reachable from
+the Objects folder (i=85) through hierarchical references, outside namespace
+0, without properties (HasProperty children).
+
+Namespace indexes in the file refer to its own NamespaceUris. With the
+server's namespace array every node id is moved to the index its URI has on
+the server. A URI the server does not list (or every URI, when the server
+could not be asked) stays in the node id as "nsu=<uri>;..." and is reported
+as a warning; such ids are resolved when the tags are added to the selection.
+"""
+
+import gzip
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import xml.etree.ElementTree as ET  # nosec B405 - NodeSet2 files come from the user
+from datetime import datetime, timezone
+
+from asyncua import ua
+
+logger = logging.getLogger(__name__)
+
+_UA = "{http://opcfoundation.org/UA/2011/03/UANodeSet.xsd}"
+_INSTANCES = {_UA + "UAObject": "Object", _UA + "UAVariable": "Variable"}
+_OBJECTS_FOLDER = "i=85"
+
+# Hierarchical reference types (and HasProperty, kept apart to skip properties)
+_HIERARCHICAL = {
+    ua.ObjectIds.HierarchicalReferences,
+    ua.ObjectIds.HasChild,
+    ua.ObjectIds.Aggregates,
+    ua.ObjectIds.Organizes,
+    ua.ObjectIds.HasComponent,
+    ua.ObjectIds.HasOrderedComponent,
+    ua.ObjectIds.HasProperty,
+    ua.ObjectIds.HasNotifier,
+    ua.ObjectIds.HasEventSource,
+}
+_BASE_DATA_TYPE = f"i={ua.ObjectIds.BaseDataType}"
+
+_BATCH_ROWS = 5000
+_MAX_DEPTH = 64
+
+_NODE_ID = re.compile(r"^(?:ns=(\d+);)?(.+)$")
+_BROWSE_NAME = re.compile(r"^(?:\d+:)?(.*)$")
+
+_STAGING = """
+CREATE TABLE nodes (
+    node_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    node_class TEXT NOT NULL,
+    data_type TEXT,
+    parent TEXT,
+    property INTEGER NOT NULL DEFAULT 0,
+    path TEXT,
+    depth INTEGER
+);
+CREATE TABLE edges (parent TEXT NOT NULL, child TEXT NOT NULL, property INTEGER);
+CREATE TABLE types (node_id TEXT PRIMARY KEY, name TEXT NOT NULL);
+"""
+_STAGING_INDEXES = """
+CREATE INDEX nodes_parent ON nodes (parent);
+CREATE INDEX nodes_depth ON nodes (depth);
+CREATE INDEX edges_child ON edges (child);
+"""
+
+
+class _Cancelled(Exception):
+    pass
+
+
+def _namespaced(node_id):
+    """True for node ids outside namespace 0, by index or by URI."""
+    return node_id.startswith(("ns=", "nsu="))
+
+
+def _open(path):
+    with open(path, "rb") as f:
+        magic = f.read(2)
+    return gzip.open(path, "rb") if magic == b"\x1f\x8b" else open(path, "rb")
+
+
+class _Parser:
+    """Streams one NodeSet2 file into the staging database."""
+
+    def __init__(self, staging, server_uris, cancel, progress):
+        self._db = staging
+        self._server_uris = server_uris
+        self._cancel = cancel
+        self._progress = progress
+        self._aliases = {}
+        self._ns_map = {}
+        self.warnings = []
+        self._nodes, self._edges, self._types = [], [], []
+        self.parsed = 0
+
+    # --- Node ids ---
+
+    def _node_id(self, text):
+        """File node id (or alias) -> node id string as the server names it."""
+        text = self._aliases.get(text.strip(), text.strip())
+        match = _NODE_ID.match(text)
+        if not match:
+            return text
+        ns = int(match.group(1) or 0)
+        if ns == 0:
+            return match.group(2)
+        return f"{self._ns_map.get(ns, f'ns={ns}')};{match.group(2)}"
+
+    def _reference_type(self, text):
+        text = self._aliases.get(text.strip(), text.strip())
+        if text.startswith("i="):
+            return int(text[2:])
+        return getattr(ua.ObjectIds, text, None)
+
+    def _set_namespaces(self, element):
+        uris = [uri.text.strip() for uri in element.iter(_UA + "Uri") if uri.text]
+        for file_index, uri in enumerate(uris, start=1):
+            if self._server_uris and uri in self._server_uris:
+                self._ns_map[file_index] = f"ns={self._server_uris.index(uri)}"
+                continue
+            self._ns_map[file_index] = f"nsu={uri}"
+            if self._server_uris:
+                self.warnings.append(f"Namespace {uri} is not on the server")
+            else:
+                self.warnings.append(
+                    f"Namespace index of {uri} unverified: server not reachable"
+                )
+
+    # --- Elements ---
+
+    def _add_instance(self, element, node_class):
+        node_id = self._node_id(element.get("NodeId", ""))
+        parent = element.get("ParentNodeId")
+        parent = self._node_id(parent) if parent else None
+        prop = 0
+        refs = element.find(_UA + "References")
+        for ref in refs if refs is not None else ():
+            ref_type = self._reference_type(ref.get("ReferenceType", ""))
+            if ref_type not in _HIERARCHICAL or not ref.text:
+                continue
+            target = self._node_id(ref.text)
+            is_property = int(ref_type == ua.ObjectIds.HasProperty)
+            if ref.get("IsForward", "true").lower() == "false":
+                if parent is None or parent == target:
+                    parent = target
+                    prop = prop or is_property
+            else:
+                self._edges.append((node_id, target, is_property))
+        if not _namespaced(node_id):
+            return  # namespace 0 is not indexed, as in a crawl
+        data_type = None
+        if node_class == "Variable":
+            data_type = self._node_id(element.get("DataType", _BASE_DATA_TYPE))
+            if not _namespaced(data_type):
+                number = data_type[2:] if data_type.startswith("i=") else ""
+                data_type = ua.ObjectIdNames.get(
+                    int(number) if number.isdigit() else -1, data_type
+                )
+        name = _BROWSE_NAME.match(element.get("BrowseName", "")).group(1)
+        self._nodes.append((node_id, name, node_class, data_type, parent, prop))
+
+    def _add_data_type(self, element):
+        node_id = self._node_id(element.get("NodeId", ""))
+        if _namespaced(node_id):
+            name = _BROWSE_NAME.match(element.get("BrowseName", "")).group(1)
+            self._types.append((node_id, name))
+
+    def _flush(self):
+        if self._nodes:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO nodes"
+                " (node_id, name, node_class, data_type, parent, property)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                self._nodes,
+            )
+        if self._edges:
+            self._db.executemany("INSERT INTO edges VALUES (?, ?, ?)", self._edges)
+        if self._types:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO types VALUES (?, ?)", self._types
+            )
+        self._nodes, self._edges, self._types = [], [], []
+        self._progress(parsed=self.parsed)
+        if self._cancel.is_set():
+            raise _Cancelled
+
+    def parse(self, source):
+        root = None
+        for event, element in ET.iterparse(source, events=("start", "end")):  # nosec B314
+            if event == "start":
+                if root is None:
+                    root = element
+                continue
+            tag = element.tag
+            if tag == _UA + "NamespaceUris":
+                self._set_namespaces(element)
+            elif tag == _UA + "Alias":
+                self._aliases[element.get("Alias")] = (element.text or "").strip()
+            elif tag in _INSTANCES:
+                self._add_instance(element, _INSTANCES[tag])
+            elif tag == _UA + "UADataType":
+                self._add_data_type(element)
+            else:
+                continue
+            self.parsed += tag in _INSTANCES
+            if element is not root:
+                # Done with this top-level element (and everything before it)
+                root.clear()
+            if len(self._nodes) + len(self._edges) >= _BATCH_ROWS:
+                self._flush()
+        self._flush()
+
+
+def _resolve(db):
+    """Fill in parents from forward references, then browse paths and custom
+    data type names, one UPDATE per tree level."""
+    db.executescript(_STAGING_INDEXES)
+    db.execute(
+        "UPDATE nodes SET parent = ("
+        " SELECT e.parent FROM edges e WHERE e.child = nodes.node_id LIMIT 1"
+        ") WHERE parent IS NULL"
+    )
+    db.execute(
+        "UPDATE nodes SET property = 1 WHERE property = 0 AND EXISTS ("
+        " SELECT 1 FROM edges e WHERE e.child = nodes.node_id"
+        " AND e.parent = nodes.parent AND e.property = 1)"
+    )
+    db.execute(
+        "UPDATE nodes SET path = name, depth = 0 WHERE parent = ? AND property = 0",
+        (_OBJECTS_FOLDER,),
+    )
+    for depth in range(_MAX_DEPTH):
+        updated = db.execute(
+            "UPDATE nodes SET depth = ?, path = ("
+            " SELECT p.path FROM nodes p WHERE p.node_id = nodes.parent"
+            ") || '/' || name"
+            " WHERE path IS NULL AND property = 0 AND parent IN ("
+            " SELECT node_id FROM nodes WHERE depth = ?)",
+            (depth + 1, depth),
+        ).rowcount
+        if not updated:
+            break
+    db.execute(
+        "UPDATE nodes SET data_type = ("
+        " SELECT t.name FROM types t WHERE t.node_id = nodes.data_type"
+        ") WHERE data_type IN (SELECT node_id FROM types)"
+    )
+
+
+def import_nodeset(
+    path, index, server, server_uris=None, cancel=None, progress=lambda **_: None
+):
+    """Replace `server`'s rows in `index` with the nodes of the NodeSet2 file at
+    `path` (plain or gzipped XML). Returns the number of nodes indexed.
+
+    `server_uris` is the server's namespace array, if known; namespaces that
+    cannot be mapped through it are reported with progress(warnings=...).
+    Raises ET.ParseError for a file that is not well-formed XML.
+    """
+    cancel = cancel or threading.Event()
+    staging_path = f"{index.path}.import-{os.getpid()}-{time.time_ns()}"
+    db = sqlite3.connect(staging_path, isolation_level=None)
+    try:
+        db.execute("PRAGMA journal_mode=OFF")
+        db.execute("PRAGMA synchronous=OFF")
+        db.executescript(_STAGING)
+        db.execute("BEGIN")
+        parser = _Parser(db, server_uris, cancel, progress)
+        with _open(path) as source:
+            parser.parse(source)
+        if parser.warnings:
+            progress(warnings=parser.warnings)
+        db.execute("COMMIT")
+        _resolve(db)
+
+        crawl = time.time_ns()
+        indexed = 0
+        rows = db.execute(
+            "SELECT node_id, path, name, node_class, data_type FROM nodes"
+            " WHERE path IS NOT NULL"
+        )
+        while batch := rows.fetchmany(_BATCH_ROWS):
+            if cancel.is_set():
+                raise _Cancelled
+            index.add(server, crawl, [tuple(row) for row in batch])
+            indexed += len(batch)
+            progress(indexed=indexed)
+        index.prune(server, crawl)
+        return indexed
+    finally:
+        db.close()
+        os.remove(staging_path)
+
+
+class NodesetImporter:
+    """One background import at a time; mirrors TagCrawler's progress API."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        self._cancel = threading.Event()
+        self._progress = {"state": "idle"}
+
+    def start(self, path, index, server, server_uris=None, remove=False):
+        """Import `path` in the background (deleting it afterwards if `remove`).
+        Returns False if an import is already running."""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return False
+            self._cancel.clear()
+            self._progress = {
+                "state": "running",
+                "started": datetime.now(timezone.utc).isoformat(),
+                "finished": None,
+                "parsed": 0,
+                "indexed": 0,
+                "warnings": [],
+                "error": None,
+            }
+            self._thread = threading.Thread(
+                target=self._run,
+                args=(path, index, server, server_uris, remove),
+                name="nodeset-import",
+                daemon=True,
+            )
+            self._thread.start()
+        return True
+
+    def cancel(self):
+        self._cancel.set()
+
+    def is_running(self):
+        return bool(self._thread and self._thread.is_alive())
+
+    def join(self, timeout=None):
+        thread = self._thread
+        if thread:
+            thread.join(timeout)
+
+    def get_progress(self):
+        with self._lock:
+            return dict(self._progress)
+
+    def _update(self, **changes):
+        with self._lock:
+            self._progress.update(changes)
+
+    def _run(self, path, index, server, server_uris, remove):
+        try:
+            indexed = import_nodeset(
+                path, index, server, server_uris, self._cancel, self._update
+            )
+            self._update(state="done", indexed=indexed)
+        except _Cancelled:
+            self._update(state="cancelled")
+        except Exception as e:
+            logger.warning("NodeSet2 import of %s failed: %s", path, e)
+            self._update(state="failed", error=str(e) or type(e).__name__)
+        finally:
+            if remove:
+                os.remove(path)
+        self._update(finished=datetime.now(timezone.utc).isoformat())
+
+
+# Module-level singleton
+nodeset_importer = NodesetImporter()
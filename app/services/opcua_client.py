@@ -1,8 +1,12 @@
+import contextlib
+import secrets
+import time
+
 from asyncua import Client, ua
 
 
-def _build_client(config):
-    client = Client(url=config["endpoint"])
+def _build_client(config, watchdog_interval=1.0):
+    client = Client(url=config["endpoint"], watchdog_intervall=watchdog_interval)
     timeout = config.get("connect_timeout", "10s")
     client.session_timeout = int(timeout.replace("s", "")) * 1000
 
@@ -66,181 +70,638 @@ async def test_connection(config):
         client = _build_client(config)
         async with client:
             server_name = await client.nodes.server.read_browse_name()
-            return {"ok": True, "server": server_name.Name}
+            limits = await fetch_operation_limits(client, refresh=True)
+            return {"ok": True, "server": server_name.Name, "limits": limits}
     except Exception as e:
         return {"ok": False, "error": _friendly_error(e), "detail": str(e)}
 
 
+# Server capabilities that bound how much one request may carry. 0 (or a
+# server that does not expose the node) means no limit.
+OPERATION_LIMITS = {
+    "max_nodes_per_read": ua.ObjectIds.Server_ServerCapabilities_OperationLimits_MaxNodesPerRead,
+    "max_nodes_per_browse": ua.ObjectIds.Server_ServerCapabilities_OperationLimits_MaxNodesPerBrowse,
+    "max_monitored_items_per_call": ua.ObjectIds.Server_ServerCapabilities_OperationLimits_MaxMonitoredItemsPerCall,
+    "max_browse_continuation_points": ua.ObjectIds.Server_ServerCapabilities_MaxBrowseContinuationPoints,
+}
+
+# Server url -> limits, probed once per server (or on every test_connection)
+_operation_limits = {}
+
+
+async def fetch_operation_limits(client, refresh=False):
+    """The server's OperationLimits as {name: int}, with one Read."""
+    key = client.server_url.geturl()
+    limits = _operation_limits.get(key)
+    if limits is None or refresh:
+        values = await _read_attributes(
+            client,
+            [(ua.NodeId(i), ua.AttributeIds.Value) for i in OPERATION_LIMITS.values()],
+        )
+        limits = {
+            name: _attribute(dv, int) or 0
+            for name, dv in zip(OPERATION_LIMITS, values, strict=True)
+        }
+        _operation_limits[key] = limits
+    return limits
+
+
+async def _chunk_size(client, limit_name, default):
+    """Items per request: the server's limit, capped at `default`."""
+    limit = (await fetch_operation_limits(client))[limit_name]
+    return min(limit, default) if limit else default
+
+
+# The fetch_* coroutines run on an already connected client: the session pool
+# (opcua_pool.run) in the routes, or a one-shot session in the wrappers below.
+
+
+# Children are whatever a forward HierarchicalReferences browse returns, the same
+# set Node.get_children() yields.
+_HIERARCHICAL_REFERENCES = ua.NodeId(ua.ObjectIds.HierarchicalReferences)
+_CHILD_RESULT_MASK = (
+    ua.BrowseResultMask.BrowseName
+    | ua.BrowseResultMask.DisplayName
+    | ua.BrowseResultMask.NodeClass
+)
+# Nodes per Browse request when checking which children have children, unless
+# the server's MaxNodesPerBrowse is lower
+_BROWSE_CHUNK = 1000
+
+
+def _browse_description(node_id, result_mask):
+    desc = ua.BrowseDescription()
+    desc.NodeId = node_id
+    desc.BrowseDirection = ua.BrowseDirection.Forward
+    desc.ReferenceTypeId = _HIERARCHICAL_REFERENCES
+    desc.IncludeSubtypes = True
+    desc.NodeClassMask = 0
+    desc.ResultMask = result_mask
+    return desc
+
+
+def _browse_parameters(descriptions, max_references=0):
+    params = ua.BrowseParameters()
+    params.NodesToBrowse = descriptions
+    params.RequestedMaxReferencesPerNode = max_references
+    return params
+
+
+async def _browse_many(
+    client, node_ids, result_mask=_CHILD_RESULT_MASK, request=contextlib.nullcontext
+):
+    """Child references of several nodes with one Browse, following
+    continuation points together. Returns [(StatusCode, references), ...].
+
+    `request()` wraps the Browse and every BrowseNext, so a caller can pace each.
+    """
+    async with request():
+        results = await client.uaclient.browse(
+            _browse_parameters(
+                [_browse_description(nid, result_mask) for nid in node_ids]
+            )
+        )
+    out = [(r.StatusCode, list(r.References)) for r in results]
+    pending = {
+        i: r.ContinuationPoint
+        for i, r in enumerate(results)
+        if r.ContinuationPoint and r.StatusCode.is_good()
+    }
+    while pending:
+        params = ua.BrowseNextParameters()
+        params.ContinuationPoints = list(pending.values())
+        params.ReleaseContinuationPoints = False
+        async with request():
+            nexts = await client.uaclient.browse_next(params)
+        following = {}
+        for i, result in zip(pending, nexts, strict=True):
+            if not result.StatusCode.is_good():
+                out[i] = (result.StatusCode, out[i][1])
+                continue
+            out[i][1].extend(result.References)
+            if result.ContinuationPoint:
+                following[i] = result.ContinuationPoint
+        pending = following
+    return out
+
+
+async def _browse_references(client, node_id):
+    """All child references of `node_id` (with names and class), following
+    continuation points when the server splits the result."""
+    ((status, references),) = await _browse_many(client, [node_id])
+    status.check()
+    return references
+
+
+async def _have_children(client, node_ids):
+    """For each node, whether it has at least one child — one Browse per chunk.
+
+    Asks for a single reference per node with no result fields; any continuation
+    points the server hands back are released straight away.
+    """
+    flags = []
+    step = await _chunk_size(client, "max_nodes_per_browse", _BROWSE_CHUNK)
+    for start in range(0, len(node_ids), step):
+        chunk = node_ids[start : start + step]
+        results = await client.uaclient.browse(
+            _browse_parameters(
+                [_browse_description(nid, ua.BrowseResultMask.None_) for nid in chunk],
+                max_references=1,
+            )
+        )
+        flags.extend(bool(r.References) for r in results)
+        pending = [r.ContinuationPoint for r in results if r.ContinuationPoint]
+        if pending:
+            params = ua.BrowseNextParameters()
+            params.ContinuationPoints = pending
+            params.ReleaseContinuationPoints = True
+            await client.uaclient.browse_next(params)
+    return flags
+
+
+async def fetch_children(client, node_id_str):
+    references = await _browse_references(client, ua.NodeId.from_string(node_id_str))
+    has_children = await _have_children(client, [ref.NodeId for ref in references])
+    return [
+        {
+            "node_id": ref.NodeId.to_string(),
+            "display_name": ref.BrowseName.Name,
+            "node_class": ref.NodeClass.name,
+            "has_children": flag,
+        }
+        for ref, flag in zip(references, has_children, strict=True)
+    ]
+
+
+# --- Paged browse ---
+#
+# Folders with tens of thousands of children are browsed a page at a time.
+# The first page asks the server for at most `limit` references; the rest of
+# the folder stays on the server behind a continuation point, which the next
+# page resumes with BrowseNext. The gateway only ever holds one page, so time
+# to first result and memory do not grow with the folder. Servers that ignore
+# RequestedMaxReferencesPerNode return everything at once; the remainder is
+# then kept with the cursor instead (a cached result set).
+#
+# A cursor is "<offset>:<token>". A token that is unknown (expired, evicted,
+# or from a replaced session) is recovered by browsing again and skipping
+# `offset` references.
+
+_PAGE_CURSOR_TTL_SECS = 120.0
+# Open cursors per session, and at most half the server's continuation points
+_MAX_PAGE_CURSORS = 8
+
+
+class _PageCursor:
+    __slots__ = ("client", "node_id", "offset", "point", "buffered", "done", "expires")
+
+    def __init__(self, client, node_id):
+        self.client = client
+        self.node_id = node_id
+        self.offset = 0
+        self.point = None
+        self.buffered = []
+        self.done = False
+        self.expires = 0.0
+
+
+# token -> _PageCursor, oldest first
+_page_cursors = {}
+
+
+def parse_page_cursor(cursor):
+    """(offset, token) of a cursor string; (0, None) for none.
+    Raises ValueError for a malformed cursor."""
+    if not cursor:
+        return 0, None
+    offset, sep, token = cursor.partition(":")
+    if not sep or not offset.isdigit() or not token:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return int(offset), token
+
+
+async def _release_points(client, points):
+    params = ua.BrowseNextParameters()
+    params.ContinuationPoints = points
+    params.ReleaseContinuationPoints = True
+    try:
+        await client.uaclient.browse_next(params)
+    except Exception:
+        pass  # the session may be gone, which releases them anyway
+
+
+async def _drop_page_cursors(tokens):
+    points = {}
+    for token in tokens:
+        cursor = _page_cursors.pop(token)
+        if cursor.point:
+            points.setdefault(cursor.client, []).append(cursor.point)
+    for client, client_points in points.items():
+        await _release_points(client, client_points)
+
+
+async def _fill_page(client, cursor, count, limit):
+    """Buffer at least `count` references of the cursor's node (fewer at the end)."""
+    while len(cursor.buffered) < count and not cursor.done:
+        if cursor.point is None:
+            description = _browse_description(
+                ua.NodeId.from_string(cursor.node_id), _CHILD_RESULT_MASK
+            )
+            (result,) = await client.uaclient.browse(
+                _browse_parameters([description], max_references=limit)
+            )
+        else:
+            params = ua.BrowseNextParameters()
+            params.ContinuationPoints = [cursor.point]
+            params.ReleaseContinuationPoints = False
+            (result,) = await client.uaclient.browse_next(params)
+        result.StatusCode.check()
+        cursor.buffered.extend(result.References)
+        cursor.point = result.ContinuationPoint or None
+        cursor.done = cursor.point is None
+
+
+async def _seek_page(client, node_id_str, offset, limit):
+    """A new cursor positioned `offset` references into the node's children."""
+    cursor = _PageCursor(client, node_id_str)
+    while cursor.offset < offset:
+        await _fill_page(client, cursor, 1, limit)
+        if not cursor.buffered:
+            break
+        skip = min(offset - cursor.offset, len(cursor.buffered))
+        del cursor.buffered[:skip]
+        cursor.offset += skip
+    return cursor
+
+
+async def fetch_children_page(client, node_id_str, limit, cursor=None):
+    """Up to `limit` children of a node, as fetch_children() lists them,
+    starting at `cursor` (None for the first page).
+
+    Returns {"children": [...], "next_cursor": cursor string or None}.
+    """
+    offset, token = parse_page_cursor(cursor)
+    now = time.monotonic()
+    await _drop_page_cursors([t for t, c in _page_cursors.items() if c.expires < now])
+
+    state = _page_cursors.pop(token, None) if token else None
+    if state is not None and (
+        state.client is not client
+        or state.node_id != node_id_str
+        or state.offset != offset
+    ):
+        _page_cursors[token] = state
+        await _drop_page_cursors([token])
+        state = None
+    try:
+        if state is None:
+            state = await _seek_page(client, node_id_str, offset, limit)
+        await _fill_page(client, state, limit, limit)
+    except ua.uaerrors.BadContinuationPointInvalid:
+        # Released by the server (or its session); start over from `offset`
+        state = await _seek_page(client, node_id_str, offset, limit)
+        await _fill_page(client, state, limit, limit)
+
+    references = state.buffered[:limit]
+    del state.buffered[:limit]
+    state.offset += len(references)
+    has_children = await _have_children(client, [ref.NodeId for ref in references])
+    children = [
+        {
+            "node_id": ref.NodeId.to_string(),
+            "display_name": ref.BrowseName.Name,
+            "node_class": ref.NodeClass.name,
+            "has_children": flag,
+        }
+        for ref, flag in zip(references, has_children, strict=True)
+    ]
+
+    next_cursor = None
+    if state.buffered or not state.done:
+        mine = [t for t, c in _page_cursors.items() if c.client is client]
+        points = await _chunk_size(
+            client, "max_browse_continuation_points", 2 * _MAX_PAGE_CURSORS
+        )
+        excess = len(mine) + 1 - max(1, points // 2)
+        if excess > 0:
+            await _drop_page_cursors(mine[:excess])
+        state.expires = time.monotonic() + _PAGE_CURSOR_TTL_SECS
+        token = secrets.token_urlsafe(9)
+        _page_cursors[token] = state
+        next_cursor = f"{state.offset}:{token}"
+    return {"children": children, "next_cursor": next_cursor}
+
+
 async def browse_children(config, node_id_str):
     client = _build_client(config)
     async with client:
-        node = client.get_node(node_id_str)
-        children = await node.get_children()
-        result = []
-        for child in children:
-            browse_name = await child.read_browse_name()
-            node_class = await child.read_node_class()
-            has_children = len(await child.get_children()) > 0
-            result.append(
-                {
-                    "node_id": child.nodeid.to_string(),
-                    "display_name": browse_name.Name,
-                    "node_class": node_class.name,
-                    "has_children": has_children,
-                }
+        return await fetch_children(client, node_id_str)
+
+
+# Everything the details panel shows, fetched with one Read. For non-Variable
+# nodes the Variable-only attributes come back as BadAttributeIdInvalid.
+_DETAIL_ATTRIBUTES = (
+    ua.AttributeIds.BrowseName,
+    ua.AttributeIds.NodeClass,
+    ua.AttributeIds.Value,
+    ua.AttributeIds.DataType,
+    ua.AttributeIds.AccessLevel,
+    ua.AttributeIds.Description,
+    ua.AttributeIds.ValueRank,
+    ua.AttributeIds.MinimumSamplingInterval,
+    ua.AttributeIds.Historizing,
+)
+_ENGINEERING_UNITS = ua.QualifiedName("EngineeringUnits", 0)
+
+# Data type id -> name for types outside namespace 0, per server. Namespace 0
+# names come from the standard nodeset (ua.ObjectIdNames) without a round trip.
+_data_type_names = {}
+_DATA_TYPE_CACHE_SIZE = 1024
+
+
+def _read_value_id(node_id, attribute_id):
+    rv = ua.ReadValueId()
+    rv.NodeId = node_id
+    rv.AttributeId = attribute_id
+    return rv
+
+
+async def _read_attributes(client, items):
+    """One Read request for [(node_id, attribute_id), ...] -> DataValues."""
+    params = ua.ReadParameters()
+    params.NodesToRead = [_read_value_id(nid, attr) for nid, attr in items]
+    return await client.uaclient.read(params)
+
+
+async def _find_property(client, node_id, name):
+    """Node id of the `name` HasProperty child of `node_id`, or None."""
+    element = ua.RelativePathElement()
+    element.ReferenceTypeId = ua.NodeId(ua.ObjectIds.HasProperty)
+    element.IsInverse = False
+    element.IncludeSubtypes = True
+    element.TargetName = name
+    path = ua.BrowsePath()
+    path.StartingNode = node_id
+    path.RelativePath.Elements = [element]
+    (result,) = await client.uaclient.translate_browsepaths_to_nodeids([path])
+    if not result.StatusCode.is_good() or not result.Targets:
+        return None
+    return result.Targets[0].TargetId
+
+
+async def _data_type_name(client, data_type_id, request=contextlib.nullcontext):
+    """Name of a data type; a Read (wrapped in `request()`) the first time a
+    type outside namespace 0 is seen."""
+    if data_type_id.NamespaceIndex == 0 and data_type_id.Identifier in ua.ObjectIdNames:
+        return ua.ObjectIdNames[data_type_id.Identifier]
+    key = (client.server_url.geturl(), data_type_id.to_string())
+    name = _data_type_names.get(key)
+    if name is None:
+        async with request():
+            (dv,) = await _read_attributes(
+                client, [(data_type_id, ua.AttributeIds.BrowseName)]
             )
-        return result
+        dv.StatusCode.check()
+        name = dv.Value.Value.Name
+        if len(_data_type_names) >= _DATA_TYPE_CACHE_SIZE:
+            _data_type_names.clear()
+        _data_type_names[key] = name
+    return name
 
 
-async def read_node_details(config, node_id_str):
-    client = _build_client(config)
-    async with client:
-        node = client.get_node(node_id_str)
-        browse_name = await node.read_browse_name()
-        node_class = await node.read_node_class()
-
-        details = {
-            "node_id": node.nodeid.to_string(),
-            "display_name": browse_name.Name,
-            "namespace": node.nodeid.NamespaceIndex,
-            "node_class": node_class.name,
-        }
+def node_identifier(nodeid):
+    """(identifier_type, identifier) of a NodeId as stored in the node selection."""
+    if nodeid.NodeIdType == ua.NodeIdType.String:
+        return "s", nodeid.Identifier
+    if nodeid.NodeIdType in (
+        ua.NodeIdType.Numeric,
+        ua.NodeIdType.TwoByte,
+        ua.NodeIdType.FourByte,
+    ):
+        return "i", str(nodeid.Identifier)
+    if nodeid.NodeIdType == ua.NodeIdType.Guid:
+        return "g", str(nodeid.Identifier)
+    return "b", str(nodeid.Identifier)
 
-        if node_class == ua.NodeClass.Variable:
-            try:
-                value = await node.read_value()
-                details["value"] = str(value)
-            except Exception:
-                details["value"] = None
 
-            try:
-                data_type_node = await node.read_data_type()
-                dt_browse = await client.get_node(data_type_node).read_browse_name()
-                details["data_type"] = dt_browse.Name
-            except Exception:
-                details["data_type"] = "Unknown"
-
-            # Parse identifier info for node selection
-            nodeid = node.nodeid
-            if nodeid.NodeIdType == ua.NodeIdType.String:
-                details["identifier_type"] = "s"
-                details["identifier"] = nodeid.Identifier
-            elif nodeid.NodeIdType == ua.NodeIdType.Numeric:
-                details["identifier_type"] = "i"
-                details["identifier"] = str(nodeid.Identifier)
-            elif nodeid.NodeIdType == ua.NodeIdType.Guid:
-                details["identifier_type"] = "g"
-                details["identifier"] = str(nodeid.Identifier)
-            else:
-                details["identifier_type"] = "b"
-                details["identifier"] = str(nodeid.Identifier)
-
-            # --- Extended OPC UA attributes ---
+def _attribute(dv, convert):
+    """convert(value) for a good DataValue with a value, else None."""
+    if not dv.StatusCode.is_good() or dv.Value.Value is None:
+        return None
+    return convert(dv.Value.Value)
 
-            try:
-                al = await node.get_attribute(ua.AttributeIds.AccessLevel)
-                details["access_level"] = (
-                    int(al.Value.Value) if al.Value.Value is not None else None
-                )
-            except Exception:
-                details["access_level"] = None
 
-            try:
-                desc = await node.get_attribute(ua.AttributeIds.Description)
-                details["description"] = (
-                    desc.Value.Value.Text if desc.Value.Value else None
-                )
-            except Exception:
-                details["description"] = None
+async def fetch_node_details(client, node_id_str):
+    """Node attributes for the browser's details panel.
 
-            try:
-                vr = await node.get_attribute(ua.AttributeIds.ValueRank)
-                details["value_rank"] = (
-                    int(vr.Value.Value) if vr.Value.Value is not None else None
-                )
-            except Exception:
-                details["value_rank"] = None
+    One TranslateBrowsePathsToNodeIds for the EngineeringUnits property, then
+    one Read for every attribute plus that property's value. Data types outside
+    namespace 0 cost one more Read the first time they are seen. Node ids kept
+    by namespace URI ("nsu=...", from a NodeSet2 import) are resolved first.
+    """
+    nodeid = ua.NodeId.from_string(node_id_str)
+    if getattr(nodeid, "NamespaceUri", None):
+        namespace = await client.get_namespace_index(nodeid.NamespaceUri)
+        nodeid = ua.NodeId(nodeid.Identifier, namespace, nodeid.NodeIdType)
+    eu_node = await _find_property(client, nodeid, _ENGINEERING_UNITS)
+    items = [(nodeid, attr) for attr in _DETAIL_ATTRIBUTES]
+    if eu_node is not None:
+        items.append((eu_node, ua.AttributeIds.Value))
+    results = await _read_attributes(client, items)
+    attrs = dict(zip(_DETAIL_ATTRIBUTES, results, strict=False))
 
-            try:
-                msi = await node.get_attribute(ua.AttributeIds.MinimumSamplingInterval)
-                details["min_sampling_interval"] = (
-                    float(msi.Value.Value) if msi.Value.Value is not None else None
-                )
-            except Exception:
-                details["min_sampling_interval"] = None
+    attrs[ua.AttributeIds.BrowseName].StatusCode.check()
+    attrs[ua.AttributeIds.NodeClass].StatusCode.check()
+    node_class = ua.NodeClass(attrs[ua.AttributeIds.NodeClass].Value.Value)
 
-            try:
-                hist = await node.get_attribute(ua.AttributeIds.Historizing)
-                details["historizing"] = (
-                    bool(hist.Value.Value) if hist.Value.Value is not None else None
-                )
-            except Exception:
-                details["historizing"] = None
+    details = {
+        "node_id": nodeid.to_string(),
+        "display_name": attrs[ua.AttributeIds.BrowseName].Value.Value.Name,
+        "namespace": nodeid.NamespaceIndex,
+        "node_class": node_class.name,
+    }
 
+    if node_class == ua.NodeClass.Variable:
+        dv = attrs[ua.AttributeIds.Value]
+        value_ok = dv.StatusCode.is_good()
+        details["value"] = str(dv.Value.Value) if value_ok else None
+
+        try:
+            data_type = attrs[ua.AttributeIds.DataType]
+            data_type.StatusCode.check()
+            details["data_type"] = await _data_type_name(client, data_type.Value.Value)
+        except Exception:
+            details["data_type"] = "Unknown"
+
+        # Parse identifier info for node selection
+        details["identifier_type"], details["identifier"] = node_identifier(nodeid)
+
+        # --- Extended OPC UA attributes ---
+
+        details["access_level"] = _attribute(attrs[ua.AttributeIds.AccessLevel], int)
+        details["description"] = _attribute(
+            attrs[ua.AttributeIds.Description], lambda text: text.Text
+        )
+        details["value_rank"] = _attribute(attrs[ua.AttributeIds.ValueRank], int)
+        details["min_sampling_interval"] = _attribute(
+            attrs[ua.AttributeIds.MinimumSamplingInterval], float
+        )
+        details["historizing"] = _attribute(attrs[ua.AttributeIds.Historizing], bool)
+
+        if value_ok:
             try:
-                dv = await node.get_attribute(ua.AttributeIds.Value)
-                try:
-                    details["status_code"] = dv.StatusCode.name
-                except AttributeError:
-                    details["status_code"] = (
-                        str(dv.StatusCode) if dv.StatusCode else None
-                    )
-                details["source_timestamp"] = (
-                    dv.SourceTimestamp.isoformat() if dv.SourceTimestamp else None
-                )
-                details["server_timestamp"] = (
-                    dv.ServerTimestamp.isoformat() if dv.ServerTimestamp else None
-                )
-            except Exception:
-                details["status_code"] = None
-                details["source_timestamp"] = None
-                details["server_timestamp"] = None
-
-            details["engineering_units"] = None
-            try:
-                eu_children = await node.get_children(refs=ua.ObjectIds.HasProperty)
-                for ch in eu_children:
-                    bn = await ch.read_browse_name()
-                    if bn.Name == "EngineeringUnits":
-                        eu_dv = await ch.get_attribute(ua.AttributeIds.Value)
-                        eu_val = eu_dv.Value.Value
-                        if (
-                            eu_val
-                            and hasattr(eu_val, "DisplayName")
-                            and eu_val.DisplayName.Text
-                        ):
-                            details["engineering_units"] = eu_val.DisplayName.Text
-                        break
-            except Exception:
-                pass
-
-        return details
+                details["status_code"] = dv.StatusCode.name
+            except AttributeError:
+                details["status_code"] = str(dv.StatusCode) if dv.StatusCode else None
+            details["source_timestamp"] = (
+                dv.SourceTimestamp.isoformat() if dv.SourceTimestamp else None
+            )
+            details["server_timestamp"] = (
+                dv.ServerTimestamp.isoformat() if dv.ServerTimestamp else None
+            )
+        else:
+            details["status_code"] = None
+            details["source_timestamp"] = None
+            details["server_timestamp"] = None
+
+        details["engineering_units"] = None
+        if eu_node is not None:
+            eu_val = _attribute(results[-1], lambda v: v)
+            if eu_val and hasattr(eu_val, "DisplayName") and eu_val.DisplayName.Text:
+                details["engineering_units"] = eu_val.DisplayName.Text
+
+    return details
+
+
+async def read_node_details(config, node_id_str):
+    client = _build_client(config)
+    async with client:
+        return await fetch_node_details(client, node_id_str)
+
+
+async def fetch_namespace_array(client):
+    ns_node = client.get_node("ns=0;i=2255")
+    ns_array = await ns_node.read_value()
+    return [{"index": i, "uri": uri} for i, uri in enumerate(ns_array)]
 
 
 async def read_namespace_array(config):
     client = _build_client(config)
     async with client:
-        ns_node = client.get_node("ns=0;i=2255")
-        ns_array = await ns_node.read_value()
-        return [{"index": i, "uri": uri} for i, uri in enumerate(ns_array)]
+        return await fetch_namespace_array(client)
+
+
+def _value_dict(dv):
+    try:
+        status_code = dv.StatusCode.name
+    except AttributeError:
+        status_code = str(dv.StatusCode) if dv.StatusCode else None
+    return {
+        "value": str(dv.Value.Value) if dv.Value.Value is not None else None,
+        "status_code": status_code,
+        "source_timestamp": dv.SourceTimestamp.isoformat()
+        if dv.SourceTimestamp
+        else None,
+        "server_timestamp": dv.ServerTimestamp.isoformat()
+        if dv.ServerTimestamp
+        else None,
+    }
+
+
+async def fetch_node_value(client, node_id_str):
+    node = client.get_node(node_id_str)
+    dv = await node.read_attribute(ua.AttributeIds.Value)
+    return _value_dict(dv)
+
+
+# Nodes per Read, unless the server's MaxNodesPerRead is lower
+_READ_CHUNK = 1000
+
+
+async def _read_chunk_size(client):
+    return await _chunk_size(client, "max_nodes_per_read", _READ_CHUNK)
+
+
+async def _read_many(client, nodeids, attribute_ids):
+    """Read `attribute_ids` of every node, in MaxNodesPerRead-sized chunks.
+
+    Returns one list of DataValues (in `attribute_ids` order) per node.
+    """
+    per_node = len(attribute_ids)
+    chunk = max(1, await _read_chunk_size(client) // per_node)
+    results = []
+    while len(results) < len(nodeids):
+        batch = nodeids[len(results) : len(results) + chunk]
+        try:
+            values = await _read_attributes(
+                client, [(nid, attr) for nid in batch for attr in attribute_ids]
+            )
+        except ua.uaerrors.BadTooManyOperations:
+            if chunk == 1:
+                raise
+            # The advertised limit was too optimistic; halve it for this server
+            chunk = max(1, len(batch) // 2)
+            limits = _operation_limits[client.server_url.geturl()]
+            limits["max_nodes_per_read"] = chunk * per_node
+            continue
+        for i in range(len(batch)):
+            results.append(values[i * per_node : (i + 1) * per_node])
+    return results
+
+
+def _parse_node_ids(node_id_strs):
+    """[{"node_id"}] per input id, plus (entry, NodeId) for those that parse;
+    the others get "error"."""
+    results = [{"node_id": nid} for nid in node_id_strs]
+    parsed = []
+    for entry in results:
+        try:
+            parsed.append((entry, ua.NodeId.from_string(entry["node_id"])))
+        except Exception:
+            entry["error"] = "Invalid node id"
+    return results, parsed
+
+
+async def fetch_node_values(client, node_id_strs):
+    """Values of many nodes, one Read per MaxNodesPerRead-sized chunk.
+
+    Returns one entry per input id, in order: {"node_id", "value",
+    "status_code", "source_timestamp", "server_timestamp"}, or {"node_id",
+    "error"} for an id that does not parse. A bad node does not fail the rest.
+    """
+    results, parsed = _parse_node_ids(node_id_strs)
+    values = await _read_many(
+        client, [nodeid for _, nodeid in parsed], [ua.AttributeIds.Value]
+    )
+    for (entry, _), (dv,) in zip(parsed, values, strict=True):
+        entry.update(_value_dict(dv))
+    return results
+
+
+async def fetch_sampling_info(client, node_id_strs):
+    """MinimumSamplingInterval and Historizing of many nodes, read in bulk.
+
+    Returns one entry per input id, in order: {"node_id",
+    "min_sampling_interval" (ms; 0 = as fast as the value changes, None =
+    unknown), "historizing"}, or {"node_id", "error"} for an id that does not
+    parse or a node the server does not know.
+    """
+    results, parsed = _parse_node_ids(node_id_strs)
+    values = await _read_many(
+        client,
+        [nodeid for _, nodeid in parsed],
+        [ua.AttributeIds.MinimumSamplingInterval, ua.AttributeIds.Historizing],
+    )
+    for (entry, _), (interval, historizing) in zip(parsed, values, strict=True):
+        if interval.StatusCode.value == ua.StatusCodes.BadNodeIdUnknown:
+            entry["error"] = "Unknown node"
+            continue
+        entry["min_sampling_interval"] = _attribute(interval, float)
+        entry["historizing"] = _attribute(historizing, bool)
+    return results
 
 
 async def read_node_value(config, node_id_str):
     client = _build_client(config)
     async with client:
-        node = client.get_node(node_id_str)
-        dv = await node.get_attribute(ua.AttributeIds.Value)
-        try:
-            status_code = dv.StatusCode.name
-        except AttributeError:
-            status_code = str(dv.StatusCode) if dv.StatusCode else None
-        return {
-            "value": str(dv.Value.Value) if dv.Value.Value is not None else None,
-            "status_code": status_code,
-            "source_timestamp": dv.SourceTimestamp.isoformat()
-            if dv.SourceTimestamp
-            else None,
-            "server_timestamp": dv.ServerTimestamp.isoformat()
-            if dv.ServerTimestamp
-            else None,
-        }
+        return await fetch_node_value(client, node_id_str)
@@ -0,0 +1,63 @@
+"""
+OPC UA server operation limits remembered between requests.
+
+A successful connection test probes the server's OperationLimits (see
+opcua_client.fetch_operation_limits). They are kept per endpoint in
+DATA_DIR/opcua_limits.json so that generating telegraf.conf, which never
+talks to the PLC, can keep each Telegraf input within what the server
+accepts in one request.
+"""
+
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+LIMITS_FILE = "opcua_limits.json"
+
+_lock = threading.Lock()
+
+
+def _limits_path():
+    from flask import current_app
+
+    return os.path.join(current_app.config["DATA_DIR"], LIMITS_FILE)
+
+
+def _load_all():
+    path = _limits_path()
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        logger.error("%s is unreadable, ignoring it", LIMITS_FILE)
+        return {}
+
+
+def load(endpoint):
+    """Limits last probed for `endpoint`, or None if it was never tested."""
+    with _lock:
+        entry = _load_all().get(endpoint)
+    return entry["limits"] if entry else None
+
+
+def save(endpoint, limits):
+    with _lock:
+        entries = _load_all()
+        entries[endpoint] = {
+            "limits": limits,
+            "probed_at": datetime.now(timezone.utc).isoformat(),
+        }
+        path = _limits_path()
+        tmp_path = path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(entries, f, indent=2)
+            os.replace(tmp_path, path)
+        except OSError:
+            logger.error("Failed to write %s", LIMITS_FILE)
@@ -0,0 +1,286 @@
+"""
+Pooled OPC UA sessions on the gateway's async runtime.
+
+Browsing and reading nodes used to open a new session per request: TCP
+connect, SecureChannel, CreateSession/ActivateSession and, with
+Basic256Sha256, the asymmetric handshake on top. The pool keeps one session
+per endpoint + security/auth settings alive on the long-lived asyncio loop of
+app.services.async_runtime, and Flask threads hand work to it with run():
+
+    opcua_pool.run(config, browse_node, "ns=0;i=85")
+
+asyncua's watchdog reads the server state every `keepalive` seconds, which
+keeps the session from timing out and detects a dead server. A session that
+failed its keepalive is reconnected on the next call; one that dropped while
+in use is retried once on a fresh session. Sessions idle for longer than
+`idle_timeout` are closed by a reaper task.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+
+from asyncua import ua
+
+from app.services.async_runtime import AsyncRuntime, OperationTimedOut, async_runtime
+from app.services.device_governor import INTERACTIVE, DeviceGovernor, device_governor
+from app.services.opcua_client import _build_client
+
+logger = logging.getLogger(__name__)
+
+_IDLE_TIMEOUT_SECS = 120.0
+_KEEPALIVE_SECS = 10.0
+_CALL_TIMEOUT_SECS = 30.0
+_MAX_SESSIONS = 8
+
+# The session (not the request) is gone: reconnect and retry once. A request
+# that timed out is not among them; a dead server fails its keepalive instead.
+_DROPPED_ERRORS = (
+    ConnectionError,
+    ua.uaerrors.BadSessionIdInvalid,
+    ua.uaerrors.BadSessionClosed,
+    ua.uaerrors.BadSessionNotActivated,
+    ua.uaerrors.BadSecureChannelIdInvalid,
+    ua.uaerrors.BadSecureChannelClosed,
+    ua.uaerrors.BadConnectionClosed,
+    ua.uaerrors.BadServerNotConnected,
+)
+
+# Settings that need their own session; everything else in the config is ignored
+_KEY_FIELDS = (
+    "endpoint",
+    "security_policy",
+    "security_mode",
+    "certificate",
+    "private_key",
+    "auth_method",
+    "username",
+    "password",
+    "connect_timeout",
+)
+
+
+def session_key(config):
+    return tuple(str(config.get(field, "")) for field in _KEY_FIELDS)
+
+
+class _Session:
+    def __init__(self, client):
+        self.client = client
+        self.last_used = time.monotonic()
+        self.in_use = 0
+
+
+class OpcuaSessionPool:
+    """Thread-safe front for OPC UA sessions owned by one asyncio loop thread.
+
+    The loop is `runtime` (the gateway's shared AsyncRuntime for the
+    singleton); a pool created without one runs its own, with its own
+    DeviceGovernor. Calls go through `governor` unless run with priority=None.
+    """
+
+    def __init__(
+        self,
+        idle_timeout=_IDLE_TIMEOUT_SECS,
+        keepalive=_KEEPALIVE_SECS,
+        max_sessions=_MAX_SESSIONS,
+        runtime=None,
+        governor=None,
+    ):
+        self._idle_timeout = idle_timeout
+        self._keepalive = keepalive
+        self._max_sessions = max_sessions
+        self._owns_runtime = runtime is None
+        self._runtime = runtime or AsyncRuntime("opcua-pool")
+        if governor is None:
+            governor = DeviceGovernor() if self._owns_runtime else device_governor
+        self.governor = governor
+        self._lock = threading.Lock()
+        self._reaper = None
+        # Loop-thread state
+        self._sessions = {}
+        self._connecting = {}
+        self._stats = {"connects": 0, "reused": 0, "reconnects": 0, "closed_idle": 0}
+
+    # --- Lifecycle ---
+
+    @property
+    def _loop(self):
+        return self._runtime.loop
+
+    def _running(self):
+        return self._reaper is not None and self._runtime.is_running()
+
+    def start(self):
+        """Start the loop thread and the idle reaper (idempotent)."""
+        with self._lock:
+            if self._running():
+                return
+            self._reaper = self._runtime.submit(self._reap_idle())
+
+    def stop(self):
+        """Close every session; stop the loop thread if the pool owns it."""
+        with self._lock:
+            running = self._running()
+            reaper, self._reaper = self._reaper, None
+        if reaper is None:
+            return
+        reaper.cancel()
+        if running:
+            try:
+                self._runtime.run(self._close_all(), timeout=10)
+            except TimeoutError:
+                logger.warning("Timed out closing OPC UA sessions")
+        if self._owns_runtime:
+            self._runtime.stop()
+
+    # --- Submit API ---
+
+    def run(
+        self,
+        config,
+        op,
+        *args,
+        timeout=_CALL_TIMEOUT_SECS,
+        cancelled=None,
+        operation=None,
+        priority=INTERACTIVE,
+        coalesce=False,
+    ):
+        """Run `await op(client, *args)` on a pooled session for `config`.
+
+        Blocks the calling thread until the result is ready and re-raises the
+        operation's exception. Raises TimeoutError after `timeout` seconds and
+        OperationCancelled once `cancelled()` is true (see
+        async_runtime.client_disconnected). The call's latency is recorded
+        under `operation`, by default the name of `op`.
+
+        The call waits for a slot on the endpoint's governor at `priority`;
+        priority=None skips the governor, for operations that take a slot
+        per request themselves. With `coalesce`, a call identical to one
+        already in flight (same session settings, op and args, which must be
+        hashable) shares its result.
+        """
+        self.start()
+        try:
+            return self._runtime.run(
+                self._governed(config, op, args, priority, coalesce),
+                timeout=timeout,
+                cancelled=cancelled,
+                operation=operation or getattr(op, "__name__", "opcua_call"),
+            )
+        except OperationTimedOut:
+            raise OperationTimedOut(f"OPC UA call timed out after {timeout}s") from None
+
+    async def _governed(self, config, op, args, priority, coalesce):
+        if priority is None:
+            return await self._call(config, op, args)
+        return await self.governor.call(
+            config.get("endpoint", ""),
+            lambda: self._call(config, op, args),
+            priority,
+            key=(session_key(config), op, args) if coalesce else None,
+        )
+
+    async def _call(self, config, op, args):
+        key = session_key(config)
+        session, fresh = await self._acquire(key, config)
+        try:
+            return await op(session.client, *args)
+        except _DROPPED_ERRORS:
+            if fresh:
+                await self._discard(key, session)
+                raise
+            # A server restart or idle drop since the last call; retry once
+            await self._discard(key, session)
+            self._stats["reconnects"] += 1
+            session, _ = await self._acquire(key, config)
+            return await op(session.client, *args)
+        finally:
+            session.in_use -= 1
+            session.last_used = time.monotonic()
+
+    async def _acquire(self, key, config):
+        """Return (session, fresh) with `in_use` already incremented."""
+        session = self._sessions.get(key)
+        if session is not None:
+            try:
+                await session.client.check_connection()
+            except Exception as e:
+                logger.info("OPC UA session to %s lost: %s", config.get("endpoint"), e)
+                await self._discard(key, session)
+                self._stats["reconnects"] += 1
+                session = None
+        if session is not None:
+            self._stats["reused"] += 1
+            session.in_use += 1
+            return session, False
+
+        # Concurrent first calls for the same key share one handshake
+        pending = self._connecting.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._connect(key, config))
+            self._connecting[key] = pending
+            pending.add_done_callback(lambda _: self._connecting.pop(key, None))
+        session = await asyncio.shield(pending)
+        session.in_use += 1
+        return session, True
+
+    async def _connect(self, key, config):
+        if len(self._sessions) >= self._max_sessions:
+            await self._evict_oldest()
+        client = _build_client(config, watchdog_interval=self._keepalive)
+        await client.connect()
+        self._stats["connects"] += 1
+        session = _Session(client)
+        self._sessions[key] = session
+        return session
+
+    async def _discard(self, key, session):
+        if self._sessions.get(key) is not session:
+            return  # already replaced or being closed by another task
+        del self._sessions[key]
+        try:
+            await session.client.disconnect()
+        except Exception:
+            pass  # the connection is usually already gone
+
+    async def _evict_oldest(self):
+        idle = [(s.last_used, k) for k, s in self._sessions.items() if not s.in_use]
+        if idle:
+            _, key = min(idle)
+            await self._discard(key, self._sessions[key])
+
+    async def _reap_idle(self):
+        while True:
+            await asyncio.sleep(min(self._idle_timeout / 2, 30))
+            await self.close_idle()
+
+    async def close_idle(self):
+        """Close sessions unused for longer than the idle timeout."""
+        cutoff = time.monotonic() - self._idle_timeout
+        for key, session in list(self._sessions.items()):
+            if not session.in_use and session.last_used < cutoff:
+                await self._discard(key, session)
+                self._stats["closed_idle"] += 1
+
+    async def _close_all(self):
+        for key, session in list(self._sessions.items()):
+            await self._discard(key, session)
+
+    # --- Introspection ---
+
+    def get_stats(self):
+        """Open sessions and connect/reuse counters."""
+
+        async def snapshot():
+            return {**self._stats, "sessions": len(self._sessions)}
+
+        if not self._running():
+            return {**self._stats, "sessions": 0}
+        return self._runtime.run(snapshot(), timeout=5)
+
+
+# Module-level singleton
+opcua_pool = OpcuaSessionPool(runtime=async_runtime)
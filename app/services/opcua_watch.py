@@ -0,0 +1,258 @@
+"""
+Live node values pushed from one OPC UA subscription.
+
+The browser used to poll the PLC every few seconds for each node a tab was
+watching. Instead, each watched node gets one monitored item on a shared
+subscription on the pooled session, however many tabs watch it. Watchers are
+reference-counted: the item is created on the first watch and deleted when
+the last watcher leaves, and the subscription goes with the last item.
+
+Data changes are published on the event bus ("opcua_values" channel) in the
+same shape as /api/opcua/node-value, plus "node_id". A supervisor thread
+checks the session every few seconds while anything is watched, and moves
+every item to a new subscription when the pool has replaced the session.
+
+Calls to the server run under a per-server lock, never under the watcher's
+own lock, so a slow or unreachable server does not hold up watches of other
+servers, get_stats() or the supervisor's checks of the rest.
+"""
+
+import contextlib
+import logging
+import threading
+
+from asyncua import ua
+
+from app.services import event_bus
+from app.services.device_governor import BACKGROUND
+from app.services.opcua_client import _read_attributes, _value_dict
+from app.services.opcua_pool import opcua_pool, session_key
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "opcua_values"
+
+_PUBLISH_MS = 250
+_CHECK_SECS = 5.0
+
+
+class _Handler:
+    def __init__(self, state):
+        self._state = state
+
+    def datachange_notification(self, node, val, data):
+        node_id = node.nodeid.to_string()
+        value = {"node_id": node_id, **_value_dict(data.monitored_item.Value)}
+        self._state.values[node_id] = value
+        event_bus.publish(CHANNEL, value)
+
+    def status_change_notification(self, status):
+        logger.info("OPC UA watch subscription status: %s", status)
+
+
+class _ServerWatch:
+    """Watched nodes of one server (pool session key)."""
+
+    def __init__(self, config):
+        self.config = config
+        self.refs = {}  # node id -> watcher count
+        self.handles = {}  # node id -> monitored item handle
+        self.values = {}  # node id -> last published value
+        self.client = None
+        self.subscription = None
+        # Serializes this server's pool calls; taken before the watcher's lock
+        self.lock = threading.Lock()
+
+
+class OpcuaValueWatcher:
+    """Reference-counted monitored items shared by every watcher."""
+
+    def __init__(self, pool=opcua_pool, publish_ms=_PUBLISH_MS, check_secs=_CHECK_SECS):
+        self._pool = pool
+        self._publish_ms = publish_ms
+        self._check_secs = check_secs
+        self._lock = threading.Lock()
+        self._servers = {}
+        self._thread = None
+        self._wake = threading.Event()
+
+    # --- Public API ---
+
+    @staticmethod
+    def normalize(node_id):
+        """Canonical node id string. Raises ValueError for one that does not parse."""
+        try:
+            return ua.NodeId.from_string(node_id).to_string()
+        except Exception:
+            raise ValueError(f"Invalid node id: {node_id}") from None
+
+    def watch(self, config, node_id):
+        """Start (or join) watching `node_id`. Returns its last known value or None.
+
+        Raises if the server rejects the monitored item; the watch is not kept.
+        """
+        node_id = self.normalize(node_id)
+        key = session_key(config)
+        with self._server(key, config) as state:
+            with self._lock:
+                state.refs[node_id] = state.refs.get(node_id, 0) + 1
+                first = state.refs[node_id] == 1
+            if first:
+                try:
+                    self._pool.run(config, self._add, state, node_id)
+                except Exception:
+                    with self._lock:
+                        self._forget(key, state, node_id)
+                    raise
+            with self._lock:
+                self._ensure_supervisor()
+            return state.values.get(node_id)
+
+    def unwatch(self, config, node_id):
+        """Leave a watch; the monitored item goes when its last watcher does."""
+        node_id = self.normalize(node_id)
+        key = session_key(config)
+        with self._server(key) as state:
+            if state is None:
+                return
+            with self._lock:
+                if node_id not in state.refs:
+                    return
+                state.refs[node_id] -= 1
+                if state.refs[node_id] > 0:
+                    return
+            try:
+                self._pool.run(config, self._remove, state, node_id)
+            except Exception as e:
+                # The session is gone; the server drops its items with it
+                logger.info("Could not delete OPC UA monitored item: %s", e)
+            with self._lock:
+                self._forget(key, state, node_id)
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "servers": len(self._servers),
+                "items": sum(len(s.handles) for s in self._servers.values()),
+                "watchers": sum(sum(s.refs.values()) for s in self._servers.values()),
+            }
+
+    @contextlib.contextmanager
+    def _server(self, key, config=None):
+        """Hold the per-server lock of `key`'s state, created from `config` when
+        given (else None when nothing of that server is watched)."""
+        while True:
+            with self._lock:
+                state = self._servers.get(key)
+                if state is None and config is not None:
+                    state = self._servers[key] = _ServerWatch(config)
+            if state is None:
+                yield None
+                return
+            with state.lock:
+                with self._lock:
+                    current = self._servers.get(key) is state
+                if current:
+                    yield state
+                    return
+            # The last watcher left while we waited; start over
+
+    # --- Internals (called with self._lock held) ---
+
+    def _forget(self, key, state, node_id):
+        state.refs.pop(node_id, None)
+        state.handles.pop(node_id, None)
+        state.values.pop(node_id, None)
+        if not state.refs:
+            del self._servers[key]
+            self._wake.set()
+
+    def _ensure_supervisor(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._wake.clear()
+        self._thread = threading.Thread(
+            target=self._supervise, name="opcua-watch", daemon=True
+        )
+        self._thread.start()
+
+    def _supervise(self):
+        """Re-create items on a replaced session; exit once nothing is watched."""
+        while True:
+            self._wake.wait(self._check_secs)
+            self._wake.clear()
+            with self._lock:
+                if not self._servers:
+                    self._thread = None
+                    return
+                keys = list(self._servers)
+            for key in keys:
+                with self._server(key) as state:
+                    if state is None:
+                        continue
+                    try:
+                        self._pool.run(
+                            state.config,
+                            self._resubscribe,
+                            state,
+                            priority=BACKGROUND,
+                        )
+                    except Exception as e:
+                        logger.info("OPC UA watch check failed: %s", e)
+
+    # --- Pool-loop operations ---
+
+    async def _subscription(self, client, state):
+        """The subscription for `state` on `client`, moving items to a new one
+        when the pool has replaced the session since they were created."""
+        if state.client is not client:
+            state.client = client
+            state.subscription = await client.create_subscription(
+                self._publish_ms, _Handler(state)
+            )
+            state.handles = {}
+            for node_id in list(state.refs):
+                try:
+                    await self._subscribe(state, node_id)
+                except ua.UaStatusCodeError as e:
+                    logger.warning("OPC UA watch of %s failed: %s", node_id, e)
+        return state.subscription
+
+    async def _subscribe(self, state, node_id):
+        state.handles[node_id] = await state.subscription.subscribe_data_change(
+            state.client.get_node(node_id), sampling_interval=self._publish_ms
+        )
+
+    async def _add(self, client, state, node_id):
+        await self._subscription(client, state)
+        if node_id not in state.handles:
+            await self._subscribe(state, node_id)
+
+    async def _remove(self, client, state, node_id):
+        if state.client is not client:
+            return  # items died with the old session
+        handle = state.handles.pop(node_id, None)
+        if len(state.refs) == 1:
+            await state.subscription.delete()
+            state.client = state.subscription = None
+        elif handle is not None:
+            await state.subscription.unsubscribe(handle)
+
+    async def _resubscribe(self, client, state):
+        if state.client is client:
+            # A cheap Read: a dead connection raises here and the pool retries
+            # this call on a fresh session, where the items are re-created
+            await _read_attributes(
+                client,
+                [
+                    (
+                        ua.NodeId(ua.ObjectIds.Server_ServerStatus_State),
+                        ua.AttributeIds.Value,
+                    )
+                ],
+            )
+        await self._subscription(client, state)
+
+
+# Module-level singleton
+opcua_watcher = OpcuaValueWatcher()
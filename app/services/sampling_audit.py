@@ -0,0 +1,149 @@
+"""
+Sampling audit of the selected OPC UA nodes.
+
+Every node is acquired at the same scan rate (polling) or sampling interval
+(subscription), picked without knowing what the nodes can deliver. The audit
+compares that interval with each node's MinimumSamplingInterval, read in
+bulk from the server, and with how often its value actually changed in the
+value cache's recent history. It flags nodes sampled faster than the server
+refreshes them, nodes sampled far faster than they change (wasted server
+CPU and MQTT traffic) and nodes whose every sample differs (likely changing
+faster than they are sampled), then suggests a rate class for each node and
+groups the nodes by it.
+
+audit() is pure: the route gathers the inputs and passes them in.
+"""
+
+import re
+
+# Suggested sampling intervals, in ms
+RATE_CLASSES_MS = (100, 250, 500, 1000, 2000, 5000, 10000, 30000, 60000, 300000)
+
+# Sampled at least this many times per observed change = oversampled
+_OVERSAMPLE_FACTOR = 10
+# Fewer samples than this in the history are not enough to judge a node
+_MIN_SAMPLES = 5
+
+_DURATION = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(ms|s|m|h)\s*$")
+_UNIT_MS = {"ms": 1, "s": 1000, "m": 60_000, "h": 3_600_000}
+
+
+def parse_interval(text):
+    """Telegraf duration ("500ms", "1s", "2m") -> ms. Raises ValueError."""
+    match = _DURATION.match(str(text))
+    if not match:
+        raise ValueError(f"Invalid interval: {text}")
+    return float(match.group(1)) * _UNIT_MS[match.group(2)]
+
+
+def format_interval(ms):
+    for unit in ("h", "m", "s"):
+        if ms >= _UNIT_MS[unit] and ms % _UNIT_MS[unit] == 0:
+            return f"{int(ms // _UNIT_MS[unit])}{unit}"
+    return f"{ms:g}ms"
+
+
+def configured_interval_ms(acquisition):
+    """The interval every node is acquired at under `acquisition`."""
+    if acquisition.get("mode") == "subscription":
+        interval = parse_interval(acquisition.get("sampling_interval") or "1s")
+    else:
+        interval = parse_interval(acquisition.get("scan_rate") or "10s")
+    if interval <= 0:
+        raise ValueError("The acquisition interval must be positive")
+    return interval
+
+
+def _changes(history):
+    """(samples, changes, span in ms) of a [(ts seconds, value), ...] history."""
+    changes = sum(1 for a, b in zip(history, history[1:], strict=False) if a[1] != b[1])
+    span = (history[-1][0] - history[0][0]) * 1000 if history else 0
+    return len(history), changes, span
+
+
+def _rate_class(target_ms, floor_ms):
+    """Rate class closest to `target_ms` (by ratio), but not below `floor_ms`."""
+    target_ms = max(target_ms, 1)
+    chosen = min(RATE_CLASSES_MS, key=lambda c: max(c, target_ms) / min(c, target_ms))
+    if chosen < floor_ms:
+        chosen = next((c for c in RATE_CLASSES_MS if c >= floor_ms), floor_ms)
+    return chosen
+
+
+def _audit_node(node, interval, info, history, polling):
+    entry = {"name": node["name"], "node_id": info["node_id"], "findings": []}
+    if "error" in info:
+        entry["error"] = info["error"]
+        return entry
+    # -1 means the server cannot say
+    floor = max(info.get("min_sampling_interval") or 0, 0)
+    entry["min_sampling_interval"] = info.get("min_sampling_interval")
+    entry["historizing"] = info.get("historizing")
+    target = interval
+
+    if floor and interval < floor:
+        entry["findings"].append("faster_than_server")
+        target = floor
+
+    samples, changes, span = _changes(history)
+    entry["samples"] = samples
+    entry["changes"] = changes
+    if samples >= _MIN_SAMPLES:
+        if changes == 0:
+            entry["findings"].append("static")
+            target = max(target, span)
+        elif span / changes >= interval * _OVERSAMPLE_FACTOR:
+            entry["findings"].append("oversampled")
+            target = max(target, span / changes / 2)
+        elif polling and changes == samples - 1:
+            # Subscriptions only report changes, so this only means something
+            # when every poll is stored
+            entry["findings"].append("undersampled")
+            target = min(target, interval / 2)
+
+    entry["suggested_interval_ms"] = _rate_class(target, floor)
+    return entry
+
+
+def audit(nodes, acquisition, sampling_info, histories):
+    """Audit report for `nodes` (the "nodes" config section).
+
+    `sampling_info` is opcua_client.fetch_sampling_info's result for the
+    nodes, in the same order; `histories` maps node name to its value cache
+    history [(ts, value), ...].
+    """
+    interval = configured_interval_ms(acquisition)
+    polling = acquisition.get("mode") != "subscription"
+    entries = [
+        _audit_node(node, interval, info, histories.get(node["name"], []), polling)
+        for node, info in zip(nodes, sampling_info, strict=True)
+    ]
+
+    groups = {}
+    for entry in entries:
+        if "suggested_interval_ms" in entry:
+            groups.setdefault(entry["suggested_interval_ms"], []).append(entry["name"])
+    audited = [e for e in entries if "suggested_interval_ms" in e]
+    summary = {
+        "nodes": len(entries),
+        "flagged": sum(1 for e in entries if e["findings"]),
+        "errors": len(entries) - len(audited),
+        # Samples per minute the server and MQTT carry now vs suggested
+        "samples_per_min": round(len(audited) * 60_000 / interval, 1),
+        "suggested_samples_per_min": round(
+            sum(60_000 / e["suggested_interval_ms"] for e in audited), 1
+        ),
+    }
+    for entry in entries:
+        for finding in entry["findings"]:
+            summary[finding] = summary.get(finding, 0) + 1
+    return {
+        "configured_interval": format_interval(interval),
+        "mode": "polling" if polling else "subscription",
+        "summary": summary,
+        "nodes": entries,
+        "rate_classes": [
+            {"interval": format_interval(ms), "interval_ms": ms, "nodes": names}
+            for ms, names in sorted(groups.items())
+        ],
+    }
@@ -1,10 +1,14 @@
 import json
+import math
 import os
 import time
-import urllib.request
 
 import psutil
 
+from app.services.telegraf_health import telegraf_health
+from app.services.telegraf_ingest import telegraf_ingest
+from app.services.telegraf_rates import rate_tracker
+
 
 def get_system_health():
     mem = psutil.virtual_memory()
@@ -22,14 +26,13 @@ def get_system_health():
 
 
 def get_telegraf_status():
+    """Cached result of the background health prober (started on first use)."""
     from flask import current_app
 
-    health_url = current_app.config.get("TELEGRAF_HEALTH_URL", "http://localhost:8080")
-    try:
-        req = urllib.request.urlopen(health_url, timeout=3)  # nosec B310
-        return {"running": True, "status_code": req.getcode()}
-    except Exception:
-        return {"running": False, "status_code": None}
+    telegraf_health.start(
+        current_app.config.get("TELEGRAF_HEALTH_URL", "http://localhost:8080")
+    )
+    return telegraf_health.get_status()
 
 
 # Module-level state for detecting Telegraf process crashes.
@@ -39,33 +42,123 @@ _prev_gathered: dict = {}
 # Set during intentional restarts to suppress false "unplanned" detection in
 # get_gateway_info() until the precise Docker started_at has been recorded.
 _intentional_restart_pending: bool = False
+# Restart reason ("deploy" | "manual") recorded by the Docker event watcher while pending.
+_intentional_restart_reason: str = "deploy"
 
-# Grace period (epoch timestamp) after clear_intentional_restart(). Crash detection and
-# baseline updates are suppressed until this time, preventing stale metrics.json data
-# (which persists until Telegraf overwrites it) from creating a false-positive crash.
+# Grace period (epoch timestamp) after clear_intentional_restart(). When metrics come
+# from the file fallback, crash detection and baseline updates are suppressed until
+# this time, preventing stale metrics.json data (which persists until Telegraf
+# overwrites it) from creating a false-positive crash.
 _post_restart_grace_until: float = 0
 _POST_RESTART_GRACE_SECS = 15
 
+# Write-time percentiles and heap growth use at most this many of the newest
+# internal samples (one per agent interval: ~20 minutes at 10s)
+_HISTORY_SAMPLES = 120
+
+# internal_memstats fields kept in the metrics model (as telegraf_<field>).
+# heap_objects_bytes is Telegraf's name for runtime.MemStats.HeapObjects, a count.
+_MEMSTATS_FIELDS = (
+    "heap_alloc_bytes",
+    "heap_in_use_bytes",
+    "heap_objects_bytes",
+    "sys_bytes",
+    "num_gc",
+)
+# internal_agent fields kept in the metrics model (as agent_<field>)
+_AGENT_FIELDS = (
+    "metrics_gathered",
+    "metrics_written",
+    "metrics_dropped",
+    "gather_errors",
+)
+
 
 def reset_crash_detection():
     """Clear the previous-gathered baseline. Call after any intentional Telegraf restart
     so the next metrics poll does not misread the counter reset as a crash."""
     global _prev_gathered
     _prev_gathered = {}
+    rate_tracker.reset()
+
 
+def mark_intentional_restart(reason="deploy"):
+    """Suppress unplanned-restart detection. Call before any intentional restart.
 
-def mark_intentional_restart():
-    """Suppress unplanned-restart detection. Call before any intentional restart."""
-    global _intentional_restart_pending
+    reason: "deploy" | "manual" — used when the restart is recorded.
+    """
+    global _intentional_restart_pending, _intentional_restart_reason
     _intentional_restart_pending = True
+    _intentional_restart_reason = reason
+
+
+def get_intentional_restart_reason():
+    """Return the pending intentional restart reason, or None if none is pending."""
+    return _intentional_restart_reason if _intentional_restart_pending else None
 
 
 def clear_intentional_restart():
     """Re-enable unplanned-restart detection. Call after recording precise started_at.
-    Also starts a grace period to absorb stale metrics.json data from before the restart."""
+    Also drops pushed metrics from before the restart and starts a grace period to
+    absorb stale metrics.json data when the file fallback is in use."""
     global _intentional_restart_pending, _post_restart_grace_until
     _intentional_restart_pending = False
     _post_restart_grace_until = time.time() + _POST_RESTART_GRACE_SECS
+    telegraf_ingest.clear()  # pushed metrics from the previous process
+    telegraf_health.wake()  # don't wait out the backoff from the restart
+
+
+def _percentile(ordered, q):
+    """Nearest-rank percentile of an ascending list."""
+    rank = max(1, math.ceil(q * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _write_time_summary(series):
+    """Latest value and percentiles of one output's write times (newest first)."""
+    ordered = sorted(series)
+    return {
+        "last_ms": series[0],
+        "p50_ms": _percentile(ordered, 0.50),
+        "p95_ms": _percentile(ordered, 0.95),
+        "p99_ms": _percentile(ordered, 0.99),
+        "samples": len(series),
+    }
+
+
+def _growth_per_min(points):
+    """Least-squares slope of [(timestamp, value)] in units per minute, or None."""
+    if len(points) < 3:
+        return None
+    n = len(points)
+    mean_t = sum(t for t, _ in points) / n
+    mean_v = sum(v for _, v in points) / n
+    var_t = sum((t - mean_t) ** 2 for t, _ in points)
+    if var_t == 0:
+        return None
+    cov = sum((t - mean_t) * (v - mean_v) for t, v in points)
+    return round(cov / var_t * 60)
+
+
+def _read_metrics_file(path):
+    """Newest-first metric dicts from Telegraf's file output, or None if empty."""
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        content = f.read().strip()
+    if not content:
+        return None
+    return _decode_reversed(content.split("\n"))
+
+
+def _decode_reversed(lines):
+    for line in reversed(lines):
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(data, dict):
+            yield data
 
 
 def get_telegraf_metrics():
@@ -93,29 +186,43 @@ def get_telegraf_metrics():
         "mqtt_buffer_size": 0,
         "mqtt_buffer_limit": 10000,
         "mqtt_errors": 0,
+        # MQTT write latency (ms): latest interval and percentiles over the history
+        "mqtt_write_time_ms": None,
+        "mqtt_write_time_p50_ms": None,
+        "mqtt_write_time_p95_ms": None,
+        "mqtt_write_time_p99_ms": None,
+        # Every output, keyed by plugin name
+        "output_write_times": {},
+        # Telegraf process memory; None when collect_memstats is off
+        **{f"telegraf_{f}": None for f in _MEMSTATS_FIELDS},
+        "telegraf_heap_growth_bytes_per_min": None,
+        # Agent-wide totals
+        **{f"agent_{f}": 0 for f in _AGENT_FIELDS},
         "last_updated": None,
     }
-
-    if not os.path.exists(metrics_file):
-        return default
+    # Derived rates are unknown until a sample with a timestamp has been read
+    default.update(rate_tracker.update(None, {}))
 
     try:
-        with open(metrics_file, "r") as f:
-            content = f.read().strip()
-
-        if not content:
+        # Pushed metrics win once Telegraf has sent any; the file output is the
+        # fallback for configs deployed before the push output existed.
+        from_file = not telegraf_ingest.is_active()
+        records = (
+            _read_metrics_file(metrics_file) if from_file else telegraf_ingest.records()
+        )
+        if not records:
             return default
 
-        lines = content.strip().split("\n")
         metrics = default.copy()
 
-        def _parse_opcua_gather(fields, data):
-            metrics["opcua_gathered"] = fields.get("metrics_gathered", 0)
-            metrics["opcua_errors"] = fields.get("errors", 0)
+        def _parse_opcua_gather(parts, ts):
+            metrics["opcua_gathered"] = sum(f.get("metrics_gathered", 0) for f in parts)
+            metrics["opcua_errors"] = sum(f.get("errors", 0) for f in parts)
+            # The parts gather concurrently: the scan takes as long as the slowest
             metrics["opcua_scan_time_ms"] = round(
-                fields.get("gather_time_ns", 0) / 1_000_000, 2
+                max(f.get("gather_time_ns", 0) for f in parts) / 1_000_000, 2
             )
-            metrics["last_updated"] = data.get("timestamp")
+            metrics["last_updated"] = ts
 
         def _parse_modbus_gather(fields, data):
             metrics["modbus_gathered"] = fields.get("metrics_gathered", 0)
@@ -133,27 +240,72 @@ def get_telegraf_metrics():
             metrics["mqtt_buffer_limit"] = fields.get("buffer_limit", 10000)
             metrics["mqtt_errors"] = fields.get("errors", 0)
 
-        def _parse_opcua_status(fields, data):
-            metrics["opcua_read_success"] = fields.get("read_success", 0)
-            metrics["opcua_read_error"] = fields.get("read_error", 0)
+        def _parse_opcua_status(parts, ts):
+            metrics["opcua_read_success"] = sum(f.get("read_success", 0) for f in parts)
+            metrics["opcua_read_error"] = sum(f.get("read_error", 0) for f in parts)
+
+        def _parse_memstats(fields, data):
+            for field in _MEMSTATS_FIELDS:
+                metrics[f"telegraf_{field}"] = fields.get(field)
+
+        def _parse_agent(fields, data):
+            for field in _AGENT_FIELDS:
+                metrics[f"agent_{field}"] = fields.get(field, 0)
 
         # Key: (metric_name, tag_key, tag_value) — tag_key/value are None for untagged metrics
         parsers = {
-            ("internal_gather", "input", "opcua"): _parse_opcua_gather,
             ("internal_gather", "input", "modbus"): _parse_modbus_gather,
             ("internal_write", "output", "mqtt"): _parse_mqtt_write,
-            ("internal_opcua", None, None): _parse_opcua_status,
+            ("internal_memstats", None, None): _parse_memstats,
+            ("internal_agent", None, None): _parse_agent,
         }
         found = set()
-
-        for line in reversed(lines):
-            if len(found) == len(parsers):
+        # A node list split over several [[inputs.opcua]] (aliases opcua_partN)
+        # reports one record per part and sample: these are summed over every
+        # part of the newest sample. Same key format as `parsers`.
+        part_parsers = {
+            ("internal_gather", "input", "opcua"): _parse_opcua_gather,
+            ("internal_opcua", None, None): _parse_opcua_status,
+        }
+        parts = {}  # key -> (sample timestamp, {tag set: fields})
+        parts_done = set()
+        sample_ts = None  # timestamp of the newest internal metric
+        # Histories, newest first. The heap series stops at a Telegraf restart so
+        # the growth figure only describes the running process.
+        write_times = {}
+        heap = []
+        heap_done = False
+        newer_num_gc = None
+
+        for data in records:
+            if (
+                len(found) == len(parsers)
+                and heap_done
+                and len(parts_done) == len(part_parsers)
+            ):
                 break
             try:
-                data = json.loads(line)
                 name = data.get("name", "")
                 tags = data.get("tags", {})
                 fields = data.get("fields", {})
+                if sample_ts is None and name.startswith("internal_"):
+                    sample_ts = data.get("timestamp")
+
+                if name == "internal_write" and tags.get("output"):
+                    # Several [[outputs.http]] share a plugin name; aliases tell them apart
+                    output = tags.get("alias") or tags["output"]
+                    series = write_times.setdefault(output, [])
+                    # 0 means the output has not written yet
+                    if len(series) < _HISTORY_SAMPLES and fields.get("write_time_ns"):
+                        series.append(round(fields["write_time_ns"] / 1_000_000, 2))
+                elif name == "internal_memstats" and not heap_done:
+                    num_gc = fields.get("num_gc", 0)
+                    if newer_num_gc is not None and num_gc > newer_num_gc:
+                        heap_done = True  # older process
+                    elif fields.get("heap_alloc_bytes") is not None:
+                        heap.append((data.get("timestamp"), fields["heap_alloc_bytes"]))
+                        newer_num_gc = num_gc
+                        heap_done = len(heap) >= _HISTORY_SAMPLES
 
                 for key, parser_fn in parsers.items():
                     if key in found:
@@ -166,15 +318,33 @@ def get_telegraf_metrics():
                     parser_fn(fields, data)
                     found.add(key)
 
-            except (json.JSONDecodeError, KeyError):
+                for key in part_parsers:
+                    metric_name, tag_key, tag_value = key
+                    if key in parts_done or name != metric_name:
+                        continue
+                    if tag_key and tags.get(tag_key) != tag_value:
+                        continue
+                    ts = data.get("timestamp")
+                    sample_parts = parts.setdefault(key, (ts, {}))
+                    if ts != sample_parts[0]:
+                        parts_done.add(key)  # an older sample
+                        continue
+                    sample_parts[1].setdefault(frozenset(tags.items()), fields)
+
+            except (KeyError, TypeError, AttributeError):
                 continue
 
+        for key, (ts, by_tags) in parts.items():
+            part_parsers[key](list(by_tags.values()), ts)
+
         # Crash detection: a counter decreasing from a non-trivial value means
         # the Telegraf process restarted inside the container (entrypoint loop).
-        # Suppressed during intentional restarts AND during the post-restart grace period
-        # to avoid false positives from stale metrics.json data.
+        # Suppressed during intentional restarts AND, for the file fallback, during
+        # the post-restart grace period to avoid false positives from stale
+        # metrics.json data. Pushed metrics from before a restart are discarded
+        # by clear_intentional_restart(), so they need no grace period.
         global _prev_gathered
-        in_grace = time.time() < _post_restart_grace_until
+        in_grace = from_file and time.time() < _post_restart_grace_until
         crash_detected = False
         for key in ("opcua_gathered", "modbus_gathered"):
             current = metrics[key]
@@ -193,21 +363,65 @@ def get_telegraf_metrics():
                 _prev_gathered[key] = current
         metrics["process_crash_detected"] = crash_detected
 
+        metrics["output_write_times"] = {
+            output: _write_time_summary(series)
+            for output, series in sorted(write_times.items())
+            if series
+        }
+        mqtt_times = metrics["output_write_times"].get("mqtt")
+        if mqtt_times:
+            metrics["mqtt_write_time_ms"] = mqtt_times["last_ms"]
+            for q in ("p50", "p95", "p99"):
+                metrics[f"mqtt_write_time_{q}_ms"] = mqtt_times[f"{q}_ms"]
+        metrics["telegraf_heap_growth_bytes_per_min"] = _growth_per_min(
+            [(ts, v) for ts, v in heap if ts is not None]
+        )
+
+        if crash_detected:
+            rate_tracker.rebase()  # counters restarted from zero; keep the averages
+        metrics.update(rate_tracker.update(sample_ts, metrics))
         return metrics
     except Exception:
         return default
 
 
+def _uptime_from_started_at(started_at):
+    """Seconds since a Docker StartedAt timestamp (second precision), or None."""
+    from datetime import datetime, timezone
+
+    try:
+        # Parse to second precision — strip sub-second portion
+        dt_str = started_at[:19]  # "2026-03-07T10:30:00"
+        start_dt = datetime.strptime(dt_str, "%Y-%m-%dT%H:%M:%S").replace(
+            tzinfo=timezone.utc
+        )
+        return int(time.time() - start_dt.timestamp())
+    except (TypeError, ValueError):
+        return None
+
+
 def _get_telegraf_container_info():
     """Return (started_at_iso, uptime_seconds) for the Telegraf container.
 
     started_at_iso is the raw Docker timestamp string (e.g. "2026-03-07T10:30:00.123Z").
     uptime_seconds is None if the container is not running or Docker is unavailable.
     Returns (None, None) on any error.
+
+    Served from the Docker event watcher when its stream is live; otherwise Docker
+    is queried directly.
     """
-    try:
-        from datetime import datetime, timezone
+    from app.services.docker_events import container_watcher
+
+    if container_watcher.is_running():
+        entry = container_watcher.get_service("telegraf")
+        if not entry:
+            return None, None
+        started_at = entry.get("started_at")
+        if entry["status"] != "running":
+            return started_at, None
+        return started_at, _uptime_from_started_at(started_at)
 
+    try:
         import docker
 
         client = docker.from_env()
@@ -221,13 +435,7 @@ def _get_telegraf_container_info():
         ]  # e.g. "2026-03-07T10:30:00.123456789Z"
         if c.status != "running":
             return started_at, None
-        # Parse to second precision — strip sub-second portion
-        dt_str = started_at[:19]  # "2026-03-07T10:30:00"
-        start_dt = datetime.strptime(dt_str, "%Y-%m-%dT%H:%M:%S").replace(
-            tzinfo=timezone.utc
-        )
-        uptime = int(time.time() - start_dt.timestamp())
-        return started_at, uptime
+        return started_at, _uptime_from_started_at(started_at)
     except Exception:
         return None, None
 
@@ -245,7 +453,50 @@ def _compute_unexpected_restart(current_started_at, last_deploy_start):
     return None
 
 
+_CONTAINER_DISPLAY_NAMES = {
+    "gateway": "Edge UI",
+    "telegraf": "Telegraf Data Agent",
+    "mosquitto": "MQTT Broker Demo",
+    "opcua-demo-server": "OPC-UA Server Demo",
+    "modbus-demo-server": "Modbus Server Demo",
+}
+
+_CONTAINER_DEMO_SERVICES = {"opcua-demo-server", "mosquitto", "modbus-demo-server"}
+
+
+def _format_container_status(entries):
+    """Turn raw {"service", "status"} entries into the dashboard container list."""
+    result = []
+    for entry in entries:
+        service = entry["service"]
+        status = entry["status"]
+        if status == "exited":
+            status = "stopped"
+        result.append(
+            {
+                "name": _CONTAINER_DISPLAY_NAMES.get(service, service),
+                "service": service,
+                "is_demo": service in _CONTAINER_DEMO_SERVICES,
+                "status": status,
+            }
+        )
+
+    order = ["Edge UI", "Telegraf Data Agent"]
+    result.sort(
+        key=lambda x: (
+            order.index(x["name"]) if x["name"] in order else len(order),
+            x["name"],
+        )
+    )
+    return result
+
+
 def get_container_status():
+    from app.services.docker_events import container_watcher, detect_compose_project
+
+    if container_watcher.is_running():
+        return _format_container_status(container_watcher.get_containers())
+
     try:
         import docker
 
@@ -253,66 +504,46 @@ def get_container_status():
         project_containers = client.containers.list(
             all=True, filters={"label": "com.docker.compose.project"}
         )
+        my_project = detect_compose_project(project_containers)
+
+        entries = [
+            {
+                "service": c.labels.get("com.docker.compose.service", c.name),
+                "status": c.status,
+            }
+            for c in project_containers
+            if c.labels.get("com.docker.compose.project") == my_project
+        ]
+        return _format_container_status(entries)
+    except Exception:
+        return []
 
-        # Detect our project name from any container we're running inside
-        my_project = None
-        hostname = os.environ.get("HOSTNAME", "")
-        for c in project_containers:
-            if c.short_id in hostname or c.name in hostname:
-                my_project = c.labels.get("com.docker.compose.project")
-                break
-
-        # Fallback: use the most common project label
-        if not my_project and project_containers:
-            projects = {}
-            for c in project_containers:
-                p = c.labels.get("com.docker.compose.project", "")
-                projects[p] = projects.get(p, 0) + 1
-            my_project = max(projects, key=projects.get)
-
-        display_names = {
-            "gateway": "Edge UI",
-            "telegraf": "Telegraf Data Agent",
-            "mosquitto": "MQTT Broker Demo",
-            "opcua-demo-server": "OPC-UA Server Demo",
-            "modbus-demo-server": "Modbus Server Demo",
-        }
 
-        demo_services = {"opcua-demo-server", "mosquitto", "modbus-demo-server"}
+def get_telegraf_container_running():
+    """Return {"ok": True, "running": bool} for the Telegraf container, or an error."""
+    from app.services.docker_events import container_watcher
 
-        result = []
-        for c in project_containers:
-            if c.labels.get("com.docker.compose.project") != my_project:
-                continue
-            service = c.labels.get("com.docker.compose.service", c.name)
-            status = c.status
-            if status == "exited":
-                status = "stopped"
-            result.append(
-                {
-                    "name": display_names.get(service, service),
-                    "service": service,
-                    "is_demo": service in demo_services,
-                    "status": status,
-                }
-            )
+    if container_watcher.is_running():
+        entry = container_watcher.get_service("telegraf")
+        return {"ok": True, "running": bool(entry) and entry["status"] == "running"}
+    try:
+        import docker
 
-        order = ["Edge UI", "Telegraf Data Agent"]
-        result.sort(
-            key=lambda x: (
-                order.index(x["name"]) if x["name"] in order else len(order),
-                x["name"],
-            )
-        )
-        return result
-    except Exception:
-        return []
+        client = docker.from_env()
+        containers = client.containers.list(all=True, filters={"name": "telegraf"})
+        if not containers:
+            return {"ok": True, "running": False}
+        return {"ok": True, "running": containers[0].status == "running"}
+    except Exception as e:
+        return {"ok": False, "error": str(e)}
 
 
-def get_gateway_info():
+def get_gateway_info(config=None):
     from app.services import config_store
+    from app.services.docker_events import container_watcher
 
-    config = config_store.load()
+    if config is None:
+        config = config_store.load()
     meta = config.get("_meta", {})
     nodes = config.get("nodes", [])
 
@@ -321,8 +552,13 @@ def get_gateway_info():
     last_restart = meta.get("last_restart", {})
     # Auto-detect unplanned restart: Telegraf started at a different time than recorded.
     # Skip while an intentional restart is in progress (precise timestamp not yet saved).
-    if not _intentional_restart_pending and _compute_unexpected_restart(
-        telegraf_started_at, last_restart.get("started_at")
+    # With a live Docker event stream the watcher records restarts as they happen.
+    if (
+        not container_watcher.is_running()
+        and not _intentional_restart_pending
+        and _compute_unexpected_restart(
+            telegraf_started_at, last_restart.get("started_at")
+        )
     ):
         config_store.record_restart(telegraf_started_at, "unplanned")
         last_restart = {"started_at": telegraf_started_at, "reason": "unplanned"}
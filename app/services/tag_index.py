@@ -0,0 +1,469 @@
+"""
+Searchable on-disk index of an OPC UA server's address space.
+
+Finding a tag in the browser means expanding the tree one folder at a time.
+TagCrawler walks the address space (or a subtree) in the background on the
+pooled session and stores every Object and Variable it finds in a SQLite
+file under DATA_DIR, with its browse path, display name, node class and data
+type. TagIndex searches that file by name prefix, path substring or regex,
+which stays fast well past 100k nodes.
+
+The crawl protects the PLC: it browses up to 100 nodes per Browse request
+(fewer when the server's MaxNodesPerBrowse or MaxBrowseContinuationPoints
+call for it), has at most `concurrency` requests in flight, spaces requests
+to `rate` per second and stops after `max_nodes`. Every request (Browse,
+BrowseNext and data type Reads alike) also takes a background slot on the
+device governor, so clicks in the browser overtake it.
+Namespace 0 (the Server object and the standard types) is skipped. Properties (HasProperty children such as
+EngineeringUnits) are not indexed.
+"""
+
+import asyncio
+import contextlib
+import logging
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+from asyncua import ua
+
+from app.services.device_governor import BACKGROUND
+from app.services.opcua_client import (
+    _browse_many,
+    _data_type_name,
+    _read_attributes,
+    _read_chunk_size,
+    fetch_operation_limits,
+)
+from app.services.opcua_pool import opcua_pool
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "tag_index.sqlite"
+SEARCH_MODES = ("prefix", "substring", "regex")
+
+_ROOT = "i=85"
+_CONCURRENCY = 4
+_RATE = 20.0
+_BATCH = 100
+_MAX_NODES = 200_000
+_FLUSH_ROWS = 1000
+_MAX_CHAR = "\U0010ffff"
+
+_CRAWL_MASK = (
+    ua.BrowseResultMask.ReferenceTypeId
+    | ua.BrowseResultMask.BrowseName
+    | ua.BrowseResultMask.NodeClass
+)
+_INDEXED_CLASSES = (ua.NodeClass.Object, ua.NodeClass.Variable)
+_HAS_PROPERTY = ua.NodeId(ua.ObjectIds.HasProperty)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tags (
+    server TEXT NOT NULL,
+    node_id TEXT NOT NULL,
+    path TEXT NOT NULL COLLATE NOCASE,
+    display_name TEXT NOT NULL COLLATE NOCASE,
+    node_class TEXT NOT NULL,
+    data_type TEXT,
+    crawl INTEGER NOT NULL,
+    PRIMARY KEY (server, node_id)
+);
+CREATE INDEX IF NOT EXISTS tags_name ON tags (server, display_name);
+CREATE INDEX IF NOT EXISTS tags_path ON tags (server, path);
+"""
+
+
+def _escape_like(text):
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class TagIndex:
+    """Tag rows for one or more servers (keyed by endpoint) in a SQLite file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._schema_lock = threading.Lock()
+        self._ready = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        if not self._ready:
+            with self._schema_lock:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+                self._ready = True
+        return conn
+
+    # --- Writes (from the crawler and the NodeSet2 importer) ---
+
+    def add(self, server, crawl, rows):
+        """Insert or replace [(node_id, path, display_name, node_class, data_type)]."""
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO tags VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(server, *row, crawl) for row in rows],
+            )
+        conn.close()
+
+    def prune(self, server, crawl, path_prefix=""):
+        """Drop rows under `path_prefix` that an earlier crawl found and `crawl` did not."""
+        sql = "DELETE FROM tags WHERE server = ? AND crawl <> ?"
+        args = [server, crawl]
+        if path_prefix:
+            sql += " AND path LIKE ? ESCAPE '\\'"
+            args.append(_escape_like(path_prefix) + "/%")
+        with self._lock, self._connect() as conn:
+            removed = conn.execute(sql, args).rowcount
+        conn.close()
+        return removed
+
+    # --- Reads ---
+
+    def path_of(self, server, node_id):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT path FROM tags WHERE server = ? AND node_id = ?",
+                (server, node_id),
+            ).fetchone()
+        conn.close()
+        return row["path"] if row else None
+
+    def search(self, server, q, mode="substring", node_class=None, limit=200, offset=0):
+        """Nodes matching `q`, ordered by path: {"total": n, "nodes": [...]}.
+
+        prefix: display name or browse path starts with `q` (case-insensitive).
+        substring: browse path contains `q` (case-insensitive).
+        regex: browse path matches the regular expression `q` (re.search).
+
+        Raises ValueError for an unknown mode and re.error for a bad regex.
+        limit=None returns every match.
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"mode must be one of {', '.join(SEARCH_MODES)}")
+        where, args = ["server = ?"], [server]
+        order = "path"
+        regex = re.compile(q) if q and mode == "regex" else None
+        if q and mode == "prefix":
+            # Ranges rather than LIKE, so both NOCASE indexes can be used
+            where.append(
+                "((display_name >= ? AND display_name < ?) OR (path >= ? AND path < ?))"
+            )
+            args += [q, q + _MAX_CHAR] * 2
+            order = "+path"  # sort the matches instead of walking the path index
+        elif q and mode == "substring":
+            where.append("path LIKE ? ESCAPE '\\'")
+            args.append("%" + _escape_like(q) + "%")
+        elif regex:
+            where.append("matches(path)")
+        if node_class:
+            where.append("node_class = ?")
+            args.append(node_class)
+        clause = " AND ".join(where)
+        with contextlib.closing(self._connect()) as conn, conn:
+            if regex:
+                conn.create_function(
+                    "matches",
+                    1,
+                    lambda p: regex.search(p) is not None,
+                    deterministic=True,
+                )
+            total = conn.execute(
+                f"SELECT COUNT(*) FROM tags WHERE {clause}",  # nosec B608
+                args,
+            ).fetchone()[0]
+            sql = (
+                "SELECT node_id, path, display_name, node_class, data_type"
+                f" FROM tags WHERE {clause} ORDER BY {order}"  # nosec B608
+            )
+            if limit is not None:
+                sql += " LIMIT ? OFFSET ?"
+                args += [limit, offset]
+            nodes = [dict(row) for row in conn.execute(sql, args)]
+        return {"total": total, "nodes": nodes}
+
+    def children(self, server, path="", limit=1000):
+        """The direct children of `path` ("" = top level), ordered by name:
+        [{node_id, path, display_name, node_class, data_type, has_children}]."""
+        prefix = f"{path}/" if path else ""
+        sql = (
+            "SELECT node_id, path, display_name, node_class, data_type,"
+            " EXISTS (SELECT 1 FROM tags c WHERE c.server = t.server"
+            " AND c.path > t.path || '/' AND c.path < t.path || '/' || ?)"
+            " AS has_children"
+            " FROM tags t WHERE server = ?"
+            " AND instr(substr(path, ?), '/') = 0"
+        )
+        args = [_MAX_CHAR, server, len(prefix) + 1]
+        if prefix:
+            sql += " AND path > ? AND path < ?"
+            args += [prefix, prefix + _MAX_CHAR]
+        sql += " ORDER BY +path LIMIT ?"
+        args.append(limit)
+        with self._connect() as conn:
+            rows = [dict(row) for row in conn.execute(sql, args)]
+        conn.close()
+        for row in rows:
+            row["has_children"] = bool(row["has_children"])
+        return rows
+
+    def count(self, server):
+        with self._connect() as conn:
+            total = conn.execute(
+                "SELECT COUNT(*) FROM tags WHERE server = ?", (server,)
+            ).fetchone()[0]
+        conn.close()
+        return total
+
+
+# ---------------------------------------------------------------------------
+# Crawler
+# ---------------------------------------------------------------------------
+
+
+class _Cancelled(Exception):
+    pass
+
+
+class TagCrawler:
+    """One background crawl at a time, run on the OPC UA session pool."""
+
+    def __init__(self, pool=opcua_pool):
+        self._pool = pool
+        self._lock = threading.Lock()
+        self._thread = None
+        self._cancel = threading.Event()
+        self._progress = {"state": "idle"}
+
+    def start(
+        self,
+        config,
+        index,
+        root=_ROOT,
+        concurrency=_CONCURRENCY,
+        rate=_RATE,
+        max_nodes=_MAX_NODES,
+    ):
+        """Start crawling from `root`. Returns False if a crawl is already running."""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return False
+            self._cancel.clear()
+            self._progress = {
+                "state": "running",
+                "root": root,
+                "started": datetime.now(timezone.utc).isoformat(),
+                "finished": None,
+                "browsed": 0,
+                "indexed": 0,
+                "queued": 1,
+                "requests": 0,
+                "truncated": False,
+                "error": None,
+            }
+            self._thread = threading.Thread(
+                target=self._run,
+                args=(config, index, root, concurrency, rate, max_nodes),
+                name="tag-crawler",
+                daemon=True,
+            )
+            self._thread.start()
+        return True
+
+    def cancel(self):
+        """Ask a running crawl to stop after its current requests."""
+        self._cancel.set()
+
+    def is_running(self):
+        return bool(self._thread and self._thread.is_alive())
+
+    def join(self, timeout=None):
+        thread = self._thread
+        if thread:
+            thread.join(timeout)
+
+    def get_progress(self):
+        with self._lock:
+            return dict(self._progress)
+
+    def _update(self, **changes):
+        with self._lock:
+            self._progress.update(changes)
+
+    def _run(self, config, index, root, concurrency, rate, max_nodes):
+        crawl = _Crawl(self, index, config.get("endpoint", ""), max_nodes, rate)
+        try:
+            self._pool.run(
+                config, crawl.walk, root, concurrency, timeout=None, priority=None
+            )
+            state = "cancelled" if self._cancel.is_set() else "done"
+            self._update(state=state)
+        except Exception as e:
+            logger.warning("Tag crawl from %s failed: %s", root, e)
+            self._update(state="failed", error=str(e) or type(e).__name__)
+        self._update(finished=datetime.now(timezone.utc).isoformat())
+
+
+class _Crawl:
+    """State of one walk; runs on the pool's event loop."""
+
+    def __init__(self, crawler, index, server, max_nodes, rate):
+        self._crawler = crawler
+        self._index = index
+        self._server = server
+        self._max_nodes = max_nodes
+        self._interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot = 0.0
+        self._id = time.time_ns()
+        self._rows = []
+        self._indexed = 0
+        self._requests = 0
+
+    @contextlib.asynccontextmanager
+    async def _request(self):
+        """Pace one request to the crawl's rate, then hold a governor slot."""
+        if self._crawler._cancel.is_set():
+            raise _Cancelled
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self._interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+        async with self._crawler._pool.governor.slot(self._server, BACKGROUND):
+            self._requests += 1
+            yield
+
+    async def _flush(self):
+        rows, self._rows = self._rows, []
+        if rows:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(
+                None, self._index.add, self._server, self._id, rows
+            )
+
+    async def _root_path(self, client, root):
+        if root == _ROOT:
+            return ""
+        known = await asyncio.get_running_loop().run_in_executor(
+            None, self._index.path_of, self._server, root
+        )
+        if known is not None:
+            return known
+        async with self._request():
+            (dv,) = await _read_attributes(
+                client, [(ua.NodeId.from_string(root), ua.AttributeIds.BrowseName)]
+            )
+        dv.StatusCode.check()
+        return dv.Value.Value.Name
+
+    async def walk(self, client, root, concurrency):
+        """Breadth-first walk from `root`; up to `concurrency` Browse batches
+        are in flight per round."""
+        # A retry after a dropped session starts over; rows are upserts
+        self._rows, self._indexed = [], 0
+        root_path = await self._root_path(client, root)
+        frontier = [(ua.NodeId.from_string(root), root_path)]
+        visited = {root}
+        browsed = 0
+        size = await self._batch_size(client, concurrency)
+        try:
+            while frontier and self._indexed < self._max_nodes:
+                take = size * concurrency
+                level, frontier = frontier[:take], frontier[take:]
+                batches = [level[i : i + size] for i in range(0, len(level), size)]
+                found = await asyncio.gather(
+                    *(self._browse_batch(client, b) for b in batches)
+                )
+                browsed += len(level)
+                for children in found:
+                    for child, path, node_class, data_type in children:
+                        key = child.to_string()
+                        if key in visited:
+                            continue
+                        visited.add(key)
+                        if self._indexed >= self._max_nodes:
+                            break
+                        name = path.rsplit("/", 1)[-1]
+                        self._rows.append((key, path, name, node_class, data_type))
+                        self._indexed += 1
+                        frontier.append((child, path))
+                if len(self._rows) >= _FLUSH_ROWS:
+                    await self._flush()
+                self._crawler._update(
+                    browsed=browsed,
+                    indexed=self._indexed,
+                    queued=len(frontier),
+                    requests=self._requests,
+                )
+        except _Cancelled:
+            pass
+        await self._flush()
+        truncated = bool(frontier) and self._indexed >= self._max_nodes
+        self._crawler._update(
+            indexed=self._indexed,
+            queued=len(frontier),
+            requests=self._requests,
+            truncated=truncated,
+        )
+        if not self._crawler._cancel.is_set() and not truncated:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(
+                None, self._index.prune, self._server, self._id, root_path
+            )
+
+    async def _batch_size(self, client, concurrency):
+        """Nodes per Browse within the server's limits. Every node of every
+        batch in flight may hold a continuation point on the session."""
+        limits = await fetch_operation_limits(client)
+        size = _BATCH
+        if limits["max_nodes_per_browse"]:
+            size = min(size, limits["max_nodes_per_browse"])
+        if limits["max_browse_continuation_points"]:
+            size = min(size, limits["max_browse_continuation_points"] // concurrency)
+        return max(1, size)
+
+    async def _browse_batch(self, client, batch):
+        """[(node_id, path, node_class, data_type)] for the children of `batch`."""
+        results = await _browse_many(
+            client, [nid for nid, _ in batch], _CRAWL_MASK, self._request
+        )
+        children = []
+        for (_, parent_path), (status, references) in zip(batch, results, strict=True):
+            if not status.is_good():
+                continue
+            for ref in references:
+                if (
+                    ref.NodeId.NamespaceIndex == 0
+                    or ref.NodeClass not in _INDEXED_CLASSES
+                    or ref.ReferenceTypeId == _HAS_PROPERTY
+                ):
+                    continue
+                name = ref.BrowseName.Name
+                path = f"{parent_path}/{name}" if parent_path else name
+                children.append([ref.NodeId, path, ref.NodeClass.name, None])
+
+        variables = [c for c in children if c[2] == "Variable"]
+        step = await _read_chunk_size(client)
+        for start in range(0, len(variables), step):
+            chunk = variables[start : start + step]
+            async with self._request():
+                values = await _read_attributes(
+                    client, [(c[0], ua.AttributeIds.DataType) for c in chunk]
+                )
+            for child, dv in zip(chunk, values, strict=True):
+                if dv.StatusCode.is_good():
+                    try:
+                        child[3] = await _data_type_name(
+                            client, dv.Value.Value, self._request
+                        )
+                    except Exception:
+                        child[3] = "Unknown"
+        return children
+
+
+# Module-level singleton
+tag_crawler = TagCrawler()
@@ -4,6 +4,13 @@ from datetime import datetime, timezone
 
 from jinja2 import Environment, FileSystemLoader
 
+# Where Telegraf pushes its internal metrics: the gateway service on the compose network
+DEFAULT_INGEST_URL = "http://gateway:5000"
+# Telegraf's own metric_buffer_limit default
+_DEFAULT_BUFFER_LIMIT = 10000
+# Gathers of every node and register the value-cache output buffers before dropping
+_VALUE_BUFFER_GATHERS = 3
+
 
 def _toml_dq(value):
     """Escape a value for safe use inside a TOML double-quoted string."""
@@ -22,12 +29,8 @@ def _toml_sq(value):
     return s
 
 
-def render_config(config):
-    template_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "telegraf")
-    env = Environment(loader=FileSystemLoader(template_dir))  # nosec B701
-    env.filters["toml_dq"] = _toml_dq
-    env.filters["toml_sq"] = _toml_sq
-    template = env.get_template("telegraf.conf.j2")
+def acquisition_settings(config):
+    """The acquisition section with defaults for anything not set."""
     _default_acquisition = {
         "mode": "polling",
         "scan_rate": "10s",
@@ -37,14 +40,64 @@ def render_config(config):
         "deadband_type": "None",
         "deadband_value": 0.0,
     }
+    return {**_default_acquisition, **config.get("acquisition", {})}
+
+
+def value_buffer_limit(config):
+    """metric_buffer_limit for the value-cache output: room for a few gathers of
+    every configured node and register, never below Telegraf's default."""
+    modbus = config.get("modbus", {})
+    tags = len(config.get("nodes", []))
+    if modbus.get("enabled"):
+        tags += len(modbus.get("registers", []))
+    return max(_DEFAULT_BUFFER_LIMIT, _VALUE_BUFFER_GATHERS * tags)
+
+
+def plan_opcua_inputs(config, limits=None):
+    """Split the OPC UA nodes so that no Telegraf input asks the server for more
+    than it accepts in one request.
+
+    Polling reads every node of an input in one Read, so MaxNodesPerRead
+    applies; subscriptions create them in one CreateMonitoredItems call, so
+    MaxMonitoredItemsPerCall does. `limits` is what opcua_client probed (0 or
+    missing = no limit). Returns (chunks, warnings).
+    """
+    nodes = config.get("nodes", [])
+    subscription = acquisition_settings(config)["mode"] == "subscription"
+    key = "max_monitored_items_per_call" if subscription else "max_nodes_per_read"
+    limit = (limits or {}).get(key) or 0
+    if not limit or len(nodes) <= limit:
+        return [nodes], []
+    chunks = [nodes[i : i + limit] for i in range(0, len(nodes), limit)]
+    warnings = [
+        f"{len(nodes)} OPC UA nodes exceed the server's {key} of {limit}; "
+        f"split into {len(chunks)} inputs"
+    ]
+    if config.get("publishing", {}).get("mode") == "grouped":
+        warnings.append(
+            "Grouped publishing: nodes from different inputs may arrive in "
+            "separate messages when their timestamps differ"
+        )
+    return chunks, warnings
+
+
+def render_config(config, ingest_url=DEFAULT_INGEST_URL, limits=None):
+    template_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "telegraf")
+    env = Environment(loader=FileSystemLoader(template_dir))  # nosec B701
+    env.filters["toml_dq"] = _toml_dq
+    env.filters["toml_sq"] = _toml_sq
+    template = env.get_template("telegraf.conf.j2")
+    opcua_chunks, _ = plan_opcua_inputs(config, limits)
     return template.render(
         opcua=config.get("opcua", {}),
-        nodes=config.get("nodes", []),
+        opcua_chunks=opcua_chunks,
         mqtt=config.get("mqtt", {}),
-        acquisition={**_default_acquisition, **config.get("acquisition", {})},
+        acquisition=acquisition_settings(config),
         publishing=config.get(
             "publishing", {"mode": "individual", "group_interval": "10s"}
         ),
         modbus=config.get("modbus", {"enabled": False, "registers": []}),
+        value_buffer_limit=value_buffer_limit(config),
+        ingest_url=(ingest_url or DEFAULT_INGEST_URL).rstrip("/"),
         generated_at=datetime.now(timezone.utc).isoformat(),
     )
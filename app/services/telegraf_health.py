@@ -0,0 +1,184 @@
+"""
+Background prober for Telegraf's [[outputs.health]] endpoint.
+
+One thread checks the endpoint over a persistent keep-alive connection and
+caches the result, so dashboard polls, the SSE feed and /metrics read the
+status instantly instead of each opening a connection and, while Telegraf is
+down, blocking for the full timeout. While the endpoint is unreachable the
+probe interval backs off exponentially; wake() forces an immediate check
+(e.g. right after a restart).
+"""
+
+import http.client
+import logging
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+_INTERVAL_SECS = 5.0
+_TIMEOUT_SECS = 1.0
+_MAX_BACKOFF_SECS = 30.0
+# Latency samples kept (10 minutes at the healthy interval)
+_HISTORY_SAMPLES = 120
+
+
+class TelegrafHealthProber:
+    """Caches Telegraf's health status and a history of check latencies."""
+
+    def __init__(
+        self,
+        interval=_INTERVAL_SECS,
+        timeout=_TIMEOUT_SECS,
+        max_backoff=_MAX_BACKOFF_SECS,
+        history=_HISTORY_SAMPLES,
+    ):
+        self._interval = interval
+        self._timeout = timeout
+        self._max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self._first_result = threading.Event()
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._url = None
+        self._conn = None  # only touched by the probing thread
+        self._conn_url = None
+        self._status = None
+        self._failures = 0
+        self._history = deque(maxlen=history)
+
+    # --- Lifecycle ---
+
+    def start(self, url):
+        """Start probing `url` (idempotent; a new URL takes effect on the next check)."""
+        with self._lock:
+            self._url = url
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="telegraf-health", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake.set()
+
+    def wake(self):
+        """Check now instead of waiting out the interval or backoff."""
+        self._wake.set()
+
+    def is_running(self):
+        return bool(self._thread and self._thread.is_alive())
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self.probe_once()
+            self._wake.wait(self._next_delay())
+            self._wake.clear()
+        self._close()
+
+    def _next_delay(self):
+        with self._lock:
+            failures = self._failures
+        if not failures:
+            return self._interval
+        return min(2 ** (failures - 1), self._max_backoff)
+
+    # --- Probing ---
+
+    def probe_once(self):
+        """Run one health check, update the cache and return the status."""
+        with self._lock:
+            url = self._url
+        started = time.monotonic()
+        status_code = None
+        try:
+            status_code = self._request(url)
+        except Exception as e:
+            logger.debug("Telegraf health check failed: %s", e)
+            self._close()
+        latency_ms = round((time.monotonic() - started) * 1000, 2)
+
+        running = status_code is not None and status_code < 400
+        with self._lock:
+            self._failures = 0 if running else self._failures + 1
+            self._status = {
+                "running": running,
+                "status_code": status_code,
+                "latency_ms": latency_ms if status_code is not None else None,
+                "checked_at": time.time(),
+                "consecutive_failures": self._failures,
+            }
+            self._history.append(
+                (self._status["checked_at"], self._status["latency_ms"])
+            )
+            status = dict(self._status)
+        self._first_result.set()
+        return status
+
+    def _request(self, url):
+        if self._conn_url != url:
+            self._close()
+        reused = self._conn is not None
+        try:
+            return self._send(url)
+        except (http.client.HTTPException, ConnectionError):
+            if not reused:
+                raise
+            # The server dropped the idle keep-alive connection; retry on a new one
+            self._close()
+            return self._send(url)
+
+    def _send(self, url):
+        parts = urlsplit(url)
+        if self._conn is None:
+            conn_cls = (
+                http.client.HTTPSConnection
+                if parts.scheme == "https"
+                else http.client.HTTPConnection
+            )
+            self._conn = conn_cls(parts.hostname, parts.port, timeout=self._timeout)
+            self._conn_url = url
+        self._conn.request("GET", parts.path or "/")
+        resp = self._conn.getresponse()
+        resp.read()  # drain so the connection can be reused
+        if resp.will_close:
+            self._close()
+        return resp.status
+
+    def _close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            conn.close()
+
+    # --- Accessors ---
+
+    def get_status(self, wait=None):
+        """Cached status. Before the first check completes, waits up to `wait`
+        seconds (default: the probe timeout) and then reports not running."""
+        if not self._first_result.is_set():
+            self._first_result.wait(self._timeout if wait is None else wait)
+        with self._lock:
+            if self._status is None:
+                return {
+                    "running": False,
+                    "status_code": None,
+                    "latency_ms": None,
+                    "checked_at": None,
+                    "consecutive_failures": 0,
+                }
+            return dict(self._status)
+
+    def get_history(self):
+        """[[timestamp, latency_ms or None], ...], oldest first."""
+        with self._lock:
+            return [list(sample) for sample in self._history]
+
+
+# Module-level singleton
+telegraf_health = TelegrafHealthProber()
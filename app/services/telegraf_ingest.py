@@ -0,0 +1,111 @@
+"""
+In-memory inbox for Telegraf internal metrics pushed over HTTP.
+
+The generated config sends ``internal_*`` metrics to /api/telegraf/ingest with
+``[[outputs.http]]`` (JSON batch format). get_telegraf_metrics() reads the
+newest records from here instead of re-reading a metrics file on every poll.
+Records are kept in arrival order and bounded, so the inbox holds roughly the
+same history the 1MB rotated file used to.
+"""
+
+import json
+import threading
+import time
+from collections import deque
+
+# Request body limit for Telegraf pushes; a full 10000-metric batch is well under it
+MAX_PAYLOAD_BYTES = 16 * 1024 * 1024
+
+# ~12 internal metrics per 10s agent interval: enough for the 120-sample
+# write-time and heap histories with room for extra inputs/outputs.
+_MAX_RECORDS = 4096
+
+
+def parse_batch(body):
+    """Decode a Telegraf JSON payload into a list of metric dicts.
+
+    Accepts the batch format ({"metrics": [...]}), a single metric object, or
+    newline-delimited metrics. Entries without a name or fields are skipped.
+    Raises ValueError if the payload is not JSON.
+    """
+    if isinstance(body, bytes):
+        body = body.decode("utf-8")
+    body = body.strip()
+    if not body:
+        return []
+    try:
+        data = json.loads(body)
+        items = data.get("metrics", [data]) if isinstance(data, dict) else data
+    except json.JSONDecodeError:
+        # Non-batch serializer output: one metric per line
+        items = [json.loads(line) for line in body.splitlines() if line.strip()]
+    if not isinstance(items, list):
+        raise ValueError("expected a metric object or a list of metrics")
+    return [
+        m
+        for m in items
+        if isinstance(m, dict)
+        and isinstance(m.get("name"), str)
+        and isinstance(m.get("fields"), dict)
+    ]
+
+
+class TelegrafIngest:
+    """Bounded, thread-safe store of the most recent pushed metrics."""
+
+    def __init__(self, max_records=_MAX_RECORDS):
+        self._records = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+        self._received = 0
+        self._last_received = None  # monotonic time of the last push
+
+    def ingest(self, body):
+        """Parse and store one push; returns the number of metrics accepted."""
+        metrics = parse_batch(body)
+        with self._lock:
+            self._records.extend(metrics)
+            self._received += len(metrics)
+            self._last_received = time.monotonic()
+        return len(metrics)
+
+    def records(self):
+        """Newest-first snapshot of the stored metrics."""
+        with self._lock:
+            snapshot = list(self._records)
+        snapshot.reverse()
+        return snapshot
+
+    def clear(self):
+        """Drop stored metrics (e.g. those from before an intentional restart).
+        The push mode itself stays active."""
+        with self._lock:
+            self._records.clear()
+
+    def is_active(self):
+        """True once Telegraf has pushed at least once since the gateway started."""
+        with self._lock:
+            return self._last_received is not None
+
+    def get_stats(self):
+        with self._lock:
+            age = (
+                None
+                if self._last_received is None
+                else round(time.monotonic() - self._last_received, 1)
+            )
+            return {
+                "records": len(self._records),
+                "received": self._received,
+                "last_received_age_secs": age,
+            }
+
+    def reset(self):
+        """Forget everything, including that a push was ever received (tests)."""
+        with self._lock:
+            self._records.clear()
+            self._received = 0
+            self._last_received = None
+
+
+# Module-level singleton
+telegraf_ingest = TelegrafIngest()
@@ -0,0 +1,294 @@
+"""
+Incremental follower for the Telegraf container log.
+
+One background thread streams the container log (``follow=True``) into a
+bounded ring buffer, so /api/telegraf/logs and the post-deploy config check
+read memory instead of downloading the last N lines from Docker on every
+call. Each line gets a sequence number; clients pass the last one they saw
+as ``after`` and only receive new lines. Lines are indexed by level (E!/W!/
+I!/D!) and plugin at ingest, and Telegraf config errors are flagged then
+too, so a deploy's config check is a lookup.
+"""
+
+import bisect
+import contextlib
+import itertools
+import logging
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+_RING_SIZE = 2000
+# Lines fetched when the follower first attaches to the container
+_INITIAL_TAIL = 500
+_MAX_BACKOFF_SECS = 30.0
+
+# "2026-03-07T10:30:00Z E! [inputs.opcua] Error in plugin: ..."
+_LINE_RE = re.compile(r"^\S+\s+([EWID])!\s+(?:\[([^\]]+)\])?")
+_LEVEL_NAMES = {"error": "E", "warn": "W", "warning": "W", "info": "I", "debug": "D"}
+
+# Keywords that indicate a genuine config parse/load error in Telegraf logs.
+# Runtime errors (OPC UA session drops, MQTT timeouts, etc.) are excluded — they
+# are transient and Telegraf recovers from them automatically without intervention.
+_CONFIG_ERROR_KEYWORDS = (
+    "config",
+    "toml",
+    "parse",
+    "invalid",
+    "unknown field",
+    "failed to load",
+    "cannot parse",
+    "error loading",
+)
+# Telegraf logs this once the config has been parsed and all plugins are loaded.
+_CONFIG_LOADED_MARKER = "Loaded outputs"
+
+
+def parse_level(value):
+    """Normalise a level filter ("E", "error", "W,I", ...) to a set of letters."""
+    levels = set()
+    for part in (value or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        letter = _LEVEL_NAMES.get(part.lower(), part.upper()[:1])
+        if letter not in "EWID":
+            raise ValueError(f"unknown log level: {part}")
+        levels.add(letter)
+    return levels
+
+
+def _split_docker_timestamp(raw):
+    """Split a `timestamps=True` log line into (epoch, text)."""
+    stamp, _, text = raw.partition(" ")
+    try:
+        # Docker uses nanosecond precision; datetime takes microseconds
+        secs, _, frac = stamp.rstrip("Z").partition(".")
+        dt = datetime.strptime(secs, "%Y-%m-%dT%H:%M:%S").replace(tzinfo=timezone.utc)
+        return dt.timestamp() + float(f"0.{frac or 0}"), text
+    except ValueError:
+        return None, raw
+
+
+class TelegrafLogFollower:
+    """Ring buffer of Telegraf log lines with level/plugin indexes and a cursor API."""
+
+    def __init__(self, container_name="telegraf", size=_RING_SIZE):
+        self._container_name = container_name
+        self._size = size
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._ring = deque(maxlen=size)
+        self._by_level = {}
+        self._by_plugin = {}
+        self._config_errors = deque(maxlen=50)
+        self._config_loaded_at = deque(maxlen=50)
+        self._seq = 0
+        self._last_ts = None
+        self._connected = False
+        self._attached = False  # reached the container at least once
+        self._last_error = None
+        self._thread = None
+        self._stream = None
+        self._stop_event = threading.Event()
+
+    # --- Lifecycle ---
+
+    def start(self):
+        """Start the follower thread (idempotent). Reconnects with backoff."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="telegraf-logs", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        stream = self._stream
+        if stream is not None:
+            with contextlib.suppress(Exception):
+                stream.close()
+
+    def _run(self):
+        backoff = 0.5
+        while not self._stop_event.is_set():
+            try:
+                import docker
+
+                client = docker.from_env()
+                if self._follow(client):
+                    backoff = 0.5  # stream ended normally (container stopped)
+            except Exception as e:
+                logger.debug("Telegraf log stream unavailable: %s", e)
+                with self._lock:
+                    self._last_error = str(e)
+            with self._cond:
+                self._connected = False
+                self._cond.notify_all()  # config checks stop waiting on a dead stream
+            self._stop_event.wait(backoff)
+            backoff = min(backoff * 2, _MAX_BACKOFF_SECS)
+
+    def _follow(self, client):
+        """Stream the container log until it ends. Returns False if no container."""
+        containers = client.containers.list(
+            all=True, filters={"name": self._container_name}
+        )
+        if not containers:
+            with self._lock:
+                self._last_error = "Telegraf container not found"
+            return False
+        with self._lock:
+            since = self._last_ts
+        kwargs = {"tail": _INITIAL_TAIL} if since is None else {"since": since}
+        stream = containers[0].logs(
+            stream=True,
+            follow=True,
+            stdout=True,
+            stderr=True,
+            timestamps=True,
+            **kwargs,
+        )
+        self._stream = stream
+        with self._lock:
+            self._connected = True
+            self._attached = True
+            self._last_error = None
+        try:
+            pending = ""
+            for chunk in stream:
+                if self._stop_event.is_set():
+                    break
+                pending += chunk.decode("utf-8", errors="replace")
+                *lines, pending = pending.split("\n")
+                self.feed(lines)
+            if pending:
+                self.feed([pending])
+        finally:
+            self._stream = None
+            with contextlib.suppress(Exception):
+                stream.close()
+        return True
+
+    # --- Ingest ---
+
+    def feed(self, raw_lines):
+        """Add Docker log lines (with `timestamps=True` prefixes) to the ring."""
+        with self._cond:
+            for raw in raw_lines:
+                raw = raw.rstrip("\r")
+                if not raw.strip():
+                    continue
+                ts, text = _split_docker_timestamp(raw)
+                if ts is not None:
+                    # Reconnecting with `since` replays the last second; skip what we have
+                    if self._last_ts is not None and ts <= self._last_ts:
+                        continue
+                    self._last_ts = ts
+                self._append(ts, text)
+            self._cond.notify_all()
+
+    def _append(self, ts, text):
+        self._seq += 1
+        m = _LINE_RE.match(text)
+        level = m.group(1) if m else None
+        plugin = m.group(2).split("::")[0] if m and m.group(2) else None
+        entry = {"seq": self._seq, "ts": ts, "level": level, "plugin": plugin}
+        entry["line"] = text.strip()
+        self._ring.append(entry)
+        if level:
+            self._by_level.setdefault(level, deque(maxlen=self._size)).append(entry)
+        if plugin:
+            self._by_plugin.setdefault(plugin, deque(maxlen=self._size)).append(entry)
+        if level == "E" and any(kw in text.lower() for kw in _CONFIG_ERROR_KEYWORDS):
+            self._config_errors.append(entry)
+        if _CONFIG_LOADED_MARKER in text:
+            self._config_loaded_at.append(ts)
+
+    # --- Queries ---
+
+    def query(self, after=0, levels=None, plugin=None, pattern=None, limit=500):
+        """The oldest `limit` lines with seq > `after`, optionally filtered.
+
+        Returns {"lines", "cursor", "truncated", "connected", "error"}; pass
+        `cursor` back as `after`. When more lines matched than `limit`,
+        `truncated` is true and `cursor` is the last returned seq, so the next
+        call continues from there. `pattern` is a regular expression; re.error
+        propagates to the caller.
+        """
+        regex = re.compile(pattern) if pattern else None
+        with self._lock:
+            candidates = self._candidates(levels, plugin)
+            start = bisect.bisect_right(candidates, after, key=lambda e: e["seq"])
+            matched = []
+            truncated = False
+            for entry in itertools.islice(candidates, start, None):
+                if levels and entry["level"] not in levels:
+                    continue
+                if plugin and entry["plugin"] != plugin:
+                    continue
+                if regex and not regex.search(entry["line"]):
+                    continue
+                if len(matched) >= limit:
+                    truncated = True
+                    break
+                matched.append(dict(entry))
+            return {
+                "lines": matched,
+                "cursor": matched[-1]["seq"] if truncated else self._seq,
+                "truncated": truncated,
+                "connected": self._connected,
+                "error": None if self._connected else self._last_error,
+            }
+
+    def _candidates(self, levels, plugin):
+        """Smallest index that covers the filter (entries ordered by seq)."""
+        options = []
+        if plugin:
+            options.append(list(self._by_plugin.get(plugin, ())))
+        if levels:
+            merged = [e for lvl in levels for e in self._by_level.get(lvl, ())]
+            merged.sort(key=lambda e: e["seq"])
+            options.append(merged)
+        if not options:
+            return list(self._ring)
+        return min(options, key=len)
+
+    def find_config_error(self, since):
+        """First config-error line logged at or after `since` (epoch), or None."""
+        with self._lock:
+            return self._find_config_error(since)
+
+    def _find_config_error(self, since):
+        for entry in self._config_errors:
+            if entry["ts"] is not None and entry["ts"] >= since:
+                return entry["line"]
+        return None
+
+    def wait_for_config_result(self, since, timeout):
+        """Wait until Telegraf, started after `since`, logs a config error (returned)
+        or reports its plugins loaded (None). Gives up after `timeout` seconds, or
+        at once if the follower has never been able to reach the container."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                error = self._find_config_error(since)
+                if error:
+                    return error
+                if any(ts is not None and ts >= since for ts in self._config_loaded_at):
+                    return None
+                if not self._attached and self._last_error:
+                    return None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+
+# Module-level singleton
+telegraf_log_follower = TelegrafLogFollower()
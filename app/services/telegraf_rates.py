@@ -0,0 +1,118 @@
+"""
+Per-second rates derived from Telegraf's cumulative internal counters.
+
+Samples are keyed on the Telegraf timestamp of each metric, not on when the
+gateway happens to read it, so any number of dashboard polls, SSE samples
+or /metrics scrapes see the same rates. A counter that goes backwards means
+Telegraf restarted; the interval is skipped instead of producing a negative rate.
+"""
+
+import math
+import threading
+
+# Counters from get_telegraf_metrics() that get a rate
+RATE_COUNTERS = (
+    "opcua_gathered",
+    "modbus_gathered",
+    "opcua_read_success",
+    "opcua_read_error",
+    "mqtt_written",
+    "mqtt_dropped",
+    "mqtt_errors",
+)
+
+# Time constant of the moving average, in seconds
+_EWMA_TAU_SECS = 60.0
+
+
+def _ratio(part, other):
+    total = (part or 0) + (other or 0)
+    if part is None or total <= 0:
+        return None
+    return round(part / total, 4)
+
+
+class RateTracker:
+    """Turns successive counter samples into rates, moving averages and ratios."""
+
+    def __init__(self, counters=RATE_COUNTERS, tau=_EWMA_TAU_SECS):
+        self._counters = tuple(counters)
+        self._tau = tau
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self):
+        self._prev = None  # (timestamp, {counter: value})
+        self._rates = dict.fromkeys(self._counters)
+        self._averages = dict.fromkeys(self._counters)
+        self._interval = None
+        self._resets = 0
+
+    def reset(self):
+        """Forget baseline and averages. Call when the pipeline config changes."""
+        with self._lock:
+            self._clear()
+
+    def rebase(self):
+        """Drop the baseline but keep averages (e.g. after a Telegraf process crash)."""
+        with self._lock:
+            self._prev = None
+            self._rates = dict.fromkeys(self._counters)
+
+    def update(self, timestamp, values):
+        """Feed one sample; returns the derived fields.
+
+        A repeated or older timestamp leaves the state untouched, so callers may
+        invoke this on every read of the metrics file.
+        """
+        with self._lock:
+            if timestamp is None:
+                return self._derived(stale=True)
+            current = {c: values.get(c) or 0 for c in self._counters}
+            if self._prev is None:
+                self._prev = (timestamp, current)
+                return self._derived()
+
+            prev_ts, prev_values = self._prev
+            dt = timestamp - prev_ts
+            if dt <= 0:
+                return self._derived()
+
+            if any(current[c] < prev_values[c] for c in self._counters):
+                # Counter reset: Telegraf restarted between the two samples
+                self._resets += 1
+                self._prev = (timestamp, current)
+                self._rates = dict.fromkeys(self._counters)
+                return self._derived()
+
+            alpha = 1 - math.exp(-dt / self._tau)
+            for c in self._counters:
+                rate = (current[c] - prev_values[c]) / dt
+                self._rates[c] = rate
+                avg = self._averages[c]
+                self._averages[c] = rate if avg is None else avg + alpha * (rate - avg)
+            self._interval = dt
+            self._prev = (timestamp, current)
+            return self._derived()
+
+    def _derived(self, stale=False):
+        out = {}
+        for c in self._counters:
+            rate = None if stale else self._rates[c]
+            avg = None if stale else self._averages[c]
+            out[f"{c}_per_sec"] = None if rate is None else round(rate, 3)
+            out[f"{c}_per_sec_avg"] = None if avg is None else round(avg, 3)
+        avg = {} if stale else self._averages
+        out["mqtt_drop_ratio"] = _ratio(
+            avg.get("mqtt_dropped"), avg.get("mqtt_written")
+        )
+        out["opcua_read_error_ratio"] = _ratio(
+            avg.get("opcua_read_error"), avg.get("opcua_read_success")
+        )
+        out["rate_interval_secs"] = None if stale else self._interval
+        out["counter_resets"] = self._resets
+        return out
+
+
+# Module-level singleton
+rate_tracker = RateTracker()
@@ -0,0 +1,153 @@
+"""
+Last-value cache and short history of process values.
+
+The generated config sends a copy of the opcua and modbus metrics to
+/api/values/ingest. Every value field becomes a tag keyed "<source>:<name>"
+plus the metric tags that tell same-named fields apart, e.g.
+"opcua:Temperature[id=ns=3;i=1001]" or "modbus:Pressure[slave_id=2]" (see
+tag_key()). The live values page and /api/values read from here, so they
+never put extra load on the PLC.
+
+Every stored value bumps a sequence number. A client passes the last one it
+saw as ``since`` and only gets the tags that changed. ``generation`` changes
+when the cache is cleared, telling clients to drop what they hold.
+"""
+
+import threading
+from collections import deque
+
+# Values kept per tag (one per poll: 1 minute at a 1s scan rate)
+_HISTORY_SAMPLES = 60
+# Upper bound on distinct tags; new tags beyond it are ignored
+_MAX_TAGS = 20000
+# Fields the OPC UA input adds next to each node value
+_QUALITY_FIELD = "Quality"
+_META_FIELDS = {_QUALITY_FIELD, "DataType"}
+# Metric tags that tell same-named fields apart: the Modbus slave and the OPC UA
+# node id. Grouped mode drops the id tag so the merge aggregator can combine
+# every node into one metric; its keys are then "<source>:<name>".
+_KEY_TAGS = ("slave_id", "id")
+
+
+def tag_key(source, name, tags=None):
+    """Cache key of the `name` field of a `source` metric with these tags."""
+    tags = tags or {}
+    return f"{source}:{name}" + "".join(
+        f"[{t}={tags[t]}]" for t in _KEY_TAGS if t in tags
+    )
+
+
+def _to_seconds(ts):
+    """Telegraf JSON timestamps are seconds or, with json_timestamp_units, ms."""
+    if not isinstance(ts, (int, float)) or isinstance(ts, bool):
+        return None
+    return ts / 1000 if ts > 1e11 else ts
+
+
+class ValueCache:
+    """Indexed last value plus a bounded ring of recent values per tag."""
+
+    def __init__(self, history=_HISTORY_SAMPLES, max_tags=_MAX_TAGS):
+        self._history = history
+        self._max_tags = max_tags
+        self._lock = threading.Lock()
+        self._tags = {}
+        self._seq = 0
+        self._generation = 0
+        self._rejected_tags = 0
+
+    def update(self, metrics):
+        """Store the value fields of Telegraf metric dicts; returns the number stored."""
+        stored = 0
+        with self._lock:
+            for metric in metrics:
+                source = metric.get("name")
+                fields = metric.get("fields") or {}
+                ts = _to_seconds(metric.get("timestamp"))
+                if not source or ts is None:
+                    continue
+                tags = metric.get("tags") or {}
+                key_tags = {t: str(tags[t]) for t in _KEY_TAGS if t in tags}
+                values = [(n, v) for n, v in fields.items() if n not in _META_FIELDS]
+                quality = data_type = None
+                if len(values) == 1:
+                    # A merged (grouped) metric has one Quality for all its
+                    # nodes, from whichever was merged last: not attributed
+                    quality = fields.get(_QUALITY_FIELD)
+                    data_type = fields.get("DataType")
+                for name, value in values:
+                    key = tag_key(source, name, key_tags)
+                    if self._store(
+                        key, source, name, key_tags, value, ts, quality, data_type
+                    ):
+                        stored += 1
+        return stored
+
+    def _store(self, key, source, name, tags, value, ts, quality, data_type):
+        entry = self._tags.get(key)
+        if entry is None:
+            if len(self._tags) >= self._max_tags:
+                self._rejected_tags += 1
+                return False
+            entry = self._tags[key] = {
+                "source": source,
+                "name": name,
+                "tags": tags,
+                "ts": None,
+                "history": deque(maxlen=self._history),
+            }
+        elif ts < entry["ts"]:
+            return False  # late duplicate from a retried batch
+        self._seq += 1
+        entry.update(
+            value=value, ts=ts, quality=quality, data_type=data_type, seq=self._seq
+        )
+        entry["history"].append((ts, value))
+        return True
+
+    def get(self, keys=None, since=0, history=False):
+        """Return {"seq", "generation", "values", "missing"} for the given tags
+        (all if None).
+
+        Only tags updated after sequence number ``since`` are included.
+        """
+        with self._lock:
+            if keys is None:
+                selected = self._tags.items()
+                missing = []
+            else:
+                selected = [(k, self._tags[k]) for k in keys if k in self._tags]
+                missing = [k for k in keys if k not in self._tags]
+            values = {}
+            for key, entry in selected:
+                if entry["seq"] <= since:
+                    continue
+                item = {k: v for k, v in entry.items() if k != "history"}
+                if history:
+                    item["history"] = [list(p) for p in entry["history"]]
+                values[key] = item
+            return {
+                "seq": self._seq,
+                "generation": self._generation,
+                "values": values,
+                "missing": missing,
+            }
+
+    def clear(self):
+        """Forget all tags (e.g. after a deploy renamed or removed some)."""
+        with self._lock:
+            self._tags.clear()
+            self._generation += 1
+            self._rejected_tags = 0
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "tags": len(self._tags),
+                "seq": self._seq,
+                "rejected_tags": self._rejected_tags,
+            }
+
+
+# Module-level singleton
+value_cache = ValueCache()
@@ -67,7 +67,10 @@ async function applyConfig(btn) {
 
     if (data.ok) {
         const restartOk = data.restart && data.restart.ok;
-        if (restartOk) {
+        if (restartOk && data.warnings && data.warnings.length) {
+            showAlert("Config applied. " + data.warnings.join(". ") + ".", "warning");
+            setAgentUI(true);
+        } else if (restartOk) {
             showAlert("Config applied and Telegraf restarted successfully.", "success");
             setAgentUI(true);
         } else {
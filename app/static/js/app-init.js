@@ -38,6 +38,20 @@ document.addEventListener("DOMContentLoaded", () => {
         document.getElementById("logs-panel-gateway").style.display = tab === "gateway" ? "" : "none";
         document.getElementById("logs-panel-telegraf").style.display = tab === "telegraf" ? "" : "none";
         if (tab === "telegraf") loadTelegrafLogs();
+        followTelegrafLogs(tab === "telegraf");
+    }
+
+    const logsModal = document.getElementById("logsModal");
+    if (logsModal) logsModal.addEventListener("hidden.bs.modal", () => followTelegrafLogs(false));
+    const tlogLevel = document.getElementById("telegraf-logs-level");
+    if (tlogLevel) tlogLevel.addEventListener("change", () => loadTelegrafLogs());
+    const tlogQuery = document.getElementById("telegraf-logs-query");
+    if (tlogQuery) {
+        let debounce = null;
+        tlogQuery.addEventListener("input", () => {
+            clearTimeout(debounce);
+            debounce = setTimeout(() => loadTelegrafLogs(), 300);
+        });
     }
 
     const logsBtn = document.getElementById("btn-open-logs");
@@ -66,9 +80,21 @@ document.addEventListener("DOMContentLoaded", () => {
         btn.addEventListener("click", () => switchLogsTab(btn.dataset.logsTab));
     });
 
-    // --- Error badge polling (every 30s) ---
+    // --- Error badge: pushed over the event stream, polled every 30s as fallback ---
+    let logBadgeTimer = null;
     pollLogBadge();
-    setInterval(pollLogBadge, 30000);
+    streamSubscribe("log", {
+        onMessage: handleLogStreamMessage,
+        onUp: () => {
+            clearInterval(logBadgeTimer);
+            logBadgeTimer = null;
+            pollLogBadge();  // catch up on anything logged while disconnected
+        },
+        onDown: () => {
+            if (!logBadgeTimer) logBadgeTimer = setInterval(pollLogBadge, 30000);
+        },
+        onResync: pollLogBadge,
+    });
 
     // --- Preview config ---
     document.querySelectorAll('[data-action="preview-config"]').forEach(el => {
@@ -6,6 +6,9 @@ let nodesConfigured = 0;
 let anyInputActive = true;
 let pipelineCrashed = false;
 let crashedTimer = null;
+let dashboardTimer = null;
+// Last full value of each section; pushed deltas are merged into it
+const dashboardState = {};
 
 document.addEventListener("DOMContentLoaded", () => {
     document.querySelectorAll('[data-bs-toggle="tooltip"]').forEach(el => {
@@ -14,7 +17,18 @@ document.addEventListener("DOMContentLoaded", () => {
     positionForkBar();
     window.addEventListener("resize", positionForkBar);
     refreshAll();
-    setInterval(refreshAll, 5000);
+    // Pushed deltas while the event stream is up, polling every 5s otherwise
+    streamSubscribe("dashboard", {
+        onMessage: applyDashboardUpdate,
+        onUp: () => {
+            clearInterval(dashboardTimer);
+            dashboardTimer = null;
+        },
+        onDown: () => {
+            if (!dashboardTimer) dashboardTimer = setInterval(refreshAll, 5000);
+        },
+        onResync: refreshAll,
+    });
 
     document.getElementById("g-containers").addEventListener("click", async (e) => {
         const btn = e.target.closest(".demo-toggle-btn");
@@ -22,25 +36,46 @@ document.addEventListener("DOMContentLoaded", () => {
         const { service, action } = btn.dataset;
         btn.disabled = true;
         await fetchJSON(`/api/dashboard/container/${service}/${action}`, { method: "POST" });
-        await refreshGatewayInfo();
+        await refreshAll();
     });
 });
 
+// One request per refresh: the server gathers every section concurrently.
+// A section that failed or timed out server-side is null and keeps its last render.
 async function refreshAll() {
-    await Promise.all([
-        refreshHealth(),
-        refreshTelegrafMetrics(),
-        refreshGatewayInfo(),
-        refreshTelegrafRunning(),
-    ]);
+    let snap;
+    try {
+        snap = await fetchJSON("/api/dashboard/snapshot");
+    } catch (e) {
+        return;
+    }
+    if (!snap || snap.error) return;
+    applyDashboardUpdate({ full: true, ...snap });
+    if (Array.isArray(snap.events) && typeof updateLogBadge === "function") {
+        updateLogBadge(snap.events);
+    }
 }
 
-async function refreshTelegrafRunning() {
-    try {
-        const d = await fetchJSON("/api/telegraf/status");
-        telegrafRunning = d.ok ? d.running : null;
-        updatePipelineStatus();
-    } catch (e) {}
+const dashboardRenderers = {
+    health: d => renderHealth(d),
+    telegraf_metrics: d => renderTelegrafMetrics(d),
+    gateway_info: d => renderGatewayInfo(d),
+    telegraf_running: d => renderTelegrafRunning(d),
+};
+
+// `update` holds whole sections (full: true) or only the fields that changed.
+function applyDashboardUpdate(update) {
+    Object.entries(dashboardRenderers).forEach(([section, render]) => {
+        const value = update[section];
+        if (!value) return;
+        dashboardState[section] = update.full ? value : { ...dashboardState[section], ...value };
+        render(dashboardState[section]);
+    });
+}
+
+function renderTelegrafRunning(d) {
+    telegrafRunning = d.ok ? d.running : null;
+    updatePipelineStatus();
 }
 
 function updatePipelineStatus() {
@@ -60,9 +95,8 @@ function updatePipelineStatus() {
 
 // --- System Health ---
 
-async function refreshHealth() {
+function renderHealth(d) {
     try {
-        const d = await fetchJSON("/api/dashboard/health");
         updateGauge("cpu", d.cpu_percent);
         updateGauge("ram", d.memory_percent);
         updateGauge("disk", d.disk_percent);
@@ -91,10 +125,8 @@ function updateGauge(id, value) {
 
 // --- Pipeline Metrics ---
 
-async function refreshTelegrafMetrics() {
+function renderTelegrafMetrics(d) {
     try {
-        const d = await fetchJSON("/api/dashboard/telegraf-metrics");
-
         lastOpcuaCount = d.opcua_gathered;
         if (d.nodes_configured !== undefined) nodesConfigured = d.nodes_configured;
         if (d.any_input_active !== undefined) {
@@ -116,6 +148,7 @@ async function refreshTelegrafMetrics() {
 
         // OPC UA input node
         setText("p-opcua-read", formatNum(d.opcua_gathered));
+        setText("p-opcua-rate", formatRate(d.opcua_gathered_per_sec_avg));
 
         // Aggregator node (only rendered in grouped mode)
         const aggEl = document.getElementById("p-agg-grouped");
@@ -127,12 +160,34 @@ async function refreshTelegrafMetrics() {
 
         // Modbus input node
         setText("p-modbus-read", formatNum(d.modbus_gathered));
+        setText("p-modbus-rate", formatRate(d.modbus_gathered_per_sec_avg));
         setText("p-modbus-errors", formatNum(d.modbus_errors));
         setText("p-modbus-scan", `${d.modbus_scan_time_ms} ms`);
         setText("p-modbus-scan-stat", `${d.modbus_scan_time_ms} ms`);
 
         // MQTT output
         setText("p-mqtt-written", formatNum(d.mqtt_written));
+        setText("p-mqtt-rate", formatRate(d.mqtt_written_per_sec_avg));
+        setText("p-throughput", d.mqtt_written_per_sec_avg != null ? formatRate(d.mqtt_written_per_sec_avg) : "--");
+
+        const writeP95 = document.getElementById("p-write-p95");
+        if (writeP95) {
+            writeP95.textContent = formatMs(d.mqtt_write_time_p95_ms);
+            writeP95.title = d.mqtt_write_time_p50_ms != null
+                ? `p50 ${formatMs(d.mqtt_write_time_p50_ms)} · p99 ${formatMs(d.mqtt_write_time_p99_ms)}`
+                : "";
+        }
+
+        // Telegraf process memory
+        if (d.telegraf_heap_alloc_bytes != null) {
+            const growth = d.telegraf_heap_growth_bytes_per_min;
+            const trend = growth != null && Math.abs(growth) >= 1024
+                ? ` (${growth > 0 ? "+" : "−"}${formatBytes(Math.abs(growth))}/min)`
+                : "";
+            setText("g-telegraf-memory", formatBytes(d.telegraf_heap_alloc_bytes) + trend);
+        } else {
+            setText("g-telegraf-memory", "--");
+        }
 
         // Buffer
         const bufPct = d.mqtt_buffer_limit > 0 ? (d.mqtt_buffer_size / d.mqtt_buffer_limit) * 100 : 0;
@@ -257,10 +312,8 @@ function setPipelineState(state) {
 
 // --- Gateway Info ---
 
-async function refreshGatewayInfo() {
+function renderGatewayInfo(d) {
     try {
-        const d = await fetchJSON("/api/dashboard/gateway-info");
-
         nodesConfigured = d.nodes_configured || 0;
 
         setText("g-telegraf-uptime",
@@ -347,6 +400,18 @@ function formatNum(n) {
     return n.toLocaleString();
 }
 
+// Per-second rate, e.g. "12.3/s". Empty while the rate is still unknown.
+function formatRate(perSec) {
+    if (perSec === null || perSec === undefined) return "";
+    const digits = perSec >= 100 ? 0 : 1;
+    return `${formatNum(Number(perSec.toFixed(digits)))}/s`;
+}
+
+function formatMs(ms) {
+    if (ms === null || ms === undefined) return "--";
+    return ms >= 100 ? `${Math.round(ms)} ms` : `${Number(ms.toFixed(1))} ms`;
+}
+
 function formatBytes(bytes) {
     if (bytes === 0) return "0 B";
     const units = ["B", "KB", "MB", "GB"];
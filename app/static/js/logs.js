@@ -78,24 +78,67 @@ function updateLogBadge(events) {
     }
 }
 
-async function loadTelegrafLogs() {
+// Cursor into the gateway's Telegraf log buffer: only lines after it are fetched
+let telegrafLogCursor = 0;
+let telegrafLogTimer = null;
+const TELEGRAF_LOG_MAX_LINES = 2000;
+
+function telegrafLogLine(entry) {
+    const cls = { E: "tlog-error", W: "tlog-warn" }[entry.level] || "tlog-info";
+    return `<div class="tlog-line ${cls}">${escapeLogHtml(entry.line)}</div>`;
+}
+
+async function loadTelegrafLogs(reset = true) {
     const container = document.getElementById("telegraf-logs-content");
     if (!container) return;
-    const data = await fetchJSON("/api/telegraf/logs");
-    if (!data.ok || !data.lines || data.lines.length === 0) {
-        container.innerHTML = '<div class="logs-empty"><i class="bi bi-terminal" style="font-size:1.5rem;opacity:0.3;"></i><div>No Telegraf logs available</div></div>';
+    if (reset) telegrafLogCursor = 0;
+    const params = new URLSearchParams({ after: telegrafLogCursor });
+    const level = document.getElementById("telegraf-logs-level");
+    const query = document.getElementById("telegraf-logs-query");
+    if (level && level.value) params.set("level", level.value);
+    if (query && query.value.trim()) params.set("q", query.value.trim());
+    const data = await fetchJSON(`/api/telegraf/logs?${params}`);
+    if (query) query.classList.toggle("is-invalid", data.ok === false && !!query.value.trim());
+    if (!data.ok || (reset && (!data.lines || data.lines.length === 0))) {
+        if (reset) {
+            container.innerHTML = '<div class="logs-empty"><i class="bi bi-terminal" style="font-size:1.5rem;opacity:0.3;"></i><div>No Telegraf logs available</div></div>';
+        }
         return;
     }
-    container.innerHTML = data.lines.map(line => {
-        let cls = "tlog-info";
-        if (line.includes(" E! ")) cls = "tlog-error";
-        else if (line.includes(" W! ")) cls = "tlog-warn";
-        return `<div class="tlog-line ${cls}">${escapeLogHtml(line)}</div>`;
-    }).join("");
-    container.scrollTop = container.scrollHeight;
+    telegrafLogCursor = data.cursor;
+    if (!data.lines.length) return;
+
+    const atBottom = container.scrollHeight - container.scrollTop - container.clientHeight < 20;
+    const html = data.lines.map(telegrafLogLine).join("");
+    if (reset) container.innerHTML = html;
+    else container.insertAdjacentHTML("beforeend", html);
+    // Keep the DOM bounded while the modal stays open
+    while (container.childElementCount > TELEGRAF_LOG_MAX_LINES) container.firstElementChild.remove();
+    if (reset || atBottom) container.scrollTop = container.scrollHeight;
+    // More lines matched than one response holds: fetch the rest from the cursor
+    if (data.truncated) await loadTelegrafLogs(false);
+}
+
+function followTelegrafLogs(active) {
+    clearInterval(telegrafLogTimer);
+    telegrafLogTimer = active ? setInterval(() => loadTelegrafLogs(false), 2000) : null;
 }
 
+// Most recent gateway events, kept current by the event stream or by polling
+let recentEvents = [];
+
 async function pollLogBadge() {
     const events = await fetchJSON("/api/logs");
-    if (events && !events.error) updateLogBadge(events);
+    if (Array.isArray(events)) {
+        recentEvents = events;
+        updateLogBadge(events);
+    }
+}
+
+function handleLogStreamMessage(d) {
+    if (d.cleared) recentEvents = [];
+    else if (d.event) recentEvents = [d.event, ...recentEvents].slice(0, 100);
+    updateLogBadge(recentEvents);
+    const modal = document.getElementById("logsModal");
+    if (modal && modal.classList.contains("show")) renderLogs(recentEvents);
 }
@@ -1,5 +1,10 @@
 // MQTT View Messages — live tail with UTC timestamps + clear
 
+const TAIL_MAX_MESSAGES = 50;   // matches the server-side tail buffer
+
+let tailActive = false;
+let tailStreaming = false;
+let tailMessages = [];
 let tailInterval = null;
 let tailAutoStopTimeout = null;
 
@@ -7,6 +12,20 @@ document.addEventListener("DOMContentLoaded", () => {
     document.getElementById("btn-tail-toggle").addEventListener("click", toggleTail);
     document.getElementById("btn-clear-messages").addEventListener("click", clearMessages);
     checkTailStatus();
+    // New messages are pushed while the event stream is up; polling is the fallback
+    streamSubscribe("tail", {
+        onMessage: handleTailStreamMessage,
+        onUp: () => {
+            tailStreaming = true;
+            stopPolling();
+            if (tailActive) pollTail();  // catch up on anything missed while disconnected
+        },
+        onDown: () => {
+            tailStreaming = false;
+            if (tailActive) startPolling();
+        },
+        onResync: () => { if (tailActive) pollTail(); },
+    });
 });
 
 // --- Init ---
@@ -15,9 +34,11 @@ async function checkTailStatus() {
     try {
         const data = await fetchJSON("/api/mqtt/tail");
         if (data.running) {
+            tailActive = true;
             setTailUI(true, data.topic);
             startPolling();
-            renderMessages(data.messages);
+            tailMessages = data.messages || [];
+            renderMessages(tailMessages);
         }
     } catch (e) {}
 }
@@ -28,7 +49,7 @@ async function toggleTail() {
     const btn = document.getElementById("btn-tail-toggle");
     setLoading(btn, true);
 
-    if (tailInterval) {
+    if (tailActive) {
         await fetchJSON("/api/mqtt/tail/stop", { method: "POST" });
         setLoading(btn, false);
         stopTail();
@@ -37,6 +58,7 @@ async function toggleTail() {
         if (result.ok) {
             const status = await fetchJSON("/api/mqtt/tail");
             setLoading(btn, false);
+            tailActive = true;
             setTailUI(true, status.topic);
             startPolling();
             // Auto-stop after 5 minutes
@@ -52,6 +74,7 @@ async function toggleTail() {
 }
 
 function stopTail() {
+    tailActive = false;
     stopPolling();
     setTailUI(false);
     clearTimeout(tailAutoStopTimeout);
@@ -86,6 +109,7 @@ function setTailUI(running, topic) {
 // --- Polling ---
 
 function startPolling() {
+    if (tailStreaming) return;
     if (tailInterval) return;
     tailInterval = setInterval(pollTail, 2000);
     pollTail();
@@ -99,11 +123,27 @@ function stopPolling() {
 async function pollTail() {
     try {
         const data = await fetchJSON("/api/mqtt/tail");
-        if (!data.running && tailInterval) { stopTail(); return; }
-        renderMessages(data.messages);
+        if (!data.running && tailActive) { stopTail(); return; }
+        tailMessages = data.messages || [];
+        renderMessages(tailMessages);
     } catch (e) {}
 }
 
+function handleTailStreamMessage(d) {
+    if (d.message && tailActive) {
+        tailMessages = [d.message, ...tailMessages].slice(0, TAIL_MAX_MESSAGES);
+        renderMessages(tailMessages);
+    } else if (d.running === false && tailActive) {
+        stopTail();
+    } else if (d.running === true && !tailActive) {
+        // Started from another tab
+        tailActive = true;
+        setTailUI(true, d.topic);
+    } else if (d.cleared) {
+        clearMessageList();
+    }
+}
+
 // --- Render ---
 
 function renderMessages(messages) {
@@ -143,6 +183,11 @@ function escapeHtml(str) {
 
 async function clearMessages() {
     await fetchJSON("/api/mqtt/messages/clear", { method: "POST" });
+    clearMessageList();
+}
+
+function clearMessageList() {
+    tailMessages = [];
     document.getElementById("tail-messages").innerHTML = "";
     document.getElementById("tail-empty").style.display = "";
 }
@@ -4,6 +4,8 @@ let nodes = [];
 let saveTimeout = null;
 let acqTimeout = null;
 let publishingTimeout = null;
+let liveTimer = null;
+let liveValues = {};
 
 document.addEventListener("DOMContentLoaded", () => {
     document.querySelectorAll('[data-bs-toggle="tooltip"]').forEach(el => new bootstrap.Tooltip(el));
@@ -20,6 +22,16 @@ document.addEventListener("DOMContentLoaded", () => {
         }
     });
 
+    document.getElementById("toggle-live-values").addEventListener("change", e => {
+        document.querySelectorAll(".live-value-col").forEach(el => el.classList.toggle("d-none", !e.target.checked));
+        if (e.target.checked) {
+            refreshLiveValues();
+        } else {
+            clearTimeout(liveTimer);
+        }
+    });
+    window.addEventListener("beforeunload", () => clearTimeout(liveTimer));
+
     // Acquisition mode toggle
     document.querySelectorAll(".acq-mode-btn").forEach(btn => {
         btn.addEventListener("click", () => {
@@ -41,6 +53,8 @@ document.addEventListener("DOMContentLoaded", () => {
     // Deadband type controls value field visibility
     document.getElementById("acq-deadband-type").addEventListener("change", updateDeadbandValueVisibility);
 
+    document.getElementById("btn-sampling-audit").addEventListener("click", runSamplingAudit);
+
     // Publishing mode radios
     document.querySelectorAll("input[name='publishing_mode']").forEach(radio => {
         radio.addEventListener("change", schedulePublishingSave);
@@ -123,6 +137,56 @@ async function saveAcquisition() {
     }
 }
 
+// ── Sampling audit ───────────────────────────────────────────────
+
+const AUDIT_FINDINGS = {
+    faster_than_server: "faster than the server refreshes it",
+    oversampled: "sampled far more often than it changes",
+    static: "did not change in the recent history",
+    undersampled: "changed on every sample",
+};
+
+async function runSamplingAudit() {
+    const btn = document.getElementById("btn-sampling-audit");
+    const box = document.getElementById("sampling-audit-result");
+    setLoading(btn, true);
+    const r = await fetchJSON("/api/opcua/sampling-audit", { method: "POST" });
+    setLoading(btn, false);
+    box.classList.remove("d-none");
+    if (r.error) {
+        box.innerHTML = `<div class="text-danger small">${esc(r.error)}</div>`;
+        return;
+    }
+    const s = r.summary;
+    const flagged = r.nodes.filter(n => n.findings.length || n.error);
+    const rows = flagged.map(n => `
+        <tr>
+            <td>${esc(n.name)}</td>
+            <td>${n.error ? `<span class="text-danger">${esc(n.error)}</span>`
+                          : n.findings.map(f => esc(AUDIT_FINDINGS[f] || f)).join("; ")}</td>
+            <td class="font-mono">${n.min_sampling_interval ?? "—"}</td>
+            <td class="font-mono">${n.suggested_interval_ms ? esc(formatMs(n.suggested_interval_ms)) : "—"}</td>
+        </tr>`).join("");
+    const classes = r.rate_classes
+        .map(c => `<span class="badge bg-secondary me-1">${esc(c.interval)}: ${c.nodes.length}</span>`)
+        .join("");
+    box.innerHTML = `
+        <div class="small mb-2">
+            ${s.nodes} nodes at ${esc(r.configured_interval)} (${esc(r.mode)}), ${s.flagged} flagged.
+            Samples/min: ${s.samples_per_min} now, ${s.suggested_samples_per_min} with the suggested rates.
+        </div>
+        <div class="small mb-2">Suggested rate classes: ${classes}</div>
+        ${rows ? `<table class="table table-sm mb-0 small">
+            <thead><tr><th>Node</th><th>Finding</th><th>Min. sampling (ms)</th><th>Suggested</th></tr></thead>
+            <tbody>${rows}</tbody></table>` : ""}`;
+}
+
+function formatMs(ms) {
+    if (ms >= 60000 && ms % 60000 === 0) return `${ms / 60000}m`;
+    if (ms >= 1000 && ms % 1000 === 0) return `${ms / 1000}s`;
+    return `${ms}ms`;
+}
+
 // ── Nodes ────────────────────────────────────────────────────────
 
 async function loadNodes() {
@@ -148,6 +212,7 @@ function renderTable() {
     table.style.display = "table";
     empty.style.display = "none";
     tbody.innerHTML = "";
+    const liveOn = document.getElementById("toggle-live-values").checked;
 
     nodes.forEach((node, idx) => {
         const tr = document.createElement("tr");
@@ -156,6 +221,7 @@ function renderTable() {
             <td>${esc(node.namespace)}</td>
             <td><code>${esc(node.identifier)}</code></td>
             <td>${esc(node.identifier_type)}</td>
+            <td class="live-value-col font-mono${liveOn ? "" : " d-none"}" data-value-for="${esc(nodeIdOf(node)).replace(/"/g, "&quot;")}">${renderLiveValue(liveValues[nodeIdOf(node)])}</td>
             <td>
                 <button class="btn btn-sm btn-outline-secondary" data-remove="${idx}" title="Remove">
                     <i class="bi bi-x"></i>
@@ -193,6 +259,39 @@ async function saveNodes() {
     if (data.ok) updateConfigStatus(true);
 }
 
+// ── Live values ──────────────────────────────────────────────────
+
+function nodeIdOf(node) {
+    return `ns=${node.namespace};${node.identifier_type}=${node.identifier}`;
+}
+
+function renderLiveValue(v) {
+    if (!v) return "";
+    if (v.error) return `<span class="text-danger">${esc(v.error)}</span>`;
+    const bad = v.status_code && v.status_code !== "Good";
+    const value = v.value === null ? "—" : esc(v.value);
+    return bad ? `<span class="text-warning" title="${esc(v.status_code)}">${value}</span>` : value;
+}
+
+// One request for every selected node, read by the gateway in MaxNodesPerRead chunks
+async function refreshLiveValues() {
+    clearTimeout(liveTimer);
+    if (!document.getElementById("toggle-live-values").checked) return;
+    if (nodes.length) {
+        const result = await fetchJSON("/api/opcua/node-values", {
+            method: "POST",
+            body: { node_ids: nodes.map(nodeIdOf) },
+        });
+        if (Array.isArray(result)) {
+            liveValues = Object.fromEntries(result.map(v => [v.node_id, v]));
+            document.querySelectorAll("[data-value-for]").forEach(td => {
+                td.innerHTML = renderLiveValue(liveValues[td.dataset.valueFor]);
+            });
+        }
+    }
+    liveTimer = setTimeout(refreshLiveValues, 3000);
+}
+
 // ── Publishing ───────────────────────────────────────────────────
 
 async function loadPublishing() {
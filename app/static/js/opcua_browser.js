@@ -5,6 +5,9 @@ let selectedNodeIds = new Set();
 let breadcrumbPath = [{ name: "Objects", node_id: "ns=0;i=85" }];
 let autoRefreshTimer = null;
 let autoRefreshNodeId = null;
+let autoRefreshSource = null;
+let crawlTimer = null;
+let tagSearchTimer = null;
 
 document.addEventListener("DOMContentLoaded", () => {
     loadTree("ns=0;i=85");
@@ -14,7 +17,7 @@ document.addEventListener("DOMContentLoaded", () => {
 
     document.getElementById("btn-refresh-root").addEventListener("click", () => {
         breadcrumbPath = [{ name: "Objects", node_id: "ns=0;i=85" }];
-        loadTree("ns=0;i=85");
+        loadTree("ns=0;i=85", true);
     });
 
     document.getElementById("btn-add-to-selection").addEventListener("click", addToSelection);
@@ -30,6 +33,15 @@ document.addEventListener("DOMContentLoaded", () => {
     });
 
     document.getElementById("btn-add-bulk").addEventListener("click", addBulkToSelection);
+
+    document.getElementById("btn-crawl-start").addEventListener("click", startCrawl);
+    document.getElementById("btn-crawl-cancel").addEventListener("click", cancelCrawl);
+    document.getElementById("btn-nodeset-import").addEventListener("click", () => document.getElementById("nodeset-file").click());
+    document.getElementById("nodeset-file").addEventListener("change", e => importNodeset(e.target));
+    document.getElementById("tag-search-q").addEventListener("input", scheduleTagSearch);
+    document.getElementById("tag-search-mode").addEventListener("change", scheduleTagSearch);
+    document.getElementById("btn-add-matching").addEventListener("click", addMatchingToSelection);
+    loadCrawlProgress();
     document.getElementById("btn-deselect-all").addEventListener("click", deselectAll);
 
     // Rotate chevron on namespace card expand/collapse
@@ -40,12 +52,15 @@ document.addEventListener("DOMContentLoaded", () => {
         document.getElementById("ns-chevron").style.transform = "";
     });
 
-    window.addEventListener("beforeunload", stopAutoRefresh);
+    window.addEventListener("beforeunload", () => {
+        stopAutoRefresh();
+        clearTimeout(crawlTimer);
+    });
 });
 
 // ─── Tree ────────────────────────────────────────────────────────────────────
 
-async function loadTree(rootNodeId) {
+async function loadTree(rootNodeId, refresh = false) {
     const container = document.getElementById("tree-container");
     container.innerHTML = '<div class="text-center text-secondary p-4"><span class="loading-spinner"></span> Loading nodes...</div>';
 
@@ -54,13 +69,14 @@ async function loadTree(rootNodeId) {
     if (searchInput) searchInput.value = "";
 
     try {
-        const nodes = await fetchJSON(`/api/opcua/browse?node_id=${encodeURIComponent(rootNodeId)}`);
-        if (nodes.error) {
-            container.innerHTML = `<div class="text-center p-4"><span class="test-result error" style="display:block;">${nodes.error}</span><p class="mt-2" style="font-size:0.8rem;"><a href="/opcua/config">Configure OPC UA connection first</a></p></div>`;
+        const tree = document.createElement("div");
+        // refresh=1 drops the gateway's cached browse results for this server
+        const page = await appendChildPage(tree, rootNodeId, 1, null, refresh);
+        if (page.error) {
+            container.innerHTML = `<div class="text-center p-4"><span class="test-result error" style="display:block;">${page.error}</span><p class="mt-2" style="font-size:0.8rem;"><a href="/opcua/config">Configure OPC UA connection first</a></p></div>`;
             return;
         }
         container.innerHTML = "";
-        const tree = buildTreeLevel(nodes, 1);
         container.appendChild(tree);
         renderBreadcrumb();
     } catch (e) {
@@ -68,8 +84,50 @@ async function loadTree(rootNodeId) {
     }
 }
 
+// Children are fetched BROWSE_PAGE at a time: a folder with 50k variables shows
+// its first page at once, and each further page loads when the "Loading more"
+// row scrolls into view.
+const BROWSE_PAGE = 200;
+
+async function appendChildPage(container, nodeId, depth, cursor = null, refresh = false) {
+    let url = `/api/opcua/browse?node_id=${encodeURIComponent(nodeId)}&limit=${BROWSE_PAGE}`;
+    if (cursor) url += `&cursor=${encodeURIComponent(cursor)}`;
+    if (refresh) url += "&refresh=1";
+    const page = await fetchJSON(url);
+    if (page.error) return page;
+    container.appendChild(buildTreeLevel(page.children, depth));
+    if (page.next_cursor) {
+        const more = document.createElement("div");
+        more.className = "tree-more";
+        more.innerHTML = '<span class="loading-spinner" style="width:0.7rem;height:0.7rem;border-width:1px;"></span> Loading more...';
+        container.appendChild(more);
+        const observer = new IntersectionObserver(async entries => {
+            if (!entries.some(e => e.isIntersecting)) return;
+            observer.disconnect();
+            try {
+                const next = await appendChildPage(container, nodeId, depth, page.next_cursor);
+                if (next.error) throw new Error(next.error);
+                more.remove();
+            } catch (e) {
+                more.textContent = "Failed to load more nodes \u2014 click to retry";
+                more.addEventListener("click", ev => {
+                    ev.stopPropagation();
+                    more.innerHTML = '<span class="loading-spinner" style="width:0.7rem;height:0.7rem;border-width:1px;"></span> Loading more...';
+                    observer.observe(more);
+                }, { once: true });
+            }
+        }, { root: document.getElementById("tree-container") });
+        observer.observe(more);
+    }
+    // Re-apply active filter if any
+    const term = document.getElementById("tree-search")?.value;
+    if (term) filterTree(term);
+    return page;
+}
+
 function buildTreeLevel(nodes, depth) {
     const ul = document.createElement("div");
+    ul.className = "tree-page";
     for (const node of nodes) {
         const item = document.createElement("div");
 
@@ -147,17 +205,15 @@ function buildTreeLevel(nodes, depth) {
 async function expandNode(parentItem, nodeId, toggleEl, depth) {
     toggleEl.innerHTML = '<span class="loading-spinner" style="width:0.7rem;height:0.7rem;border-width:1px;"></span>';
     try {
-        const children = await fetchJSON(`/api/opcua/browse?node_id=${encodeURIComponent(nodeId)}`);
         const childContainer = document.createElement("div");
         childContainer.className = "tree-children expanded";
-        const childTree = buildTreeLevel(children, depth);
-        childContainer.appendChild(childTree);
         parentItem.appendChild(childContainer);
+        const page = await appendChildPage(childContainer, nodeId, depth);
+        if (page.error) {
+            childContainer.remove();
+            throw new Error(page.error);
+        }
         toggleEl.textContent = "\u25BC";
-
-        // Re-apply active filter if any
-        const term = document.getElementById("tree-search")?.value;
-        if (term) filterTree(term);
     } catch (e) {
         toggleEl.textContent = "\u25B6";
     }
@@ -222,6 +278,8 @@ async function loadNodeDetails(nodeId) {
         const details = await fetchJSON(`/api/opcua/node-details?node_id=${encodeURIComponent(nodeId)}`);
         currentNodeDetails = details;
         renderNodeDetails(details);
+        // Details may come from the gateway's browse cache; fetch the live value
+        if (details.node_class === "Variable") refreshNodeValue(nodeId);
     } catch (e) {
         document.getElementById("detail-node-id").textContent = "Error loading details";
     }
@@ -356,6 +414,7 @@ async function addToSelection() {
         namespace: String(currentNodeDetails.namespace),
         identifier_type: currentNodeDetails.identifier_type || "s",
         identifier: String(currentNodeDetails.identifier || ""),
+        data_type: currentNodeDetails.data_type,
         sampling_mode: "polling",
         interval: "1s",
         deadband_type: "None",
@@ -475,14 +534,37 @@ async function loadSelectedNodeIds() {
 
 // ─── Auto-refresh ─────────────────────────────────────────────────────────────
 
+// Values are pushed from the gateway's shared OPC UA subscription; polling is
+// the fallback when the stream cannot be opened.
+
 function startAutoRefresh(nodeId) {
     stopAutoRefresh();
     autoRefreshNodeId = nodeId;
+    if (typeof EventSource === "undefined") {
+        startPollingRefresh();
+        return;
+    }
+    const es = new EventSource(`/api/stream/opcua-values?node_id=${encodeURIComponent(nodeId)}`);
+    autoRefreshSource = es;
+    es.addEventListener("value", e => {
+        try { renderNodeValue(JSON.parse(e.data)); } catch (err) { /* ignore */ }
+    });
+    es.onerror = () => {
+        // CLOSED: the gateway refused the stream (e.g. no subscription support)
+        if (es.readyState === EventSource.CLOSED && autoRefreshSource === es) {
+            autoRefreshSource = null;
+            startPollingRefresh();
+        }
+    };
+}
+
+function startPollingRefresh() {
     autoRefreshTimer = setInterval(() => refreshNodeValue(autoRefreshNodeId), 3000);
 }
 
 function stopAutoRefresh() {
     if (autoRefreshTimer) { clearInterval(autoRefreshTimer); autoRefreshTimer = null; }
+    if (autoRefreshSource) { autoRefreshSource.close(); autoRefreshSource = null; }
     autoRefreshNodeId = null;
 }
 
@@ -490,7 +572,10 @@ async function refreshNodeValue(nodeId) {
     if (!nodeId) return;
     const dv = await fetchJSON(`/api/opcua/node-value?node_id=${encodeURIComponent(nodeId)}`);
     if (!dv || dv.error) return;
+    renderNodeValue(dv);
+}
 
+function renderNodeValue(dv) {
     document.getElementById("detail-value").textContent = dv.value ?? "-";
 
     const badge = document.getElementById("detail-status-badge");
@@ -513,6 +598,144 @@ async function refreshNodeValue(nodeId) {
     document.getElementById("detail-server-ts").textContent = fmtTs(dv.server_timestamp);
 }
 
+// ─── Tag index ────────────────────────────────────────────────────────────────
+
+async function startCrawl() {
+    const result = await fetchJSON("/api/opcua/crawl", { method: "POST", body: {} });
+    if (!result.ok) {
+        showAlert(result.error === "HTTP 409" ? "Indexing already running" : `Could not start indexing: ${result.error}`, "warning");
+    }
+    loadCrawlProgress();
+}
+
+async function cancelCrawl() {
+    await fetchJSON("/api/opcua/crawl", { method: "DELETE" });
+    loadCrawlProgress();
+}
+
+async function loadCrawlProgress() {
+    clearTimeout(crawlTimer);
+    const p = await fetchJSON("/api/opcua/crawl");
+    if (p.ok === false) return;
+    const running = p.state === "running";
+    document.getElementById("btn-crawl-start").disabled = running;
+    document.getElementById("btn-crawl-cancel").classList.toggle("d-none", !running);
+
+    const el = document.getElementById("crawl-progress");
+    const size = `${p.index_size.toLocaleString()} tags indexed`;
+    if (running) {
+        el.textContent = `Indexing… ${p.indexed.toLocaleString()} found, ${p.queued.toLocaleString()} queued, ${p.requests} requests`;
+        crawlTimer = setTimeout(loadCrawlProgress, 1000);
+    } else if (p.state === "failed") {
+        el.textContent = `Indexing failed: ${p.error} (${size})`;
+    } else if (p.state === "cancelled") {
+        el.textContent = `Indexing cancelled (${size})`;
+    } else if (p.state === "done") {
+        el.textContent = `${size}${p.truncated ? " — stopped at the node limit" : ""}`;
+        runTagSearch();
+    } else {
+        el.textContent = p.index_size ? size : "Not indexed yet";
+    }
+}
+
+// NodeSet2 import: upload, then poll its progress on the same status line
+async function importNodeset(input) {
+    const file = input.files[0];
+    input.value = "";
+    if (!file) return;
+    const form = new FormData();
+    form.append("file", file);
+    document.getElementById("crawl-progress").textContent = `Uploading ${file.name}…`;
+    const result = await fetchJSON("/api/opcua/nodeset", { method: "POST", body: form });
+    if (!result.ok) {
+        showAlert(result.error === "HTTP 409" ? "An import is already running" : `Could not import: ${result.error}`, "warning");
+    }
+    loadImportProgress();
+}
+
+async function loadImportProgress() {
+    clearTimeout(crawlTimer);
+    const p = await fetchJSON("/api/opcua/nodeset");
+    if (p.ok === false) return;
+    const el = document.getElementById("crawl-progress");
+    const size = `${p.index_size.toLocaleString()} tags indexed`;
+    document.getElementById("btn-nodeset-import").disabled = p.state === "running";
+    if (p.state === "running") {
+        el.textContent = p.indexed
+            ? `Importing… ${p.indexed.toLocaleString()} tags indexed`
+            : `Reading NodeSet2… ${p.parsed.toLocaleString()} nodes`;
+        crawlTimer = setTimeout(loadImportProgress, 1000);
+    } else if (p.state === "failed") {
+        el.textContent = `Import failed: ${p.error} (${size})`;
+    } else if (p.state === "done") {
+        el.textContent = `${size} from NodeSet2`;
+        if (p.warnings?.length) el.textContent += ` — ${p.warnings.join("; ")}`;
+        runTagSearch();
+    }
+}
+
+function tagSearchParams() {
+    return {
+        q: document.getElementById("tag-search-q").value.trim(),
+        mode: document.getElementById("tag-search-mode").value,
+    };
+}
+
+function scheduleTagSearch() {
+    clearTimeout(tagSearchTimer);
+    tagSearchTimer = setTimeout(runTagSearch, 200);
+}
+
+async function runTagSearch() {
+    const { q, mode } = tagSearchParams();
+    const list = document.getElementById("tag-search-results");
+    const count = document.getElementById("tag-search-count");
+    const addBtn = document.getElementById("btn-add-matching");
+    if (!q) {
+        list.innerHTML = "";
+        count.textContent = "";
+        addBtn.classList.add("d-none");
+        return;
+    }
+    const result = await fetchJSON(`/api/opcua/tags?q=${encodeURIComponent(q)}&mode=${mode}&limit=200`);
+    if (result.error) {
+        list.innerHTML = "";
+        count.textContent = mode === "regex" ? "Invalid regular expression" : result.error;
+        addBtn.classList.add("d-none");
+        return;
+    }
+    list.innerHTML = result.nodes.map(n => `
+        <div class="tag-hit" data-node-id="${escAttr(n.node_id)}" title="${escAttr(n.node_id)}">
+            <span class="tag-hit-path">${escHtml(n.path)}</span>
+            <span class="tag-hit-type">${escHtml(n.data_type || n.node_class)}</span>
+        </div>`).join("");
+    list.querySelectorAll(".tag-hit").forEach(row => {
+        row.addEventListener("click", () => loadNodeDetails(row.dataset.nodeId));
+    });
+    const shown = result.nodes.length < result.total ? ` (showing ${result.nodes.length})` : "";
+    count.textContent = `${result.total.toLocaleString()} matches${shown}`;
+    addBtn.classList.toggle("d-none", result.total === 0);
+}
+
+async function addMatchingToSelection() {
+    const result = await fetchJSON("/api/opcua/tags/select", { method: "POST", body: tagSearchParams() });
+    if (!result.ok) {
+        showAlert(`Could not add nodes: ${result.error}`, "danger");
+        return;
+    }
+    if (result.skipped > 0) {
+        showAlert(`${result.skipped} node${result.skipped > 1 ? "s" : ""} skipped: invalid node id or namespace not on the server`, "warning");
+    }
+    if (result.added > 0) {
+        showAlert(`Added ${result.added} node${result.added > 1 ? "s" : ""} to selection`, "success");
+        updateConfigStatus(true);
+        loadSelectedNodeIds();
+        loadSelectedCount();
+    } else if (!result.skipped) {
+        showAlert("All matching variables already in selection", "warning");
+    }
+}
+
 // ─── Namespace table ──────────────────────────────────────────────────────────
 
 async function loadNamespaceTable() {
@@ -0,0 +1,60 @@
+// Live updates over Server-Sent Events — one connection shared by every module on the page.
+//
+// streamSubscribe(channel, { onMessage, onUp, onDown, onResync })
+//   onMessage(data)  a pushed update for the channel
+//   onUp()           stream connected — stop polling
+//   onDown()         stream unavailable — fall back to polling
+//   onResync()       server dropped updates for this client — re-fetch full state
+
+const liveStream = {
+    handlers: {},       // channel -> [handlers]
+    source: null,
+    up: null,           // null = not yet known, then true/false
+    connectTimer: null,
+};
+
+function streamSubscribe(channel, handlers) {
+    (liveStream.handlers[channel] = liveStream.handlers[channel] || []).push(handlers);
+    if (typeof EventSource === "undefined") {
+        if (handlers.onDown) handlers.onDown();
+        return;
+    }
+    // Registrations made during page init share one connection
+    clearTimeout(liveStream.connectTimer);
+    liveStream.connectTimer = setTimeout(streamConnect, 0);
+}
+
+function streamEach(callbackName, arg) {
+    Object.values(liveStream.handlers).flat().forEach(h => {
+        if (h[callbackName]) h[callbackName](arg);
+    });
+}
+
+function streamConnect() {
+    if (liveStream.source) liveStream.source.close();
+    const channels = Object.keys(liveStream.handlers);
+    const es = new EventSource(`/api/stream?channels=${channels.join(",")}`);
+    liveStream.source = es;
+
+    es.onopen = () => {
+        liveStream.up = true;
+        streamEach("onUp");
+    };
+    es.onerror = () => {
+        // EventSource reconnects on its own (server sends retry:); poll meanwhile
+        if (liveStream.up !== false) {
+            liveStream.up = false;
+            streamEach("onDown");
+        }
+    };
+    channels.forEach(channel => {
+        es.addEventListener(channel, e => {
+            let data;
+            try { data = JSON.parse(e.data); } catch (err) { return; }
+            (liveStream.handlers[channel] || []).forEach(h => {
+                if (h.onMessage) h.onMessage(data);
+            });
+        });
+    });
+    es.addEventListener("resync", () => streamEach("onResync"));
+}
@@ -0,0 +1,113 @@
+// Live Values — last value per OPC UA node / Modbus register from the gateway cache
+
+const VALUES_POLL_MS = 2000;
+
+let valuesSeq = 0;
+let valuesGeneration = null;
+let valuesTimer = null;
+const valueRows = new Map();   // tag key → { row, ts }
+
+document.addEventListener("DOMContentLoaded", () => {
+    document.getElementById("values-filter").addEventListener("input", applyValuesFilter);
+    document.addEventListener("visibilitychange", () => {
+        if (document.hidden) stopValuesPolling();
+        else pollValues();
+    });
+    pollValues();
+});
+
+function stopValuesPolling() {
+    clearTimeout(valuesTimer);
+    valuesTimer = null;
+}
+
+async function pollValues() {
+    stopValuesPolling();
+    try {
+        const data = await fetchJSON(`/api/values?since=${valuesSeq}`);
+        if (data.generation !== valuesGeneration) {
+            // Cache was cleared (deploy): start over with a full read
+            valuesGeneration = data.generation;
+            resetValues();
+            if (valuesSeq !== 0) {
+                valuesSeq = 0;
+                return pollValues();
+            }
+        }
+        valuesSeq = data.seq;
+        applyValues(data.values || {});
+    } catch (e) {}
+    refreshAges();
+    if (!document.hidden) valuesTimer = setTimeout(pollValues, VALUES_POLL_MS);
+}
+
+function resetValues() {
+    valueRows.clear();
+    document.getElementById("values-tbody").replaceChildren();
+    updateValuesCount();
+}
+
+function applyValues(values) {
+    const fragment = document.createDocumentFragment();
+    for (const [key, v] of Object.entries(values)) {
+        let entry = valueRows.get(key);
+        if (!entry) {
+            const row = document.createElement("tr");
+            row.dataset.tag = key.toLowerCase();
+            row.innerHTML = `<td class="value-name"></td><td class="value-source"></td>` +
+                `<td class="value-value text-end"></td><td class="value-quality"></td><td class="value-age"></td>`;
+            row.cells[0].textContent = v.name;
+            // Same-named fields of different slaves or nodes differ by their tags
+            const tags = Object.entries(v.tags || {}).map(([k, val]) => `${k}=${val}`);
+            row.cells[1].textContent = tags.length ? `${v.source} (${tags.join(", ")})` : v.source;
+            entry = { row, ts: null };
+            valueRows.set(key, entry);
+            fragment.appendChild(row);
+        }
+        entry.ts = v.ts;
+        entry.row.cells[2].textContent = formatValue(v.value);
+        const quality = entry.row.cells[3];
+        quality.textContent = v.quality || "";
+        quality.classList.toggle("value-bad", !!v.quality && !String(v.quality).startsWith("OK"));
+    }
+    if (fragment.childNodes.length) {
+        document.getElementById("values-tbody").appendChild(fragment);
+        updateValuesCount();
+        applyValuesFilter();
+    }
+}
+
+function formatValue(value) {
+    if (typeof value === "number" && !Number.isInteger(value)) {
+        return Number(value.toPrecision(6)).toString();
+    }
+    return String(value);
+}
+
+function refreshAges() {
+    const now = Date.now() / 1000;
+    for (const { row, ts } of valueRows.values()) {
+        row.cells[4].textContent = ts ? formatAge(now - ts) : "--";
+    }
+}
+
+function formatAge(seconds) {
+    if (seconds < 1) return "now";
+    if (seconds < 60) return `${Math.floor(seconds)}s ago`;
+    if (seconds < 3600) return `${Math.floor(seconds / 60)}m ago`;
+    return `${Math.floor(seconds / 3600)}h ago`;
+}
+
+function applyValuesFilter() {
+    const q = document.getElementById("values-filter").value.trim().toLowerCase();
+    for (const { row } of valueRows.values()) {
+        row.style.display = !q || row.dataset.tag.includes(q) ? "" : "none";
+    }
+}
+
+function updateValuesCount() {
+    const count = valueRows.size;
+    document.getElementById("values-count").textContent = count;
+    document.getElementById("values-empty").style.display = count ? "none" : "";
+    document.getElementById("values-table").style.display = count ? "" : "none";
+}
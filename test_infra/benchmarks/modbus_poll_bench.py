@@ -0,0 +1,189 @@
+"""
+Polling time of many Modbus devices, one read per value vs coalesced reads.
+
+Starts the simulator from test_infra/modbus_server/server.py in-process (no
+Docker) and polls every unit's holding registers twice: "per value" sends
+one request per value, "coalesced" merges neighbouring values into reads of
+up to 125 registers (the Modbus maximum), as Telegraf's optimization does.
+Every value read is decoded and checked against its type's simulated range,
+so the run also validates each data type and byte order.
+
+    python test_infra/benchmarks/modbus_poll_bench.py
+    python test_infra/benchmarks/modbus_poll_bench.py --units 20 --registers 2000 \\
+        --latency 5ms-20ms --concurrency 4
+
+Needs the simulator's requirements (pymodbus, numpy).
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import socket
+import struct
+import time
+from pathlib import Path
+
+from pymodbus.client import AsyncModbusTcpClient
+
+_SIMULATOR = Path(__file__).resolve().parent.parent / "modbus_server" / "server.py"
+_MAX_READ = 125
+_FORMATS = {
+    "INT16": "h",
+    "UINT16": "H",
+    "INT32": "i",
+    "UINT32": "I",
+    "INT64": "q",
+    "UINT64": "Q",
+    "FLOAT32": "f",
+    "FLOAT64": "d",
+}
+
+
+def _load_simulator():
+    spec = importlib.util.spec_from_file_location("modbus_simulator", _SIMULATOR)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def decode(registers, data_type, byte_order):
+    """Value of `registers` as the gateway (Telegraf) decodes them."""
+    words = [struct.pack(">H", r) for r in registers]
+    if byte_order in ("CDAB", "DCBA"):
+        words.reverse()
+    if byte_order in ("BADC", "DCBA"):
+        words = [w[::-1] for w in words]
+    return struct.unpack(">" + _FORMATS[data_type], b"".join(words))[0]
+
+
+def coalesce(layout, words_of, max_read=_MAX_READ):
+    """Group contiguous values into reads of at most `max_read` registers:
+    [(start, count, [(address, data_type, byte_order), ...])]."""
+    reads = []
+    for value in layout:
+        address, data_type, _ = value
+        end = address + words_of(data_type)
+        if reads and address == reads[-1][0] + reads[-1][1]:
+            start, _, values = reads[-1]
+            if end - start <= max_read:
+                reads[-1] = (start, end - start, values + [value])
+                continue
+        reads.append((address, end - address, [value]))
+    return reads
+
+
+async def _poll(client, unit, reads, check):
+    for start, count, values in reads:
+        response = await client.read_holding_registers(start, count, slave=unit)
+        if response.isError():
+            raise RuntimeError(f"unit {unit} read {start}+{count}: {response}")
+        for address, data_type, byte_order in values:
+            offset = address - start
+            width = check.words(data_type)
+            check(
+                decode(
+                    response.registers[offset : offset + width], data_type, byte_order
+                ),
+                data_type,
+            )
+
+
+async def _poll_units(port, units, reads, check, concurrency):
+    """Poll unit ids 1..`units` over `concurrency` connections."""
+    pending = list(range(units, 0, -1))
+    clients = [AsyncModbusTcpClient("127.0.0.1", port=port) for _ in range(concurrency)]
+
+    async def worker(client):
+        await client.connect()
+        try:
+            while pending:
+                await _poll(client, pending.pop(), reads, check)
+        finally:
+            client.close()
+
+    await asyncio.gather(*(worker(c) for c in clients))
+
+
+class _Check:
+    def __init__(self, simulator):
+        self.simulator = simulator
+        self.words = simulator.register_words
+        self.values = 0
+
+    def __call__(self, value, data_type):
+        low, high = self.simulator.value_range(data_type)
+        if not low <= value <= high:
+            raise AssertionError(f"{data_type} value {value} outside {low}..{high}")
+        self.values += 1
+
+
+async def _run(args):
+    simulator = _load_simulator()
+    port = _free_port()
+    argv = [
+        "--host",
+        "127.0.0.1",
+        "--port",
+        str(port),
+        "--units",
+        str(args.units),
+        "--registers",
+        str(args.registers),
+        "--types",
+        args.types,
+        "--byte-orders",
+        args.byte_orders,
+        "--latency",
+        args.latency,
+    ]
+    server = asyncio.create_task(simulator.main(argv))
+    await asyncio.sleep(1)
+    layout = simulator.register_map(
+        args.registers,
+        simulator.parse_types(args.types),
+        simulator.parse_byte_orders(args.byte_orders),
+    )
+    check = _Check(simulator)
+    plans = {
+        "per value": [(a, check.words(t), [(a, t, o)]) for a, t, o in layout],
+        "coalesced": coalesce(layout, check.words),
+    }
+    print(
+        f"{args.units} units x {len(layout):,} values in {args.registers:,} registers, "
+        f"latency {args.latency}, {args.concurrency} connection(s)"
+    )
+    try:
+        for label, reads in plans.items():
+            started = time.perf_counter()
+            await _poll_units(port, args.units, reads, check, args.concurrency)
+            elapsed = time.perf_counter() - started
+            requests = len(reads) * args.units
+            print(
+                f"{label:10} {requests:8,} requests  {elapsed:7.2f}s  "
+                f"{requests / elapsed:8,.0f} req/s  "
+                f"{len(layout) * args.units / elapsed:9,.0f} values/s"
+            )
+        print(f"{check.values:,} values decoded within their simulated range")
+    finally:
+        server.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--units", type=int, default=10)
+    parser.add_argument("--registers", type=int, default=1000)
+    parser.add_argument("--types", default="INT16,UINT16,INT32,UINT32,FLOAT32,FLOAT64")
+    parser.add_argument("--byte-orders", default="ABCD,DCBA,BADC,CDAB")
+    parser.add_argument("--latency", default="0ms")
+    parser.add_argument("--concurrency", type=int, default=1)
+    asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
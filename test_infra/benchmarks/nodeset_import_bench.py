@@ -0,0 +1,149 @@
+"""
+Time and memory of importing a large NodeSet2 XML file into the tag index.
+
+Writes a synthetic NodeSet2 export (Plant/AreaNN/LineNN/DeviceNNN/TagNNN,
+one million variables by default, about 400 MB), imports it with
+nodeset_import.import_nodeset and reports the import time, the resulting
+index size and the process's peak resident memory, then runs a few searches
+against the result.
+
+    python test_infra/benchmarks/nodeset_import_bench.py
+    python test_infra/benchmarks/nodeset_import_bench.py --tags 100000 --gzip
+    python test_infra/benchmarks/nodeset_import_bench.py --file export.xml   # a real export
+"""
+
+import argparse
+import gzip
+import os
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from app.services.nodeset_import import import_nodeset
+from app.services.tag_index import TagIndex
+
+_SERVER = "opc.tcp://bench:4840"
+_HEADER = """<?xml version="1.0" encoding="utf-8"?>
+<UANodeSet xmlns="http://opcfoundation.org/UA/2011/03/UANodeSet.xsd">
+  <NamespaceUris><Uri>urn:bench:plant</Uri></NamespaceUris>
+  <Aliases>
+    <Alias Alias="Double">i=11</Alias>
+    <Alias Alias="Organizes">i=35</Alias>
+    <Alias Alias="HasComponent">i=47</Alias>
+    <Alias Alias="HasTypeDefinition">i=40</Alias>
+  </Aliases>
+"""
+_OBJECT = """  <UAObject NodeId="ns=1;i={id}" BrowseName="1:{name}" ParentNodeId="{parent}">
+    <DisplayName>{name}</DisplayName>
+    <References>
+      <Reference ReferenceType="HasTypeDefinition">i=58</Reference>
+      <Reference ReferenceType="Organizes" IsForward="false">{parent}</Reference>
+    </References>
+  </UAObject>
+"""
+_VARIABLE = """  <UAVariable NodeId="ns=1;i={id}" BrowseName="1:{name}" ParentNodeId="{parent}" DataType="Double" AccessLevel="3">
+    <DisplayName>{name}</DisplayName>
+    <Description>Synthetic tag {name} of {parent}</Description>
+    <References>
+      <Reference ReferenceType="HasTypeDefinition">i=63</Reference>
+      <Reference ReferenceType="HasComponent" IsForward="false">{parent}</Reference>
+    </References>
+    <Value><Double xmlns="http://opcfoundation.org/UA/2008/02/Types.xsd">0</Double></Value>
+  </UAVariable>
+"""
+
+
+def write_nodeset(path, tags, tags_per_device=100, devices_per_line=100):
+    """Write a NodeSet2 file with `tags` variables (gzipped if `path` ends in
+    .gz), ten lines per area."""
+    opener = gzip.open if path.endswith(".gz") else open
+    ids = iter(range(1, 10**9))
+    with opener(path, "wt", encoding="utf-8") as f:
+        f.write(_HEADER)
+
+        def obj(name, parent):
+            node_id = next(ids)
+            f.write(_OBJECT.format(id=node_id, name=name, parent=parent))
+            return f"ns=1;i={node_id}"
+
+        plant = obj("Plant", "i=85")
+        per_line = tags_per_device * devices_per_line
+        for line_no in range(-(-tags // per_line)):
+            if line_no % 10 == 0:
+                area = obj(f"Area{line_no // 10:02d}", plant)
+            line = obj(f"Line{line_no % 10:02d}", area)
+            line_tags = min(per_line, tags - line_no * per_line)
+            for device_no in range(-(-line_tags // tags_per_device)):
+                device = obj(f"Device{device_no:03d}", line)
+                count = min(tags_per_device, line_tags - device_no * tags_per_device)
+                for tag_no in range(count):
+                    f.write(
+                        _VARIABLE.format(
+                            id=next(ids), name=f"Tag{tag_no:03d}", parent=device
+                        )
+                    )
+        f.write("</UANodeSet>\n")
+
+
+def _peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tags", type=int, default=1_000_000)
+    parser.add_argument("--gzip", action="store_true", help="write a .xml.gz file")
+    parser.add_argument("--file", help="import this NodeSet2 file instead")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.file:
+            path = args.file
+        else:
+            path = os.path.join(tmp, "bench.xml" + (".gz" if args.gzip else ""))
+            started = time.perf_counter()
+            write_nodeset(path, args.tags)
+            print(f"wrote {path} in {time.perf_counter() - started:.1f}s")
+        size_mb = os.path.getsize(path) / 2**20
+        index = TagIndex(os.path.join(tmp, "tags.sqlite"))
+
+        rss_before = _peak_rss_mb()
+        last = {"at": time.perf_counter()}
+
+        def progress(**p):
+            now = time.perf_counter()
+            if now - last["at"] >= 5:
+                last["at"] = now
+                print(f"  {p}")
+
+        started = time.perf_counter()
+        indexed = import_nodeset(path, index, _SERVER, progress=progress)
+        elapsed = time.perf_counter() - started
+
+        print(f"file:    {size_mb:,.0f} MB")
+        print(
+            f"indexed: {indexed:,} nodes in {elapsed:.1f}s ({indexed / elapsed:,.0f}/s)"
+        )
+        print(
+            f"peak RSS: {_peak_rss_mb():,.0f} MB (before import: {rss_before:,.0f} MB)"
+        )
+        for mode, q in (
+            ("prefix", "Tag042"),
+            ("substring", "Line03/Device007"),
+            ("regex", r"Area00/Line0[12]/Device000/Tag00\d$"),
+        ):
+            t = time.perf_counter()
+            total = index.search(_SERVER, q, mode=mode, limit=50)["total"]
+            ms = (time.perf_counter() - t) * 1000
+            print(f"search {mode:9} {q!r}: {total:,} matches in {ms:.0f} ms")
+        t = time.perf_counter()
+        children = index.children(_SERVER, "Plant/Area00/Line00/Device000")
+        ms = (time.perf_counter() - t) * 1000
+        print(f"children of one device: {len(children)} in {ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
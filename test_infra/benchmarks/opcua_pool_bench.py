@@ -0,0 +1,103 @@
+"""
+Per-call latency of OPC UA reads with and without the session pool.
+
+"one-shot" is what the browser routes did before the pool: asyncio.run() of a
+coroutine that connects, reads one value and disconnects. "pooled" sends the
+same read through opcua_pool.run() on a session kept open between calls.
+
+    python test_infra/benchmarks/opcua_pool_bench.py                  # in-process server
+    python test_infra/benchmarks/opcua_pool_bench.py --endpoint opc.tcp://localhost:4840/freeopcua/server/ \\
+        --node "ns=2;i=3" --calls 200
+
+Security settings (--security-policy/--security-mode/--certificate/--private-key)
+are passed through unchanged, so the Basic256Sha256 handshake cost can be
+measured against a real server.
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from app.services.opcua_client import fetch_node_value, read_node_value
+from app.services.opcua_pool import OpcuaSessionPool
+
+
+def _summary(samples_ms):
+    ordered = sorted(samples_ms)
+    return {
+        "mean": statistics.fmean(ordered),
+        "p50": ordered[len(ordered) // 2],
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max": ordered[-1],
+    }
+
+
+def _time_calls(fn, calls):
+    samples = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--endpoint", help="OPC UA server (default: in-process)")
+    parser.add_argument("--node", help="Node id to read (default: Line1.Temperature)")
+    parser.add_argument("--calls", type=int, default=100)
+    parser.add_argument("--security-policy", default="None")
+    parser.add_argument("--security-mode", default="None")
+    parser.add_argument("--certificate", default="")
+    parser.add_argument("--private-key", default="")
+    args = parser.parse_args()
+
+    server = None
+    if args.endpoint:
+        endpoint, node = args.endpoint, args.node or "i=2259"
+    else:
+        from tests.conftest import OpcuaTestServer
+
+        server = OpcuaTestServer()
+        server.start()
+        endpoint, node = server.endpoint, server.nodes["Line1.Temperature"]
+
+    config = {
+        "endpoint": endpoint,
+        "connect_timeout": "10s",
+        "security_policy": args.security_policy,
+        "security_mode": args.security_mode,
+        "certificate": args.certificate,
+        "private_key": args.private_key,
+    }
+    pool = OpcuaSessionPool()
+    try:
+        one_shot = _time_calls(
+            lambda: asyncio.run(read_node_value(config, node)), args.calls
+        )
+        pool.run(config, fetch_node_value, node)  # open the session outside the timing
+        pooled = _time_calls(
+            lambda: pool.run(config, fetch_node_value, node), args.calls
+        )
+    finally:
+        pool.stop()
+        if server:
+            server.stop()
+            server.close()
+
+    print(f"{args.calls} reads of {node} on {endpoint}")
+    print(f"{'':10} {'mean':>9} {'p50':>9} {'p95':>9} {'max':>9}  (ms)")
+    for label, samples in (("one-shot", one_shot), ("pooled", pooled)):
+        s = _summary(samples)
+        print(
+            f"{label:10} {s['mean']:9.2f} {s['p50']:9.2f} {s['p95']:9.2f} {s['max']:9.2f}"
+        )
+    print(f"speedup (p50): {_summary(one_shot)['p50'] / _summary(pooled)['p50']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
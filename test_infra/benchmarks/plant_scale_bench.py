@@ -0,0 +1,176 @@
+"""
+Browse, read, crawl and config-render times against a plant-scale OPC UA server.
+
+Starts the simulator from test_infra/opcua_server/server.py in-process (no
+Docker) with --tags variables, then times what the gateway does with a big
+address space, through the same session pool the routes use: browsing a
+folder (whole and first page), reading values, indexing the tree with the tag
+crawler and rendering the Telegraf config with every tag selected.
+
+    python test_infra/benchmarks/plant_scale_bench.py
+    python test_infra/benchmarks/plant_scale_bench.py --tags 100000 --depth 0   # one flat folder
+    python test_infra/benchmarks/plant_scale_bench.py --tags 20000 --no-crawl \\
+        --sim-args="--types Double,Float[16] --properties"
+
+Needs the simulator's requirements (asyncua, numpy).
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import shlex
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from app.services.opcua_client import (
+    fetch_children,
+    fetch_children_page,
+    fetch_node_values,
+)
+from app.services.opcua_pool import OpcuaSessionPool
+from app.services.tag_index import TagCrawler, TagIndex
+from app.services.telegraf_config import render_config
+
+_SIMULATOR = Path(__file__).resolve().parent.parent / "opcua_server" / "server.py"
+
+
+def _load_simulator():
+    spec = importlib.util.spec_from_file_location("opcua_simulator", _SIMULATOR)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_simulator(argv):
+    """Run the simulator on a daemon thread; returns (endpoint, tag node ids)."""
+    simulator = _load_simulator()
+    endpoint = f"opc.tcp://127.0.0.1:{_free_port()}/sim/"
+    args = simulator.build_parser().parse_args(["--endpoint", endpoint, *argv])
+    captured = {}
+    started = threading.Event()
+
+    def ready(sim):
+        captured["sim"] = sim
+        started.set()
+
+    threading.Thread(
+        target=asyncio.run, args=(simulator.serve(args, ready),), daemon=True
+    ).start()
+    if not started.wait(600):
+        sys.exit("simulator did not start")
+    return endpoint, captured["sim"].tag_ids
+
+
+def _summary(samples_ms):
+    ordered = sorted(samples_ms)
+    return (
+        f"mean {statistics.fmean(ordered):8.1f}  p50 {ordered[len(ordered) // 2]:8.1f}"
+        f"  max {ordered[-1]:8.1f} ms"
+    )
+
+
+def _timed(fn, calls):
+    samples, result = [], None
+    for _ in range(calls):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tags", type=int, default=100_000)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--fanout", type=int, default=10)
+    parser.add_argument("--sim-args", default="", help="more simulator options")
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--read", type=int, default=1000, help="tags per value read")
+    parser.add_argument("--no-crawl", action="store_true", help="skip the crawl")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    endpoint, tag_ids = start_simulator(
+        [
+            "--tags",
+            str(args.tags),
+            "--depth",
+            str(args.depth),
+            "--fanout",
+            str(args.fanout),
+            *shlex.split(args.sim_args),
+        ]
+    )
+    print(
+        f"simulator: {len(tag_ids):,} tags up in {time.perf_counter() - started:.1f}s"
+    )
+    folder = tag_ids[0].rsplit(".", 1)[0]
+    in_folder = sum(1 for t in tag_ids if t.rsplit(".", 1)[0] == folder)
+
+    config = {"endpoint": endpoint, "connect_timeout": "10s"}
+    pool = OpcuaSessionPool()
+    try:
+        pool.run(config, fetch_children, "i=85")  # connect outside the timings
+        results = {}
+        results[f"browse {in_folder:,} children"], _ = _timed(
+            lambda: pool.run(config, fetch_children, folder, timeout=300), args.calls
+        )
+        results["browse first page (200)"], _ = _timed(
+            lambda: pool.run(config, fetch_children_page, folder, 200), args.calls
+        )
+        batch = tag_ids[: args.read]
+        results[f"read {len(batch):,} values"], _ = _timed(
+            lambda: pool.run(config, fetch_node_values, batch, timeout=300),
+            args.calls,
+        )
+        for label, samples in results.items():
+            print(f"{label:28} {_summary(samples)}")
+
+        if not args.no_crawl:
+            with tempfile.TemporaryDirectory() as tmp:
+                index = TagIndex(str(Path(tmp) / "tags.sqlite"))
+                crawler = TagCrawler(pool)
+                started = time.perf_counter()
+                crawler.start(config, index, root="ns=2;s=Sim", rate=0)
+                crawler.join()
+                elapsed = time.perf_counter() - started
+                progress = crawler.get_progress()
+                print(
+                    f"{'crawl':28} {progress['indexed']:,} nodes in {elapsed:.1f}s "
+                    f"({progress['indexed'] / elapsed:,.0f}/s, {progress['state']})"
+                )
+    finally:
+        pool.stop()
+
+    nodes = [
+        {
+            "name": tag_id.rsplit(".", 1)[1],
+            "namespace": "2",
+            "identifier_type": "s",
+            "identifier": tag_id.split(";s=", 1)[1],
+        }
+        for tag_id in tag_ids
+    ]
+    samples, rendered = _timed(
+        lambda: render_config({"opcua": config, "nodes": nodes}), 3
+    )
+    print(
+        f"{f'render {len(nodes):,} nodes':28} {_summary(samples)}"
+        f"  ({len(rendered) / 2**20:.1f} MB)"
+    )
+
+
+if __name__ == "__main__":
+    main()
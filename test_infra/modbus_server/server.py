@@ -9,14 +9,41 @@ Register map (holding registers, 0-based):
   4-5  : motor_speed  (RPM)   1000 – 1500
   6-7  : voltage      (V)     220  – 240
   8-9  : current      (A)     5.0  – 15.0
+
+With options it also simulates many devices at once, for register
+coalescing and multi-device polling tests:
+
+    python test_infra/modbus_server/server.py --port 5020 --units 50 \\
+        --registers 10000 --coils 2000 --discretes 2000 \\
+        --types INT16,UINT32,FLOAT32,FLOAT64 --byte-orders ABCD,DCBA,BADC,CDAB \\
+        --latency 5ms-40ms --map registers.json
+
+- every unit id 1..--units gets the same map: --registers holding and as many
+  input registers, --coils coils and --discretes discrete inputs, starting at
+  address 100 (unit 1 keeps the demo registers below that),
+- the registers hold one value after another, cycling through --types, and
+  through --byte-orders once per round of types, so every type/order pair
+  appears,
+- values are sine waves (bits: square waves) recomputed every --interval for
+  all units at once with numpy and packed straight into register arrays;
+  client writes last until the next update,
+- --latency delays every response by a fixed or random (min-max) time,
+- --map writes the register list in the gateway's Modbus config format.
+
+Runs without Docker: pip install -r test_infra/modbus_server/requirements.txt
 """
 
+import argparse
 import asyncio
+import json
 import logging
 import math
+import random
+import re
 import struct
 import time
 
+import numpy as np
 from pymodbus.datastore import (
     ModbusSequentialDataBlock,
     ModbusServerContext,
@@ -24,11 +51,25 @@ from pymodbus.datastore import (
 )
 from pymodbus.server import StartAsyncTcpServer
 
-logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 logger = logging.getLogger(__name__)
 
 PORT = 502
 SLAVE_ID = 1
+# Generated registers start here, after the demo block
+SIM_START = 100
+
+# Gateway data type -> (big-endian numpy dtype, (low, high) of the simulated values)
+_TYPES = {
+    "INT16": (">i2", (-1000, 1000)),
+    "UINT16": (">u2", (0, 10000)),
+    "INT32": (">i4", (-100000, 100000)),
+    "UINT32": (">u4", (0, 1000000)),
+    "INT64": (">i8", (-10000000, 10000000)),
+    "UINT64": (">u8", (0, 10000000)),
+    "FLOAT32": (">f4", (-50.0, 500.0)),
+    "FLOAT64": (">f8", (-50.0, 500.0)),
+}
+_BYTE_ORDERS = ("ABCD", "DCBA", "BADC", "CDAB")
 
 
 def float_to_regs(value: float) -> list[int]:
@@ -55,32 +96,368 @@ def build_holding_registers() -> list[int]:
     return regs
 
 
-async def update_loop(context: ModbusServerContext):
-    """Update register values every 2 seconds."""
+# --- Simulator options ---
+
+
+def parse_types(text):
+    """Parse --types: INT16,FLOAT32 -> ["INT16", "FLOAT32"]."""
+    types = [part.strip().upper() for part in text.split(",") if part.strip()]
+    unknown = [t for t in types if t not in _TYPES]
+    if unknown or not types:
+        raise argparse.ArgumentTypeError(
+            f"bad types {', '.join(unknown) or text!r}: use {', '.join(_TYPES)}"
+        )
+    return types
+
+
+def parse_byte_orders(text):
+    """Parse --byte-orders: ABCD,CDAB -> ["ABCD", "CDAB"]."""
+    orders = [part.strip().upper() for part in text.split(",") if part.strip()]
+    if not orders or any(o not in _BYTE_ORDERS for o in orders):
+        raise argparse.ArgumentTypeError(
+            f"bad byte orders {text!r}: use {', '.join(_BYTE_ORDERS)}"
+        )
+    return orders
+
+
+def _seconds(text):
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)(ms|s)", text.strip())
+    if not match:
+        raise argparse.ArgumentTypeError(f"bad duration {text!r}: use e.g. 20ms, 1s")
+    return float(match[1]) * (0.001 if match[2] == "ms" else 1)
+
+
+def parse_latency(text):
+    """Parse --latency: 20ms -> (0.02, 0.02); 5ms-40ms -> (0.005, 0.04)."""
+    low, _, high = text.partition("-")
+    low = _seconds(low)
+    high = _seconds(high) if high else low
+    if high < low:
+        raise argparse.ArgumentTypeError(f"bad latency {text!r}: min above max")
+    return low, high
+
+
+def register_words(data_type):
+    """16-bit registers taken by one value of `data_type`."""
+    return np.dtype(_TYPES[data_type][0]).itemsize // 2
+
+
+def value_range(data_type):
+    """(low, high) of the values simulated for `data_type`."""
+    return _TYPES[data_type][1]
+
+
+def pack_registers(values, data_type, byte_order):
+    """Registers of `values` (any shape) as `data_type` in `byte_order`, with
+    one extra trailing axis of register_words(data_type) words.
+
+    ABCD keeps big-endian words in order, CDAB reverses the word order, BADC
+    swaps the bytes within each word and DCBA does both (little endian).
+    """
+    dtype = np.dtype(_TYPES[data_type][0])
+    words = np.ascontiguousarray(values, dtype=dtype).view(">u2")
+    words = words.reshape(*np.shape(values), dtype.itemsize // 2).astype(np.uint16)
+    if byte_order in ("CDAB", "DCBA"):
+        words = words[..., ::-1]
+    if byte_order in ("BADC", "DCBA"):
+        words = (words >> 8) | (words << 8)
+    return words
+
+
+def register_map(count, types, byte_orders, start=SIM_START):
+    """[(address, data_type, byte_order)] of the values packed into `count`
+    registers from `start`."""
+    layout = []
+    address, end = start, start + count
+    i = 0
+    while True:
+        data_type = types[i % len(types)]
+        byte_order = byte_orders[(i // len(types)) % len(byte_orders)]
+        if address + register_words(data_type) > end:
+            return layout
+        layout.append((address, data_type, byte_order))
+        address += register_words(data_type)
+        i += 1
+
+
+# --- Data store ---
+
+
+class _ArrayBlock(ModbusSequentialDataBlock):
+    """A data block over one unit's row of a numpy array (no copy)."""
+
+    def __init__(self, array):
+        self.address = 0
+        self.default_value = array.dtype.type(0)
+        self.values = array
+
+    def reset(self):
+        self.values[:] = 0
+
+    def getValues(self, address, count=1):
+        return self.values[address : address + count].tolist()
+
+    def setValues(self, address, values):
+        if not isinstance(values, list):
+            values = [values]
+        self.values[address : address + len(values)] = values
+
+
+class _SlowSlaveContext(ModbusSlaveContext):
+    """Answers after a random delay between `latency` (min, max) seconds."""
+
+    def __init__(self, latency, **blocks):
+        super().__init__(zero_mode=True, **blocks)
+        self.latency = latency
+
+    async def _delay(self):
+        low, high = self.latency
+        if high:
+            await asyncio.sleep(random.uniform(low, high))
+
+    async def async_getValues(self, fc_as_hex, address, count=1):
+        await self._delay()
+        return self.getValues(fc_as_hex, address, count)
+
+    async def async_setValues(self, fc_as_hex, address, values):
+        await self._delay()
+        self.setValues(fc_as_hex, address, values)
+
+
+class _Table:
+    """One register table (holding, input, coils or discretes) of every unit."""
+
+    def __init__(self, units, size, layout, bits, rng):
+        self.bits = bits
+        self.array = np.zeros((units, size), dtype=np.bool_ if bits else np.uint16)
+        self.groups = []  # (data type, byte order, register indexes, params)
+        if bits:
+            count = len(layout)
+            self.bit_index = np.array(layout, dtype=np.int64)
+            self.cycle = rng.uniform(5.0, 120.0, (units, count))
+            self.phase = rng.uniform(0.0, 2 * math.pi, (units, count))
+            return
+        by_kind = {}
+        for address, data_type, byte_order in layout:
+            by_kind.setdefault((data_type, byte_order), []).append(address)
+        for (data_type, byte_order), addresses in by_kind.items():
+            _, (low, high) = _TYPES[data_type]
+            shape = (units, len(addresses))
+            amplitude = (high - low) * rng.uniform(0.02, 0.2, shape)
+            center = np.clip(
+                rng.uniform(low, high, shape), low + amplitude, high - amplitude
+            )
+            index = np.array(addresses)[:, None] + np.arange(register_words(data_type))
+            self.groups.append(
+                (
+                    data_type,
+                    byte_order,
+                    index,
+                    center,
+                    amplitude,
+                    rng.uniform(10.0, 600.0, shape),  # waveform period (s)
+                    rng.uniform(0.0, 2 * math.pi, shape),
+                )
+            )
+
+    def update(self, now):
+        """Recompute and pack every value of every unit."""
+        if self.bits:
+            if len(self.bit_index):
+                wave = np.sin(2 * math.pi * now / self.cycle + self.phase)
+                self.array[:, self.bit_index] = wave > 0
+            return
+        for (
+            data_type,
+            byte_order,
+            index,
+            center,
+            amplitude,
+            cycle,
+            phase,
+        ) in self.groups:
+            values = center + amplitude * np.sin(2 * math.pi * now / cycle + phase)
+            if not data_type.startswith("FLOAT"):
+                values = np.rint(values)
+            self.array[:, index] = pack_registers(values, data_type, byte_order)
+
+
+class Simulator:
+    """Register tables for unit ids 1..`units`, updated together."""
+
+    def __init__(
+        self,
+        units=1,
+        registers=0,
+        coils=0,
+        discretes=0,
+        types=("FLOAT32",),
+        byte_orders=("ABCD",),
+        latency=(0.0, 0.0),
+        seed=0,
+    ):
+        rng = np.random.default_rng(seed)
+        self.units = units
+        self.layout = register_map(registers, list(types), list(byte_orders))
+        size = max(100, SIM_START + registers)
+        self.holding = _Table(units, size, self.layout, False, rng)
+        self.input = _Table(units, size, self.layout, False, rng)
+        self.coils = _Table(
+            units,
+            max(100, SIM_START + coils),
+            range(SIM_START, SIM_START + coils),
+            True,
+            rng,
+        )
+        self.discretes = _Table(
+            units,
+            max(100, SIM_START + discretes),
+            range(SIM_START, SIM_START + discretes),
+            True,
+            rng,
+        )
+        self.tables = (self.holding, self.input, self.coils, self.discretes)
+        self.latency = latency
+        self.update()
+
+    def context(self):
+        slaves = {
+            unit: _SlowSlaveContext(
+                self.latency,
+                hr=_ArrayBlock(self.holding.array[unit - 1]),
+                ir=_ArrayBlock(self.input.array[unit - 1]),
+                co=_ArrayBlock(self.coils.array[unit - 1]),
+                di=_ArrayBlock(self.discretes.array[unit - 1]),
+            )
+            for unit in range(1, self.units + 1)
+        }
+        return ModbusServerContext(slaves=slaves, single=False)
+
+    def update(self):
+        now = time.time()
+        for table in self.tables:
+            table.update(now)
+        # Unit 1 keeps the demo registers
+        self.holding.array[SLAVE_ID - 1, :100] = build_holding_registers()
+
+    def gateway_registers(self):
+        """The simulated values as entries of the gateway's Modbus config."""
+        registers = [
+            {
+                "name": f"{kind}_{address}_{data_type.lower()}_{byte_order.lower()}",
+                "register_type": kind,
+                "address": address,
+                "data_type": data_type,
+                "byte_order": byte_order,
+            }
+            for kind in ("holding", "input")
+            for address, data_type, byte_order in self.layout
+        ]
+        for kind, table in (("coil", self.coils), ("discrete", self.discretes)):
+            registers += [
+                {
+                    "name": f"{kind}_{address}",
+                    "register_type": kind,
+                    "address": int(address),
+                    "data_type": "BOOL",
+                    "byte_order": "ABCD",
+                }
+                for address in table.bit_index
+            ]
+        return registers
+
+
+async def update_loop(simulator, interval=2.0):
+    """Update register values every `interval` seconds."""
     while True:
-        regs = build_holding_registers()
-        context[SLAVE_ID].setValues(3, 0, regs)  # function code 3 = holding registers
-        await asyncio.sleep(2)
+        await asyncio.sleep(interval)
+        started = time.monotonic()
+        simulator.update()
+        logger.debug(
+            "Updated registers in %.1f ms", (time.monotonic() - started) * 1000
+        )
 
 
-async def main():
-    regs = build_holding_registers()
-    store = ModbusSlaveContext(
-        hr=ModbusSequentialDataBlock(0, regs),
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--units", type=int, default=1, help="unit ids 1..N (max 247)")
+    parser.add_argument(
+        "--registers", type=int, default=0, help="simulated holding/input registers"
     )
-    context = ModbusServerContext(slaves={SLAVE_ID: store}, single=False)
+    parser.add_argument("--coils", type=int, default=0)
+    parser.add_argument("--discretes", type=int, default=0)
+    parser.add_argument(
+        "--types",
+        type=parse_types,
+        default="FLOAT32",
+        help=f"comma-separated, from {','.join(_TYPES)} (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--byte-orders",
+        type=parse_byte_orders,
+        default="ABCD",
+        help="comma-separated, from ABCD,DCBA,BADC,CDAB (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--latency",
+        type=parse_latency,
+        default="0ms",
+        help="response delay, fixed (20ms) or random (5ms-40ms)",
+    )
+    parser.add_argument("--interval", type=_seconds, default="2s")
+    parser.add_argument("--map", help="write the gateway register list to this file")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser
+
+
+async def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not 1 <= args.units <= 247:
+        raise SystemExit("--units must be between 1 and 247")
+    if SIM_START + max(args.registers, args.coils, args.discretes) > 65536:
+        raise SystemExit(f"at most {65536 - SIM_START} registers/coils/discretes")
+    simulator = Simulator(
+        units=args.units,
+        registers=args.registers,
+        coils=args.coils,
+        discretes=args.discretes,
+        types=args.types,
+        byte_orders=args.byte_orders,
+        latency=args.latency,
+        seed=args.seed,
+    )
+    context = simulator.context()
+    if args.map:
+        with open(args.map, "w") as f:
+            json.dump(simulator.gateway_registers(), f, indent=2)
 
     logger.info(
-        "Modbus TCP demo server starting on port %d (slave ID %d)", PORT, SLAVE_ID
+        "Modbus TCP demo server starting on port %d (slave ID %d)", args.port, SLAVE_ID
     )
     logger.info(
         "Registers: temperature(0), pressure(2), motor_speed(4), voltage(6), current(8)"
     )
+    if args.registers or args.coils or args.discretes or args.units > 1:
+        logger.info(
+            "Simulating units 1-%d: %d values in %d holding and input registers, "
+            "%d coils, %d discretes from address %d",
+            args.units,
+            len(simulator.layout),
+            args.registers,
+            args.coils,
+            args.discretes,
+            SIM_START,
+        )
 
-    asyncio.create_task(update_loop(context))
+    asyncio.create_task(update_loop(simulator, args.interval))
 
-    await StartAsyncTcpServer(context=context, address=("0.0.0.0", PORT))
+    await StartAsyncTcpServer(context=context, address=(args.host, args.port))
 
 
 if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s"
+    )
     asyncio.run(main())
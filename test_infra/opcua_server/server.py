@@ -1,22 +1,93 @@
+"""
+OPC UA test server: the demo plant, plus an optional plant-scale simulator.
+
+Without arguments it serves only the demo address space that the gateway's
+"Use Demo Server" button and the docs point at: Plant/Line1, Line2 and
+Utilities, ten variables changing every 2 s. --tags adds a generated tree
+under Objects/Sim for load and performance testing:
+
+    python test_infra/opcua_server/server.py --tags 100000 --depth 3 --fanout 10 \\
+        --types Double,Float,Int32,Boolean,Double[16] \\
+        --rates 100ms:0.1,1s:0.6,10s:0.3 --properties
+
+- --depth/--fanout shape the folders (Sim/Area01/Line01/Cell01/...); the tags
+  are spread evenly over the deepest folders (--depth 0 puts them all in
+  Sim, to test one huge folder),
+- --types are assigned round-robin; Name[N] is a one-dimensional array,
+- --rates are update-rate classes with the share of tags in each; a tag's
+  MinimumSamplingInterval is its class period,
+- --properties turns Float/Double tags into AnalogItems with EURange and
+  EngineeringUnits property nodes.
+
+Tags are ns=2;s=Sim.Area01.Line01.Tag00042 (the number is the tag's index,
+which also picks its type and rate class). Their values are sine waves plus
+noise computed with numpy one rate class at a time; reads are answered from
+those arrays and subscribed tags are notified on every update, so 100k tags
+cost next to nothing until a client asks for them.
+
+Runs without Docker: pip install -r test_infra/opcua_server/requirements.txt
+"""
+
+import argparse
 import asyncio
 import logging
+import math
 import random
+import re
+import time
+from datetime import datetime, timezone
 
+import numpy as np
 from asyncua import Server, ua
+from asyncua.server.address_space import AttributeValue, NodeData
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+ENDPOINT = "opc.tcp://0.0.0.0:4840/freeopcua/server/"
+NAMESPACE = "urn:iiot-test-server"
 
-async def main():
-    server = Server()
-    await server.init()
-    server.set_endpoint("opc.tcp://0.0.0.0:4840/freeopcua/server/")
-    server.set_server_name("IIoT Test OPC UA Server")
+# Type name -> (variant type, numpy dtype, (low, high) of the simulated values)
+_TYPES = {
+    "Boolean": (ua.VariantType.Boolean, np.bool_, (0, 1)),
+    "SByte": (ua.VariantType.SByte, np.int8, (-128, 127)),
+    "Byte": (ua.VariantType.Byte, np.uint8, (0, 255)),
+    "Int16": (ua.VariantType.Int16, np.int16, (-1000, 1000)),
+    "UInt16": (ua.VariantType.UInt16, np.uint16, (0, 10000)),
+    "Int32": (ua.VariantType.Int32, np.int32, (-10000, 10000)),
+    "UInt32": (ua.VariantType.UInt32, np.uint32, (0, 100000)),
+    "Int64": (ua.VariantType.Int64, np.int64, (-100000, 100000)),
+    "UInt64": (ua.VariantType.UInt64, np.uint64, (0, 1000000)),
+    "Float": (ua.VariantType.Float, np.float32, (-50.0, 500.0)),
+    "Double": (ua.VariantType.Double, np.float64, (-50.0, 500.0)),
+    "String": (ua.VariantType.String, np.float64, (0.0, 100.0)),
+}
+_ANALOG = ("Float", "Double")
+# Folder names by level; deeper levels are called Level5, Level6, ...
+_LEVELS = ("Area", "Line", "Cell", "Unit", "Module")
+# (symbol, description, UN/CEFACT common code) handed out to analog tags
+_UNITS = (
+    ("°C", "degree Celsius", "CEL"),
+    ("bar", "bar", "BAR"),
+    ("m³/h", "cubic metre per hour", "MQH"),
+    ("kW", "kilowatt", "KWT"),
+    ("rpm", "revolutions per minute", "RPM"),
+    ("%", "percent", "P1"),
+)
+_UNITS_URI = "http://www.opcfoundation.org/UA/units/un/cefact"
+
+_READ = ua.AccessLevel.CurrentRead.mask
+_HAS_COMPONENT = ua.NodeId(ua.ObjectIds.HasComponent)
+_HAS_PROPERTY = ua.NodeId(ua.ObjectIds.HasProperty)
+_HAS_TYPE_DEFINITION = ua.NodeId(ua.ObjectIds.HasTypeDefinition)
+_ORGANIZES = ua.NodeId(ua.ObjectIds.Organizes)
+
+
+# --- Demo address space ---
 
-    uri = "urn:iiot-test-server"
-    idx = await server.register_namespace(uri)
 
+async def add_demo(server, idx):
+    """Add Plant/Line1, Line2 and Utilities; returns a coroutine function
+    that keeps their values changing."""
     objects = server.nodes.objects
 
     # Plant object
@@ -58,9 +129,7 @@ async def main():
     ]:
         await var.set_writable()
 
-    logger.info("Starting OPC UA Test Server at opc.tcp://0.0.0.0:4840")
-
-    async with server:
+    async def simulate():
         while True:
             # Simulate changing values
             await l1_temp.write_value(round(random.uniform(20.0, 35.0), 2))
@@ -82,6 +151,548 @@ async def main():
 
             await asyncio.sleep(2)
 
+    return simulate
+
+
+# --- Simulator options ---
+
+
+def parse_types(text):
+    """Parse --types: Double,Float[8] -> [("Double", 0), ("Float", 8)]."""
+    types = []
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        match = re.fullmatch(r"(\w+)(?:\[(\d+)\])?", item)
+        if not match or match[1] not in _TYPES or match[2] == "0":
+            raise argparse.ArgumentTypeError(
+                f"bad type {item!r}: expected one of {', '.join(_TYPES)}, "
+                "optionally with an array length like Double[8]"
+            )
+        types.append((match[1], int(match[2] or 0)))
+    if not types:
+        raise argparse.ArgumentTypeError("no types given")
+    return types
+
+
+def _seconds(text):
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)(ms|s|m)", text)
+    if not match:
+        raise argparse.ArgumentTypeError(f"bad period {text!r}: use e.g. 100ms, 1s, 1m")
+    return float(match[1]) * {"ms": 0.001, "s": 1, "m": 60}[match[2]]
+
+
+def parse_rates(text):
+    """Parse --rates: 100ms:0.2,1s:0.8 -> [(0.1, 0.2), (1.0, 0.8)]."""
+    rates = []
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        period, _, share = item.partition(":")
+        try:
+            weight = float(share or 1)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"bad share in {item!r}") from None
+        if weight <= 0:
+            raise argparse.ArgumentTypeError(f"share in {item!r} must be positive")
+        rates.append((_seconds(period), weight))
+    if not rates:
+        raise argparse.ArgumentTypeError("no rates given")
+    return rates
+
+
+def _unece_id(code):
+    """The UnitId of a UN/CEFACT common code (OPC UA Part 8, EUInformation)."""
+    return int.from_bytes(code.encode(), "big")
+
+
+# --- Plant-scale simulator ---
+
+
+class _Group:
+    """Tags of one type and rate class: parameters and current values as arrays."""
+
+    def __init__(self, type_name, length, period, count, rng):
+        self.vtype, self.dtype, (low, high) = _TYPES[type_name]
+        self.type_name = type_name
+        self.length = length
+        self.period = period
+        self.count = count
+        self.is_string = type_name == "String"
+        self.rng = rng
+        shape = (count, length) if length else (count,)
+        span = high - low
+        self.amplitude = span * rng.uniform(0.02, 0.2, shape)
+        self.center = rng.uniform(low, high, shape)
+        self.center = np.clip(self.center, low + self.amplitude, high - self.amplitude)
+        self.cycle = rng.uniform(10.0, 600.0, shape)  # waveform period (s)
+        self.phase = rng.uniform(0.0, 2 * math.pi, shape)
+        self.values = None
+        self.stamp = None
+        self.watched = {}  # row -> AttributeValue with datachange callbacks
+        self.update(time.time())
+
+    def update(self, now):
+        """Compute every tag's value at `now` in one go."""
+        wave = np.sin(2 * math.pi * now / self.cycle + self.phase)
+        if self.dtype is np.bool_:
+            self.values = wave > 0
+        else:
+            noise = self.rng.standard_normal(wave.shape) * 0.02
+            raw = self.center + self.amplitude * (wave + noise)
+            if np.issubdtype(self.dtype, np.integer):
+                raw = np.rint(raw)
+            self.values = raw.astype(self.dtype)
+        self.stamp = datetime.fromtimestamp(now, timezone.utc)
+
+    def value(self, row):
+        current = self.values[row]
+        if self.is_string:
+            if self.length:
+                return [f"{v:.2f}" for v in current]
+            return f"{current:.2f}"
+        return current.tolist() if self.length else current.item()
+
+    def data_value(self, row):
+        return ua.DataValue(
+            ua.Variant(self.value(row), self.vtype, is_array=bool(self.length)),
+            SourceTimestamp=self.stamp,
+            ServerTimestamp=datetime.now(timezone.utc),
+        )
+
+
+class Simulator:
+    """A generated tree of `tags` variables under Objects/Sim, built straight
+    into the server's address space (adding 100k nodes through the regular
+    AddNodes path takes minutes)."""
+
+    def __init__(
+        self,
+        tags,
+        depth=2,
+        fanout=10,
+        types=(("Double", 0),),
+        rates=((1.0, 1.0),),
+        properties=False,
+        seed=0,
+    ):
+        self.tags = tags
+        self.depth = depth
+        self.fanout = fanout
+        self.types = list(types)
+        self.rates = list(rates)
+        self.properties = properties
+        self.rng = np.random.default_rng(seed)
+        self.groups = []
+        self.rows = {}  # nodeid -> (group, row)
+        self.tag_ids = []  # node id strings, by tag index
+        self._aspace = None
+        self._idx = None
+
+    # --- Layout ---
+
+    def _rate_of(self, count):
+        """Rate class of each tag index, interleaved by share."""
+        total = sum(weight for _, weight in self.rates)
+        slots = [round(100 * weight / total) or 1 for _, weight in self.rates]
+        pattern = np.repeat(np.arange(len(self.rates)), slots)
+        return np.resize(pattern, count)
+
+    def _leaf_paths(self):
+        """(folder path, tag count) of every leaf folder with at least one tag."""
+        leaves = self.fanout**self.depth
+        per_leaf, extra = divmod(self.tags, leaves)
+        for leaf in range(min(leaves, self.tags)):
+            digits, rest = [], leaf
+            for _ in range(self.depth):
+                rest, digit = divmod(rest, self.fanout)
+                digits.append(digit)
+            path = tuple(
+                f"{_LEVELS[level] if level < len(_LEVELS) else f'Level{level + 1}'}"
+                f"{digit + 1:02d}"
+                for level, digit in enumerate(reversed(digits))
+            )
+            yield path, per_leaf + (1 if leaf < extra else 0)
+
+    # --- Address space ---
+
+    def _node(self, node_id, name, node_class, attributes):
+        node = NodeData(node_id)
+        browse_name = ua.QualifiedName(name, self._idx)
+        node.attributes[ua.AttributeIds.NodeId] = AttributeValue(
+            ua.DataValue(ua.Variant(node_id, ua.VariantType.NodeId))
+        )
+        node.attributes[ua.AttributeIds.NodeClass] = self._constants[
+            ("NodeClass", node_class)
+        ]
+        node.attributes[ua.AttributeIds.BrowseName] = AttributeValue(
+            ua.DataValue(ua.Variant(browse_name, ua.VariantType.QualifiedName))
+        )
+        node.attributes[ua.AttributeIds.DisplayName] = AttributeValue(
+            ua.DataValue(
+                ua.Variant(ua.LocalizedText(name), ua.VariantType.LocalizedText)
+            )
+        )
+        for attr, value in attributes.items():
+            node.attributes[attr] = value
+        self._aspace[node_id] = node
+        return node, browse_name
+
+    def _link(self, parent, child, reference, node_class, type_definition):
+        """Forward reference parent -> child, inverse child -> parent."""
+        node, browse_name = child
+        parent_node, _ = parent
+        parent_node.references.append(
+            ua.ReferenceDescription(
+                ReferenceTypeId=reference,
+                NodeId=node.nodeid,
+                BrowseName=browse_name,
+                DisplayName=ua.LocalizedText(browse_name.Name),
+                NodeClass_=node_class,
+                TypeDefinition=type_definition,
+                IsForward=True,
+            )
+        )
+        inverse = self._inverse.get((parent_node.nodeid, reference))
+        if inverse is None:
+            inverse = self._inverse[(parent_node.nodeid, reference)] = (
+                ua.ReferenceDescription(
+                    ReferenceTypeId=reference,
+                    NodeId=parent_node.nodeid,
+                    BrowseName=parent[1],
+                    DisplayName=ua.LocalizedText(parent[1].Name),
+                    NodeClass_=self._node_class(parent_node),
+                    IsForward=False,
+                )
+            )
+        node.references.append(inverse)
+        node.references.append(self._type_refs[type_definition.Identifier])
+
+    @staticmethod
+    def _node_class(node):
+        return node.attributes[ua.AttributeIds.NodeClass].value.Value.Value
+
+    def _constant(self, value, vtype):
+        """A read-only attribute shared by every node that has this value."""
+        key = (vtype, tuple(value) if isinstance(value, list) else value)
+        attr = self._shared.get(key)
+        if attr is None:
+            attr = self._shared[key] = AttributeValue(
+                ua.DataValue(ua.Variant(value, vtype))
+            )
+        return attr
+
+    def _variable_attributes(self, data_type, value_rank, dimensions, interval_ms):
+        c = self._constant
+        return {
+            ua.AttributeIds.DataType: c(data_type, ua.VariantType.NodeId),
+            ua.AttributeIds.ValueRank: c(value_rank, ua.VariantType.Int32),
+            ua.AttributeIds.ArrayDimensions: c(dimensions, ua.VariantType.UInt32),
+            ua.AttributeIds.AccessLevel: c(_READ, ua.VariantType.Byte),
+            ua.AttributeIds.UserAccessLevel: c(_READ, ua.VariantType.Byte),
+            ua.AttributeIds.MinimumSamplingInterval: c(
+                interval_ms, ua.VariantType.Double
+            ),
+            ua.AttributeIds.Historizing: c(False, ua.VariantType.Boolean),
+            ua.AttributeIds.WriteMask: c(0, ua.VariantType.UInt32),
+            ua.AttributeIds.UserWriteMask: c(0, ua.VariantType.UInt32),
+        }
+
+    def _existing(self, node_id):
+        node = self._aspace[node_id]
+        name = node.attributes[ua.AttributeIds.BrowseName].value.Value.Value
+        return node, name
+
+    async def build(self, server, idx):
+        """Create the groups and the Sim tree in `server` (namespace `idx`)."""
+        started = time.monotonic()
+        self._aspace = server.iserver.aspace
+        self._idx = idx
+        self._shared = {}
+        self._inverse = {}
+        self._templates = {}
+        self._constants = {
+            ("NodeClass", cls): self._constant(cls, ua.VariantType.Int32)
+            for cls in (ua.NodeClass.Object, ua.NodeClass.Variable)
+        }
+        self._type_refs = {}
+        for type_id in (
+            ua.ObjectIds.FolderType,
+            ua.ObjectIds.BaseDataVariableType,
+            ua.ObjectIds.AnalogItemType,
+            ua.ObjectIds.PropertyType,
+        ):
+            type_node, type_name = self._existing(ua.NodeId(type_id))
+            self._type_refs[type_id] = ua.ReferenceDescription(
+                ReferenceTypeId=_HAS_TYPE_DEFINITION,
+                NodeId=type_node.nodeid,
+                BrowseName=type_name,
+                DisplayName=ua.LocalizedText(type_name.Name),
+                NodeClass_=self._node_class(type_node),
+                IsForward=True,
+            )
+
+        # Tags per (type, rate class), and each tag's row in its group
+        count = self.tags
+        type_of = np.arange(count) % len(self.types)
+        rate_of = self._rate_of(count)
+        key_of = type_of * len(self.rates) + rate_of
+        rows_of = np.zeros(count, dtype=np.int64)
+        groups = {}
+        for key in np.unique(key_of):
+            members = np.flatnonzero(key_of == key)
+            rows_of[members] = np.arange(len(members))
+            (type_name, length), (period, _) = (
+                self.types[key // len(self.rates)],
+                self.rates[key % len(self.rates)],
+            )
+            groups[key] = _Group(type_name, length, period, len(members), self.rng)
+        self.groups = list(groups.values())
+
+        folder = self._folder_attributes()
+        objects = self._existing(ua.NodeId(ua.ObjectIds.ObjectsFolder))
+        folder_type = ua.NodeId(ua.ObjectIds.FolderType)
+        sim = self._node(ua.NodeId("Sim", idx), "Sim", ua.NodeClass.Object, folder)
+        self._link(objects, sim, _ORGANIZES, ua.NodeClass.Object, folder_type)
+        folders = {(): sim}
+        width = len(str(max(count - 1, 0)))
+        tag = 0
+        for path, tags_here in self._leaf_paths():
+            for depth in range(1, len(path) + 1):
+                if path[:depth] not in folders:
+                    node_id = ua.NodeId(".".join(("Sim",) + path[:depth]), idx)
+                    folders[path[:depth]] = self._node(
+                        node_id, path[depth - 1], ua.NodeClass.Object, folder
+                    )
+                    self._link(
+                        folders[path[: depth - 1]],
+                        folders[path[:depth]],
+                        _ORGANIZES,
+                        ua.NodeClass.Object,
+                        folder_type,
+                    )
+            prefix = ".".join(("Sim",) + path)
+            for _ in range(tags_here):
+                group = groups[key_of[tag]]
+                self._add_tag(
+                    folders[path], f"{prefix}.Tag{tag:0{width}d}", group, rows_of[tag]
+                )
+                tag += 1
+
+        logger.info(
+            "Simulated %d tags in %d folders (%d nodes) in %.1fs",
+            count,
+            len(folders),
+            len(self.rows) + len(folders) + (2 * self._analog_count()),
+            time.monotonic() - started,
+        )
+
+    def _folder_attributes(self):
+        c = self._constant
+        return {
+            ua.AttributeIds.EventNotifier: c(0, ua.VariantType.Byte),
+            ua.AttributeIds.WriteMask: c(0, ua.VariantType.UInt32),
+            ua.AttributeIds.UserWriteMask: c(0, ua.VariantType.UInt32),
+        }
+
+    def _analog_count(self):
+        if not self.properties:
+            return 0
+        return sum(g.count for g in self.groups if g.type_name in _ANALOG)
+
+    def _tag_template(self, group):
+        """Attributes shared by every tag of `group`, and its type definition."""
+        template = self._templates.get(group)
+        if template is None:
+            analog = self.properties and group.type_name in _ANALOG
+            template = self._templates[group] = (
+                self._variable_attributes(
+                    ua.NodeId(group.vtype.value),
+                    1 if group.length else -1,
+                    [group.length] if group.length else [],
+                    group.period * 1000,
+                ),
+                ua.NodeId(
+                    ua.ObjectIds.AnalogItemType
+                    if analog
+                    else ua.ObjectIds.BaseDataVariableType
+                ),
+                analog,
+            )
+        return template
+
+    def _add_tag(self, folder, node_id_str, group, row):
+        row = int(row)
+        node_id = ua.NodeId(node_id_str, self._idx)
+        shared, type_definition, analog = self._tag_template(group)
+        value = AttributeValue(None)
+        value.value_callback = self._read
+        attributes = {**shared, ua.AttributeIds.Value: value}
+        name = node_id_str.rsplit(".", 1)[1]
+        tag = self._node(node_id, name, ua.NodeClass.Variable, attributes)
+        self._link(folder, tag, _HAS_COMPONENT, ua.NodeClass.Variable, type_definition)
+        self.rows[node_id] = (group, row)
+        self.tag_ids.append(f"ns={self._idx};s={node_id_str}")
+        if analog:
+            self._add_properties(tag, node_id_str, group, row)
+
+    def _add_properties(self, tag, node_id_str, group, row):
+        center = float(np.mean(group.center[row]))
+        spread = float(np.max(group.amplitude[row])) * 1.1
+        symbol, description, code = _UNITS[row % len(_UNITS)]
+        properties = (
+            (
+                "EURange",
+                ua.NodeId(ua.ObjectIds.Range),
+                ua.Range(Low=center - spread, High=center + spread),
+            ),
+            (
+                "EngineeringUnits",
+                ua.NodeId(ua.ObjectIds.EUInformation),
+                ua.EUInformation(
+                    NamespaceUri=_UNITS_URI,
+                    UnitId=_unece_id(code),
+                    DisplayName=ua.LocalizedText(symbol),
+                    Description=ua.LocalizedText(description),
+                ),
+            ),
+        )
+        property_type = ua.NodeId(ua.ObjectIds.PropertyType)
+        for name, data_type, value in properties:
+            attributes = self._variable_attributes(data_type, -1, [], 0.0)
+            attributes[ua.AttributeIds.Value] = AttributeValue(
+                ua.DataValue(ua.Variant(value, ua.VariantType.ExtensionObject))
+            )
+            node = self._node(
+                ua.NodeId(f"{node_id_str}.{name}", self._idx),
+                name,
+                ua.NodeClass.Variable,
+                attributes,
+            )
+            self._link(tag, node, _HAS_PROPERTY, ua.NodeClass.Variable, property_type)
+
+    def _read(self, nodeid, attr):
+        group, row = self.rows[nodeid]
+        return group.data_value(row)
+
+    # --- Updates ---
+
+    def watch_subscriptions(self):
+        """Track which tags have monitored items, so updates notify only those."""
+        aspace = self._aspace
+        add, delete = aspace.add_datachange_callback, aspace.delete_datachange_callback
+
+        def add_callback(nodeid, attr, callback):
+            status, handle = add(nodeid, attr, callback)
+            if status.is_good() and attr == ua.AttributeIds.Value:
+                entry = self.rows.get(nodeid)
+                if entry:
+                    group, row = entry
+                    group.watched[row] = aspace[nodeid].attributes[attr]
+            return status, handle
+
+        def delete_callback(handle):
+            nodeid, attr = aspace._handle_to_attribute_map.get(handle, (None, None))
+            delete(handle)
+            entry = self.rows.get(nodeid)
+            if entry:
+                group, row = entry
+                attval = group.watched.get(row)
+                if attval is not None and not attval.datachange_callbacks:
+                    del group.watched[row]
+
+        aspace.add_datachange_callback = add_callback
+        aspace.delete_datachange_callback = delete_callback
+
+    async def _run_rate(self, period, groups):
+        next_tick = time.monotonic()
+        while True:
+            next_tick += period
+            await asyncio.sleep(max(0.0, next_tick - time.monotonic()))
+            now = time.time()
+            for group in groups:
+                group.update(now)
+                for row, attval in list(group.watched.items()):
+                    data_value = group.data_value(row)
+                    for handle, callback in list(attval.datachange_callbacks.items()):
+                        await callback(handle, data_value)
+
+    async def run(self):
+        """Update every rate class on its own period, until cancelled."""
+        by_period = {}
+        for group in self.groups:
+            by_period.setdefault(group.period, []).append(group)
+        await asyncio.gather(
+            *(self._run_rate(period, groups) for period, groups in by_period.items())
+        )
+
+
+# --- Entry point ---
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--endpoint", default=ENDPOINT)
+    parser.add_argument(
+        "--tags", type=int, default=0, help="simulated variables under Objects/Sim"
+    )
+    parser.add_argument("--depth", type=int, default=2, help="folder levels")
+    parser.add_argument("--fanout", type=int, default=10, help="subfolders per folder")
+    parser.add_argument(
+        "--types",
+        type=parse_types,
+        default="Double,Float,Int32,Boolean",
+        help="comma-separated, e.g. Double,Int16,Float[8] (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--rates",
+        type=parse_rates,
+        default="1s",
+        help="period:share,... e.g. 100ms:0.1,1s:0.9 (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--properties",
+        action="store_true",
+        help="EURange/EngineeringUnits on Float and Double tags",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    return parser
+
+
+async def serve(args, ready=None):
+    """Run the server described by `args` until cancelled. `ready`, if given,
+    is called with the Simulator (None without --tags) once the server
+    accepts connections."""
+    server = Server()
+    await server.init()
+    server.set_endpoint(args.endpoint)
+    server.set_server_name("IIoT Test OPC UA Server")
+
+    idx = await server.register_namespace(NAMESPACE)
+    simulate_demo = await add_demo(server, idx)
+
+    simulator = None
+    if args.tags:
+        simulator = Simulator(
+            args.tags,
+            depth=max(0, args.depth),
+            fanout=max(1, args.fanout),
+            types=args.types,
+            rates=args.rates,
+            properties=args.properties,
+            seed=args.seed,
+        )
+        await simulator.build(server, idx)
+        simulator.watch_subscriptions()
+
+    logger.info("Starting OPC UA Test Server at %s", args.endpoint)
+
+    async with server:
+        if ready is not None:
+            ready(simulator)
+        await asyncio.gather(simulate_demo(), *([simulator.run()] if simulator else []))
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(serve(build_parser().parse_args(argv)))
+
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    main()
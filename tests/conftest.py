@@ -1,5 +1,11 @@
 """Shared pytest fixtures."""
 
+import asyncio
+import copy
+import socket
+import threading
+from collections import Counter
+
 import pytest
 from flask import Flask
 
@@ -12,3 +18,150 @@ def app_ctx(tmp_path):
     app.config["TELEGRAF_METRICS_FILE"] = str(tmp_path / "metrics.json")
     with app.app_context():
         yield tmp_path
+
+
+class OpcuaTestServer:
+    """An asyncua server on its own loop thread, with a small Plant address space.
+
+    Tests read `endpoint` and `nodes` (browse name -> node id string), and use
+    call() to run a coroutine on the server's loop (e.g. to write a value).
+    Plant/Bulk holds `bulk_tags` variables for large-folder tests.
+    """
+
+    bulk_tags = 500
+
+    def __init__(self):
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        self.endpoint = f"opc.tcp://127.0.0.1:{port}/test/"
+        self.nodes = {}
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        self.server = None
+
+    def call(self, coro, timeout=10):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    async def _build(self):
+        from asyncua import Server, ua
+
+        server = Server()
+        await server.init()
+        server.set_endpoint(self.endpoint)
+        idx = await server.register_namespace("urn:iiot-test-server")
+        plant = await server.nodes.objects.add_object(idx, "Plant")
+        self.nodes["Plant"] = plant.nodeid.to_string()
+        for line_name in ("Line1", "Line2"):
+            line = await plant.add_object(idx, line_name)
+            self.nodes[line_name] = line.nodeid.to_string()
+            for name, value, vtype in (
+                ("Temperature", 25.0, ua.VariantType.Double),
+                ("Speed", 300, ua.VariantType.Int32),
+                ("Status", True, ua.VariantType.Boolean),
+            ):
+                var = await line.add_variable(idx, name, value, vtype)
+                self.nodes[f"{line_name}.{name}"] = var.nodeid.to_string()
+            temperature = await line.get_child(f"{idx}:Temperature")
+            eu = ua.EUInformation()
+            eu.DisplayName = ua.LocalizedText("°C")
+            await temperature.add_property(0, "EngineeringUnits", eu)
+            await temperature.write_attribute(
+                ua.AttributeIds.Description,
+                ua.DataValue(ua.Variant(ua.LocalizedText(f"{line_name} temperature"))),
+            )
+        bulk = await plant.add_folder(idx, "Bulk")
+        self.nodes["Bulk"] = bulk.nodeid.to_string()
+        for i in range(self.bulk_tags):
+            await bulk.add_variable(idx, f"Tag{i:04d}", float(i))
+        self.server = server
+
+    def run_counted(self, op, *args):
+        """Run `await op(client, *args)` on a new session from the calling thread.
+
+        Returns (result, Counter of request type names sent during `op`).
+        """
+
+        async def run():
+            from asyncua import Client
+
+            # Long watchdog interval: no keepalive reads in the counts
+            client = Client(self.endpoint, watchdog_intervall=3600)
+            async with client:
+                calls = Counter()
+                protocol = client.uaclient.protocol
+                send = protocol.send_request
+
+                async def counting(request, *a, **kw):
+                    calls[type(request).__name__] += 1
+                    return await send(request, *a, **kw)
+
+                protocol.send_request = counting
+                try:
+                    return await op(client, *args), calls
+                finally:
+                    protocol.send_request = send
+
+        return asyncio.run(run())
+
+    def start(self):
+        self.call(self._build())
+        self.call(self.server.start())
+
+    def stop(self):
+        self.call(self.server.stop(), timeout=30)
+
+    def close(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+
+@pytest.fixture(scope="session")
+def opcua_server():
+    """In-process OPC UA server shared by the whole test session."""
+    server = OpcuaTestServer()
+    server.start()
+    yield server
+    server.stop()
+    server.close()
+
+
+@pytest.fixture
+def opcua_route_client(monkeypatch, tmp_path, opcua_server):
+    """Test client for the OPC UA routes, on its own session pool.
+
+    The config store is replaced by `client.sections` (an "opcua" section for
+    `opcua_server` and no nodes), which tests may edit and routes update;
+    `client.pool` is the pool the routes use, stopped afterwards.
+    """
+    from app.routes import opcua as opcua_routes
+    from app.services import config_store
+    from app.services.opcua_pool import OpcuaSessionPool
+
+    sections = {
+        "opcua": {"endpoint": opcua_server.endpoint, "connect_timeout": "10s"},
+        "nodes": [],
+    }
+
+    def update_section(section, data):
+        if section == "nodes":
+            sections["nodes"] = data
+        else:
+            sections.setdefault(section, {}).update(data)
+
+    pool = OpcuaSessionPool()
+    monkeypatch.setattr(config_store, "load", lambda: copy.deepcopy(sections))
+    monkeypatch.setattr(
+        config_store, "get_section", lambda s: copy.deepcopy(sections.get(s, {}))
+    )
+    monkeypatch.setattr(config_store, "update_section", update_section)
+    monkeypatch.setattr(opcua_routes, "opcua_pool", pool)
+    app = Flask(__name__)
+    app.config["DATA_DIR"] = str(tmp_path)
+    app.register_blueprint(opcua_routes.opcua_bp)
+    client = app.test_client()
+    client.sections = sections
+    client.pool = pool
+    yield client
+    pool.stop()
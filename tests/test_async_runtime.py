@@ -0,0 +1,168 @@
+"""Tests for the shared async runtime.
+
+Every OPC UA route blocks a request thread on this loop, so a call must come
+back with its result or exception, give up (and cancel the coroutine on the
+loop) on timeout or when the HTTP client goes away, and leave a latency
+sample per operation. The route test checks test-connection runs on it
+against the in-process OPC UA server.
+"""
+
+import asyncio
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from flask import Flask
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from app.routes import opcua as opcua_routes
+from app.routes.opcua import opcua_bp
+from app.services import config_store, metrics_exporter, opcua_limits
+from app.services.async_runtime import (
+    AsyncRuntime,
+    OperationCancelled,
+    client_disconnected,
+)
+from app.services.opcua_client import fetch_node_value
+from app.services.opcua_pool import OpcuaSessionPool
+
+
+@pytest.fixture
+def runtime():
+    runtime = AsyncRuntime("test-runtime")
+    yield runtime
+    runtime.stop()
+
+
+def _latency_count(operation, result):
+    for suffix, labels, value in metrics_exporter.ASYNC_OPERATION_LATENCY.samples():
+        if suffix == "_count" and labels == {"operation": operation, "result": result}:
+            return value
+    return 0
+
+
+class TestRun:
+    def test_result_and_exception(self, runtime):
+        async def double(x):
+            await asyncio.sleep(0)
+            return threading.current_thread().name, x * 2
+
+        async def fail():
+            raise ValueError("bad node")
+
+        assert runtime.run(double(21)) == ("test-runtime", 42)
+        with pytest.raises(ValueError, match="bad node"):
+            runtime.run(fail())
+
+    def test_calls_from_many_threads_share_one_loop(self, runtime):
+        async def current_loop():
+            return asyncio.get_running_loop()
+
+        loops = []
+        threads = [
+            threading.Thread(target=lambda: loops.append(runtime.run(current_loop())))
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(loops) == 8
+        assert set(loops) == {runtime.loop}
+
+    def test_timeout_cancels_the_coroutine(self, runtime):
+        cancelled = threading.Event()
+
+        async def hang():
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        with pytest.raises(TimeoutError):
+            runtime.run(hang(), timeout=0.1)
+        assert cancelled.wait(2)
+
+    def test_timeout_raised_by_the_coroutine_propagates_at_once(self, runtime):
+        async def connect():
+            raise asyncio.TimeoutError("connect timed out")
+
+        started = time.monotonic()
+        with pytest.raises(TimeoutError, match="connect timed out"):
+            runtime.run(connect(), timeout=3)
+        assert time.monotonic() - started < 0.5
+
+    def test_cancelled_callable_stops_the_wait(self, runtime):
+        gone = threading.Event()
+        threading.Timer(0.1, gone.set).start()
+        with pytest.raises(OperationCancelled):
+            runtime.run(asyncio.sleep(60), timeout=None, cancelled=gone.is_set)
+
+    def test_latency_per_operation(self, runtime):
+        before = _latency_count("probe", "ok"), _latency_count("probe", "timeout")
+        runtime.run(asyncio.sleep(0), operation="probe")
+        with pytest.raises(TimeoutError):
+            runtime.run(asyncio.sleep(60), timeout=0.05, operation="probe")
+        runtime.run(asyncio.sleep(0))  # unnamed calls are not recorded
+        after = _latency_count("probe", "ok"), _latency_count("probe", "timeout")
+        assert (after[0] - before[0], after[1] - before[1]) == (1, 1)
+        stats = runtime.get_stats()
+        assert list(stats) == ["probe"]
+        assert (stats["probe"]["calls"], stats["probe"]["timeout"]) == (2, 1)
+
+    def test_stop_and_restart(self, runtime):
+        first = runtime.loop
+        runtime.stop()
+        assert not runtime.is_running()
+        assert runtime.run(asyncio.sleep(0, "again")) == "again"
+        assert runtime.loop is not first
+
+
+class TestClientDisconnected:
+    def test_detects_closed_peer(self):
+        server, client = socket.socketpair()
+        try:
+            check = client_disconnected({"werkzeug.socket": server})
+            assert check() is False
+            client.sendall(b"x")  # pending data is not a disconnect
+            assert check() is False
+            client.close()
+            server.recv(1)
+            assert check() is True
+        finally:
+            server.close()
+
+    def test_without_socket_never_cancels(self):
+        assert client_disconnected({})() is False
+
+
+class TestSharedLoop:
+    def test_pool_runs_on_the_given_runtime(self, runtime, opcua_server):
+        pool = OpcuaSessionPool(runtime=runtime)
+        config = {"endpoint": opcua_server.endpoint, "connect_timeout": "10s"}
+        try:
+            assert pool.run(config, fetch_node_value, "i=2259")["value"] is not None
+            assert pool._loop is runtime.loop
+            assert runtime.get_stats()["fetch_node_value"]["ok"] == 1
+        finally:
+            pool.stop()
+        # The pool does not own the runtime, so it keeps running
+        assert runtime.is_running()
+        assert pool.get_stats()["sessions"] == 0
+
+    def test_test_connection_route(self, runtime, monkeypatch, tmp_path, opcua_server):
+        monkeypatch.setattr(opcua_routes, "async_runtime", runtime)
+        monkeypatch.setattr(config_store, "get_section", lambda s: {})
+        monkeypatch.setattr(opcua_limits, "save", lambda endpoint, limits: None)
+        app = Flask(__name__)
+        app.config["DATA_DIR"] = str(tmp_path)
+        app.register_blueprint(opcua_bp)
+        resp = app.test_client().post(
+            "/api/opcua/test-connection", json={"endpoint": opcua_server.endpoint}
+        )
+        assert resp.get_json()["ok"] is True
+        assert runtime.get_stats()["test_connection"]["ok"] == 1
@@ -0,0 +1,162 @@
+"""Tests for the OPC UA browse cache.
+
+Repeated expands and clicks in the browser must be answered from memory, but
+never with a stale tree: entries expire, stay within their memory budget and
+are dropped when the server reports a model change or the user refreshes.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from asyncua import ua
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from app.routes import opcua as opcua_routes
+from app.services import metrics_exporter
+from app.services.browse_cache import BrowseCache
+
+_SERVER = ("opc.tcp://plc:4840",)
+
+
+class TestBrowseCache:
+    def test_hit_after_put(self):
+        cache = BrowseCache()
+        assert cache.get(_SERVER, "browse", "i=85") is None
+        etag = cache.put(_SERVER, "browse", "i=85", [{"node_id": "ns=2;i=1"}])
+        assert cache.get(_SERVER, "browse", "i=85") == ([{"node_id": "ns=2;i=1"}], etag)
+        stats = cache.get_stats()
+        assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+
+    def test_etag_follows_content(self):
+        cache = BrowseCache()
+        first = cache.put(_SERVER, "browse", "i=85", [1, 2])
+        assert cache.put(_SERVER, "browse", "i=85", [1, 2]) == first
+        assert cache.put(_SERVER, "browse", "i=85", [1, 3]) != first
+
+    def test_ttl(self):
+        cache = BrowseCache(ttl=0)
+        cache.put(_SERVER, "details", "ns=2;i=3", {"a": 1})
+        time.sleep(0.01)
+        assert cache.get(_SERVER, "details", "ns=2;i=3") is None
+        assert cache.get_stats()["entries"] == 0
+
+    def test_memory_cap_evicts_least_recently_used(self):
+        cache = BrowseCache(max_bytes=100)
+        for node in ("a", "b", "c"):
+            cache.put(_SERVER, "browse", node, "x" * 30)  # 32 bytes as JSON
+        cache.get(_SERVER, "browse", "a")  # a is now the most recent
+        cache.put(_SERVER, "browse", "d", "x" * 30)
+        assert cache.get(_SERVER, "browse", "b") is None
+        assert cache.get(_SERVER, "browse", "a") is not None
+        stats = cache.get_stats()
+        assert stats["bytes"] <= 100
+        assert stats["evictions"] == 1
+
+    def test_oversized_value_not_cached(self):
+        cache = BrowseCache(max_bytes=10)
+        cache.put(_SERVER, "browse", "a", "x" * 100)
+        assert cache.get_stats()["entries"] == 0
+
+    def test_invalidate_one_server(self):
+        cache = BrowseCache()
+        other = ("opc.tcp://other:4840",)
+        cache.put(_SERVER, "browse", "i=85", [])
+        cache.put(other, "browse", "i=85", [])
+        assert cache.invalidate(_SERVER) == 1
+        assert cache.get(_SERVER, "browse", "i=85") is None
+        assert cache.get(other, "browse", "i=85") is not None
+
+
+# ---------------------------------------------------------------------------
+# Routes against the in-process server
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture
+def client(monkeypatch, opcua_route_client):
+    cache = BrowseCache()
+    monkeypatch.setattr(opcua_routes, "browse_cache", cache)
+    metrics_exporter.OPCUA_BROWSE_CACHE.clear()
+    opcua_route_client.cache = cache
+    return opcua_route_client
+
+
+def _browse(client, node_id, **headers):
+    return client.get(f"/api/opcua/browse?node_id={node_id}", headers=headers)
+
+
+class TestCachedRoutes:
+    def test_second_expand_is_a_hit(self, client, opcua_server):
+        first = _browse(client, opcua_server.nodes["Plant"])
+        second = _browse(client, opcua_server.nodes["Plant"])
+        assert first.headers["X-Cache"] == "MISS"
+        assert second.headers["X-Cache"] == "HIT"
+        assert first.get_json() == second.get_json()
+        assert metrics_exporter.OPCUA_BROWSE_CACHE.get(kind="browse", result="hit") == 1
+
+    def test_etag_revalidation(self, client, opcua_server):
+        first = _browse(client, opcua_server.nodes["Line1"])
+        etag = first.headers["ETag"]
+        again = _browse(client, opcua_server.nodes["Line1"], **{"If-None-Match": etag})
+        assert again.status_code == 304
+        assert again.data == b""
+
+    def test_first_page_is_cached(self, client, opcua_server):
+        url = f"/api/opcua/browse?node_id={opcua_server.nodes['Bulk']}&limit=200"
+        first = client.get(url)
+        second = client.get(url)
+        assert (first.headers["X-Cache"], second.headers["X-Cache"]) == ("MISS", "HIT")
+        assert first.get_json() == second.get_json()
+        assert metrics_exporter.OPCUA_BROWSE_CACHE.get(kind="page", result="hit") == 1
+        again = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+        assert again.status_code == 304
+        # Another page size is another entry; later pages are not cached
+        assert client.get(url[:-3] + "100").headers["X-Cache"] == "MISS"
+        cursor = first.get_json()["next_cursor"]
+        assert "X-Cache" not in client.get(f"{url}&cursor={cursor}").headers
+
+    def test_details_are_cached(self, client, opcua_server):
+        url = f"/api/opcua/node-details?node_id={opcua_server.nodes['Line2.Speed']}"
+        assert client.get(url).headers["X-Cache"] == "MISS"
+        resp = client.get(url)
+        assert resp.headers["X-Cache"] == "HIT"
+        assert resp.get_json()["display_name"] == "Speed"
+
+    def test_manual_refresh(self, client, opcua_server):
+        node = opcua_server.nodes["Plant"]
+        _browse(client, node)
+        resp = client.get(f"/api/opcua/browse?node_id={node}&refresh=1")
+        assert resp.headers["X-Cache"] == "MISS"
+
+    def test_model_change_event_invalidates(self, client, opcua_server):
+        node = opcua_server.nodes["Plant"]
+        _browse(client, node)
+        assert client.cache.get_stats()["entries"] == 1
+
+        async def trigger():
+            server = opcua_server.server
+            gen = await server.get_event_generator(
+                ua.ObjectIds.GeneralModelChangeEventType, server.nodes.server
+            )
+            await gen.trigger(message="Plant changed")
+
+        opcua_server.call(trigger())
+        deadline = time.monotonic() + 5
+        while client.cache.get_stats()["entries"] and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert client.cache.get_stats()["entries"] == 0
+        assert _browse(client, node).headers["X-Cache"] == "MISS"
+
+    def test_errors_are_not_cached(self, client):
+        resp = _browse(client, "ns=2;s=DoesNotExist")
+        assert resp.status_code == 500
+        assert client.cache.get_stats()["entries"] == 0
+
+    def test_stats_endpoint(self, client, opcua_server):
+        _browse(client, opcua_server.nodes["Plant"])
+        _browse(client, opcua_server.nodes["Plant"])
+        stats = client.get("/api/opcua/browse-cache").get_json()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
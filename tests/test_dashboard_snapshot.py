@@ -0,0 +1,188 @@
+"""Tests for the aggregated dashboard snapshot.
+
+The dashboard renders from a single /api/dashboard/snapshot response. A section
+that hangs (e.g. a stuck Docker call) must not delay or break the others, and
+disabled inputs must still show zeroed counters instead of stale values.
+"""
+
+import copy
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from app.config import DEFAULT_CONFIG
+from app.services import config_store, dashboard_snapshot, event_log
+
+# ---------------------------------------------------------------------------
+# gather()
+# ---------------------------------------------------------------------------
+
+
+class TestGather:
+    def test_collects_all_results(self):
+        results, latency, errors = dashboard_snapshot.gather(
+            {"a": lambda: 1, "b": lambda: {"x": 2}}
+        )
+        assert results == {"a": 1, "b": {"x": 2}}
+        assert errors == {}
+        assert set(latency) == {"a", "b"}
+
+    def test_slow_source_times_out_without_blocking_others(self):
+        def slow():
+            time.sleep(1.0)
+            return "late"
+
+        t0 = time.monotonic()
+        results, latency, errors = dashboard_snapshot.gather(
+            {"slow": slow, "fast": lambda: "ok"}, timeouts={"slow": 0.1}
+        )
+        elapsed = time.monotonic() - t0
+
+        assert elapsed < 0.8
+        assert results["slow"] is None
+        assert errors["slow"] == "timeout"
+        assert results["fast"] == "ok"
+        assert latency["slow"] >= 100
+
+    def test_sources_run_concurrently(self):
+        sources = {f"s{i}": (lambda: time.sleep(0.2) or True) for i in range(4)}
+        t0 = time.monotonic()
+        results, _, errors = dashboard_snapshot.gather(sources)
+        assert time.monotonic() - t0 < 0.6
+        assert all(results.values())
+        assert errors == {}
+
+    def test_exception_reported_per_source(self):
+        def boom():
+            raise RuntimeError("docker unavailable")
+
+        results, _, errors = dashboard_snapshot.gather({"bad": boom, "ok": lambda: 1})
+        assert results["bad"] is None
+        assert errors["bad"] == "docker unavailable"
+        assert results["ok"] == 1
+
+
+# ---------------------------------------------------------------------------
+# get_dashboard_metrics()
+# ---------------------------------------------------------------------------
+
+
+def _fake_metrics(**overrides):
+    metrics = {
+        "opcua_gathered": 10,
+        "opcua_scan_time_ms": 5,
+        "opcua_errors": 1,
+        "opcua_read_success": 9,
+        "opcua_read_error": 1,
+        "modbus_gathered": 4,
+        "modbus_scan_time_ms": 3,
+        "modbus_errors": 2,
+        "process_crash_detected": False,
+    }
+    metrics.update(overrides)
+    return metrics
+
+
+class TestDashboardMetrics:
+    def test_disabled_inputs_are_zeroed(self, monkeypatch):
+        monkeypatch.setattr(dashboard_snapshot, "get_telegraf_metrics", _fake_metrics)
+        cfg = copy.deepcopy(DEFAULT_CONFIG)
+        cfg["opcua"]["enabled"] = False
+        cfg["modbus"]["enabled"] = False
+
+        m = dashboard_snapshot.get_dashboard_metrics(cfg)
+
+        assert m["opcua_gathered"] == 0
+        assert m["opcua_read_error"] == 0
+        assert m["modbus_gathered"] == 0
+        assert m["modbus_errors"] == 0
+        assert m["any_input_active"] is False
+
+    def test_nodes_configured_and_crash_flag(self, monkeypatch):
+        monkeypatch.setattr(
+            dashboard_snapshot,
+            "get_telegraf_metrics",
+            lambda: _fake_metrics(process_crash_detected=True),
+        )
+        event_log.clear()
+        cfg = copy.deepcopy(DEFAULT_CONFIG)
+        cfg["nodes"] = [{"name": "a"}, {"name": "b"}]
+
+        m = dashboard_snapshot.get_dashboard_metrics(cfg)
+
+        assert m["nodes_configured"] == 2
+        assert m["process_crashed"] is True
+        assert "process_crash_detected" not in m
+        assert event_log.get_events()[-1]["level"] == "error"
+
+
+# ---------------------------------------------------------------------------
+# get_snapshot()
+# ---------------------------------------------------------------------------
+
+
+class TestSnapshot:
+    def _stub_sources(self, monkeypatch):
+        monkeypatch.setattr(dashboard_snapshot, "get_system_health", lambda: {"h": 1})
+        monkeypatch.setattr(
+            dashboard_snapshot, "get_telegraf_status", lambda: {"ok": True}
+        )
+        monkeypatch.setattr(dashboard_snapshot, "get_telegraf_metrics", _fake_metrics)
+        monkeypatch.setattr(
+            dashboard_snapshot,
+            "get_telegraf_container_running",
+            lambda: {"ok": True, "running": True},
+        )
+
+    def test_all_sections_present(self, app_ctx, monkeypatch):
+        self._stub_sources(monkeypatch)
+        monkeypatch.setattr(
+            dashboard_snapshot,
+            "get_gateway_info",
+            lambda config: {"nodes_configured": len(config["nodes"])},
+        )
+        with open(app_ctx / "config.json", "w") as f:
+            json.dump(copy.deepcopy(DEFAULT_CONFIG), f)
+
+        snap = dashboard_snapshot.get_snapshot()
+
+        for section in (
+            "health",
+            "telegraf_status",
+            "telegraf_metrics",
+            "gateway_info",
+            "telegraf_running",
+            "events",
+        ):
+            assert snap[section] is not None, section
+        assert snap["errors"] == {}
+        assert set(snap["latency_ms"]) >= {"health", "gateway_info"}
+
+    def test_config_loaded_once(self, app_ctx, monkeypatch):
+        self._stub_sources(monkeypatch)
+        monkeypatch.setattr(dashboard_snapshot, "get_gateway_info", lambda config: {})
+        calls = []
+        real_load = config_store.load
+        monkeypatch.setattr(
+            config_store, "load", lambda: calls.append(1) or real_load()
+        )
+
+        dashboard_snapshot.get_snapshot()
+
+        assert len(calls) == 1
+
+    def test_failing_section_is_isolated(self, app_ctx, monkeypatch):
+        self._stub_sources(monkeypatch)
+
+        def broken(config):
+            raise RuntimeError("docker socket missing")
+
+        monkeypatch.setattr(dashboard_snapshot, "get_gateway_info", broken)
+
+        snap = dashboard_snapshot.get_snapshot()
+
+        assert snap["gateway_info"] is None
+        assert "docker socket missing" in snap["errors"]["gateway_info"]
+        assert snap["health"] == {"h": 1}
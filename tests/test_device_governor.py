@@ -0,0 +1,263 @@
+"""Tests for the device governor.
+
+The governor is all that stands between a room full of browser tabs and a
+PLC's small request budget, so its limits are checked under concurrent load:
+never more requests in flight or per second than allowed, interactive
+requests ahead of background ones, identical requests sent once, and no slot
+leaked when callers give up. The Modbus route test checks a device that
+accepts the connection but never answers is reported after the probe's socket
+timeout, not the runtime's default.
+"""
+
+import asyncio
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+from flask import Flask
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from app.routes import modbus as modbus_routes
+from app.routes.modbus import modbus_bp
+from app.services import config_store, metrics_exporter
+from app.services.async_runtime import AsyncRuntime
+from app.services.device_governor import BACKGROUND, INTERACTIVE, DeviceGovernor
+from app.services.opcua_client import fetch_children
+from app.services.opcua_pool import OpcuaSessionPool
+
+_EP = "opc.tcp://plc:4840"
+
+
+@pytest.fixture
+def runtime():
+    runtime = AsyncRuntime("test-governor")
+    yield runtime
+    runtime.stop()
+
+
+class _Probe:
+    """A fake device request that records how many run at once."""
+
+    def __init__(self, seconds=0.01):
+        self.seconds = seconds
+        self.running = 0
+        self.peak = 0
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(self.seconds)
+            return self.calls
+        finally:
+            self.running -= 1
+
+
+def _hammer(runtime, governor, fn, callers, **kw):
+    with ThreadPoolExecutor(callers) as pool:
+        futures = [
+            pool.submit(runtime.run, governor.call(_EP, fn, **kw), 10)
+            for _ in range(callers)
+        ]
+        return [f.result() for f in futures]
+
+
+class TestLimits:
+    def test_concurrency_under_load(self, runtime):
+        governor = DeviceGovernor(concurrency=3, rate=0)
+        probe = _Probe()
+        _hammer(runtime, governor, probe, 60)
+        assert probe.calls == 60
+        assert probe.peak == 3
+        stats = governor.get_stats()[_EP]
+        assert (stats["requests"], stats["in_flight"], stats["queued"]) == (60, 0, 0)
+        assert metrics_exporter.DEVICE_QUEUE_DEPTH.get(endpoint=_EP) == 0
+
+    def test_rate(self, runtime):
+        governor = DeviceGovernor(concurrency=10, rate=50, burst=1)
+        started = time.monotonic()
+        _hammer(runtime, governor, _Probe(0), 11)
+        # One token up front, then one every 20 ms
+        assert time.monotonic() - started >= 0.19
+
+    def test_interactive_before_background(self, runtime):
+        governor = DeviceGovernor(concurrency=1, rate=0)
+        order = []
+
+        async def scenario():
+            release = asyncio.Event()
+
+            async def hold():
+                await release.wait()
+
+            async def request(name, priority):
+                async with governor.slot(_EP, priority):
+                    order.append(name)
+
+            holder = asyncio.ensure_future(governor.call(_EP, hold))
+            await asyncio.sleep(0)
+            waiters = [
+                asyncio.ensure_future(request("crawl-1", BACKGROUND)),
+                asyncio.ensure_future(request("crawl-2", BACKGROUND)),
+            ]
+            await asyncio.sleep(0)
+            waiters.append(asyncio.ensure_future(request("click", INTERACTIVE)))
+            await asyncio.sleep(0)
+            release.set()
+            await asyncio.gather(holder, *waiters)
+
+        runtime.run(scenario())
+        assert order == ["click", "crawl-1", "crawl-2"]
+
+
+class TestSingleflight:
+    def test_identical_requests_are_sent_once(self, runtime):
+        governor = DeviceGovernor(rate=0)
+        probe = _Probe(0.2)
+        results = _hammer(runtime, governor, probe, 10, key="browse:Line1")
+        assert probe.calls == 1
+        assert results == [1] * 10
+        assert governor.get_stats()[_EP]["coalesced"] == 9
+        # Once it has landed, the next call is sent again
+        runtime.run(governor.call(_EP, probe, key="browse:Line1"))
+        assert probe.calls == 2
+
+    def test_errors_reach_every_caller(self, runtime):
+        governor = DeviceGovernor(rate=0)
+
+        async def fail():
+            await asyncio.sleep(0.1)
+            raise ConnectionError("PLC gone")
+
+        with ThreadPoolExecutor(4) as pool:
+            futures = [
+                pool.submit(runtime.run, governor.call(_EP, fail, key="k"), 5)
+                for _ in range(4)
+            ]
+            for f in futures:
+                with pytest.raises(ConnectionError):
+                    f.result()
+
+
+class TestCancellation:
+    def test_cancelled_waiters_free_their_place(self, runtime):
+        governor = DeviceGovernor(concurrency=1, rate=0)
+        gate = threading.Event()
+
+        async def block():
+            await asyncio.get_running_loop().run_in_executor(None, gate.wait, 5)
+
+        holder = runtime.submit(governor.call(_EP, block))
+        with pytest.raises(TimeoutError):
+            runtime.run(governor.call(_EP, _Probe()), timeout=0.1)
+        gate.set()
+        holder.result(5)
+        probe = _Probe()
+        runtime.run(governor.call(_EP, probe), timeout=2)
+        assert probe.calls == 1
+        assert governor.get_stats()[_EP]["in_flight"] == 0
+
+    def test_shared_call_stops_when_every_caller_left(self, runtime):
+        governor = DeviceGovernor(rate=0)
+        stopped = threading.Event()
+
+        async def slow():
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                stopped.set()
+                raise
+
+        for _ in range(2):
+            with pytest.raises(TimeoutError):
+                runtime.run(governor.call(_EP, slow, key="k"), timeout=0.05)
+        assert stopped.wait(2)
+
+
+class TestPool:
+    def test_tabs_expanding_one_folder_browse_once(self, opcua_server):
+        governor = DeviceGovernor(concurrency=1, rate=0)
+        pool = OpcuaSessionPool(governor=governor)
+        config = {"endpoint": opcua_server.endpoint, "connect_timeout": "10s"}
+        folder = opcua_server.nodes["Line1"]
+
+        async def busy(client):
+            await asyncio.sleep(0.3)
+
+        try:
+            pool.run(config, fetch_children, folder)  # connect first
+            busy_call = threading.Thread(target=pool.run, args=(config, busy))
+            busy_call.start()
+            time.sleep(0.05)
+            with ThreadPoolExecutor(10) as tabs:
+                results = list(
+                    tabs.map(
+                        lambda _: pool.run(
+                            config, fetch_children, folder, coalesce=True
+                        ),
+                        range(10),
+                    )
+                )
+            busy_call.join()
+        finally:
+            pool.stop()
+        assert all(r == results[0] for r in results)
+        stats = governor.get_stats()[opcua_server.endpoint]
+        # The first browse, the busy call and one browse for all ten tabs
+        assert (stats["requests"], stats["coalesced"]) == (3, 9)
+
+
+class TestModbusRoute:
+    def test_silent_device_answers_after_the_socket_timeout(self, monkeypatch):
+        monkeypatch.setattr(config_store, "get_section", lambda s: {})
+        # Accepts the TCP connection but never answers the Modbus request
+        listener = socket.create_server(("127.0.0.1", 0))
+        port = listener.getsockname()[1]
+        app = Flask(__name__)
+        app.register_blueprint(modbus_bp)
+        try:
+            started = time.monotonic()
+            resp = app.test_client().post(
+                "/api/modbus/test-connection",
+                json={"controller": f"127.0.0.1:{port}", "slave_id": 1},
+            )
+            elapsed = time.monotonic() - started
+        finally:
+            listener.close()
+        assert resp.get_json() == {
+            "ok": False,
+            "error": f"Timeout connecting to 127.0.0.1:{port}",
+        }
+        assert 4.5 < elapsed < 6.5
+
+    def test_slow_connect_and_silent_reply_share_one_deadline(self, monkeypatch):
+        monkeypatch.setattr(config_store, "get_section", lambda s: {})
+        monkeypatch.setattr(modbus_routes, "_PROBE_SOCKET_TIMEOUT", 1)
+        connect = socket.create_connection
+
+        def slow_connect(address, timeout):
+            time.sleep(0.8)
+            return connect(address, timeout)
+
+        monkeypatch.setattr(modbus_routes.socket, "create_connection", slow_connect)
+        listener = socket.create_server(("127.0.0.1", 0))
+        port = listener.getsockname()[1]
+        app = Flask(__name__)
+        app.register_blueprint(modbus_bp)
+        try:
+            started = time.monotonic()
+            resp = app.test_client().post(
+                "/api/modbus/test-connection",
+                json={"controller": f"127.0.0.1:{port}", "slave_id": 1},
+            )
+            elapsed = time.monotonic() - started
+        finally:
+            listener.close()
+        assert resp.get_json()["error"] == f"Timeout connecting to 127.0.0.1:{port}"
+        assert 0.9 < elapsed < 1.5
@@ -0,0 +1,393 @@
+"""Tests for docker_events.ContainerEventWatcher.
+
+The watcher replaces per-poll container listing and StartedAt comparisons.
+A missed or misattributed event shows a wrong container status on the dashboard
+or records a deploy as an "unplanned" restart. Docker is replaced by a fake
+client whose event stream is a finite list.
+"""
+
+import copy
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from app.config import DEFAULT_CONFIG
+from app.services import docker_events, event_log, system_monitor
+from app.services.docker_events import ContainerEventWatcher, _format_event_time
+
+_PROJECT = "iiot"
+_TS = 1772879400  # 2026-03-07T10:30:00Z
+
+# ---------------------------------------------------------------------------
+# Fake Docker client
+# ---------------------------------------------------------------------------
+
+
+class FakeContainer:
+    def __init__(
+        self, cid, service, status="running", started_at=None, project=_PROJECT
+    ):
+        self.id = cid
+        self.short_id = cid[:10]
+        self.name = f"{project}-{service}-1"
+        self.labels = {
+            "com.docker.compose.project": project,
+            "com.docker.compose.service": service,
+        }
+        self.status = status
+        self.attrs = {"State": {"StartedAt": started_at}}
+
+    def reload(self):
+        pass
+
+
+class FakeContainers:
+    def __init__(self, containers):
+        self._by_id = {c.id: c for c in containers}
+
+    def list(self, all=False, filters=None):
+        return list(self._by_id.values())
+
+    def get(self, cid):
+        return self._by_id[cid]
+
+
+class FakeClient:
+    def __init__(self, containers, events):
+        self.containers = FakeContainers(containers)
+        self._events = events
+        self.events_kwargs = None
+
+    def events(self, **kwargs):
+        self.events_kwargs = kwargs
+        return iter(self._events)
+
+
+def _event(action, container, ts=_TS):
+    return {
+        "Type": "container",
+        "Action": action,
+        "Actor": {
+            "ID": container.id,
+            "Attributes": {**container.labels, "name": container.name},
+        },
+        "time": ts,
+        "timeNano": ts * 1_000_000_000 + 123_456_789,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Fixtures
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture
+def config_file(app_ctx):
+    cfg = copy.deepcopy(DEFAULT_CONFIG)
+    (app_ctx / "config.json").write_text(json.dumps(cfg))
+    return app_ctx / "config.json"
+
+
+@pytest.fixture(autouse=True)
+def _isolate(monkeypatch):
+    monkeypatch.setattr(system_monitor, "_intentional_restart_pending", False)
+    event_log.clear()
+    yield
+    event_log.clear()
+
+
+def _last_restart(config_file):
+    return json.loads(config_file.read_text())["_meta"].get("last_restart")
+
+
+# ---------------------------------------------------------------------------
+# Snapshot and container state
+# ---------------------------------------------------------------------------
+
+
+class TestSnapshot:
+    def test_snapshot_lists_project_containers(self, config_file):
+        telegraf = FakeContainer(
+            "t" * 12, "telegraf", started_at="2026-03-07T10:00:00Z"
+        )
+        other = FakeContainer("o" * 12, "telegraf", project="someone-else")
+        gateway = FakeContainer("g" * 12, "gateway")
+        mosquitto = FakeContainer("m" * 12, "mosquitto")
+        client = FakeClient([telegraf, gateway, mosquitto, other], [])
+        watcher = ContainerEventWatcher()
+        watcher._watch(client)
+
+        services = sorted(c["service"] for c in watcher.get_containers())
+        assert services == ["gateway", "mosquitto", "telegraf"]
+        assert watcher.get_service("telegraf")["started_at"] == "2026-03-07T10:00:00Z"
+        assert client.events_kwargs["filters"]["label"] == (
+            f"com.docker.compose.project={_PROJECT}"
+        )
+
+    def test_restart_while_gateway_down_recorded_as_unplanned(self, config_file):
+        cfg = json.loads(config_file.read_text())
+        cfg["_meta"]["last_restart"] = {
+            "started_at": "2026-03-07T09:00:00Z",
+            "reason": "deploy",
+        }
+        config_file.write_text(json.dumps(cfg))
+        telegraf = FakeContainer(
+            "t" * 12, "telegraf", started_at="2026-03-07T10:00:00Z"
+        )
+        ContainerEventWatcher()._watch(FakeClient([telegraf], []))
+
+        assert _last_restart(config_file) == {
+            "started_at": "2026-03-07T10:00:00Z",
+            "reason": "unplanned",
+        }
+
+    def test_same_start_as_recorded_not_flagged(self, config_file):
+        cfg = json.loads(config_file.read_text())
+        cfg["_meta"]["last_restart"] = {
+            "started_at": "2026-03-07T10:00:00.5Z",
+            "reason": "deploy",
+        }
+        config_file.write_text(json.dumps(cfg))
+        telegraf = FakeContainer(
+            "t" * 12, "telegraf", started_at="2026-03-07T10:00:00.9Z"
+        )
+        ContainerEventWatcher()._watch(FakeClient([telegraf], []))
+
+        assert _last_restart(config_file)["reason"] == "deploy"
+
+
+class TestStatusEvents:
+    def _run(self, containers, events):
+        watcher = ContainerEventWatcher()
+        watcher._watch(FakeClient(containers, events))
+        return watcher
+
+    def test_die_marks_exited(self, config_file):
+        mosq = FakeContainer("m" * 12, "mosquitto")
+        watcher = self._run([mosq], [_event("die", mosq)])
+        assert watcher.get_service("mosquitto")["status"] == "exited"
+
+    def test_pause_and_unpause(self, config_file):
+        mosq = FakeContainer("m" * 12, "mosquitto")
+        watcher = self._run([mosq], [_event("pause", mosq)])
+        assert watcher.get_service("mosquitto")["status"] == "paused"
+        watcher = self._run([mosq], [_event("pause", mosq), _event("unpause", mosq)])
+        assert watcher.get_service("mosquitto")["status"] == "running"
+
+    def test_health_status_event(self, config_file):
+        mosq = FakeContainer("m" * 12, "mosquitto")
+        watcher = self._run([mosq], [_event("health_status: unhealthy", mosq)])
+        entry = watcher.get_service("mosquitto")
+        assert entry["health"] == "unhealthy"
+        assert entry["status"] == "running"
+
+    def test_new_container_created_from_event_attributes(self, config_file):
+        opcua = FakeContainer("x" * 12, "opcua-demo-server", status="created")
+        watcher = self._run([], [_event("create", opcua), _event("start", opcua)])
+        entry = watcher.get_service("opcua-demo-server")
+        assert entry["status"] == "running"
+        assert entry["name"] == opcua.name
+
+    def test_destroy_removes_container(self, config_file):
+        mosq = FakeContainer("m" * 12, "mosquitto")
+        watcher = self._run([mosq], [_event("die", mosq), _event("destroy", mosq)])
+        assert watcher.get_service("mosquitto") is None
+
+    def test_non_container_events_ignored(self, config_file):
+        mosq = FakeContainer("m" * 12, "mosquitto")
+        evt = _event("die", mosq)
+        evt["Type"] = "network"
+        watcher = self._run([mosq], [evt])
+        assert watcher.get_service("mosquitto")["status"] == "running"
+
+    def test_container_status_served_from_watcher(self, config_file, monkeypatch):
+        gateway = FakeContainer("g" * 12, "gateway")
+        mosq = FakeContainer("m" * 12, "mosquitto")
+        watcher = self._run([gateway, mosq], [_event("die", mosq)])
+        monkeypatch.setattr(docker_events, "container_watcher", watcher)
+
+        result = system_monitor.get_container_status()
+        assert result == [
+            {
+                "name": "Edge UI",
+                "service": "gateway",
+                "is_demo": False,
+                "status": "running",
+            },
+            {
+                "name": "MQTT Broker Demo",
+                "service": "mosquitto",
+                "is_demo": True,
+                "status": "stopped",
+            },
+        ]
+
+
+# ---------------------------------------------------------------------------
+# Telegraf restarts
+# ---------------------------------------------------------------------------
+
+
+class TestTelegrafStart:
+    def test_unplanned_start_recorded_with_exact_timestamp(self, config_file):
+        telegraf = FakeContainer(
+            "t" * 12, "telegraf", started_at="2026-03-07T10:00:00Z"
+        )
+        client = FakeClient([telegraf], [])
+        watcher = ContainerEventWatcher()
+        watcher._watch(client)
+
+        telegraf.attrs["State"]["StartedAt"] = "2026-03-07T10:30:00.123456789Z"
+        watcher._handle_event(client, _event("die", telegraf))
+        watcher._handle_event(client, _event("start", telegraf))
+
+        assert _last_restart(config_file) == {
+            "started_at": "2026-03-07T10:30:00.123456789Z",
+            "reason": "unplanned",
+        }
+        events = event_log.get_events()
+        assert events[0]["level"] == "warning"
+        assert events[0]["component"] == "telegraf"
+
+    def test_replayed_start_not_recorded(self, config_file):
+        telegraf = FakeContainer(
+            "t" * 12, "telegraf", started_at="2026-03-07T10:30:00Z"
+        )
+        ContainerEventWatcher()._watch(
+            FakeClient([telegraf], [_event("start", telegraf, ts=_TS + 60)])
+        )
+        # Snapshot StartedAt == event StartedAt → already known, nothing recorded
+        assert _last_restart(config_file) is None
+
+    def test_intentional_start_uses_pending_reason(self, config_file):
+        telegraf = FakeContainer(
+            "t" * 12, "telegraf", started_at="2026-03-07T10:30:00Z"
+        )
+        client = FakeClient([telegraf], [])
+        watcher = ContainerEventWatcher()
+        watcher._watch(client)
+
+        system_monitor.mark_intentional_restart("manual")
+        telegraf.attrs["State"]["StartedAt"] = "2026-03-07T10:31:00Z"
+        watcher._handle_event(client, _event("start", telegraf, ts=_TS + 60))
+
+        assert _last_restart(config_file) == {
+            "started_at": "2026-03-07T10:31:00Z",
+            "reason": "manual",
+        }
+        assert event_log.get_events() == []
+
+    def test_falls_back_to_event_time_without_started_at(self, config_file):
+        telegraf = FakeContainer("t" * 12, "telegraf")
+        ContainerEventWatcher()._watch(
+            FakeClient([telegraf], [_event("start", telegraf)])
+        )
+        assert _last_restart(config_file)["started_at"] == (
+            "2026-03-07T10:30:00.123456789Z"
+        )
+
+
+class TestWaitForStart:
+    def test_returns_none_when_not_connected(self):
+        watcher = ContainerEventWatcher()
+        assert watcher.wait_for_start("telegraf", after=0, timeout=0.1) is None
+
+    def test_wakes_up_on_start_event(self, config_file):
+        telegraf = FakeContainer(
+            "t" * 12, "telegraf", started_at="2026-03-07T10:00:00Z"
+        )
+        client = FakeClient([telegraf], [])
+        watcher = ContainerEventWatcher()
+        watcher._watch(client)  # leaves the watcher connected with a snapshot
+
+        after = time.time()
+        result = {}
+
+        def waiter():
+            result["started_at"] = watcher.wait_for_start(
+                "telegraf", after=after, timeout=5
+            )
+
+        t = threading.Thread(target=waiter)
+        t.start()
+        time.sleep(0.05)
+        telegraf.attrs["State"]["StartedAt"] = "2026-03-07T10:45:00Z"
+        watcher._handle_event(client, _event("start", telegraf, ts=int(after) + 1))
+        t.join(timeout=5)
+
+        assert result["started_at"] == "2026-03-07T10:45:00Z"
+
+    def test_restart_recorded_before_waiters_wake(self, config_file, monkeypatch):
+        get_reason = system_monitor.get_intentional_restart_reason
+
+        def slow_reason():
+            time.sleep(0.1)  # gives an early-woken waiter time to move on
+            return get_reason()
+
+        monkeypatch.setattr(
+            system_monitor, "get_intentional_restart_reason", slow_reason
+        )
+        telegraf = FakeContainer(
+            "t" * 12, "telegraf", started_at="2026-03-07T10:00:00Z"
+        )
+        client = FakeClient([telegraf], [])
+        watcher = ContainerEventWatcher()
+        watcher._watch(client)
+
+        after = time.time()
+        seen = {}
+
+        def deploy():
+            # What the deploy route does once the start event arrives
+            watcher.wait_for_start("telegraf", after=after, timeout=5)
+            seen["last_restart"] = _last_restart(config_file)
+            system_monitor._intentional_restart_pending = False
+
+        system_monitor.mark_intentional_restart("deploy")
+        t = threading.Thread(target=deploy)
+        t.start()
+        time.sleep(0.05)
+        telegraf.attrs["State"]["StartedAt"] = "2026-03-07T10:45:00Z"
+        watcher._handle_event(client, _event("start", telegraf, ts=int(after) + 1))
+        t.join(timeout=5)
+
+        expected = {"started_at": "2026-03-07T10:45:00Z", "reason": "deploy"}
+        assert seen["last_restart"] == expected
+        assert _last_restart(config_file) == expected
+
+    def test_record_intentional_start_without_event_stream(
+        self, config_file, monkeypatch
+    ):
+        monkeypatch.setattr(docker_events, "container_watcher", ContainerEventWatcher())
+        monkeypatch.setattr(
+            docker_events, "_query_started_at", lambda service: "2026-03-07T10:50:00Z"
+        )
+        docker_events.record_intentional_start("manual", since=time.time())
+        assert _last_restart(config_file) == {
+            "started_at": "2026-03-07T10:50:00Z",
+            "reason": "manual",
+        }
+
+    def test_times_out_without_newer_start(self, config_file):
+        telegraf = FakeContainer(
+            "t" * 12, "telegraf", started_at="2026-03-07T10:00:00Z"
+        )
+        watcher = ContainerEventWatcher()
+        watcher._watch(FakeClient([telegraf], []))
+        assert (
+            watcher.wait_for_start("telegraf", after=time.time(), timeout=0.1) is None
+        )
+
+
+class TestFormatEventTime:
+    def test_nanosecond_precision(self):
+        evt = {"time": _TS, "timeNano": _TS * 1_000_000_000 + 5}
+        assert _format_event_time(evt) == "2026-03-07T10:30:00.000000005Z"
+
+    def test_seconds_only(self):
+        assert _format_event_time({"time": _TS}) == "2026-03-07T10:30:00.000000000Z"
@@ -0,0 +1,149 @@
+"""Tests for the SSE publish/subscribe bus and the dashboard change feed.
+
+A slow or stalled browser must never block producers (the MQTT callback thread,
+event_log callers), and the dashboard feed must push only what changed.
+"""
+
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from app.services import event_bus, event_log
+from app.services.dashboard_feed import DashboardFeed, diff_sections
+
+
+@pytest.fixture
+def sub():
+    s = event_bus.subscribe(["log"])
+    yield s
+    s.close()
+
+
+# ---------------------------------------------------------------------------
+# event_bus
+# ---------------------------------------------------------------------------
+
+
+class TestEventBus:
+    def test_publish_reaches_subscriber(self, sub):
+        event_bus.publish("log", {"n": 1})
+        assert sub.get(timeout=1) == ("log", {"n": 1})
+
+    def test_other_channels_not_delivered(self, sub):
+        event_bus.publish("tail", {"n": 1})
+        assert sub.get(timeout=0.05) is None
+
+    def test_get_times_out_when_idle(self, sub):
+        assert sub.get(timeout=0.05) is None
+
+    def test_close_unsubscribes_and_wakes_consumer(self):
+        s = event_bus.subscribe(["log"])
+        result = []
+        t = threading.Thread(target=lambda: result.append(s.get(timeout=5)))
+        t.start()
+        s.close()
+        t.join(timeout=1)
+        assert not t.is_alive()
+        assert result == [None]
+        assert s.closed
+        assert s not in event_bus._subscribers
+
+    def test_overflow_drops_oldest_and_requests_resync(self):
+        s = event_bus.subscribe(["log"], maxlen=3)
+        try:
+            for i in range(5):
+                event_bus.publish("log", {"n": i})
+            assert s.get(timeout=0) == ("resync", None)
+            remaining = [s.get(timeout=0)[1]["n"] for _ in range(3)]
+            assert remaining == [2, 3, 4]
+        finally:
+            s.close()
+
+    def test_publish_never_blocks_on_full_subscriber(self):
+        s = event_bus.subscribe(["log"], maxlen=1)
+        try:
+            for i in range(1000):
+                event_bus.publish("log", {"n": i})
+        finally:
+            s.close()
+
+    def test_event_log_publishes_new_entries(self, sub):
+        event_log.log("error", "opcua", "Connection failed")
+        channel, data = sub.get(timeout=1)
+        assert channel == "log"
+        assert data["event"]["message"] == "Connection failed"
+
+    def test_event_log_clear_publishes_marker(self, sub):
+        event_log.clear()
+        assert sub.get(timeout=1) == ("log", {"cleared": True})
+
+
+# ---------------------------------------------------------------------------
+# dashboard_feed
+# ---------------------------------------------------------------------------
+
+
+class TestDiffSections:
+    def test_first_sample_is_full(self):
+        new = {"health": {"cpu": 1, "ram": 2}, "telegraf_running": {"running": True}}
+        assert diff_sections({}, new) == new
+
+    def test_only_changed_fields(self):
+        old = {"health": {"cpu": 1, "ram": 2}}
+        new = {"health": {"cpu": 5, "ram": 2}}
+        assert diff_sections(old, new) == {"health": {"cpu": 5}}
+
+    def test_unchanged_is_empty(self):
+        snap = {"health": {"cpu": 1}, "gateway_info": {"containers": [{"n": "a"}]}}
+        assert diff_sections(snap, snap) == {}
+
+    def test_failed_section_is_skipped(self):
+        old = {"health": {"cpu": 1}}
+        assert diff_sections(old, {"health": None}) == {}
+
+    def test_events_and_meta_not_pushed(self):
+        new = {"events": [{"m": 1}], "errors": {}, "latency_ms": {"health": 1}}
+        assert diff_sections({}, new) == {}
+
+
+class TestDashboardFeed:
+    def test_publishes_only_changes(self):
+        samples = iter(
+            [
+                {"health": {"cpu": 1, "ram": 2}},
+                {"health": {"cpu": 1, "ram": 2}},
+                {"health": {"cpu": 3, "ram": 2}},
+            ]
+        )
+        feed = DashboardFeed(source=lambda: next(samples))
+        s = event_bus.subscribe(["dashboard"])
+        try:
+            feed.sample()
+            feed.sample()
+            feed.sample()
+            assert s.get(timeout=0) == ("dashboard", {"health": {"cpu": 1, "ram": 2}})
+            assert s.get(timeout=0) == ("dashboard", {"health": {"cpu": 3}})
+            assert s.get(timeout=0) is None
+        finally:
+            s.close()
+
+    def test_state_merges_deltas(self):
+        samples = iter(
+            [{"health": {"cpu": 1, "ram": 2}}, {"health": {"cpu": 3, "ram": 2}}]
+        )
+        feed = DashboardFeed(source=lambda: next(samples))
+        feed.sample()
+        feed.sample()
+        assert feed.get_state() == {"health": {"cpu": 3, "ram": 2}}
+
+    def test_sampler_stops_without_subscribers(self):
+        feed = DashboardFeed(interval=0.01, source=lambda: {})
+        feed.ensure_running()
+        for _ in range(200):
+            if not feed.is_running():
+                break
+            threading.Event().wait(0.01)
+        assert not feed.is_running()
@@ -0,0 +1,302 @@
+"""Tests for the /metrics OpenMetrics exposition.
+
+Monitoring scrapes this endpoint directly. A malformed line makes the scraper
+reject the whole exposition, so every family is checked against the format
+rules, not just for the presence of a few values.
+"""
+
+import math
+import re
+import sys
+from pathlib import Path
+
+import pytest
+from flask import Flask
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from app.routes import metrics as metrics_routes
+from app.routes.metrics import metrics_bp
+from app.services import config_store, metrics_exporter
+from app.services.dashboard_feed import DashboardFeed
+
+_NAME = r"[a-zA-Z_:][a-zA-Z0-9_:]*"
+_SAMPLE_RE = re.compile(
+    rf"^({_NAME})(\{{(?:[a-zA-Z_][a-zA-Z0-9_]*=\"(?:[^\"\\\n]|\\.)*\",?)*\}})? (\S+)$"
+)
+_LABEL_RE = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+_SUFFIXES = {
+    "counter": ("_total", "_created"),
+    "gauge": ("",),
+    "histogram": ("_bucket", "_count", "_sum", "_created"),
+}
+
+_STATE = {
+    "health": {
+        "cpu_percent": 12.5,
+        "memory_percent": 40.0,
+        "memory_used_mb": 512,
+        "memory_total_mb": 2048,
+        "disk_percent": 55.1,
+        "bytes_sent": 1000,
+        "bytes_recv": 2000,
+    },
+    "telegraf_status": {"running": True, "status_code": 200},
+    "telegraf_running": {"ok": True, "running": True},
+    "telegraf_metrics": {
+        "opcua_gathered": 120,
+        "opcua_scan_time_ms": 15.5,
+        "opcua_errors": 0,
+        "opcua_read_success": 118,
+        "opcua_read_error": 2,
+        "modbus_gathered": 40,
+        "modbus_scan_time_ms": 3,
+        "modbus_errors": 1,
+        "mqtt_written": 150,
+        "mqtt_dropped": 0,
+        "mqtt_buffer_size": 5,
+        "mqtt_buffer_limit": 10000,
+        "mqtt_errors": 0,
+        "output_write_times": {
+            "mqtt": {
+                "last_ms": 4.2,
+                "p50_ms": 3.8,
+                "p95_ms": 48.0,
+                "p99_ms": 48.0,
+                "samples": 29,
+            }
+        },
+        "agent_metrics_gathered": 900,
+        "agent_metrics_written": 1350,
+        "agent_metrics_dropped": 0,
+        "agent_gather_errors": 0,
+        "telegraf_heap_alloc_bytes": 10955665,
+        "telegraf_heap_in_use_bytes": 12855665,
+        "telegraf_heap_objects_bytes": 53160,
+        "telegraf_sys_bytes": 29400000,
+        "telegraf_num_gc": 59,
+        "last_updated": 1772879400,
+        "nodes_configured": 4,
+    },
+    "gateway_info": {
+        "telegraf_uptime_seconds": 3600,
+        "containers": [
+            {"service": "gateway", "status": "running"},
+            {"service": "opcua-server", "status": "stopped"},
+        ],
+    },
+}
+
+
+def _parse_value(text):
+    return {"+Inf": math.inf, "-Inf": -math.inf}.get(text) or float(text)
+
+
+def _validate(text):
+    """Check OpenMetrics structure; return {sample_name: [(labels, value)]}."""
+    assert text.endswith("# EOF\n"), "exposition must end with # EOF"
+    lines = text[: -len("# EOF\n")].splitlines()
+    families, samples, current = {}, {}, None
+    for line in lines:
+        assert line, "blank lines are not allowed"
+        if line.startswith("# TYPE "):
+            _, _, name, metric_type = line.split(" ", 3)
+            assert name not in families, f"family {name} declared twice"
+            assert metric_type in _SUFFIXES
+            families[name] = metric_type
+            current = name
+            continue
+        if line.startswith("# HELP "):
+            assert line.split(" ")[2] == current, "HELP must follow its TYPE"
+            continue
+        assert not line.startswith("#"), f"unexpected comment: {line}"
+        m = _SAMPLE_RE.match(line)
+        assert m, f"malformed sample line: {line!r}"
+        name, label_text, value = m.group(1), m.group(2) or "", m.group(3)
+        assert current and name.startswith(current), f"{name} outside its family"
+        suffix = name[len(current) :]
+        assert suffix in _SUFFIXES[families[current]], f"{name}: bad suffix"
+        labels = dict(_LABEL_RE.findall(label_text))
+        key = (name, tuple(sorted(labels.items())))
+        assert key not in {
+            (n, tuple(sorted(lbl.items()))) for n, v in samples.items() for lbl, _ in v
+        }, f"duplicate sample {key}"
+        samples.setdefault(name, []).append((labels, _parse_value(value)))
+
+    for name, metric_type in families.items():
+        if metric_type == "histogram":
+            _check_histogram(name, samples)
+        if metric_type == "counter":
+            for _, value in samples.get(f"{name}_total", []):
+                assert value >= 0
+    return samples
+
+
+def _check_histogram(name, samples):
+    series = {}
+    for labels, value in samples.get(f"{name}_bucket", []):
+        key = tuple(sorted((k, v) for k, v in labels.items() if k != "le"))
+        series.setdefault(key, []).append((_parse_value(labels["le"]), value))
+    counts = {
+        tuple(sorted(lbl.items())): v for lbl, v in samples.get(f"{name}_count", [])
+    }
+    for key, buckets in series.items():
+        bounds = [b for b, _ in buckets]
+        assert bounds == sorted(bounds) and bounds[-1] == math.inf
+        values = [v for _, v in buckets]
+        assert values == sorted(values), "buckets must be cumulative"
+        assert values[-1] == counts[key], "+Inf bucket must equal _count"
+
+
+def _value(samples, name, **labels):
+    for lbl, value in samples[name]:
+        if all(lbl.get(k) == v for k, v in labels.items()):
+            return value
+    raise AssertionError(f"{name}{labels} not found")
+
+
+@pytest.fixture(autouse=True)
+def _reset_registry():
+    for metric in metrics_exporter._REGISTRY:
+        metric.clear()
+
+
+# ---------------------------------------------------------------------------
+# render()
+# ---------------------------------------------------------------------------
+
+
+class TestRender:
+    def test_empty_state_is_valid(self):
+        samples = _validate(metrics_exporter.render())
+        assert not any(name.startswith("telegraf_") for name in samples)
+
+    def test_full_state_is_valid(self):
+        samples = _validate(metrics_exporter.render(_STATE, state_age_seconds=1.25))
+        assert _value(samples, "gateway_cpu_usage_percent") == 12.5
+        assert _value(samples, "gateway_memory_total_bytes") == 2048 * 1024 * 1024
+        assert (
+            _value(samples, "telegraf_input_metrics_gathered_total", input="opcua")
+            == 120
+        )
+        assert _value(samples, "telegraf_opcua_reads_total", result="error") == 2
+        assert (
+            _value(samples, "telegraf_input_gather_time_seconds", input="opcua")
+            == 0.0155
+        )
+        assert _value(samples, "telegraf_output_buffer_size", output="mqtt") == 5
+        assert (
+            _value(
+                samples,
+                "telegraf_output_write_time_quantile_seconds",
+                output="mqtt",
+                q="0.95",
+            )
+            == 0.048
+        )
+        assert _value(samples, "telegraf_heap_alloc_bytes") == 10955665
+        assert _value(samples, "telegraf_heap_objects") == 53160
+        assert _value(samples, "telegraf_gc_cycles_total") == 59
+        assert _value(samples, "telegraf_agent_metrics_written_total") == 1350
+        assert _value(samples, "gateway_container_running", service="opcua-server") == 0
+        assert _value(samples, "gateway_metrics_state_age_seconds") == 1.25
+
+    def test_memstats_absent(self):
+        metrics = dict(_STATE["telegraf_metrics"])
+        metrics["telegraf_heap_alloc_bytes"] = None
+        metrics["output_write_times"] = {}
+        samples = _validate(metrics_exporter.render({"telegraf_metrics": metrics}))
+        assert "telegraf_heap_alloc_bytes" not in samples
+        assert "telegraf_output_write_time_quantile_seconds" not in samples
+
+    def test_partial_state_skips_missing_sections(self):
+        samples = _validate(metrics_exporter.render({"health": _STATE["health"]}))
+        assert "gateway_cpu_usage_percent" in samples
+        assert not any(name.startswith("telegraf_") for name in samples)
+
+    def test_counters_and_histogram(self):
+        metrics_exporter.DEPLOYS.inc(result="ok")
+        metrics_exporter.DEPLOYS.inc(result="ok")
+        metrics_exporter.RESTARTS.inc(reason="unplanned")
+        for seconds in (0.001, 0.02, 0.3, 20):
+            metrics_exporter.observe_request("GET", "/api/x", 200, seconds)
+
+        samples = _validate(metrics_exporter.render())
+
+        assert _value(samples, "gateway_deploys_total", result="ok") == 2
+        assert (
+            _value(samples, "gateway_telegraf_restarts_total", reason="unplanned") == 1
+        )
+        name = "gateway_http_request_duration_seconds"
+        assert _value(samples, f"{name}_count", route="/api/x") == 4
+        assert _value(samples, f"{name}_bucket", route="/api/x", le="0.005") == 1
+        assert _value(samples, f"{name}_bucket", route="/api/x", le="+Inf") == 4
+        assert _value(samples, f"{name}_sum", route="/api/x") == pytest.approx(20.321)
+
+    def test_label_values_are_escaped(self):
+        metrics_exporter.observe_request("GET", '/a"b\\c\nd', 404, 0.01)
+        text = metrics_exporter.render()
+        _validate(text)
+        assert 'route="/a\\"b\\\\c\\nd"' in text
+
+    def test_record_restart_counts(self, app_ctx):
+        config_store.save(config_store.load())
+        config_store.record_restart("2026-03-07T10:30:00Z", "manual")
+        assert metrics_exporter.RESTARTS.get(reason="manual") == 1
+
+
+# ---------------------------------------------------------------------------
+# /metrics route and request instrumentation
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture
+def client(monkeypatch):
+    feed = DashboardFeed(interval=60, source=lambda: _STATE)
+    monkeypatch.setattr(metrics_routes, "dashboard_feed", feed)
+    app = Flask(__name__)
+    app.register_blueprint(metrics_bp)
+
+    @app.route("/api/ping/<name>")
+    def ping(name):
+        return {"ok": True}
+
+    yield app.test_client(), feed
+    feed.stop()
+
+
+class TestMetricsRoute:
+    def test_content_type_and_format(self, client):
+        c, feed = client
+        feed.sample()
+        resp = c.get("/metrics")
+        assert resp.status_code == 200
+        assert resp.content_type.startswith("application/openmetrics-text")
+        samples = _validate(resp.get_data(as_text=True))
+        assert "telegraf_health_up" in samples
+
+    def test_scrape_starts_sampler(self, client):
+        c, feed = client
+        c.get("/metrics")
+        assert feed.is_running()
+
+    def test_requests_are_timed_by_route(self, client):
+        c, _ = client
+        c.get("/api/ping/a")
+        c.get("/api/ping/b")
+        c.get("/nope")
+        samples = _validate(c.get("/metrics").get_data(as_text=True))
+        assert (
+            _value(
+                samples,
+                "gateway_http_requests_total",
+                route="/api/ping/<name>",
+                code="200",
+            )
+            == 2
+        )
+        assert (
+            _value(
+                samples, "gateway_http_requests_total", route="unmatched", code="404"
+            )
+            == 1
+        )
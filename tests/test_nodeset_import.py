@@ -0,0 +1,258 @@
+"""Tests for the NodeSet2 XML import.
+
+The import builds the tag index from an integrator's export before the live
+server is reachable, so it must index the same nodes a crawl would (Objects
+and Variables under Objects, no properties, no namespace 0, no type
+definitions), with the same browse paths, data type names and node ids.
+"""
+
+import gzip
+import io
+import sys
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from app.routes import opcua as opcua_routes
+from app.services.nodeset_import import NodesetImporter, import_nodeset
+from app.services.tag_index import TagIndex
+
+_SERVER = "opc.tcp://plc:4840"
+
+_NODESET = """<?xml version="1.0" encoding="utf-8"?>
+<UANodeSet xmlns="http://opcfoundation.org/UA/2011/03/UANodeSet.xsd">
+  <NamespaceUris>
+    <Uri>urn:plant</Uri>
+  </NamespaceUris>
+  <Aliases>
+    <Alias Alias="Double">i=11</Alias>
+    <Alias Alias="Organizes">i=35</Alias>
+    <Alias Alias="HasComponent">i=47</Alias>
+    <Alias Alias="HasProperty">i=46</Alias>
+    <Alias Alias="HasTypeDefinition">i=40</Alias>
+  </Aliases>
+  <UADataType NodeId="ns=1;i=3001" BrowseName="1:MotorState">
+    <DisplayName>MotorState</DisplayName>
+  </UADataType>
+  <UAObjectType NodeId="ns=1;i=1001" BrowseName="1:MotorType">
+    <DisplayName>MotorType</DisplayName>
+  </UAObjectType>
+  <UAVariable NodeId="ns=1;i=1002" BrowseName="1:Rpm" ParentNodeId="ns=1;i=1001"
+              DataType="Double">
+    <References>
+      <Reference ReferenceType="HasComponent" IsForward="false">ns=1;i=1001</Reference>
+    </References>
+  </UAVariable>
+  <UAObject NodeId="ns=1;i=5001" BrowseName="1:Plant">
+    <DisplayName>Plant</DisplayName>
+    <References>
+      <Reference ReferenceType="Organizes" IsForward="false">i=85</Reference>
+      <Reference ReferenceType="Organizes">ns=1;s=Line1</Reference>
+    </References>
+  </UAObject>
+  <UAVariable NodeId="ns=1;s=Line1.Temperature" BrowseName="1:Temperature"
+              ParentNodeId="ns=1;s=Line1" DataType="Double">
+    <References>
+      <Reference ReferenceType="HasComponent" IsForward="false">ns=1;s=Line1</Reference>
+      <Reference ReferenceType="HasProperty">ns=1;s=Line1.Temperature.EU</Reference>
+    </References>
+  </UAVariable>
+  <UAVariable NodeId="ns=1;s=Line1.Temperature.EU" BrowseName="EngineeringUnits"
+              DataType="i=887">
+    <References>
+      <Reference ReferenceType="HasProperty" IsForward="false">ns=1;s=Line1.Temperature</Reference>
+    </References>
+  </UAVariable>
+  <UAObject NodeId="ns=1;s=Line1" BrowseName="1:Line1">
+    <References>
+      <Reference ReferenceType="HasTypeDefinition">i=58</Reference>
+    </References>
+  </UAObject>
+  <UAVariable NodeId="ns=1;s=Line1.State" BrowseName="1:State" DataType="ns=1;i=3001">
+    <References>
+      <Reference ReferenceType="HasComponent" IsForward="false">ns=1;s=Line1</Reference>
+    </References>
+  </UAVariable>
+  <UAVariable NodeId="ns=1;s=Line1.Count" BrowseName="1:Count" DataType="UInt32">
+    <References>
+      <Reference ReferenceType="i=47" IsForward="false">ns=1;s=Line1</Reference>
+    </References>
+  </UAVariable>
+  <UAObject NodeId="ns=1;s=Orphan" BrowseName="1:Orphan"/>
+</UANodeSet>
+"""
+
+
+@pytest.fixture
+def nodeset(tmp_path):
+    path = tmp_path / "plant.xml"
+    path.write_text(_NODESET)
+    return path
+
+
+@pytest.fixture
+def index(tmp_path):
+    return TagIndex(str(tmp_path / "tags.sqlite"))
+
+
+def _paths(index, server=_SERVER):
+    return {n["path"]: n for n in index.search(server, "", limit=None)["nodes"]}
+
+
+class TestImport:
+    def test_indexes_instances_under_objects(self, nodeset, index):
+        assert import_nodeset(str(nodeset), index, _SERVER) == 5
+        assert sorted(_paths(index)) == [
+            "Plant",
+            "Plant/Line1",
+            "Plant/Line1/Count",
+            "Plant/Line1/State",
+            "Plant/Line1/Temperature",
+        ]
+
+    def test_node_ids_and_data_types(self, nodeset, index):
+        import_nodeset(str(nodeset), index, _SERVER, ["urn:ua", "urn:plant"])
+        nodes = _paths(index)
+        assert nodes["Plant/Line1/Temperature"] == {
+            "node_id": "ns=1;s=Line1.Temperature",
+            "path": "Plant/Line1/Temperature",
+            "display_name": "Temperature",
+            "node_class": "Variable",
+            "data_type": "Double",
+        }
+        assert nodes["Plant/Line1/State"]["data_type"] == "MotorState"
+        assert nodes["Plant/Line1/Count"]["data_type"] == "UInt32"
+        assert nodes["Plant/Line1"]["data_type"] is None
+
+    def test_namespaces_follow_the_server(self, nodeset, index):
+        server_uris = ["http://opcfoundation.org/UA/", "urn:server", "urn:plant"]
+        import_nodeset(str(nodeset), index, _SERVER, server_uris)
+        assert _paths(index)["Plant/Line1"]["node_id"] == "ns=2;s=Line1"
+
+    def test_unmapped_namespaces_keep_their_uri(self, nodeset, index):
+        warnings = []
+        progress = lambda **kw: warnings.extend(kw.get("warnings", ()))  # noqa: E731
+        import_nodeset(str(nodeset), index, _SERVER, progress=progress)
+        nodes = _paths(index)
+        assert nodes["Plant/Line1"]["node_id"] == "nsu=urn:plant;s=Line1"
+        assert nodes["Plant/Line1/State"]["data_type"] == "MotorState"
+        assert warnings == [
+            "Namespace index of urn:plant unverified: server not reachable"
+        ]
+
+        warnings.clear()
+        import_nodeset(str(nodeset), index, _SERVER, ["urn:ua"], progress=progress)
+        assert _paths(index)["Plant/Line1"]["node_id"] == "nsu=urn:plant;s=Line1"
+        assert warnings == ["Namespace urn:plant is not on the server"]
+
+    def test_gzip_and_reimport_replaces_rows(self, nodeset, index, tmp_path):
+        index.add(_SERVER, 1, [("ns=1;s=Old", "Old", "Old", "Object", None)])
+        packed = tmp_path / "plant.xml.gz"
+        packed.write_bytes(gzip.compress(nodeset.read_bytes()))
+        assert import_nodeset(str(packed), index, _SERVER) == 5
+        assert "Old" not in _paths(index)
+
+    def test_bad_xml_leaves_the_index_alone(self, index, tmp_path):
+        index.add(_SERVER, 1, [("ns=1;s=Old", "Old", "Old", "Object", None)])
+        broken = tmp_path / "broken.xml"
+        broken.write_text(_NODESET[:800])
+        with pytest.raises(ET.ParseError):
+            import_nodeset(str(broken), index, _SERVER)
+        assert index.count(_SERVER) == 1
+        assert list(tmp_path.glob("*.import-*")) == []
+
+    def test_children(self, nodeset, index):
+        import_nodeset(str(nodeset), index, _SERVER)
+        (top,) = index.children(_SERVER)
+        assert (top["path"], top["has_children"]) == ("Plant", True)
+        line = index.children(_SERVER, "Plant/Line1")
+        assert [(c["display_name"], c["has_children"]) for c in line] == [
+            ("Count", False),
+            ("State", False),
+            ("Temperature", False),
+        ]
+
+
+class TestImporter:
+    def test_background_import(self, nodeset, index):
+        importer = NodesetImporter()
+        assert importer.start(str(nodeset), index, _SERVER)
+        importer.join(10)
+        progress = importer.get_progress()
+        assert progress["state"] == "done"
+        assert (progress["parsed"], progress["indexed"]) == (8, 5)
+        assert progress["warnings"] == [
+            "Namespace index of urn:plant unverified: server not reachable"
+        ]
+
+
+class TestRoutes:
+    @pytest.fixture
+    def client(self, monkeypatch, opcua_route_client):
+        monkeypatch.setattr(opcua_routes, "nodeset_importer", NodesetImporter())
+        return opcua_route_client
+
+    def _upload(self, client, nodeset=_NODESET):
+        data = {"file": (io.BytesIO(nodeset.encode()), "plant.xml")}
+        resp = client.post("/api/opcua/nodeset", data=data)
+        assert resp.get_json() == {"ok": True}
+        opcua_routes.nodeset_importer.join(10)
+        return client.get("/api/opcua/nodeset").get_json()
+
+    def test_upload_then_select(self, client, tmp_path):
+        # The test server registers urn:iiot-test-server at index 2
+        progress = self._upload(
+            client, _NODESET.replace("urn:plant", "urn:iiot-test-server")
+        )
+        assert (progress["state"], progress["index_size"]) == ("done", 5)
+        assert progress["warnings"] == []
+        assert not (tmp_path / "nodeset-upload.xml").exists()
+
+        children = client.get("/api/opcua/tags/children?path=Plant").get_json()
+        assert [c["display_name"] for c in children] == ["Line1"]
+
+        resp = client.post("/api/opcua/tags/select", json={"q": "Plant/Line1/T"})
+        assert resp.get_json()["added"] == 1
+        assert client.sections["nodes"] == [
+            {
+                "name": "Temperature",
+                "namespace": "2",
+                "identifier_type": "s",
+                "identifier": "Line1.Temperature",
+                "sampling_mode": "polling",
+                "interval": "1s",
+                "deadband_type": "None",
+                "deadband_value": 0,
+                "data_type": "Double",
+            }
+        ]
+
+    def test_namespace_missing_on_the_server_is_skipped(self, client):
+        progress = self._upload(client)
+        assert progress["warnings"] == ["Namespace urn:plant is not on the server"]
+        resp = client.post("/api/opcua/tags/select", json={"q": "Plant/Line1/T"})
+        assert resp.get_json() == {
+            "ok": True,
+            "added": 0,
+            "skipped": 1,
+            "matched": 1,
+        }
+        assert client.sections["nodes"] == []
+
+    def test_unreachable_server_leaves_indexes_unverified(self, client):
+        client.sections["opcua"]["endpoint"] = "opc.tcp://127.0.0.1:1"
+        progress = self._upload(client)
+        assert progress["warnings"] == [
+            "Namespace index of urn:plant unverified: server not reachable"
+        ]
+        assert progress["index_size"] == 5
+
+    def test_bad_uploads(self, client):
+        assert client.post("/api/opcua/nodeset").status_code == 400
+        data = {
+            "file": (io.BytesIO(b"<x/>"), "x.xml"),
+            "namespace_uris": "urn:plant",
+        }
+        assert client.post("/api/opcua/nodeset", data=data).status_code == 400
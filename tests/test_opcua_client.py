@@ -1,8 +1,10 @@
 """Unit tests for opcua_client helpers.
 
-Tests use mocks — no real OPC UA server required.
+Most tests use mocks. Browse tests run against the in-process OPC UA server
+and count service calls, since the number of round trips is what they guard.
 Covers: access_level bitmask handling, value_rank labels, min_sampling_interval
-display, status_code extraction, and graceful None on attribute errors.
+display, status_code extraction, graceful None on attribute errors, and
+browse and bulk-read round trips.
 """
 
 import asyncio
@@ -10,6 +12,8 @@ import sys
 from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import pytest
+
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 # ─── Helpers that mirror JS rendering logic (tested in Python for parity) ─────
@@ -135,17 +139,50 @@ def _make_data_value(value=42.0, status_name="Good", src_ts=None, srv_ts=None):
     return dv
 
 
-def _make_attr_result(value):
-    """Wrap a value in a mock get_attribute() result (DataValue-like)."""
-    result = MagicMock()
-    result.Value.Value = value
-    return result
+def _details_client(attributes, eu_text=None):
+    """Mock client whose Read returns `attributes` ({AttributeId: value}); an
+    attribute mapped to an Exception comes back with a bad status code."""
+    from asyncua import ua
+
+    def data_value(value):
+        if isinstance(value, Exception):
+            return ua.DataValue(
+                StatusCode_=ua.StatusCode(ua.StatusCodes.BadAttributeIdInvalid)
+            )
+        return ua.DataValue(ua.Variant(value))
+
+    async def read(params):
+        results = []
+        for rv in params.NodesToRead:
+            if rv.NodeId == eu_node:
+                eu = ua.EUInformation()
+                eu.DisplayName = ua.LocalizedText(eu_text)
+                results.append(data_value(eu))
+            else:
+                results.append(data_value(attributes.get(rv.AttributeId, Exception())))
+        return results
+
+    async def translate(paths):
+        result = ua.BrowsePathResult()
+        if eu_text is None:
+            result.StatusCode = ua.StatusCode(ua.StatusCodes.BadNoMatch)
+        else:
+            target = ua.BrowsePathTarget()
+            target.TargetId = eu_node
+            result.Targets = [target]
+        return [result]
+
+    eu_node = ua.NodeId("Temperature.EngineeringUnits", 2)
+    client = MagicMock()
+    client.uaclient.read = AsyncMock(side_effect=read)
+    client.uaclient.translate_browsepaths_to_nodeids = AsyncMock(side_effect=translate)
+    return client
 
 
 class TestReadNodeDetails:
     """Tests for read_node_details() extended attributes."""
 
-    def _make_node(
+    def _attributes(
         self,
         access_level=1,
         description="Test desc",
@@ -153,182 +190,149 @@ class TestReadNodeDetails:
         min_sampling=100.0,
         historizing=False,
     ):
-        node = AsyncMock()
-        node.nodeid.to_string.return_value = "ns=2;s=Temperature"
-        node.nodeid.NamespaceIndex = 2
-        node.nodeid.NodeIdType = MagicMock()
-        # read_browse_name
-        bn = MagicMock()
-        bn.Name = "Temperature"
-        node.read_browse_name = AsyncMock(return_value=bn)
-        # read_node_class — asyncua ua.NodeClass.Variable
         from asyncua import ua
 
-        node.read_node_class = AsyncMock(return_value=ua.NodeClass.Variable)
-        # read_value
-        node.read_value = AsyncMock(return_value=23.5)
-        # read_data_type
-        dt_node_id = MagicMock()
-        node.read_data_type = AsyncMock(return_value=dt_node_id)
+        return {
+            ua.AttributeIds.BrowseName: ua.QualifiedName("Temperature", 2),
+            ua.AttributeIds.NodeClass: ua.NodeClass.Variable.value,
+            ua.AttributeIds.Value: 23.5,
+            ua.AttributeIds.DataType: ua.NodeId(ua.ObjectIds.Float),
+            ua.AttributeIds.AccessLevel: access_level,
+            ua.AttributeIds.Description: ua.LocalizedText(description),
+            ua.AttributeIds.ValueRank: value_rank,
+            ua.AttributeIds.MinimumSamplingInterval: min_sampling,
+            ua.AttributeIds.Historizing: historizing,
+        }
 
-        # get_attribute — called per AttributeId
-        def get_attr_side_effect(attr_id):
-            from asyncua import ua
+    def _run(self, client):
+        from app.services.opcua_client import fetch_node_details
 
-            mapping = {
-                ua.AttributeIds.AccessLevel: _make_attr_result(access_level),
-                ua.AttributeIds.Description: _make_attr_result(
-                    MagicMock(Text=description) if description else None
-                ),
-                ua.AttributeIds.ValueRank: _make_attr_result(value_rank),
-                ua.AttributeIds.MinimumSamplingInterval: _make_attr_result(
-                    min_sampling
-                ),
-                ua.AttributeIds.Historizing: _make_attr_result(historizing),
-                ua.AttributeIds.Value: _make_data_value(23.5),
-            }
-            future = asyncio.Future()
-            future.set_result(mapping.get(attr_id, _make_attr_result(None)))
-            return future
-
-        node.get_attribute = get_attr_side_effect
-        # get_children — no EU properties
-        node.get_children = AsyncMock(return_value=[])
-        return node
-
-    def _run(self, coro):
-        return asyncio.run(coro)
+        return asyncio.run(fetch_node_details(client, "ns=2;s=Temperature"))
 
     def test_access_level_read_only(self):
         """access_level=1 should be returned as int 1."""
-        node = self._make_node(access_level=1)
-
-        with patch("app.services.opcua_client._build_client") as mock_build:
-            mock_client = AsyncMock()
-            mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-            mock_client.__aexit__ = AsyncMock(return_value=False)
-            mock_client.get_node.return_value = node
-            # data type browse
-            dt_name = MagicMock()
-            dt_name.Name = "Float"
-            mock_client.get_node.return_value.read_browse_name = AsyncMock(
-                return_value=dt_name
-            )
-            dt_node = AsyncMock()
-            dt_bn = MagicMock()
-            dt_bn.Name = "Float"
-            dt_node.read_browse_name = AsyncMock(return_value=dt_bn)
-
-            async def fake_get_node(nid):
-                return dt_node
-
-            mock_client.get_node = MagicMock(side_effect=lambda nid: node)
-            mock_build.return_value = mock_client
-
-            from app.services.opcua_client import read_node_details
-
-            result = self._run(
-                read_node_details(
-                    {"endpoint": "opc.tcp://test:4840"}, "ns=2;s=Temperature"
-                )
-            )
-
+        result = self._run(_details_client(self._attributes(access_level=1)))
         assert result["access_level"] == 1
+        assert result["data_type"] == "Float"
+        assert result["value"] == "23.5"
 
     def test_access_level_none_on_exception(self):
-        """If get_attribute raises, access_level should be None."""
+        """If the AccessLevel read fails, access_level should be None."""
         from asyncua import ua
 
-        node = self._make_node()
-
-        original_side = node.get_attribute
-
-        def raise_on_access_level(attr_id):
-            if attr_id == ua.AttributeIds.AccessLevel:
-                raise Exception("BadAttributeIdInvalid")
-            return original_side(attr_id)
-
-        node.get_attribute = raise_on_access_level
-
-        with patch("app.services.opcua_client._build_client") as mock_build:
-            mock_client = AsyncMock()
-            mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-            mock_client.__aexit__ = AsyncMock(return_value=False)
-            mock_client.get_node = MagicMock(return_value=node)
-            mock_build.return_value = mock_client
-
-            from app.services.opcua_client import read_node_details
-
-            result = self._run(
-                read_node_details(
-                    {"endpoint": "opc.tcp://test:4840"}, "ns=2;s=Temperature"
-                )
-            )
-
+        attributes = self._attributes()
+        attributes[ua.AttributeIds.AccessLevel] = Exception("BadAttributeIdInvalid")
+        result = self._run(_details_client(attributes))
         assert result["access_level"] is None
 
     def test_description_none_when_empty(self):
         """description=None when server returns no text."""
-        node = self._make_node(description=None)
-
-        with patch("app.services.opcua_client._build_client") as mock_build:
-            mock_client = AsyncMock()
-            mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-            mock_client.__aexit__ = AsyncMock(return_value=False)
-            mock_client.get_node = MagicMock(return_value=node)
-            mock_build.return_value = mock_client
-
-            from app.services.opcua_client import read_node_details
-
-            result = self._run(
-                read_node_details(
-                    {"endpoint": "opc.tcp://test:4840"}, "ns=2;s=Temperature"
-                )
-            )
-
+        result = self._run(_details_client(self._attributes(description=None)))
         assert result["description"] is None
 
     def test_historizing_false(self):
-        node = self._make_node(historizing=False)
+        result = self._run(_details_client(self._attributes(historizing=False)))
+        assert result["historizing"] is False
 
-        with patch("app.services.opcua_client._build_client") as mock_build:
-            mock_client = AsyncMock()
-            mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-            mock_client.__aexit__ = AsyncMock(return_value=False)
-            mock_client.get_node = MagicMock(return_value=node)
-            mock_build.return_value = mock_client
+    def test_engineering_units_none_when_no_property(self):
+        """No EU property → engineering_units is None."""
+        result = self._run(_details_client(self._attributes()))
+        assert result["engineering_units"] is None
 
-            from app.services.opcua_client import read_node_details
+    def test_engineering_units_from_property(self):
+        result = self._run(_details_client(self._attributes(), eu_text="°C"))
+        assert result["engineering_units"] == "°C"
 
-            result = self._run(
-                read_node_details(
-                    {"endpoint": "opc.tcp://test:4840"}, "ns=2;s=Temperature"
-                )
-            )
+    def test_one_read_and_one_translate(self):
+        client = _details_client(self._attributes(), eu_text="°C")
+        self._run(client)
+        assert client.uaclient.read.await_count == 1
+        assert client.uaclient.translate_browsepaths_to_nodeids.await_count == 1
 
-        assert result["historizing"] is False
 
-    def test_engineering_units_none_when_no_property(self):
-        """No EU property children → engineering_units is None."""
-        node = self._make_node()
-        node.get_children = AsyncMock(return_value=[])
+class TestDataTypeNames:
+    def test_namespace_zero_needs_no_read(self):
+        from asyncua import ua
 
-        with patch("app.services.opcua_client._build_client") as mock_build:
-            mock_client = AsyncMock()
-            mock_client.__aenter__ = AsyncMock(return_value=mock_client)
-            mock_client.__aexit__ = AsyncMock(return_value=False)
-            mock_client.get_node = MagicMock(return_value=node)
-            mock_build.return_value = mock_client
+        from app.services.opcua_client import _data_type_name
 
-            from app.services.opcua_client import read_node_details
+        client = MagicMock()
+        client.uaclient.read = AsyncMock()
+        name = asyncio.run(_data_type_name(client, ua.NodeId(ua.ObjectIds.Double)))
+        assert name == "Double"
+        client.uaclient.read.assert_not_awaited()
 
-            result = self._run(
-                read_node_details(
-                    {"endpoint": "opc.tcp://test:4840"}, "ns=2;s=Temperature"
-                )
-            )
+    def test_vendor_type_is_read_once(self):
+        from asyncua import ua
 
-        assert result["engineering_units"] is None
+        from app.services import opcua_client
+
+        dv = ua.DataValue(ua.Variant(ua.QualifiedName("MotorState", 2)))
+        client = MagicMock()
+        client.server_url.geturl.return_value = "opc.tcp://plc:4840"
+        client.uaclient.read = AsyncMock(return_value=[dv])
+        type_id = ua.NodeId(3001, 2)
+        with patch.dict(opcua_client._data_type_names, clear=True):
+            for _ in range(3):
+                name = asyncio.run(opcua_client._data_type_name(client, type_id))
+                assert name == "MotorState"
+        assert client.uaclient.read.await_count == 1
+
+
+class TestFetchNodeDetailsLive:
+    def test_variable_details(self, opcua_server):
+        from app.services.opcua_client import fetch_node_details
+
+        node_id = opcua_server.nodes["Line1.Temperature"]
+        details, calls = opcua_server.run_counted(fetch_node_details, node_id)
+        assert calls == {"TranslateBrowsePathsToNodeIdsRequest": 1, "ReadRequest": 1}
+        assert details["source_timestamp"] and details["server_timestamp"]
+        assert {k: v for k, v in details.items() if not k.endswith("_timestamp")} == {
+            "node_id": node_id,
+            "display_name": "Temperature",
+            "namespace": 2,
+            "node_class": "Variable",
+            "value": "25.0",
+            "data_type": "Double",
+            "identifier_type": "i",
+            "identifier": node_id.split("=")[-1],
+            "access_level": 1,
+            "description": "Line1 temperature",
+            "value_rank": -1,
+            "min_sampling_interval": 0.0,
+            "historizing": False,
+            "status_code": "Good",
+            "engineering_units": "°C",
+        }
+
+    def test_object_details(self, opcua_server):
+        from app.services.opcua_client import fetch_node_details
+
+        node_id = opcua_server.nodes["Line2"]
+        details, calls = opcua_server.run_counted(fetch_node_details, node_id)
+        assert details == {
+            "node_id": node_id,
+            "display_name": "Line2",
+            "namespace": 2,
+            "node_class": "Object",
+        }
+        assert sum(calls.values()) == 2
+
+    def test_namespace_uri_node_id_is_resolved(self, opcua_server):
+        from app.services.opcua_client import fetch_node_details
+
+        node_id = opcua_server.nodes["Line2"]
+        by_uri = node_id.replace("ns=2;", "nsu=urn:iiot-test-server;")
+        details, _ = opcua_server.run_counted(fetch_node_details, by_uri)
+        assert (details["node_id"], details["namespace"]) == (node_id, 2)
+
+    def test_unknown_node_raises(self, opcua_server):
+        from asyncua import ua
+
+        from app.services.opcua_client import fetch_node_details
+
+        with pytest.raises(ua.uaerrors.BadNodeIdUnknown):
+            opcua_server.run_counted(fetch_node_details, "ns=2;s=Nope")
 
 
 class TestReadNamespaceArray:
@@ -369,7 +373,7 @@ class TestReadNodeValue:
             mock_client.__aexit__ = AsyncMock(return_value=False)
             node = AsyncMock()
             dv = _make_data_value(42.5, "Good", src_ts, srv_ts)
-            node.get_attribute = AsyncMock(return_value=dv)
+            node.read_attribute = AsyncMock(return_value=dv)
             mock_client.get_node = MagicMock(return_value=node)
             mock_build.return_value = mock_client
 
@@ -393,7 +397,7 @@ class TestReadNodeValue:
             mock_client.__aexit__ = AsyncMock(return_value=False)
             node = AsyncMock()
             dv = _make_data_value(0, "Good", None, None)
-            node.get_attribute = AsyncMock(return_value=dv)
+            node.read_attribute = AsyncMock(return_value=dv)
             mock_client.get_node = MagicMock(return_value=node)
             mock_build.return_value = mock_client
 
@@ -407,3 +411,456 @@ class TestReadNodeValue:
 
         assert result["source_timestamp"] is None
         assert result["server_timestamp"] is None
+
+
+# ─── fetch_node_values ────────────────────────────────────────────────────────
+
+
+def _bulk_tag_ids(opcua_server):
+    from app.services.opcua_client import fetch_children
+
+    children, _ = opcua_server.run_counted(fetch_children, opcua_server.nodes["Bulk"])
+    return [c["node_id"] for c in children]
+
+
+def _limits(**limits):
+    from app.services.opcua_client import OPERATION_LIMITS
+
+    return {name: limits.get(name, 0) for name in OPERATION_LIMITS}
+
+
+class TestFetchNodeValues:
+    def test_one_read_for_many_nodes(self, opcua_server):
+        from app.services import opcua_client
+
+        ids = _bulk_tag_ids(opcua_server)
+        with patch.dict(opcua_client._operation_limits, clear=True):
+            result, calls = opcua_server.run_counted(
+                opcua_client.fetch_node_values, ids
+            )
+        # The operation limits once, then every value in one Read
+        assert calls == {"ReadRequest": 2}
+        assert len(result) == opcua_server.bulk_tags
+        assert result[7]["node_id"] == ids[7]
+        assert result[7]["value"] == "7.0"
+        assert result[7]["status_code"] == "Good"
+        assert result[7]["server_timestamp"]
+
+    def test_chunks_follow_max_nodes_per_read(self, opcua_server):
+        from app.services import opcua_client
+
+        ids = _bulk_tag_ids(opcua_server)
+        limits = {opcua_server.endpoint: _limits(max_nodes_per_read=100)}
+        with patch.dict(opcua_client._operation_limits, limits, clear=True):
+            result, calls = opcua_server.run_counted(
+                opcua_client.fetch_node_values, ids
+            )
+        assert calls == {"ReadRequest": 5}
+        assert [r["value"] for r in result] == [str(float(i)) for i in range(500)]
+
+    def test_bad_ids_do_not_fail_the_rest(self, opcua_server):
+        from app.services.opcua_client import fetch_node_values
+
+        ids = ["nonsense", "ns=2;s=Nope", opcua_server.nodes["Line1.Temperature"]]
+        result, _ = opcua_server.run_counted(fetch_node_values, ids)
+        assert result[0] == {"node_id": "nonsense", "error": "Invalid node id"}
+        assert result[1]["status_code"] == "BadNodeIdUnknown"
+        assert result[1]["value"] is None
+        assert result[2]["value"] == "25.0"
+
+    def test_too_many_operations_halves_the_chunk(self):
+        from asyncua import ua
+
+        from app.services import opcua_client
+
+        sizes = []
+
+        async def read(params):
+            sizes.append(len(params.NodesToRead))
+            if len(params.NodesToRead) > 60:
+                raise ua.uaerrors.BadTooManyOperations()
+            return [ua.DataValue(ua.Variant(1.0)) for _ in params.NodesToRead]
+
+        client = MagicMock()
+        client.server_url.geturl.return_value = "opc.tcp://plc:4840"
+        client.uaclient.read = read
+        ids = [f"ns=2;i={i}" for i in range(120)]
+        limits = {"opc.tcp://plc:4840": _limits(max_nodes_per_read=200)}
+        with patch.dict(opcua_client._operation_limits, limits, clear=True):
+            result = asyncio.run(opcua_client.fetch_node_values(client, ids))
+            limit = opcua_client._operation_limits["opc.tcp://plc:4840"]
+            assert limit["max_nodes_per_read"] == 60
+        assert sizes == [120, 60, 60]
+        assert all(r["value"] == "1.0" for r in result)
+
+
+class TestNodeValuesRoute:
+    def test_reads_all_requested_nodes(self, opcua_route_client, opcua_server):
+        ids = [opcua_server.nodes["Line1.Speed"], opcua_server.nodes["Line2.Status"]]
+        resp = opcua_route_client.post("/api/opcua/node-values", json={"node_ids": ids})
+        assert [v["value"] for v in resp.get_json()] == ["300", "True"]
+
+    def test_rejects_bad_payloads(self, opcua_route_client):
+        url = "/api/opcua/node-values"
+        assert (
+            opcua_route_client.post(url, json={"node_ids": "i=2258"}).status_code == 400
+        )
+        assert (
+            opcua_route_client.post(url, json={"node_ids": [1, 2]}).status_code == 400
+        )
+        too_many = {"node_ids": ["i=2258"] * 5001}
+        assert opcua_route_client.post(url, json=too_many).status_code == 400
+
+
+# ─── Operation limits ─────────────────────────────────────────────────────────
+
+
+class TestOperationLimits:
+    def test_probed_with_one_read_and_cached(self, opcua_server):
+        from app.services import opcua_client
+
+        with patch.dict(opcua_client._operation_limits, clear=True):
+            limits, calls = opcua_server.run_counted(
+                opcua_client.fetch_operation_limits
+            )
+            assert calls == {"ReadRequest": 1}
+            _, calls = opcua_server.run_counted(opcua_client.fetch_operation_limits)
+            assert calls == {}
+        assert set(limits) == set(opcua_client.OPERATION_LIMITS)
+        assert all(isinstance(v, int) for v in limits.values())
+
+    def test_browse_chunks_follow_max_nodes_per_browse(self, opcua_server):
+        from app.services import opcua_client
+
+        limits = {opcua_server.endpoint: _limits(max_nodes_per_browse=200)}
+        with patch.dict(opcua_client._operation_limits, limits, clear=True):
+            result, calls = opcua_server.run_counted(
+                opcua_client.fetch_children, opcua_server.nodes["Bulk"]
+            )
+        # One Browse for the folder, then has_children in chunks of 200
+        assert calls == {"BrowseRequest": 4}
+        assert len(result) == opcua_server.bulk_tags
+
+    def test_test_connection_reports_limits(self, opcua_server):
+        from app.services.opcua_client import test_connection
+
+        result = asyncio.run(test_connection({"endpoint": opcua_server.endpoint}))
+        assert result["ok"] is True
+        assert "max_nodes_per_read" in result["limits"]
+
+
+# ─── fetch_children (in-process server) ───────────────────────────────────────
+
+
+class TestFetchChildren:
+    @pytest.fixture(autouse=True)
+    def known_limits(self, opcua_server):
+        """Limits already probed, so only browse calls are counted."""
+        from app.services import opcua_client
+
+        limits = {opcua_server.endpoint: _limits()}
+        with patch.dict(opcua_client._operation_limits, limits, clear=True):
+            yield
+
+    def test_children_and_has_children(self, opcua_server):
+        from app.services.opcua_client import fetch_children
+
+        result, _ = opcua_server.run_counted(
+            fetch_children, opcua_server.nodes["Plant"]
+        )
+        by_name = {c["display_name"]: c for c in result}
+        assert set(by_name) == {"Line1", "Line2", "Bulk"}
+        assert by_name["Line1"]["node_class"] == "Object"
+        assert by_name["Line1"]["node_id"] == opcua_server.nodes["Line1"]
+        assert all(c["has_children"] for c in result)
+
+        leaves, _ = opcua_server.run_counted(
+            fetch_children, opcua_server.nodes["Line1"]
+        )
+        assert {c["display_name"]: c["has_children"] for c in leaves} == {
+            "Temperature": True,  # EngineeringUnits property
+            "Speed": False,
+            "Status": False,
+        }
+        assert {c["node_class"] for c in leaves} == {"Variable"}
+
+    def test_large_folder_is_two_round_trips(self, opcua_server):
+        """One Browse for the children, one batched Browse for has_children —
+        not 3 calls per child."""
+        from app.services.opcua_client import fetch_children
+
+        result, calls = opcua_server.run_counted(
+            fetch_children, opcua_server.nodes["Bulk"]
+        )
+        assert len(result) == opcua_server.bulk_tags
+        assert calls == {"BrowseRequest": 2}
+
+    def test_leaf_is_one_round_trip(self, opcua_server):
+        from app.services.opcua_client import fetch_children
+
+        result, calls = opcua_server.run_counted(
+            fetch_children, opcua_server.nodes["Line1.Speed"]
+        )
+        assert result == []
+        assert calls == {"BrowseRequest": 1}
+
+    def test_matches_node_api(self, opcua_server):
+        """Same children, in the same order, as Node.get_children()."""
+        from app.services.opcua_client import fetch_children
+
+        async def via_node_api(client, node_id):
+            return [
+                c.nodeid.to_string()
+                for c in await client.get_node(node_id).get_children()
+            ]
+
+        root = "i=85"  # Objects
+        expected, _ = opcua_server.run_counted(via_node_api, root)
+        result, _ = opcua_server.run_counted(fetch_children, root)
+        assert [c["node_id"] for c in result] == expected
+
+
+def _reference(name):
+    from asyncua import ua
+
+    ref = ua.ReferenceDescription()
+    ref.NodeId = ua.NodeId(name, 2)
+    ref.BrowseName = ua.QualifiedName(name, 2)
+    ref.NodeClass = ua.NodeClass.Variable
+    return ref
+
+
+class _PagingUaClient:
+    """Returns browse results `page` references at a time, like a server that
+    enforces its own MaxReferencesPerNode."""
+
+    def __init__(self, names, page):
+        self._names = names
+        self._page = page
+        self.calls = []
+
+    def _result(self, offset):
+        from asyncua import ua
+
+        result = ua.BrowseResult()
+        result.References = [
+            _reference(n) for n in self._names[offset : offset + self._page]
+        ]
+        if offset + self._page < len(self._names):
+            result.ContinuationPoint = str(offset + self._page).encode()
+        return result
+
+    async def browse(self, params):
+        self.calls.append(("Browse", len(params.NodesToBrowse)))
+        if params.RequestedMaxReferencesPerNode == 1:
+            from asyncua import ua
+
+            return [ua.BrowseResult() for _ in params.NodesToBrowse]
+        return [self._result(0)]
+
+    async def browse_next(self, params):
+        self.calls.append(("BrowseNext", params.ReleaseContinuationPoints))
+        (cp,) = params.ContinuationPoints
+        return [self._result(int(cp))]
+
+
+class TestFetchChildrenContinuation:
+    def test_follows_continuation_points(self):
+        from app.services.opcua_client import fetch_children
+
+        names = [f"Tag{i}" for i in range(25)]
+        client = MagicMock()
+        client.server_url.geturl.return_value = "opc.tcp://plc:4840"
+        client.uaclient = _PagingUaClient(names, page=10)
+        limits = {"opc.tcp://plc:4840": _limits()}
+        with patch.dict("app.services.opcua_client._operation_limits", limits):
+            result = asyncio.run(fetch_children(client, "ns=2;s=Folder"))
+        assert [c["display_name"] for c in result] == names
+        assert client.uaclient.calls == [
+            ("Browse", 1),
+            ("BrowseNext", False),
+            ("BrowseNext", False),
+            ("Browse", 25),
+        ]
+
+    def test_request_wraps_browse_and_every_browse_next(self):
+        import contextlib
+
+        from app.services.opcua_client import _browse_many
+
+        entered = []
+
+        @contextlib.asynccontextmanager
+        async def request():
+            entered.append(len(uaclient.calls))
+            yield
+
+        uaclient = _PagingUaClient([f"Tag{i}" for i in range(25)], page=10)
+        client = MagicMock()
+        client.uaclient = uaclient
+        ((_, references),) = asyncio.run(
+            _browse_many(client, ["ns=2;s=Folder"], request=request)
+        )
+        assert len(references) == 25
+        # One request per Browse/BrowseNext, entered before each is sent
+        assert entered == [0, 1, 2]
+
+
+# ─── Paged browse ─────────────────────────────────────────────────────────────
+
+
+class _HugeFolderUaClient:
+    """A simulated folder of `size` variables behind a server that honours
+    RequestedMaxReferencesPerNode with continuation points. References are
+    made on demand, so the simulation itself holds no list of children."""
+
+    def __init__(self, size):
+        self.size = size
+        self.calls = []
+        self.largest_response = 0
+        self.released = []
+
+    def _result(self, offset, limit):
+        from asyncua import ua
+
+        end = min(self.size, offset + limit)
+        result = ua.BrowseResult()
+        result.References = [_reference(f"Tag{i:05d}") for i in range(offset, end)]
+        if end < self.size:
+            result.ContinuationPoint = f"{end}:{limit}".encode()
+        self.largest_response = max(self.largest_response, end - offset)
+        return result
+
+    async def browse(self, params):
+        from asyncua import ua
+
+        self.calls.append(("Browse", len(params.NodesToBrowse)))
+        if params.RequestedMaxReferencesPerNode == 1:
+            return [ua.BrowseResult() for _ in params.NodesToBrowse]
+        return [self._result(0, params.RequestedMaxReferencesPerNode or self.size)]
+
+    async def browse_next(self, params):
+        self.calls.append(("BrowseNext", params.ReleaseContinuationPoints))
+        if params.ReleaseContinuationPoints:
+            self.released.extend(params.ContinuationPoints)
+            return []
+        (cp,) = params.ContinuationPoints
+        offset, limit = map(int, cp.decode().split(":"))
+        return [self._result(offset, limit)]
+
+
+def _huge_client(size=50_000):
+    client = MagicMock()
+    client.server_url.geturl.return_value = "opc.tcp://plc:4840"
+    client.uaclient = _HugeFolderUaClient(size)
+    return client
+
+
+class TestFetchChildrenPage:
+    @pytest.fixture(autouse=True)
+    def isolated(self):
+        from app.services import opcua_client
+
+        limits = {"opc.tcp://plc:4840": _limits(max_browse_continuation_points=6)}
+        with (
+            patch.dict(opcua_client._operation_limits, limits, clear=True),
+            patch.dict(opcua_client._page_cursors, clear=True),
+        ):
+            yield opcua_client
+
+    def test_first_page_of_50k_children_costs_one_page(self, isolated):
+        client = _huge_client()
+        page = asyncio.run(isolated.fetch_children_page(client, "ns=2;s=Huge", 200))
+        assert len(page["children"]) == 200
+        assert page["children"][0]["display_name"] == "Tag00000"
+        assert page["next_cursor"].startswith("200:")
+        assert client.uaclient.calls == [("Browse", 1), ("Browse", 200)]
+        assert client.uaclient.largest_response == 200
+        (cursor,) = isolated._page_cursors.values()
+        assert cursor.buffered == []
+
+    def test_pages_cover_the_folder_in_order(self, isolated):
+        client = _huge_client()
+
+        async def walk():
+            names, cursor, open_cursors = [], None, 0
+            while True:
+                page = await isolated.fetch_children_page(
+                    client, "ns=2;s=Huge", 1000, cursor
+                )
+                names += [c["display_name"] for c in page["children"]]
+                open_cursors = max(open_cursors, len(isolated._page_cursors))
+                cursor = page["next_cursor"]
+                if cursor is None:
+                    return names, open_cursors
+
+        names, open_cursors = asyncio.run(walk())
+        assert names == [f"Tag{i:05d}" for i in range(50_000)]
+        assert client.uaclient.largest_response == 1000
+        assert open_cursors == 1
+        assert isolated._page_cursors == {}
+
+    def test_unknown_cursor_resumes_at_its_offset(self, isolated):
+        client = _huge_client(1000)
+        page = asyncio.run(
+            isolated.fetch_children_page(client, "ns=2;s=Huge", 100, "400:expired")
+        )
+        assert page["children"][0]["display_name"] == "Tag00400"
+        assert page["next_cursor"].startswith("500:")
+        with pytest.raises(ValueError):
+            isolated.parse_page_cursor("soon")
+
+    def test_open_cursors_stay_within_continuation_points(self, isolated):
+        client = _huge_client(1000)
+
+        async def open_folders():
+            for folder in ("A", "B", "C", "D"):
+                await isolated.fetch_children_page(client, f"ns=2;s={folder}", 100)
+
+        asyncio.run(open_folders())
+        # Half of MaxBrowseContinuationPoints=6; the oldest is released
+        assert len(isolated._page_cursors) == 3
+        assert client.uaclient.released == [b"100:100"]
+
+    def test_server_without_continuation_points(self, opcua_server, isolated):
+        """The in-process server returns every reference at once; pages then
+        come from the cursor and the folder is browsed only once."""
+
+        async def pages(client):
+            out, cursor = [], None
+            while True:
+                page = await isolated.fetch_children_page(
+                    client, opcua_server.nodes["Bulk"], 200, cursor
+                )
+                out.append(page["children"])
+                cursor = page["next_cursor"]
+                if cursor is None:
+                    return out
+
+        limits = {opcua_server.endpoint: _limits()}
+        with patch.dict(isolated._operation_limits, limits):
+            result, calls = opcua_server.run_counted(pages)
+            everything, _ = opcua_server.run_counted(
+                isolated.fetch_children, opcua_server.nodes["Bulk"]
+            )
+        assert [len(p) for p in result] == [200, 200, 100]
+        assert [c for p in result for c in p] == everything
+        # The folder once, then has_children per page
+        assert calls == {"BrowseRequest": 4}
+
+
+class TestBrowseRoutePaging:
+    def test_follows_cursors(self, opcua_route_client, opcua_server):
+        url = f"/api/opcua/browse?node_id={opcua_server.nodes['Bulk']}&limit=300"
+        first = opcua_route_client.get(url).get_json()
+        second = opcua_route_client.get(
+            f"{url}&cursor={first['next_cursor']}"
+        ).get_json()
+        assert (len(first["children"]), len(second["children"])) == (300, 200)
+        assert second["next_cursor"] is None
+
+    def test_rejects_bad_limit_and_cursor(self, opcua_route_client):
+        assert opcua_route_client.get("/api/opcua/browse?limit=0").status_code == 400
+        assert opcua_route_client.get("/api/opcua/browse?limit=5000").status_code == 400
+        url = "/api/opcua/browse?limit=10&cursor=nope"
+        assert opcua_route_client.get(url).status_code == 400
@@ -0,0 +1,164 @@
+"""Tests for the pooled OPC UA sessions.
+
+The browser routes hand every browse/read to this pool, so a session must be
+reused across requests and threads, replaced transparently when the server
+drops it, and closed once idle. Runs against the in-process OPC UA server.
+"""
+
+import asyncio
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from asyncua import ua
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from app.services.opcua_client import fetch_children, fetch_node_value
+from app.services.opcua_pool import OpcuaSessionPool, session_key
+
+
+@pytest.fixture
+def pool():
+    pool = OpcuaSessionPool()
+    yield pool
+    pool.stop()
+
+
+def _config(server, **overrides):
+    return {"endpoint": server.endpoint, "connect_timeout": "10s", **overrides}
+
+
+def _on_loop(pool, coro):
+    return asyncio.run_coroutine_threadsafe(coro, pool._loop).result(5)
+
+
+class TestSessionReuse:
+    def test_one_handshake_for_many_calls(self, pool, opcua_server):
+        config = _config(opcua_server)
+        node = opcua_server.nodes["Line1.Temperature"]
+        for _ in range(5):
+            assert pool.run(config, fetch_node_value, node)["value"] == "25.0"
+        stats = pool.get_stats()
+        assert stats["connects"] == 1
+        assert stats["reused"] == 4
+        assert stats["sessions"] == 1
+
+    def test_concurrent_first_calls_share_a_session(self, pool, opcua_server):
+        config = _config(opcua_server)
+        results = []
+
+        def browse():
+            results.append(
+                pool.run(config, fetch_children, opcua_server.nodes["Plant"])
+            )
+
+        threads = [threading.Thread(target=browse) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(results) == 8
+        assert {c["display_name"] for c in results[0]} == {"Line1", "Line2", "Bulk"}
+        assert pool.get_stats()["connects"] == 1
+
+    def test_settings_change_opens_new_session(self, pool, opcua_server):
+        node = opcua_server.nodes["Line1.Speed"]
+        pool.run(_config(opcua_server), fetch_node_value, node)
+        pool.run(_config(opcua_server, connect_timeout="5s"), fetch_node_value, node)
+        assert pool.get_stats()["sessions"] == 2
+
+    def test_key_ignores_unrelated_settings(self):
+        base = {"endpoint": "opc.tcp://plc:4840", "security_policy": "None"}
+        assert session_key(base) == session_key({**base, "interval": "5s"})
+        assert session_key(base) != session_key({**base, "username": "op"})
+
+
+class TestFailures:
+    def test_operation_error_keeps_session(self, pool, opcua_server):
+        config = _config(opcua_server)
+        with pytest.raises(ua.uaerrors.BadNodeIdUnknown):
+            pool.run(config, fetch_node_value, "ns=2;s=DoesNotExist")
+        pool.run(config, fetch_node_value, opcua_server.nodes["Line1.Status"])
+        assert pool.get_stats()["connects"] == 1
+
+    def test_dropped_connection_is_reconnected(self, pool, opcua_server):
+        config = _config(opcua_server)
+        node = opcua_server.nodes["Line2.Temperature"]
+        pool.run(config, fetch_node_value, node)
+
+        async def drop():
+            (session,) = pool._sessions.values()
+            session.client.uaclient.protocol.transport.close()
+            await asyncio.sleep(0.1)
+
+        _on_loop(pool, drop())
+        assert pool.run(config, fetch_node_value, node)["value"] == "25.0"
+        stats = pool.get_stats()
+        assert stats["connects"] == 2
+        assert stats["reconnects"] == 1
+
+    def test_unreachable_endpoint(self, pool):
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        config = {"endpoint": f"opc.tcp://127.0.0.1:{port}", "connect_timeout": "1s"}
+        with pytest.raises(OSError):
+            pool.run(config, fetch_node_value, "i=2259")
+        assert pool.get_stats()["sessions"] == 0
+
+    def test_call_timeout(self, pool, opcua_server):
+        async def slow(client):
+            await asyncio.sleep(5)
+
+        with pytest.raises(TimeoutError):
+            pool.run(_config(opcua_server), slow, timeout=0.2)
+
+    def test_request_timeout_keeps_session(self, pool, opcua_server):
+        config = _config(opcua_server)
+        calls = []
+
+        async def timed_out(client):
+            calls.append(client)
+            raise asyncio.TimeoutError
+
+        pool.run(config, fetch_node_value, opcua_server.nodes["Line1.Status"])
+        with pytest.raises(TimeoutError):
+            pool.run(config, timed_out)
+        assert len(calls) == 1
+        pool.run(config, fetch_node_value, opcua_server.nodes["Line1.Status"])
+        stats = pool.get_stats()
+        assert (stats["connects"], stats["reconnects"]) == (1, 0)
+
+
+class TestLifecycle:
+    def test_idle_sessions_are_closed(self, opcua_server):
+        pool = OpcuaSessionPool(idle_timeout=0.2)
+        try:
+            pool.run(_config(opcua_server), fetch_node_value, "i=2259")
+            deadline = time.monotonic() + 3
+            while pool.get_stats()["sessions"] and time.monotonic() < deadline:
+                time.sleep(0.05)
+            stats = pool.get_stats()
+            assert stats["sessions"] == 0
+            assert stats["closed_idle"] == 1
+        finally:
+            pool.stop()
+
+    def test_max_sessions_evicts_least_recently_used(self, opcua_server):
+        pool = OpcuaSessionPool(max_sessions=2)
+        try:
+            for timeout in ("3s", "4s", "5s"):
+                config = _config(opcua_server, connect_timeout=timeout)
+                pool.run(config, fetch_node_value, "i=2259")
+            assert pool.get_stats()["sessions"] == 2
+        finally:
+            pool.stop()
+
+    def test_stop_and_restart(self, pool, opcua_server):
+        pool.run(_config(opcua_server), fetch_node_value, "i=2259")
+        pool.stop()
+        assert pool.get_stats()["sessions"] == 0
+        assert pool.run(_config(opcua_server), fetch_node_value, "i=2259")["value"]
@@ -0,0 +1,213 @@
+"""Tests for subscription-backed live values.
+
+Every tab watching a node used to poll the PLC on its own. Watchers now share
+one monitored item per node, so these tests check what the PLC sees: one item
+however many watchers, none once the last one leaves, and changes pushed to
+the browser well under a second, and that a server that stops answering does
+not hold up watches of another. Runs against the in-process OPC UA server.
+"""
+
+import asyncio
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from asyncua import ua
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from app.routes import stream as stream_routes
+from app.routes.stream import stream_bp
+from app.services import event_bus
+from app.services.opcua_pool import OpcuaSessionPool
+from app.services.opcua_watch import CHANNEL, OpcuaValueWatcher
+
+
+@pytest.fixture
+def pool():
+    pool = OpcuaSessionPool()
+    yield pool
+    pool.stop()
+
+
+@pytest.fixture
+def watcher(pool):
+    return OpcuaValueWatcher(pool, check_secs=0.2)
+
+
+@pytest.fixture
+def config(opcua_server):
+    return {"endpoint": opcua_server.endpoint, "connect_timeout": "10s"}
+
+
+@pytest.fixture
+def speed(opcua_server):
+    """Line2.Speed, restored after the test writes to it."""
+    node_id = opcua_server.nodes["Line2.Speed"]
+    yield node_id
+    _write(opcua_server, node_id, 300)
+
+
+def _write(opcua_server, node_id, value):
+    node = opcua_server.server.get_node(node_id)
+    opcua_server.call(node.write_value(ua.Variant(value, ua.VariantType.Int32)))
+
+
+def _server_items(opcua_server):
+    """Monitored items the server holds across all subscriptions."""
+
+    async def count():
+        subs = opcua_server.server.iserver.subscription_service.subscriptions
+        return sum(len(s.monitored_item_srv._monitored_items) for s in subs.values())
+
+    return opcua_server.call(count())
+
+
+def _next_value(sub, node_id, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        item = sub.get(timeout=deadline - time.monotonic())
+        if item and item[0] == CHANNEL and item[1]["node_id"] == node_id:
+            return item[1]
+    raise AssertionError(f"no value for {node_id}")
+
+
+class TestWatcher:
+    def test_watchers_share_one_monitored_item(self, watcher, config, opcua_server):
+        node_id = opcua_server.nodes["Line1.Status"]
+        before = _server_items(opcua_server)
+        for _ in range(3):
+            watcher.watch(config, node_id)
+        assert watcher.get_stats() == {"servers": 1, "items": 1, "watchers": 3}
+        assert _server_items(opcua_server) == before + 1
+
+        for _ in range(3):
+            watcher.unwatch(config, node_id)
+        assert watcher.get_stats() == {"servers": 0, "items": 0, "watchers": 0}
+        assert _server_items(opcua_server) == before
+
+    def test_pushes_changes_quickly(self, watcher, config, opcua_server, speed):
+        sub = event_bus.subscribe([CHANNEL])
+        try:
+            watcher.watch(config, speed)
+            assert _next_value(sub, speed)["value"] == "300"  # initial value
+            started = time.monotonic()
+            _write(opcua_server, speed, 1234)
+            value = _next_value(sub, speed)
+            latency = time.monotonic() - started
+            assert value["value"] == "1234"
+            assert value["status_code"] == "Good"
+            assert latency < 1.0
+        finally:
+            sub.close()
+            watcher.unwatch(config, speed)
+
+    def test_last_value_for_late_watchers(self, watcher, config, opcua_server):
+        node_id = opcua_server.nodes["Line1.Speed"]
+        sub = event_bus.subscribe([CHANNEL])
+        try:
+            watcher.watch(config, node_id)
+            _next_value(sub, node_id)
+            assert watcher.watch(config, node_id)["value"] == "300"
+        finally:
+            sub.close()
+            watcher.unwatch(config, node_id)
+            watcher.unwatch(config, node_id)
+
+    def test_rejected_node_is_not_kept(self, watcher, config):
+        with pytest.raises(ua.UaStatusCodeError):
+            watcher.watch(config, "ns=2;s=DoesNotExist")
+        assert watcher.get_stats()["watchers"] == 0
+        with pytest.raises(ValueError):
+            watcher.watch(config, "not a node id")
+
+    def test_items_move_to_a_replaced_session(
+        self, watcher, pool, config, opcua_server, speed
+    ):
+        sub = event_bus.subscribe([CHANNEL])
+        try:
+            watcher.watch(config, speed)
+            _next_value(sub, speed)
+
+            async def drop():
+                (session,) = pool._sessions.values()
+                session.client.uaclient.protocol.transport.close()
+                await asyncio.sleep(0.1)
+
+            asyncio.run_coroutine_threadsafe(drop(), pool._loop).result(5)
+            # The supervisor reconnects and re-creates the item; its first
+            # notification is the current value
+            assert _next_value(sub, speed, timeout=5)["value"] == "300"
+            _write(opcua_server, speed, 77)
+            assert _next_value(sub, speed)["value"] == "77"
+            assert pool.get_stats()["reconnects"] == 1
+        finally:
+            sub.close()
+            watcher.unwatch(config, speed)
+
+    def test_silent_server_does_not_block_others(self, watcher, config, opcua_server):
+        # Accepts the TCP connection but never answers the OPC UA handshake
+        listener = socket.create_server(("127.0.0.1", 0))
+        silent = {
+            "endpoint": f"opc.tcp://127.0.0.1:{listener.getsockname()[1]}",
+            "connect_timeout": "2s",
+        }
+        errors = []
+
+        def watch_silent():
+            try:
+                watcher.watch(silent, "ns=2;s=Anything")
+            except Exception as e:
+                errors.append(e)
+
+        stuck = threading.Thread(target=watch_silent)
+        node_id = opcua_server.nodes["Line1.Status"]
+        try:
+            stuck.start()
+            time.sleep(0.2)
+            started = time.monotonic()
+            watcher.watch(config, node_id)
+            assert watcher.get_stats()["items"] == 1
+            assert time.monotonic() - started < 1.5
+            assert stuck.is_alive()  # still waiting on the silent server
+            watcher.unwatch(config, node_id)
+            stuck.join(15)
+        finally:
+            listener.close()
+        assert len(errors) == 1
+        assert watcher.get_stats() == {"servers": 0, "items": 0, "watchers": 0}
+
+
+class TestStreamRoute:
+    @pytest.fixture
+    def client(self, monkeypatch, watcher, opcua_route_client):
+        monkeypatch.setattr(stream_routes, "opcua_watcher", watcher)
+        opcua_route_client.application.register_blueprint(stream_bp)
+        return opcua_route_client
+
+    def test_streams_values_and_releases_on_close(
+        self, client, watcher, opcua_server, speed
+    ):
+        resp = client.get(f"/api/stream/opcua-values?node_id={speed}", buffered=False)
+        chunks = iter(resp.response)
+        try:
+            assert resp.mimetype == "text/event-stream"
+            assert next(chunks).startswith(b"retry:")
+            assert watcher.get_stats()["items"] == 1
+            first = next(chunks).decode()
+            assert first.startswith("event: value")
+            assert '"value": "300"' in first
+            _write(opcua_server, speed, 5)
+            assert '"value": "5"' in next(chunks).decode()
+        finally:
+            resp.close()
+        assert watcher.get_stats()["items"] == 0
+
+    def test_bad_requests(self, client):
+        assert client.get("/api/stream/opcua-values").status_code == 400
+        assert client.get("/api/stream/opcua-values?node_id=x").status_code == 400
+        resp = client.get("/api/stream/opcua-values?node_id=ns=2;s=Nope")
+        assert resp.status_code == 500
+        assert event_bus.subscriber_count(CHANNEL) == 0
@@ -0,0 +1,163 @@
+"""Tests for the sampling audit.
+
+The audit tells users which nodes waste server CPU and MQTT bandwidth (sampled
+faster than the server refreshes them or than they change) and which likely
+miss changes, so its thresholds and suggested rate classes are checked here.
+The route test reads MinimumSamplingInterval from the in-process server.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+from asyncua import ua
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from app.routes import opcua as opcua_routes
+from app.services.sampling_audit import audit, format_interval, parse_interval
+from app.services.value_cache import ValueCache
+
+_POLL_1S = {"mode": "polling", "scan_rate": "1s"}
+
+
+def _node(name):
+    return {"name": name, "namespace": "2", "identifier_type": "s", "identifier": name}
+
+
+def _info(name, min_sampling=0.0, historizing=False):
+    return {
+        "node_id": f"ns=2;s={name}",
+        "min_sampling_interval": min_sampling,
+        "historizing": historizing,
+    }
+
+
+def _history(values, step=1.0):
+    return [(1000 + i * step, v) for i, v in enumerate(values)]
+
+
+def _one(acquisition, info, history=()):
+    report = audit([_node("A")], acquisition, [info], {"A": list(history)})
+    return report["nodes"][0]
+
+
+class TestIntervals:
+    def test_parse_and_format(self):
+        assert parse_interval("500ms") == 500
+        assert parse_interval("1.5s") == 1500
+        assert parse_interval("2m") == 120_000
+        assert format_interval(120_000) == "2m"
+        assert format_interval(250) == "250ms"
+        with pytest.raises(ValueError):
+            parse_interval("fast")
+
+
+class TestAudit:
+    def test_faster_than_server(self):
+        node = _one(_POLL_1S, _info("A", min_sampling=5000.0))
+        assert node["findings"] == ["faster_than_server"]
+        assert node["suggested_interval_ms"] == 5000
+
+    def test_static_value_is_flagged(self):
+        node = _one(_POLL_1S, _info("A"), _history([7] * 60))
+        assert node["findings"] == ["static"]
+        assert node["suggested_interval_ms"] == 60000
+
+    def test_oversampled(self):
+        # Changes every 20 polls at 1s
+        values = [i // 20 for i in range(60)]
+        node = _one(_POLL_1S, _info("A"), _history(values))
+        assert node["findings"] == ["oversampled"]
+        assert node["suggested_interval_ms"] == 10000
+
+    def test_undersampled_when_every_poll_differs(self):
+        node = _one(_POLL_1S, _info("A"), _history(range(30)))
+        assert node["findings"] == ["undersampled"]
+        assert node["suggested_interval_ms"] == 500
+        # A subscription only stores changes, so that is expected there
+        subscription = {"mode": "subscription", "sampling_interval": "1s"}
+        assert _one(subscription, _info("A"), _history(range(30)))["findings"] == []
+
+    def test_too_little_history_is_not_judged(self):
+        node = _one(_POLL_1S, _info("A"), _history([1, 1, 1]))
+        assert node["findings"] == []
+        assert node["suggested_interval_ms"] == 1000
+
+    def test_rate_classes_and_summary(self):
+        nodes = [_node("Fast"), _node("Slow"), _node("Missing")]
+        info = [
+            _info("Fast"),
+            _info("Slow", min_sampling=10000.0),
+            {"node_id": "ns=2;s=Missing", "error": "Unknown node"},
+        ]
+        report = audit(nodes, _POLL_1S, info, {})
+        assert report["rate_classes"] == [
+            {"interval": "1s", "interval_ms": 1000, "nodes": ["Fast"]},
+            {"interval": "10s", "interval_ms": 10000, "nodes": ["Slow"]},
+        ]
+        summary = report["summary"]
+        assert summary["flagged"] == 1
+        assert summary["errors"] == 1
+        assert summary["faster_than_server"] == 1
+        assert summary["samples_per_min"] == 120
+        assert summary["suggested_samples_per_min"] == 66
+
+
+class TestRoute:
+    @pytest.fixture
+    def client(self, monkeypatch, opcua_route_client, opcua_server):
+        speed = opcua_server.nodes["Line1.Speed"]
+        temperature = opcua_server.server.get_node(
+            opcua_server.nodes["Line2.Temperature"]
+        )
+        opcua_route_client.sections.update(
+            acquisition={"mode": "polling", "scan_rate": "1s"},
+            nodes=[
+                {
+                    "name": "Speed",
+                    "namespace": "2",
+                    "identifier_type": "i",
+                    "identifier": speed.split("=")[-1],
+                },
+                {
+                    "name": "Temperature",
+                    "namespace": "2",
+                    "identifier_type": "i",
+                    "identifier": temperature.nodeid.Identifier,
+                },
+            ],
+        )
+        cache = ValueCache()
+        monkeypatch.setattr(opcua_routes, "value_cache", cache)
+        attr = ua.AttributeIds.MinimumSamplingInterval
+        opcua_server.call(
+            temperature.write_attribute(attr, ua.DataValue(ua.Variant(5000.0)))
+        )
+        opcua_route_client.cache = cache
+        yield opcua_route_client
+        opcua_server.call(
+            temperature.write_attribute(attr, ua.DataValue(ua.Variant(0.0)))
+        )
+
+    @pytest.mark.parametrize("tagged", [False, True], ids=["grouped", "individual"])
+    def test_reads_server_and_history(self, client, opcua_server, tagged):
+        # Individual mode tags each value with its node id; grouped mode does not
+        tags = {"id": opcua_server.nodes["Line1.Speed"]} if tagged else {}
+        client.cache.update(
+            [
+                {
+                    "name": "opcua",
+                    "tags": tags,
+                    "timestamp": 1000 + i,
+                    "fields": {"Speed": 300},
+                }
+                for i in range(30)
+            ]
+        )
+        report = client.post("/api/opcua/sampling-audit").get_json()
+        by_name = {n["name"]: n for n in report["nodes"]}
+        assert by_name["Speed"]["findings"] == ["static"]
+        assert by_name["Speed"]["samples"] == 30
+        assert by_name["Temperature"]["findings"] == ["faster_than_server"]
+        assert by_name["Temperature"]["min_sampling_interval"] == 5000.0
+        assert by_name["Temperature"]["historizing"] is False
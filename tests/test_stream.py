@@ -0,0 +1,195 @@
+"""Tests for the /api/stream Server-Sent Events endpoint, including a load test.
+
+The stream replaces per-client polling. Server work must scale with the rate of
+change, not with the number of open browsers: 50 subscribers must all receive
+every event while the dashboard is still sampled once per interval.
+"""
+
+import http.client
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from flask import Flask
+from werkzeug.serving import make_server
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from app.routes import stream as stream_routes
+from app.routes.stream import stream_bp
+from app.services import event_bus, event_log
+from app.services.dashboard_feed import DashboardFeed
+
+_SUBSCRIBERS = 50
+_EVENTS = 20
+
+
+class _CountingSource:
+    """Stand-in for get_snapshot(): changes on every call and counts calls."""
+
+    def __init__(self):
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+            n = self.calls
+        return {"health": {"cpu_percent": n, "memory_percent": 40}}
+
+
+@pytest.fixture
+def feed(monkeypatch):
+    source = _CountingSource()
+    feed = DashboardFeed(interval=0.05, source=source)
+    feed.source = source
+    monkeypatch.setattr(stream_routes, "dashboard_feed", feed)
+    yield feed
+    feed.stop()
+
+
+@pytest.fixture
+def app(tmp_path, feed):
+    app = Flask(__name__)
+    app.config["DATA_DIR"] = str(tmp_path)
+    app.register_blueprint(stream_bp)
+    yield app
+    # Wake any stream generators still blocked on their queue
+    for sub in list(event_bus._subscribers):
+        sub.close()
+
+
+def _parse_events(chunks):
+    """Split raw SSE text into (event, data) tuples, skipping comments."""
+    events = []
+    for block in "".join(chunks).split("\n\n"):
+        name, data = None, None
+        for line in block.splitlines():
+            if line.startswith("event: "):
+                name = line[7:]
+            elif line.startswith("data: "):
+                data = line[6:]
+        if name:
+            events.append((name, data))
+    return events
+
+
+class TestStreamRoute:
+    def test_headers(self, app):
+        resp = app.test_client().get("/api/stream?channels=log", buffered=False)
+        try:
+            assert resp.mimetype == "text/event-stream"
+            assert resp.headers["Cache-Control"] == "no-cache"
+        finally:
+            resp.close()
+
+    def test_pushes_log_event(self, app):
+        resp = app.test_client().get("/api/stream?channels=log", buffered=False)
+        chunks = iter(resp.response)
+        try:
+            assert next(chunks).startswith(b"retry:")
+            event_log.log("warning", "telegraf", "Restarted")
+            events = _parse_events([next(chunks).decode()])
+            assert events[0][0] == "log"
+            assert "Restarted" in events[0][1]
+        finally:
+            resp.close()
+
+    def test_closing_stream_unsubscribes(self, app):
+        before = event_bus.subscriber_count("log")
+        resp = app.test_client().get("/api/stream?channels=log", buffered=False)
+        chunks = iter(resp.response)
+        next(chunks)
+        assert event_bus.subscriber_count("log") == before + 1
+        resp.close()
+        assert event_bus.subscriber_count("log") == before
+
+    def test_unknown_channels_default_to_all(self, app):
+        resp = app.test_client().get("/api/stream?channels=bogus", buffered=False)
+        chunks = iter(resp.response)
+        try:
+            next(chunks)
+            assert event_bus.subscriber_count("tail") >= 1
+            assert event_bus.subscriber_count("dashboard") >= 1
+        finally:
+            resp.close()
+
+    def test_new_client_gets_full_dashboard_state(self, app, feed):
+        feed.sample()
+        resp = app.test_client().get("/api/stream?channels=dashboard", buffered=False)
+        chunks = iter(resp.response)
+        try:
+            next(chunks)  # retry
+            name, data = _parse_events([next(chunks).decode()])[0]
+            assert name == "dashboard"
+            assert '"full": true' in data
+            assert "cpu_percent" in data
+        finally:
+            resp.close()
+
+
+class TestLoad:
+    def test_fifty_concurrent_subscribers(self, app, feed):
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        port = server.server_port
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        received = [None] * _SUBSCRIBERS
+        errors = []
+
+        def client(i):
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+                conn.request("GET", "/api/stream?channels=dashboard,log")
+                resp = conn.getresponse()
+                buf, logs, dashboards = "", [], 0
+                while len(logs) < _EVENTS or dashboards == 0:
+                    line = resp.fp.readline().decode()
+                    if not line:
+                        break
+                    buf += line
+                    if line == "\n":
+                        for name, data in _parse_events([buf]):
+                            if name == "log":
+                                logs.append(data)
+                            elif name == "dashboard":
+                                dashboards += 1
+                        buf = ""
+                received[i] = (logs, dashboards)
+                conn.close()
+            except Exception as e:
+                errors.append(e)
+
+        test_started = time.monotonic()
+        try:
+            threads = [
+                threading.Thread(target=client, args=(i,)) for i in range(_SUBSCRIBERS)
+            ]
+            for t in threads:
+                t.start()
+
+            deadline = time.monotonic() + 10
+            while event_bus.subscriber_count("log") < _SUBSCRIBERS:
+                assert time.monotonic() < deadline, "subscribers did not connect"
+                time.sleep(0.02)
+
+            for n in range(_EVENTS):
+                event_log.log("info", "system", f"load-{n}")
+            for t in threads:
+                t.join(timeout=15)
+            elapsed = time.monotonic() - test_started
+        finally:
+            server.shutdown()
+
+        assert not errors
+        for logs, dashboards in received:
+            messages = [d for d in logs if "load-" in d]
+            assert len(messages) == _EVENTS
+            for n, data in enumerate(messages):
+                assert f'"load-{n}"' in data
+            assert dashboards >= 1
+
+        # One shared sampler: snapshots follow the sampling interval, not the
+        # number of connected clients.
+        assert feed.source.calls <= elapsed / 0.05 + 2
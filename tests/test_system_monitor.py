@@ -5,6 +5,7 @@ Bugs produce wrong metric values or None-related errors in the frontend.
 """
 
 import json
+import shutil
 import sys
 from pathlib import Path
 
@@ -21,6 +22,9 @@ from app.services.system_monitor import (
 
 _TS = 1700000010  # arbitrary fixed timestamp
 
+# Recorded Telegraf metrics.json files (30 steady intervals; a process restart)
+_FIXTURES = Path(__file__).parent / "fixtures"
+
 
 def _gather(
     input_name, metrics_gathered=5, gather_time_ns=12_500_000, errors=0, ts=_TS
@@ -161,6 +165,46 @@ class TestGetTelegrafMetricsLatestWins:
         assert d["mqtt_written"] == 200
 
 
+class TestGetTelegrafMetricsSplitOpcua:
+    """A node list split over several [[inputs.opcua]] (aliases opcua_partN)."""
+
+    @staticmethod
+    def _part(line, alias):
+        record = json.loads(line)
+        record["tags"]["alias"] = alias
+        return json.dumps(record)
+
+    def test_parts_of_the_newest_sample_are_summed(self, app_ctx):
+        old = [
+            self._part(
+                _gather("opcua", metrics_gathered=1, ts=_TS - 10), "opcua_part1"
+            ),
+            self._part(
+                _gather("opcua", metrics_gathered=1, ts=_TS - 10), "opcua_part2"
+            ),
+        ]
+        new = [
+            self._part(
+                _gather("opcua", metrics_gathered=5, gather_time_ns=10_000_000),
+                "opcua_part1",
+            ),
+            self._part(_opcua_status(read_success=25, read_error=2), "opcua_part1"),
+            self._part(
+                _gather(
+                    "opcua", metrics_gathered=7, gather_time_ns=30_000_000, errors=1
+                ),
+                "opcua_part2",
+            ),
+            self._part(_opcua_status(read_success=10, read_error=1), "opcua_part2"),
+        ]
+        _write_metrics(app_ctx, *old, *new)
+        d = get_telegraf_metrics()
+        assert (d["opcua_gathered"], d["opcua_errors"]) == (12, 1)
+        assert d["opcua_scan_time_ms"] == 30.0
+        assert (d["opcua_read_success"], d["opcua_read_error"]) == (35, 3)
+        assert d["last_updated"] == _TS
+
+
 class TestGetTelegrafMetricsPartial:
     def test_only_opcua_modbus_fields_default(self, app_ctx):
         _write_metrics(
@@ -349,3 +393,94 @@ class TestCrashDetection:
         _write_metrics(app_ctx, _gather("opcua", metrics_gathered=2))
         d = get_telegraf_metrics()
         assert d["process_crash_detected"] is False
+
+
+# ---------------------------------------------------------------------------
+# Memstats, agent and write-time history (recorded fixtures)
+# ---------------------------------------------------------------------------
+
+
+def _use_fixture(app_ctx, name):
+    shutil.copy(_FIXTURES / name, app_ctx / "metrics.json")
+
+
+def _write_time(output, write_time_ns, ts):
+    return json.dumps(
+        {
+            "name": "internal_write",
+            "tags": {"output": output},
+            "fields": {"metrics_written": 1, "write_time_ns": write_time_ns},
+            "timestamp": ts,
+        }
+    )
+
+
+class TestTelegrafInternalMetrics:
+    def setup_method(self):
+        reset_crash_detection()
+
+    def test_memstats_and_agent(self, app_ctx):
+        _use_fixture(app_ctx, "metrics_steady.json")
+        d = get_telegraf_metrics()
+        assert d["telegraf_heap_alloc_bytes"] == 10955665
+        assert d["telegraf_heap_in_use_bytes"] == 12855665
+        assert d["telegraf_heap_objects_bytes"] == 53160
+        assert d["telegraf_sys_bytes"] == 29400000
+        assert d["telegraf_num_gc"] == 59
+        assert d["agent_metrics_gathered"] == 900
+        assert d["agent_metrics_written"] == 1350
+        assert d["agent_metrics_dropped"] == 0
+
+    def test_existing_fields_unchanged(self, app_ctx):
+        _use_fixture(app_ctx, "metrics_steady.json")
+        d = get_telegraf_metrics()
+        assert d["opcua_gathered"] == 450
+        assert d["mqtt_written"] == 450
+        assert d["opcua_read_success"] == 450
+
+    def test_mqtt_write_time_percentiles(self, app_ctx):
+        """29 writes of 3-5 ms with three 48 ms broker hiccups (first write pending)."""
+        _use_fixture(app_ctx, "metrics_steady.json")
+        d = get_telegraf_metrics()
+        assert d["mqtt_write_time_ms"] == 4.2
+        assert d["mqtt_write_time_p50_ms"] == 3.8
+        assert d["mqtt_write_time_p95_ms"] == 48.0
+        assert d["mqtt_write_time_p99_ms"] == 48.0
+        assert d["output_write_times"]["mqtt"]["samples"] == 29
+
+    def test_every_output_summarised(self, app_ctx):
+        _use_fixture(app_ctx, "metrics_steady.json")
+        times = get_telegraf_metrics()["output_write_times"]
+        assert set(times) == {"mqtt", "file"}
+        assert times["file"]["p99_ms"] < 1
+
+    def test_heap_growth(self, app_ctx):
+        """The steady fixture's heap grows by ~40 kB per 10 s interval."""
+        _use_fixture(app_ctx, "metrics_steady.json")
+        growth = get_telegraf_metrics()["telegraf_heap_growth_bytes_per_min"]
+        assert 200_000 < growth < 300_000
+
+    def test_heap_growth_ignores_previous_process(self, app_ctx):
+        """The heap of the crashed process must not read as a sudden shrink."""
+        _use_fixture(app_ctx, "metrics_restart.json")
+        d = get_telegraf_metrics()
+        assert d["telegraf_num_gc"] == 11
+        assert abs(d["telegraf_heap_growth_bytes_per_min"]) < 100_000
+
+    def test_history_is_bounded(self, app_ctx):
+        lines = [
+            _write_time("mqtt", 1_000_000 * (i + 1), _TS + 10 * i) for i in range(300)
+        ]
+        _write_metrics(app_ctx, *lines)
+        times = get_telegraf_metrics()["output_write_times"]["mqtt"]
+        assert times["samples"] == 120
+        assert times["last_ms"] == 300.0
+        assert times["p50_ms"] == 240.0  # only the newest 120 writes count
+
+    def test_no_memstats_or_writes(self, app_ctx):
+        _write_metrics(app_ctx, _gather("opcua"), _write_mqtt())
+        d = get_telegraf_metrics()
+        assert d["telegraf_heap_alloc_bytes"] is None
+        assert d["telegraf_heap_growth_bytes_per_min"] is None
+        assert d["mqtt_write_time_p95_ms"] is None
+        assert d["output_write_times"] == {}
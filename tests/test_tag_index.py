@@ -0,0 +1,253 @@
+"""Tests for the address-space crawler and tag index.
+
+The crawl runs against a live PLC, so it must stay within its node and rate
+budget, stop when cancelled and never index properties or namespace 0. The
+index backs search and "add all matching" in the browser, so its matching
+rules and stale-row cleanup matter as much as its speed.
+"""
+
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from app.routes import opcua as opcua_routes
+from app.services.opcua_pool import OpcuaSessionPool
+from app.services.tag_index import INDEX_FILE, TagCrawler, TagIndex
+
+_SERVER = "opc.tcp://plc:4840"
+
+
+def _row(node_id, path, node_class="Variable", data_type="Double"):
+    return (node_id, path, path.rsplit("/", 1)[-1], node_class, data_type)
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = TagIndex(str(tmp_path / "tags.sqlite"))
+    index.add(
+        _SERVER,
+        1,
+        [
+            _row("ns=2;s=Line1", "Plant/Line1", "Object", None),
+            _row("ns=2;s=L1.Temp", "Plant/Line1/Temperature"),
+            _row("ns=2;s=L1.Speed", "Plant/Line1/Speed", data_type="Int32"),
+            _row("ns=2;s=L2.Temp", "Plant/Line2/Temperature"),
+            _row("ns=2;s=Pct", "Plant/Line2/Load_100%"),
+        ],
+    )
+    return index
+
+
+class TestSearch:
+    def test_substring_over_path(self, index):
+        result = index.search(_SERVER, "line1", mode="substring")
+        assert result["total"] == 3
+        assert [n["path"] for n in result["nodes"]] == [
+            "Plant/Line1",
+            "Plant/Line1/Speed",
+            "Plant/Line1/Temperature",
+        ]
+
+    def test_prefix_matches_name_or_path(self, index):
+        by_name = index.search(_SERVER, "temp", mode="prefix")
+        assert {n["node_id"] for n in by_name["nodes"]} == {
+            "ns=2;s=L1.Temp",
+            "ns=2;s=L2.Temp",
+        }
+        by_path = index.search(_SERVER, "Plant/Line2/", mode="prefix")
+        assert by_path["total"] == 2
+
+    def test_like_wildcards_are_literal(self, index):
+        assert index.search(_SERVER, "100%", mode="substring")["total"] == 1
+        assert index.search(_SERVER, "Load%", mode="prefix")["total"] == 0
+        assert index.search(_SERVER, "Line_", mode="substring")["total"] == 0
+
+    def test_regex(self, index):
+        result = index.search(_SERVER, r"Line\d/T", mode="regex")
+        assert result["total"] == 2
+        with pytest.raises(re.error):
+            index.search(_SERVER, "(", mode="regex")
+
+    def test_bad_regex_opens_no_connection(self, index, monkeypatch):
+        opened = []
+        connect = index._connect
+        monkeypatch.setattr(index, "_connect", lambda: opened.append(1) or connect())
+        with pytest.raises(re.error):
+            index.search(_SERVER, "(", mode="regex")
+        assert opened == []
+
+    def test_unknown_mode(self, index):
+        with pytest.raises(ValueError):
+            index.search(_SERVER, "x", mode="glob")
+
+    def test_node_class_limit_and_offset(self, index):
+        result = index.search(_SERVER, "", node_class="Variable", limit=2, offset=1)
+        assert result["total"] == 4
+        assert [n["path"] for n in result["nodes"]] == [
+            "Plant/Line1/Temperature",
+            "Plant/Line2/Load_100%",
+        ]
+
+    def test_servers_are_separate(self, index):
+        assert index.search("opc.tcp://other:4840", "", limit=None)["total"] == 0
+
+
+class TestPrune:
+    def test_full_crawl_drops_missing_nodes(self, index):
+        index.add(_SERVER, 2, [_row("ns=2;s=L1.Temp", "Plant/Line1/Temperature")])
+        assert index.prune(_SERVER, 2) == 4
+        assert index.count(_SERVER) == 1
+
+    def test_subtree_crawl_only_touches_its_subtree(self, index):
+        index.add(_SERVER, 2, [_row("ns=2;s=L1.Temp", "Plant/Line1/Temperature")])
+        assert index.prune(_SERVER, 2, "Plant/Line1") == 1  # Speed is gone
+        assert index.path_of(_SERVER, "ns=2;s=L2.Temp") == "Plant/Line2/Temperature"
+        assert index.path_of(_SERVER, "ns=2;s=L1.Speed") is None
+
+
+# ---------------------------------------------------------------------------
+# Crawling the in-process server
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture
+def pool():
+    pool = OpcuaSessionPool()
+    yield pool
+    pool.stop()
+
+
+def _crawl(pool, opcua_server, index, **options):
+    crawler = TagCrawler(pool)
+    config = {"endpoint": opcua_server.endpoint, "connect_timeout": "10s"}
+    assert crawler.start(config, index, **{"rate": 0, **options})
+    crawler.join(30)
+    return crawler.get_progress()
+
+
+class TestCrawler:
+    def test_indexes_the_whole_plant(self, pool, opcua_server, tmp_path):
+        index = TagIndex(str(tmp_path / "tags.sqlite"))
+        progress = _crawl(pool, opcua_server, index)
+        assert progress["state"] == "done"
+        # Plant, Line1/2 with 3 variables each, Bulk with its tags
+        assert progress["indexed"] == 1 + 2 * 4 + 1 + opcua_server.bulk_tags
+        temp = index.search(opcua_server.endpoint, "Plant/Line1/Temperature")
+        assert temp["nodes"] == [
+            {
+                "node_id": opcua_server.nodes["Line1.Temperature"],
+                "path": "Plant/Line1/Temperature",
+                "display_name": "Temperature",
+                "node_class": "Variable",
+                "data_type": "Double",
+            }
+        ]
+        assert index.search(opcua_server.endpoint, "EngineeringUnits")["total"] == 0
+        assert index.search(opcua_server.endpoint, "Server")["total"] == 0
+
+    def test_batches_requests(self, pool, opcua_server, tmp_path):
+        index = TagIndex(str(tmp_path / "tags.sqlite"))
+        progress = _crawl(pool, opcua_server, index)
+        # 511 nodes browsed 100 per Browse, plus one DataType Read per batch
+        # that found variables
+        assert progress["browsed"] == 511
+        assert progress["requests"] <= 14
+
+    def test_node_budget(self, pool, opcua_server, tmp_path):
+        index = TagIndex(str(tmp_path / "tags.sqlite"))
+        progress = _crawl(pool, opcua_server, index, max_nodes=50)
+        assert progress["state"] == "done"
+        assert progress["truncated"] is True
+        assert index.count(opcua_server.endpoint) == 50
+
+    def test_cancel(self, pool, opcua_server, tmp_path):
+        index = TagIndex(str(tmp_path / "tags.sqlite"))
+        crawler = TagCrawler(pool)
+        config = {"endpoint": opcua_server.endpoint}
+        crawler.start(config, index, rate=5)
+        assert crawler.start(config, index) is False  # one crawl at a time
+        crawler.cancel()
+        crawler.join(10)
+        assert crawler.get_progress()["state"] == "cancelled"
+        assert index.count(opcua_server.endpoint) < 500
+
+    def test_subtree_keeps_paths(self, pool, opcua_server, tmp_path):
+        index = TagIndex(str(tmp_path / "tags.sqlite"))
+        _crawl(pool, opcua_server, index)
+        progress = _crawl(pool, opcua_server, index, root=opcua_server.nodes["Line2"])
+        assert progress["indexed"] == 3
+        speed = index.path_of(opcua_server.endpoint, opcua_server.nodes["Line2.Speed"])
+        assert speed == "Plant/Line2/Speed"
+        assert index.count(opcua_server.endpoint) == 510
+
+
+class TestRoutes:
+    @pytest.fixture
+    def client(self, monkeypatch, opcua_route_client, opcua_server):
+        temperature = opcua_server.nodes["Line1.Temperature"]
+        opcua_route_client.sections["nodes"] = [
+            {
+                "name": "Temperature",
+                "namespace": "2",
+                "identifier_type": "i",
+                "identifier": temperature.split("=")[-1],
+            }
+        ]
+        crawler = TagCrawler(opcua_route_client.pool)
+        monkeypatch.setattr(opcua_routes, "tag_crawler", crawler)
+        return opcua_route_client
+
+    def _crawl(self, client):
+        assert client.post("/api/opcua/crawl", json={"rate": 0}).status_code == 200
+        opcua_routes.tag_crawler.join(30)
+        return client.get("/api/opcua/crawl").get_json()
+
+    def test_crawl_then_search(self, client):
+        progress = self._crawl(client)
+        assert progress["state"] == "done"
+        assert progress["index_size"] == progress["indexed"]
+        result = client.get("/api/opcua/tags?q=Tag01&mode=prefix&limit=5").get_json()
+        assert result["total"] == 100
+        assert len(result["nodes"]) == 5
+
+    def test_bad_search_is_400(self, client):
+        assert client.get("/api/opcua/tags?q=(&mode=regex").status_code == 400
+        assert client.get("/api/opcua/tags?q=x&mode=glob").status_code == 400
+        assert (
+            client.post("/api/opcua/crawl", json={"concurrency": 0}).status_code == 400
+        )
+
+    def test_select_matching_variables(self, client):
+        self._crawl(client)
+        resp = client.post("/api/opcua/tags/select", json={"q": "Plant/Line1/"})
+        assert resp.get_json() == {
+            "ok": True,
+            "added": 2,
+            "skipped": 0,
+            "matched": 3,
+        }
+        names = sorted(n["name"] for n in client.sections["nodes"])
+        assert names == ["Speed", "Status", "Temperature"]
+        speed = next(n for n in client.sections["nodes"] if n["name"] == "Speed")
+        assert speed["namespace"] == "2"
+        assert speed["identifier_type"] == "i"
+
+    def test_unparseable_node_ids_are_skipped(self, client, opcua_server, tmp_path):
+        self._crawl(client)
+        TagIndex(str(tmp_path / INDEX_FILE)).add(
+            opcua_server.endpoint,
+            1,
+            [("ns=2;i=oops", "Plant/Line1/Broken", "Broken", "Variable", "Double")],
+        )
+        resp = client.post("/api/opcua/tags/select", json={"q": "Plant/Line1/"})
+        assert resp.status_code == 200
+        assert resp.get_json() == {
+            "ok": True,
+            "added": 2,
+            "skipped": 1,
+            "matched": 4,
+        }
+        assert "Broken" not in {n["name"] for n in client.sections["nodes"]}
@@ -12,7 +12,7 @@ import pytest
 
 # Ensure the project root is importable
 sys.path.insert(0, str(Path(__file__).parent.parent))
-from app.services.telegraf_config import render_config
+from app.services.telegraf_config import plan_opcua_inputs, render_config
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -329,3 +329,99 @@ class TestTomlInjection:
         _, parsed = _render_and_parse(cfg)
         # The injected table must NOT appear as a parsed TOML section
         assert "evil" not in parsed.get("inputs", {})
+
+
+class TestInternalMetricsOutput:
+    """Internal metrics are pushed to the gateway instead of written to a file."""
+
+    def test_http_output_to_gateway(self):
+        _, parsed = _render_and_parse(_cfg())
+        outputs = parsed["outputs"]
+        assert "file" not in outputs
+        http = {o["alias"]: o for o in outputs["http"]}["gateway_metrics"]
+        assert http["url"] == "http://gateway:5000/api/telegraf/ingest"
+        assert http["data_format"] == "json"
+        assert http["namepass"] == ["internal_*"]
+
+    def test_custom_ingest_url(self):
+        rendered = render_config(_cfg(), ingest_url="http://10.0.0.5:8050/")
+        urls = {o["url"] for o in tomllib.loads(rendered)["outputs"]["http"]}
+        assert "http://10.0.0.5:8050/api/telegraf/ingest" in urls
+        assert "http://10.0.0.5:8050/api/values/ingest" in urls
+
+    def test_values_copy_follows_enabled_inputs(self):
+        _, parsed = _render_and_parse(TestDualInput()._dual_cfg())
+        values = {o["alias"]: o for o in parsed["outputs"]["http"]}["gateway_values"]
+        assert values["url"] == "http://gateway:5000/api/values/ingest"
+        assert values["namepass"] == ["opcua", "modbus"]
+        assert values["json_timestamp_units"] == "1ms"
+
+    def test_values_buffer_keeps_telegraf_default_for_small_configs(self):
+        _, parsed = _render_and_parse(_cfg())
+        values = {o["alias"]: o for o in parsed["outputs"]["http"]}["gateway_values"]
+        assert values["metric_buffer_limit"] == 10000
+
+    def test_values_buffer_holds_several_gathers_of_every_tag(self):
+        nodes = [{**_BASE_NODE, "identifier": str(i)} for i in range(5000)]
+        _, parsed = _render_and_parse(_cfg(nodes=nodes))
+        values = {o["alias"]: o for o in parsed["outputs"]["http"]}["gateway_values"]
+        assert values["metric_buffer_limit"] == 15000
+
+
+class TestOperationLimits:
+    """Inputs are split to stay within what the OPC UA server accepts per request."""
+
+    def _nodes(self, n):
+        return [{**_BASE_NODE, "name": f"N{i}", "identifier": str(i)} for i in range(n)]
+
+    def test_within_limit_is_one_input(self):
+        config = _cfg(nodes=self._nodes(5))
+        parsed = tomllib.loads(render_config(config, limits={"max_nodes_per_read": 5}))
+        (opcua,) = parsed["inputs"]["opcua"]
+        assert "alias" not in opcua
+        assert len(opcua["nodes"]) == 5
+        assert plan_opcua_inputs(config, {"max_nodes_per_read": 5})[1] == []
+
+    def test_polling_splits_by_max_nodes_per_read(self):
+        config = _cfg(nodes=self._nodes(5))
+        limits = {"max_nodes_per_read": 2, "max_monitored_items_per_call": 100}
+        parsed = tomllib.loads(render_config(config, limits=limits))
+        inputs = parsed["inputs"]["opcua"]
+        assert [len(i["nodes"]) for i in inputs] == [2, 2, 1]
+        assert [i["alias"] for i in inputs] == [
+            "opcua_part1",
+            "opcua_part2",
+            "opcua_part3",
+        ]
+        assert all(i["name"] == "opcua" for i in inputs)
+        _, warnings = plan_opcua_inputs(config, limits)
+        assert len(warnings) == 1
+        assert "max_nodes_per_read" in warnings[0]
+
+    def test_subscription_splits_by_max_monitored_items(self):
+        acq = {**_BASE_ACQ, "mode": "subscription"}
+        config = _cfg(nodes=self._nodes(5), acquisition=acq)
+        limits = {"max_nodes_per_read": 2, "max_monitored_items_per_call": 3}
+        inputs = tomllib.loads(render_config(config, limits=limits))["inputs"]["opcua"]
+        assert [len(i["nodes"]) for i in inputs] == [3, 2]
+
+    def test_grouped_split_warns(self):
+        config = _cfg(nodes=self._nodes(4), publishing={"mode": "grouped"})
+        parsed = tomllib.loads(render_config(config, limits={"max_nodes_per_read": 2}))
+        groups = [i["group"][0]["nodes"] for i in parsed["inputs"]["opcua"]]
+        assert [len(g) for g in groups] == [2, 2]
+        _, warnings = plan_opcua_inputs(config, {"max_nodes_per_read": 2})
+        assert len(warnings) == 2
+
+    def test_zero_means_no_limit(self):
+        config = _cfg(nodes=self._nodes(5))
+        parsed = tomllib.loads(render_config(config, limits={"max_nodes_per_read": 0}))
+        assert len(parsed["inputs"]["opcua"]) == 1
+
+    def test_limits_are_remembered_per_endpoint(self, app_ctx):
+        from app.services import opcua_limits
+
+        assert opcua_limits.load("opc.tcp://plc:4840") is None
+        opcua_limits.save("opc.tcp://plc:4840", {"max_nodes_per_read": 2})
+        opcua_limits.save("opc.tcp://other:4840", {"max_nodes_per_read": 9})
+        assert opcua_limits.load("opc.tcp://plc:4840") == {"max_nodes_per_read": 2}
@@ -0,0 +1,176 @@
+"""Tests for the background Telegraf health prober.
+
+Dashboard polls, the SSE feed and /metrics read the prober's cached status, so
+a down Telegraf must never block a request. The prober itself must reuse one
+connection while Telegraf is up and back off while it is down.
+"""
+
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from app.services.telegraf_health import TelegrafHealthProber
+
+
+class _HealthHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        server = self.server
+        server.requests += 1
+        body = b"ok" if server.status == 200 else b"unhealthy"
+        self.send_response(server.status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        # Simulate an idle timeout: drop the connection without announcing it
+        self.close_connection = server.drop_after_response
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def health_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _HealthHandler)
+    server.daemon_threads = True
+    server.status = 200
+    server.requests = 0
+    server.connections = 0
+    server.drop_after_response = False
+    threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+    ).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _url(server):
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def _closed_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _prober(url, **kwargs):
+    prober = TelegrafHealthProber(**kwargs)
+    prober._url = url  # probe_once() without the background thread
+    return prober
+
+
+class TestProbeOnce:
+    def test_healthy(self, health_server):
+        prober = _prober(_url(health_server))
+        status = prober.probe_once()
+        assert status["running"] is True
+        assert status["status_code"] == 200
+        assert status["latency_ms"] >= 0
+        assert status["consecutive_failures"] == 0
+
+    def test_keep_alive_reuses_connection(self, health_server):
+        prober = _prober(_url(health_server))
+        for _ in range(5):
+            assert prober.probe_once()["running"]
+        assert health_server.requests == 5
+        assert health_server.connections == 1
+
+    def test_dropped_idle_connection_is_retried(self, health_server):
+        health_server.drop_after_response = True
+        prober = _prober(_url(health_server))
+        prober.probe_once()
+        time.sleep(0.05)  # let the server close its side
+        status = prober.probe_once()
+        assert status["running"] is True
+        assert health_server.connections == 2
+
+    def test_unhealthy_status(self, health_server):
+        health_server.status = 503
+        status = _prober(_url(health_server)).probe_once()
+        assert status["running"] is False
+        assert status["status_code"] == 503
+
+    def test_unreachable(self):
+        prober = _prober(f"http://127.0.0.1:{_closed_port()}")
+        prober.probe_once()
+        status = prober.probe_once()
+        assert status["running"] is False
+        assert status["status_code"] is None
+        assert status["latency_ms"] is None
+        assert status["consecutive_failures"] == 2
+
+    def test_recovery_resets_failures(self, health_server):
+        health_server.status = 503
+        prober = _prober(_url(health_server))
+        prober.probe_once()
+        health_server.status = 200
+        assert prober.probe_once()["consecutive_failures"] == 0
+
+    def test_history(self, health_server):
+        prober = _prober(_url(health_server), history=3)
+        for _ in range(4):
+            prober.probe_once()
+        health_server.status = 503
+        prober.probe_once()
+        history = prober.get_history()
+        assert len(history) == 3
+        assert all(latency is not None for _, latency in history)
+        assert [ts for ts, _ in history] == sorted(ts for ts, _ in history)
+
+
+class TestBackoff:
+    def test_interval_while_healthy(self):
+        assert TelegrafHealthProber(interval=5)._next_delay() == 5
+
+    def test_exponential_while_down(self):
+        prober = _prober(f"http://127.0.0.1:{_closed_port()}", max_backoff=8)
+        delays = []
+        for _ in range(6):
+            prober.probe_once()
+            delays.append(prober._next_delay())
+        assert delays == [1, 2, 4, 8, 8, 8]
+
+
+class TestCachedStatus:
+    def test_reads_do_not_block_while_down(self):
+        prober = TelegrafHealthProber(timeout=0.5)
+        prober.start(f"http://127.0.0.1:{_closed_port()}")
+        try:
+            assert prober.get_status()["running"] is False
+            started = time.monotonic()
+            for _ in range(100):
+                prober.get_status()
+            assert time.monotonic() - started < 0.1
+        finally:
+            prober.stop()
+
+    def test_unknown_before_first_check(self):
+        status = TelegrafHealthProber().get_status(wait=0)
+        assert status["running"] is False
+        assert status["checked_at"] is None
+
+    def test_background_thread_and_wake(self, health_server):
+        prober = TelegrafHealthProber(interval=60)
+        prober.start(_url(health_server))
+        try:
+            assert prober.get_status(wait=2)["running"] is True
+            prober.wake()
+            deadline = time.monotonic() + 2
+            while health_server.requests < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert health_server.requests == 2
+        finally:
+            prober.stop()
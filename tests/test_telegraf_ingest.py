@@ -0,0 +1,215 @@
+"""Tests for push-based ingestion of Telegraf internal metrics.
+
+Telegraf's [[outputs.http]] posts internal_* metrics to the gateway, which
+feeds the Pipeline Health dashboard, the SSE feed and /metrics. A parsing gap
+here blanks the dashboard; stale pushes surviving a restart would be read as a
+process crash.
+"""
+
+import json
+import shutil
+import sys
+import threading
+import urllib.request
+from itertools import groupby
+from pathlib import Path
+
+import pytest
+from flask import Flask
+from werkzeug.serving import make_server
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from app.routes.telegraf import telegraf_bp
+from app.services import system_monitor
+from app.services.system_monitor import (
+    clear_intentional_restart,
+    get_telegraf_metrics,
+    reset_crash_detection,
+)
+from app.services.telegraf_ingest import TelegrafIngest, parse_batch, telegraf_ingest
+
+_FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def _metric(name, fields, ts=1700000000, **tags):
+    return {"name": name, "tags": tags, "fields": fields, "timestamp": ts}
+
+
+def _gather(gathered, ts=1700000000):
+    return _metric(
+        "internal_gather",
+        {"metrics_gathered": gathered, "gather_time_ns": 1_000_000},
+        ts,
+        input="opcua",
+    )
+
+
+def _fixture_batches(name):
+    """Recorded metrics.json grouped into one JSON batch per Telegraf flush."""
+    lines = (_FIXTURES / name).read_text().splitlines()
+    records = [json.loads(line) for line in lines]
+    return [
+        json.dumps({"metrics": list(group)}).encode()
+        for _, group in groupby(records, key=lambda r: r["timestamp"])
+    ]
+
+
+@pytest.fixture(autouse=True)
+def _clean_inbox(monkeypatch):
+    # clear_intentional_restart() starts a grace period; keep it out of other tests
+    monkeypatch.setattr(system_monitor, "_post_restart_grace_until", 0)
+    telegraf_ingest.reset()
+    reset_crash_detection()
+    yield
+    telegraf_ingest.reset()
+    reset_crash_detection()
+
+
+# ---------------------------------------------------------------------------
+# parse_batch()
+# ---------------------------------------------------------------------------
+
+
+class TestParseBatch:
+    def test_batch_format(self):
+        body = json.dumps({"metrics": [_gather(1), _gather(2)]}).encode()
+        assert [m["fields"]["metrics_gathered"] for m in parse_batch(body)] == [1, 2]
+
+    def test_single_metric(self):
+        assert len(parse_batch(json.dumps(_gather(1)))) == 1
+
+    def test_newline_delimited(self):
+        body = "\n".join(json.dumps(_gather(i)) for i in range(3))
+        assert len(parse_batch(body)) == 3
+
+    def test_entries_without_name_or_fields_skipped(self):
+        body = json.dumps({"metrics": [_gather(1), {"name": "x"}, 5, {"fields": {}}]})
+        assert len(parse_batch(body)) == 1
+
+    def test_empty_body(self):
+        assert parse_batch(b"  ") == []
+
+    @pytest.mark.parametrize("body", ["not json", '"text"', "{broken"])
+    def test_invalid_payload_raises(self, body):
+        with pytest.raises(ValueError):
+            parse_batch(body)
+
+
+# ---------------------------------------------------------------------------
+# TelegrafIngest
+# ---------------------------------------------------------------------------
+
+
+class TestTelegrafIngest:
+    def test_records_newest_first(self):
+        inbox = TelegrafIngest()
+        inbox.ingest(json.dumps({"metrics": [_gather(1), _gather(2)]}))
+        inbox.ingest(json.dumps(_gather(3)))
+        assert [m["fields"]["metrics_gathered"] for m in inbox.records()] == [3, 2, 1]
+
+    def test_bounded(self):
+        inbox = TelegrafIngest(max_records=5)
+        inbox.ingest(json.dumps({"metrics": [_gather(i) for i in range(20)]}))
+        records = inbox.records()
+        assert len(records) == 5
+        assert records[0]["fields"]["metrics_gathered"] == 19
+        assert inbox.get_stats()["received"] == 20
+
+    def test_clear_keeps_push_mode(self):
+        inbox = TelegrafIngest()
+        assert not inbox.is_active()
+        inbox.ingest(json.dumps(_gather(1)))
+        inbox.clear()
+        assert inbox.records() == []
+        assert inbox.is_active()
+
+
+# ---------------------------------------------------------------------------
+# /api/telegraf/ingest and get_telegraf_metrics()
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.register_blueprint(telegraf_bp)
+    return app.test_client()
+
+
+class TestIngestRoute:
+    def test_accepts_batch(self, client):
+        resp = client.post(
+            "/api/telegraf/ingest", json={"metrics": [_gather(1), _gather(2)]}
+        )
+        assert resp.status_code == 200
+        assert resp.get_json() == {"ok": True, "accepted": 2}
+
+    def test_rejects_malformed(self, client):
+        resp = client.post("/api/telegraf/ingest", data="garbage")
+        assert resp.status_code == 400
+        assert telegraf_ingest.records() == []
+
+
+class TestPushedMetrics:
+    def test_push_wins_over_stale_file(self, app_ctx, client):
+        shutil.copy(_FIXTURES / "metrics_steady.json", app_ctx / "metrics.json")
+        client.post("/api/telegraf/ingest", json={"metrics": [_gather(7)]})
+        assert get_telegraf_metrics()["opcua_gathered"] == 7
+
+    def test_file_fallback_without_push(self, app_ctx):
+        shutil.copy(_FIXTURES / "metrics_steady.json", app_ctx / "metrics.json")
+        assert get_telegraf_metrics()["opcua_gathered"] == 450
+
+    def test_restart_discards_previous_process(self, app_ctx, client):
+        client.post("/api/telegraf/ingest", json=_gather(500, ts=100))
+        get_telegraf_metrics()
+
+        reset_crash_detection()
+        clear_intentional_restart()
+        assert get_telegraf_metrics()["opcua_gathered"] == 0  # nothing pushed yet
+
+        client.post("/api/telegraf/ingest", json=_gather(3, ts=120))
+        d = get_telegraf_metrics()
+        assert d["opcua_gathered"] == 3
+        assert d["process_crash_detected"] is False
+
+    def test_crash_detected_without_grace_period(self, app_ctx, client):
+        """Stale pushes are discarded, so a real crash right after a deploy shows."""
+        reset_crash_detection()
+        clear_intentional_restart()  # starts the file-only grace period
+
+        client.post("/api/telegraf/ingest", json=_gather(100, ts=100))
+        get_telegraf_metrics()
+        client.post("/api/telegraf/ingest", json=_gather(2, ts=110))
+        assert get_telegraf_metrics()["process_crash_detected"] is True
+
+
+class TestLocalSender:
+    """A stand-in for Telegraf posting recorded flushes over a real socket."""
+
+    def test_recorded_flushes(self, app_ctx):
+        app = Flask(__name__)
+        app.register_blueprint(telegraf_bp)
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_port}/api/telegraf/ingest"
+        try:
+            for body in _fixture_batches("metrics_steady.json"):
+                req = urllib.request.Request(
+                    url,
+                    data=body,
+                    method="POST",
+                    headers={"Content-Type": "application/json"},
+                )
+                with urllib.request.urlopen(req, timeout=5) as resp:  # nosec B310
+                    assert resp.status == 200
+        finally:
+            server.shutdown()
+
+        assert not (app_ctx / "metrics.json").exists()
+        d = get_telegraf_metrics()
+        assert d["opcua_gathered"] == 450
+        assert d["mqtt_written"] == 450
+        assert d["telegraf_heap_alloc_bytes"] == 10955665
+        assert d["mqtt_write_time_p95_ms"] == 48.0
+        assert d["last_updated"] == 1772879690
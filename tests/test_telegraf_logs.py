@@ -0,0 +1,285 @@
+"""Tests for the Telegraf log follower.
+
+The logs view and every deploy's config check read this ring buffer instead
+of asking Docker for the log tail. A wrong cursor shows lines twice or drops
+them, and a missed config error lets a broken deploy report success. Docker
+is replaced by a fake client whose log stream is a finite list of chunks.
+"""
+
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from flask import Flask
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from app.routes import telegraf as telegraf_routes
+from app.routes.telegraf import telegraf_bp
+from app.services.telegraf_logs import TelegrafLogFollower, parse_level
+
+_TS = 1772879400  # 2026-03-07T10:30:00Z
+
+
+def _raw(offset, text):
+    """A Docker `timestamps=True` log line, `offset` seconds after _TS."""
+    secs = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(_TS + int(offset)))
+    frac = f"{offset % 1:.9f}"[2:]
+    return f"{secs}.{frac}Z {secs}Z {text}"
+
+
+_SAMPLE = [
+    _raw(0, "I! Starting Telegraf 1.33.0"),
+    _raw(1, "I! [agent] Config: Interval:10s"),
+    _raw(2, "W! [inputs.opcua] Session timeout, reconnecting"),
+    _raw(3, "E! [inputs.opcua] Error in plugin: connection refused"),
+    _raw(4, "E! [outputs.mqtt::broker] could not write: timeout"),
+    _raw(5, "D! [outputs.http::gateway_values] Wrote batch of 12 metrics"),
+]
+
+
+class FakeContainer:
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self.logs_kwargs = []
+
+    def logs(self, **kwargs):
+        self.logs_kwargs.append(kwargs)
+        return iter(self._chunks)
+
+
+class FakeClient:
+    def __init__(self, container):
+        self.containers = self
+        self._container = container
+
+    def list(self, all=False, filters=None):
+        return [self._container] if self._container else []
+
+
+def _follower(lines=_SAMPLE, **kwargs):
+    follower = TelegrafLogFollower(**kwargs)
+    follower.feed(lines)
+    return follower
+
+
+def _texts(result):
+    return [entry["line"].split(" ", 1)[1] for entry in result["lines"]]
+
+
+# ---------------------------------------------------------------------------
+# Ring buffer, cursor and filters
+# ---------------------------------------------------------------------------
+
+
+class TestQuery:
+    def test_parses_level_and_plugin(self):
+        lines = _follower().query()["lines"]
+        assert [e["level"] for e in lines] == ["I", "I", "W", "E", "E", "D"]
+        assert [e["plugin"] for e in lines] == [
+            None,
+            "agent",
+            "inputs.opcua",
+            "inputs.opcua",
+            "outputs.mqtt",  # alias stripped
+            "outputs.http",
+        ]
+        assert lines[0]["ts"] == _TS
+        assert lines[0]["line"].startswith("2026-03-07T10:30:00Z I! Starting")
+
+    def test_cursor_returns_only_new_lines(self):
+        follower = _follower(_SAMPLE[:2])
+        first = follower.query()
+        assert len(first["lines"]) == 2
+        follower.feed(_SAMPLE[2:4])
+        second = follower.query(after=first["cursor"])
+        assert [e["seq"] for e in second["lines"]] == [3, 4]
+        assert follower.query(after=second["cursor"])["lines"] == []
+
+    def test_level_filter(self):
+        result = _follower().query(levels={"E", "W"})
+        assert [e["level"] for e in result["lines"]] == ["W", "E", "E"]
+        # The cursor still advances to the newest line, matched or not
+        assert result["cursor"] == 6
+
+    def test_plugin_filter(self):
+        result = _follower().query(plugin="inputs.opcua", levels={"E"})
+        assert _texts(result) == [
+            "E! [inputs.opcua] Error in plugin: connection refused"
+        ]
+
+    def test_regex_filter(self):
+        result = _follower().query(pattern=r"timeout|refused")
+        assert len(result["lines"]) == 3
+
+    def test_invalid_regex(self):
+        with pytest.raises(re.error):
+            _follower().query(pattern="(")
+
+    def test_limit_pages_oldest_first(self):
+        follower = _follower()
+        seen, after = [], 0
+        while True:
+            result = follower.query(after=after, limit=2)
+            seen.append([e["seq"] for e in result["lines"]])
+            after = result["cursor"]
+            if not result["truncated"]:
+                break
+        assert seen == [[1, 2], [3, 4], [5, 6]]
+        assert after == 6
+
+    def test_more_matches_than_limit_are_paged_not_skipped(self):
+        lines = [_raw(i, f"E! [inputs.opcua] error {i}") for i in range(5)]
+        lines.insert(2, _raw(1.5, "I! [agent] unrelated"))
+        follower = _follower(lines)
+        first = follower.query(levels={"E"}, limit=3)
+        assert _texts(first) == [
+            "E! [inputs.opcua] error 0",
+            "E! [inputs.opcua] error 1",
+            "E! [inputs.opcua] error 2",
+        ]
+        assert (first["truncated"], first["cursor"]) == (True, 4)
+        second = follower.query(after=first["cursor"], levels={"E"}, limit=3)
+        assert _texts(second) == [
+            "E! [inputs.opcua] error 3",
+            "E! [inputs.opcua] error 4",
+        ]
+        assert (second["truncated"], second["cursor"]) == (False, 6)
+
+    def test_ring_is_bounded(self):
+        follower = _follower([_raw(i, f"I! line {i}") for i in range(10)], size=4)
+        result = follower.query(levels={"I"})
+        assert [e["seq"] for e in result["lines"]] == [7, 8, 9, 10]
+
+    def test_replayed_lines_are_skipped(self):
+        """Reconnecting with `since` replays lines already in the buffer."""
+        follower = _follower(_SAMPLE[:3])
+        follower.feed(_SAMPLE[1:4])
+        assert len(follower.query()["lines"]) == 4
+
+
+class TestParseLevel:
+    def test_names_and_letters(self):
+        assert parse_level("error,W") == {"E", "W"}
+        assert parse_level("") == set()
+
+    def test_unknown(self):
+        with pytest.raises(ValueError):
+            parse_level("loud")
+
+
+# ---------------------------------------------------------------------------
+# Config-error lookup
+# ---------------------------------------------------------------------------
+
+
+class TestConfigResult:
+    def test_config_error_after_since(self):
+        follower = _follower(
+            [
+                _raw(0, "E! [telegraf] Error loading config file: old problem"),
+                _raw(10, "E! error loading config file: invalid TOML syntax at line 3"),
+            ]
+        )
+        error = follower.wait_for_config_result(since=_TS + 5, timeout=0)
+        assert "invalid TOML" in error
+
+    def test_runtime_error_is_not_a_config_error(self):
+        follower = _follower(
+            [
+                _raw(10, "E! [outputs.mqtt] could not connect to broker"),
+                _raw(11, "I! Loaded outputs: mqtt"),
+            ]
+        )
+        assert follower.wait_for_config_result(since=_TS, timeout=0) is None
+
+    def test_waits_for_loaded_marker(self):
+        follower = TelegrafLogFollower()
+        threading.Timer(
+            0.05, follower.feed, args=([_raw(10, "I! Loaded outputs: mqtt")],)
+        ).start()
+        started = time.monotonic()
+        assert follower.wait_for_config_result(since=_TS, timeout=5) is None
+        assert time.monotonic() - started < 1
+
+    def test_wakes_on_error(self):
+        follower = TelegrafLogFollower()
+        threading.Timer(
+            0.05, follower.feed, args=([_raw(10, "E! invalid config: unknown field")],)
+        ).start()
+        error = follower.wait_for_config_result(since=_TS, timeout=5)
+        assert "unknown field" in error
+
+    def test_unreachable_docker_does_not_wait(self):
+        follower = TelegrafLogFollower()
+        follower._last_error = "docker socket not found"
+        started = time.monotonic()
+        assert follower.wait_for_config_result(since=_TS, timeout=5) is None
+        assert time.monotonic() - started < 0.5
+
+
+# ---------------------------------------------------------------------------
+# Docker stream
+# ---------------------------------------------------------------------------
+
+
+class TestFollow:
+    def test_reassembles_chunked_lines(self):
+        blob = ("\n".join(_SAMPLE[:3]) + "\n").encode()
+        container = FakeContainer([blob[:30], blob[30:100], blob[100:]])
+        follower = TelegrafLogFollower()
+        assert follower._follow(FakeClient(container)) is True
+        assert len(follower.query()["lines"]) == 3
+        assert container.logs_kwargs[0]["follow"] is True
+        assert "tail" in container.logs_kwargs[0]
+
+    def test_reconnect_resumes_from_last_timestamp(self):
+        container = FakeContainer([("\n".join(_SAMPLE[:2]) + "\n").encode()])
+        follower = TelegrafLogFollower()
+        follower._follow(FakeClient(container))
+        follower._follow(FakeClient(container))
+        assert container.logs_kwargs[1]["since"] == pytest.approx(_TS + 1)
+        assert len(follower.query()["lines"]) == 2
+
+    def test_missing_container(self):
+        follower = TelegrafLogFollower()
+        assert follower._follow(FakeClient(None)) is False
+        assert follower.query()["error"] == "Telegraf container not found"
+
+
+# ---------------------------------------------------------------------------
+# /api/telegraf/logs
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture
+def client(monkeypatch):
+    follower = _follower()
+    monkeypatch.setattr(follower, "start", lambda: None)
+    monkeypatch.setattr(telegraf_routes, "telegraf_log_follower", follower)
+    app = Flask(__name__)
+    app.register_blueprint(telegraf_bp)
+    return app.test_client()
+
+
+class TestLogsRoute:
+    def test_cursor_and_filters(self, client):
+        data = client.get(
+            "/api/telegraf/logs?level=error&plugin=inputs.opcua"
+        ).get_json()
+        assert data["ok"] is True
+        assert len(data["lines"]) == 1
+        assert data["cursor"] == 6
+        assert client.get("/api/telegraf/logs?after=6").get_json()["lines"] == []
+
+    def test_regex(self, client):
+        data = client.get("/api/telegraf/logs?q=Wrote+batch").get_json()
+        assert [e["plugin"] for e in data["lines"]] == ["outputs.http"]
+
+    @pytest.mark.parametrize("query", ["q=(", "level=loud", "after=x"])
+    def test_bad_params(self, client, query):
+        resp = client.get(f"/api/telegraf/logs?{query}")
+        assert resp.status_code == 400
+        assert resp.get_json()["ok"] is False
@@ -0,0 +1,226 @@
+"""Tests for derived rates from Telegraf's cumulative counters.
+
+Rates feed the dashboard throughput figures and alerting on drop/error ratios.
+Counter resets (Telegraf restarts), repeated reads of the same sample and
+metrics.json rotation must never produce negative or inflated rates.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from app.services.system_monitor import get_telegraf_metrics, reset_crash_detection
+from app.services.telegraf_rates import RateTracker
+
+
+def _sample(**values):
+    base = dict.fromkeys(
+        (
+            "opcua_gathered",
+            "modbus_gathered",
+            "opcua_read_success",
+            "opcua_read_error",
+            "mqtt_written",
+            "mqtt_dropped",
+            "mqtt_errors",
+        ),
+        0,
+    )
+    base.update(values)
+    return base
+
+
+# ---------------------------------------------------------------------------
+# RateTracker
+# ---------------------------------------------------------------------------
+
+
+class TestRateTracker:
+    def test_first_sample_has_no_rate(self):
+        t = RateTracker()
+        d = t.update(100, _sample(mqtt_written=50))
+        assert d["mqtt_written_per_sec"] is None
+        assert d["mqtt_written_per_sec_avg"] is None
+        assert d["mqtt_drop_ratio"] is None
+
+    def test_rate_per_second(self):
+        t = RateTracker()
+        t.update(100, _sample(mqtt_written=50))
+        d = t.update(110, _sample(mqtt_written=150))
+        assert d["mqtt_written_per_sec"] == 10.0
+        assert d["mqtt_written_per_sec_avg"] == 10.0
+        assert d["rate_interval_secs"] == 10
+
+    def test_moving_average_smooths(self):
+        t = RateTracker(tau=60)
+        t.update(0, _sample(mqtt_written=0))
+        t.update(10, _sample(mqtt_written=100))  # 10/s
+        d = t.update(20, _sample(mqtt_written=1100))  # 100/s
+        assert d["mqtt_written_per_sec"] == 100.0
+        assert 10.0 < d["mqtt_written_per_sec_avg"] < 100.0
+
+    def test_same_timestamp_is_idempotent(self):
+        t = RateTracker()
+        t.update(100, _sample(mqtt_written=0))
+        first = t.update(110, _sample(mqtt_written=100))
+        again = t.update(110, _sample(mqtt_written=100))
+        assert first == again
+
+    def test_older_timestamp_ignored(self):
+        t = RateTracker()
+        t.update(100, _sample(mqtt_written=0))
+        t.update(110, _sample(mqtt_written=100))
+        d = t.update(90, _sample(mqtt_written=5))
+        assert d["mqtt_written_per_sec"] == 10.0
+        assert d["counter_resets"] == 0
+
+    def test_counter_reset_skips_interval(self):
+        t = RateTracker()
+        t.update(100, _sample(mqtt_written=1000))
+        t.update(110, _sample(mqtt_written=1100))
+        d = t.update(120, _sample(mqtt_written=20))
+        assert d["mqtt_written_per_sec"] is None
+        assert d["mqtt_written_per_sec_avg"] == 10.0  # average survives the restart
+        assert d["counter_resets"] == 1
+        d = t.update(130, _sample(mqtt_written=70))
+        assert d["mqtt_written_per_sec"] == 5.0
+
+    def test_reset_forgets_averages(self):
+        t = RateTracker()
+        t.update(100, _sample(mqtt_written=0))
+        t.update(110, _sample(mqtt_written=100))
+        t.reset()
+        d = t.update(120, _sample(mqtt_written=200))
+        assert d["mqtt_written_per_sec_avg"] is None
+
+    def test_missing_timestamp_reports_unknown(self):
+        t = RateTracker()
+        t.update(100, _sample(mqtt_written=0))
+        t.update(110, _sample(mqtt_written=100))
+        d = t.update(None, {})
+        assert d["mqtt_written_per_sec"] is None
+        assert d["mqtt_drop_ratio"] is None
+
+    def test_ratios(self):
+        t = RateTracker()
+        t.update(0, _sample())
+        d = t.update(
+            10,
+            _sample(
+                mqtt_written=90,
+                mqtt_dropped=10,
+                opcua_read_success=30,
+                opcua_read_error=10,
+            ),
+        )
+        assert d["mqtt_drop_ratio"] == 0.1
+        assert d["opcua_read_error_ratio"] == 0.25
+
+    def test_ratio_none_without_traffic(self):
+        t = RateTracker()
+        t.update(0, _sample())
+        d = t.update(10, _sample())
+        assert d["mqtt_drop_ratio"] is None
+
+
+# ---------------------------------------------------------------------------
+# get_telegraf_metrics() integration
+# ---------------------------------------------------------------------------
+
+
+def _lines(ts, gathered, written, dropped=0):
+    return "\n".join(
+        [
+            json.dumps(
+                {
+                    "name": "internal_gather",
+                    "tags": {"input": "opcua"},
+                    "fields": {"metrics_gathered": gathered, "gather_time_ns": 1},
+                    "timestamp": ts,
+                }
+            ),
+            json.dumps(
+                {
+                    "name": "internal_write",
+                    "tags": {"output": "mqtt"},
+                    "fields": {"metrics_written": written, "metrics_dropped": dropped},
+                    "timestamp": ts,
+                }
+            ),
+        ]
+    )
+
+
+@pytest.fixture
+def metrics_file(app_ctx):
+    reset_crash_detection()
+    yield app_ctx / "metrics.json"
+    reset_crash_detection()
+
+
+class TestTelegrafMetricsRates:
+    def test_rates_exposed(self, metrics_file):
+        metrics_file.write_text(_lines(1000, 10, 10))
+        get_telegraf_metrics()
+        metrics_file.write_text(_lines(1010, 60, 50, dropped=10))
+        d = get_telegraf_metrics()
+        assert d["opcua_gathered_per_sec"] == 5.0
+        assert d["mqtt_written_per_sec"] == 4.0
+        assert d["mqtt_dropped_per_sec"] == 1.0
+        assert d["mqtt_drop_ratio"] == 0.2
+
+    def test_repeated_reads_do_not_change_rates(self, metrics_file):
+        metrics_file.write_text(_lines(1000, 10, 10))
+        get_telegraf_metrics()
+        metrics_file.write_text(_lines(1010, 60, 60))
+        first = get_telegraf_metrics()["mqtt_written_per_sec_avg"]
+        for _ in range(5):
+            again = get_telegraf_metrics()["mqtt_written_per_sec_avg"]
+        assert again == first
+
+    def test_rotation_keeps_counting(self, metrics_file):
+        """Telegraf rotated metrics.json: a brief empty file, then the counters continue."""
+        metrics_file.write_text(_lines(1000, 100, 100))
+        get_telegraf_metrics()
+        metrics_file.write_text(_lines(1010, 200, 200))
+        get_telegraf_metrics()
+
+        metrics_file.write_text("")
+        d = get_telegraf_metrics()
+        assert d["mqtt_written_per_sec"] is None
+
+        metrics_file.write_text(_lines(1020, 300, 300))
+        d = get_telegraf_metrics()
+        assert d["mqtt_written_per_sec"] == 10.0
+        assert d["counter_resets"] == 0
+
+    def test_process_crash_rebases(self, metrics_file):
+        metrics_file.write_text(_lines(1000, 100, 100))
+        get_telegraf_metrics()
+        metrics_file.write_text(_lines(1010, 200, 200))
+        get_telegraf_metrics()
+
+        metrics_file.write_text(_lines(1020, 3, 3))
+        d = get_telegraf_metrics()
+        assert d["process_crash_detected"] is True
+        assert d["opcua_gathered_per_sec"] is None
+        assert d["opcua_gathered_per_sec_avg"] == 10.0
+
+        metrics_file.write_text(_lines(1030, 53, 53))
+        d = get_telegraf_metrics()
+        assert d["opcua_gathered_per_sec"] == 5.0
+
+    def test_deploy_reset_clears_averages(self, metrics_file):
+        metrics_file.write_text(_lines(1000, 100, 100))
+        get_telegraf_metrics()
+        metrics_file.write_text(_lines(1010, 200, 200))
+        get_telegraf_metrics()
+
+        reset_crash_detection()  # called around every intentional restart
+
+        metrics_file.write_text(_lines(1020, 5, 5))
+        d = get_telegraf_metrics()
+        assert d["opcua_gathered_per_sec_avg"] is None
@@ -0,0 +1,217 @@
+"""Tests for the live value cache fed by Telegraf's opcua/modbus copy.
+
+The Live Values page and /api/values read only from this cache, so it must
+keep the newest value per tag, bound its memory, and hand pollers exactly the
+tags that changed since their last read.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+from flask import Flask
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from app.routes import values as values_routes
+from app.routes.values import values_bp
+from app.services.value_cache import ValueCache
+
+
+def _opcua(name, value, ts_ms, quality="OK (0x0)"):
+    return {
+        "name": "opcua",
+        "tags": {"id": f"ns=3;s={name}"},
+        "fields": {name: value, "Quality": quality, "DataType": "Double"},
+        "timestamp": ts_ms,
+    }
+
+
+def _modbus(ts, **registers):
+    return {
+        "name": "modbus",
+        "tags": {"name": "modbus", "slave_id": "1", "type": "holding_register"},
+        "fields": registers,
+        "timestamp": ts,
+    }
+
+
+# ---------------------------------------------------------------------------
+# ValueCache
+# ---------------------------------------------------------------------------
+
+
+class TestValueCache:
+    def test_last_value_and_metadata(self):
+        cache = ValueCache()
+        cache.update([_opcua("Temp", 20.5, 1_700_000_000_000)])
+        cache.update([_opcua("Temp", 21.0, 1_700_000_001_500, quality="Bad (0x8)")])
+        v = cache.get()["values"]["opcua:Temp[id=ns=3;s=Temp]"]
+        assert v["value"] == 21.0
+        assert v["ts"] == 1_700_000_001.5
+        assert v["quality"] == "Bad (0x8)"
+        assert v["data_type"] == "Double"
+        assert v["source"] == "opcua" and v["name"] == "Temp"
+
+    def test_metadata_fields_are_not_tags(self):
+        cache = ValueCache()
+        cache.update([_opcua("Temp", 1.0, 1_700_000_000_000)])
+        assert list(cache.get()["values"]) == ["opcua:Temp[id=ns=3;s=Temp]"]
+
+    def test_multi_field_metric(self):
+        """Modbus and grouped OPC UA metrics carry several values per metric."""
+        cache = ValueCache()
+        assert cache.update([_modbus(1_700_000_000, Pressure=3.2, Pump=True)]) == 2
+        values = cache.get()["values"]
+        assert values["modbus:Pressure[slave_id=1]"]["value"] == 3.2
+        assert values["modbus:Pump[slave_id=1]"]["value"] is True
+
+    def test_same_field_from_two_sources(self):
+        """Two Modbus slaves, or two OPC UA nodes, may share a field name."""
+        cache = ValueCache()
+        other_slave = {
+            **_modbus(1_700_000_000, Pressure=7.5),
+            "tags": {"slave_id": "2"},
+        }
+        other_node = {
+            **_opcua("Temp", 30.0, 1_700_000_000_000),
+            "tags": {"id": "ns=3;i=7"},
+        }
+        cache.update([_modbus(1_700_000_000, Pressure=3.2), other_slave])
+        cache.update([_opcua("Temp", 20.5, 1_700_000_000_000), other_node])
+        values = cache.get()["values"]
+        assert values["modbus:Pressure[slave_id=1]"]["value"] == 3.2
+        assert values["modbus:Pressure[slave_id=2]"]["value"] == 7.5
+        assert values["opcua:Temp[id=ns=3;s=Temp]"]["value"] == 20.5
+        assert values["opcua:Temp[id=ns=3;i=7]"]["value"] == 30.0
+        assert values["modbus:Pressure[slave_id=2]"]["tags"] == {"slave_id": "2"}
+
+    def test_grouped_metric_quality_not_shared(self):
+        """The merge aggregator leaves one Quality for every node it combined."""
+        cache = ValueCache()
+        cache.update(
+            [
+                {
+                    "name": "opcua",
+                    "tags": {"host": "gw"},
+                    "fields": {"Temp": 20.5, "Speed": 300, "Quality": "Bad (0x8)"},
+                    "timestamp": 1_700_000_000_000,
+                }
+            ]
+        )
+        values = cache.get()["values"]
+        assert sorted(values) == ["opcua:Speed", "opcua:Temp"]
+        assert {v["quality"] for v in values.values()} == {None}
+
+    def test_history_ring_is_bounded(self):
+        cache = ValueCache(history=3)
+        for i in range(10):
+            cache.update([_modbus(1_700_000_000 + i, Level=i)])
+        v = cache.get(history=True)["values"]["modbus:Level[slave_id=1]"]
+        assert v["history"] == [
+            [1_700_000_007, 7],
+            [1_700_000_008, 8],
+            [1_700_000_009, 9],
+        ]
+
+    def test_history_only_on_request(self):
+        cache = ValueCache()
+        cache.update([_modbus(1_700_000_000, Level=1)])
+        assert "history" not in cache.get()["values"]["modbus:Level[slave_id=1]"]
+
+    def test_older_sample_ignored(self):
+        cache = ValueCache()
+        cache.update([_modbus(1_700_000_010, Level=2)])
+        assert cache.update([_modbus(1_700_000_005, Level=1)]) == 0
+        assert cache.get()["values"]["modbus:Level[slave_id=1]"]["value"] == 2
+
+    def test_since_returns_only_changed_tags(self):
+        cache = ValueCache()
+        cache.update([_modbus(1_700_000_000, A=1, B=1)])
+        seq = cache.get()["seq"]
+        cache.update([_modbus(1_700_000_001, B=2)])
+        changed = cache.get(since=seq)
+        assert list(changed["values"]) == ["modbus:B[slave_id=1]"]
+        assert cache.get(since=changed["seq"])["values"] == {}
+
+    def test_selected_tags_and_missing(self):
+        cache = ValueCache()
+        cache.update([_modbus(1_700_000_000, A=1, B=2)])
+        result = cache.get(["modbus:B[slave_id=1]", "opcua:Nope"])
+        assert list(result["values"]) == ["modbus:B[slave_id=1]"]
+        assert result["missing"] == ["opcua:Nope"]
+
+    def test_clear_bumps_generation(self):
+        cache = ValueCache()
+        cache.update([_modbus(1_700_000_000, A=1)])
+        generation = cache.get()["generation"]
+        cache.clear()
+        result = cache.get()
+        assert result["values"] == {}
+        assert result["generation"] == generation + 1
+
+    def test_tag_limit(self):
+        cache = ValueCache(max_tags=2)
+        cache.update([_modbus(1_700_000_000, A=1, B=2, C=3)])
+        assert cache.get_stats() == {"tags": 2, "seq": 2, "rejected_tags": 1}
+
+    def test_metric_without_timestamp_skipped(self):
+        cache = ValueCache()
+        assert cache.update([{"name": "modbus", "fields": {"A": 1}}]) == 0
+
+
+# ---------------------------------------------------------------------------
+# /api/values routes
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(values_routes, "value_cache", ValueCache())
+    app = Flask(__name__)
+    app.register_blueprint(values_bp)
+    return app.test_client()
+
+
+class TestValuesRoutes:
+    def test_ingest_then_bulk_read(self, client):
+        resp = client.post(
+            "/api/values/ingest",
+            json={"metrics": [_opcua("Temp", 20.5, 1_700_000_000_000)]},
+        )
+        assert resp.get_json() == {"ok": True, "accepted": 1}
+        data = client.get(
+            "/api/values?tags=opcua:Temp[id=ns=3;s=Temp]&tags=opcua:Other"
+        ).get_json()
+        assert data["values"]["opcua:Temp[id=ns=3;s=Temp]"]["value"] == 20.5
+        assert data["missing"] == ["opcua:Other"]
+
+    def test_tag_keys_may_contain_commas(self, client):
+        client.post(
+            "/api/values/ingest",
+            json={"metrics": [_opcua("a,b", 7.0, 1_700_000_000_000)]},
+        )
+        data = client.get(
+            "/api/values", query_string=[("tags", "opcua:a,b[id=ns=3;s=a,b]")]
+        ).get_json()
+        assert data["values"]["opcua:a,b[id=ns=3;s=a,b]"]["value"] == 7.0
+        assert data["missing"] == []
+
+    def test_since_and_history_params(self, client):
+        client.post("/api/values/ingest", json=_modbus(1_700_000_000, A=1))
+        seq = client.get("/api/values").get_json()["seq"]
+        client.post("/api/values/ingest", json=_modbus(1_700_000_001, A=2))
+        data = client.get(f"/api/values?since={seq}&history=1").get_json()
+        assert data["values"]["modbus:A[slave_id=1]"]["history"] == [
+            [1_700_000_000, 1],
+            [1_700_000_001, 2],
+        ]
+
+    def test_malformed_ingest(self, client):
+        assert client.post("/api/values/ingest", data="nope").status_code == 400
+
+    def test_thousands_of_tags(self, client):
+        fields = {f"Tag{i:05d}": float(i) for i in range(5000)}
+        client.post("/api/values/ingest", json=_modbus(1_700_000_000, **fields))
+        data = client.get("/api/values").get_json()
+        assert len(data["values"]) == 5000
+        assert data["values"]["modbus:Tag04999[slave_id=1]"]["value"] == 4999.0